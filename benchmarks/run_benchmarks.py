@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks of the database tooling
+
+Generates a synthetic database (synthetic_data.py) at a multiple of the
+current size, times the loader, every phase of the validator, the manifest
+hash and the file count, and compares the timings with the baselines stored
+in benchmarks/baselines.json. A benchmark regresses when it is slower than
+its baseline by more than the threshold (relative, plus a small absolute
+allowance for very short timings).
+
+Baselines are machine specific; record them on the machine that runs the
+comparison with --update-baseline, which stores the machine's name with
+them. Only a baseline recorded on this machine can fail the run; against any
+other baseline regressions are advisory. A baseline recorded with other
+schemas (stand-in vs OpenPrintTag) is not compared at all. The committed
+baselines.json only holds local stand-in numbers (one development machine,
+the stand-in schemas, scales 0.1 and 1 only, see their `note`), so they are
+never more than advisory, and no reference for scales 10 and 100.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scale 1] [--repeat 1] [--threshold 0.25]
+    python benchmarks/run_benchmarks.py --scale 10 --data-dir /tmp/bench-10x
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from synthetic_data import generate_database, prepare_reference_data
+
+from lib import DatabaseLoader
+from profiling import Profiler
+from update_manifest import compute_data_hash
+from update_stats import count_yaml_files
+from validate_json_schema import JsonSchemaValidator
+
+
+BASELINES_FILE = Path(__file__).parent / 'baselines.json'
+DEFAULT_THRESHOLD = 0.25
+# Timings below this many seconds of difference are treated as noise
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def _timed(func: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        func()
+    return time.perf_counter() - started
+
+
+def run_benchmarks(base_path: Path, repeat: int = 1) -> Dict[str, Any]:
+    """Time each benchmark on the database at base_path
+
+    Returns:
+        Dict with the best time of `repeat` runs per benchmark in seconds
+        ('timings') and the number of validation errors ('validation_errors').
+    """
+    data_dir = base_path / 'data'
+    timings: Dict[str, float] = {}
+    validation_errors = 0
+
+    def record(name: str, seconds: float) -> None:
+        timings[name] = round(min(seconds, timings.get(name, seconds)), 4)
+
+    for _ in range(repeat):
+        record('count_yaml_files', _timed(lambda: count_yaml_files(data_dir)))
+        record('compute_data_hash', _timed(lambda: compute_data_hash(data_dir)))
+        record('load_all_entities', _timed(DatabaseLoader(base_path).load_all_entities))
+
+        # The validator's own phases, as reported by its profiler
+        profiler = Profiler(script='run_benchmarks')
+        validator = JsonSchemaValidator(base_path, profiler)
+        _timed(validator.validate)
+        phases = profiler.report()['phases']
+        for phase in phases:
+            record(f"validate.{phase['name']}", phase['wall_s'])
+        record('validate.total', sum(phase['wall_s'] for phase in phases))
+        validation_errors = validator.errors.total('error')
+
+    return {'timings': timings, 'validation_errors': validation_errors}
+
+
+def compare(timings: Dict[str, float], baseline: Dict[str, float],
+            threshold: float = DEFAULT_THRESHOLD) -> list[Dict[str, Any]]:
+    """Compare timings with a baseline
+
+    Returns:
+        One row per benchmark with its baseline, current time, ratio and
+        whether it regressed; benchmarks without a baseline never regress.
+    """
+    rows = []
+    for name, seconds in timings.items():
+        base = baseline.get(name)
+        regressed = (base is not None and seconds > base * (1 + threshold)
+                     and seconds - base > MIN_REGRESSION_SECONDS)
+        rows.append({
+            'name': name,
+            'baseline': base,
+            'seconds': seconds,
+            'ratio': round(seconds / base, 3) if base else None,
+            'regressed': regressed,
+        })
+    return rows
+
+
+def usable_baseline(stored: Dict[str, Any], schemas: str,
+                    machine: str) -> tuple[Dict[str, float], bool, Optional[str]]:
+    """Timings of a stored baseline to compare with
+
+    Returns:
+        The timings (empty when the baseline ran with other schemas), whether
+        a regression fails the run (only for baselines recorded on this
+        machine) and a notice explaining why not.
+    """
+    if not stored:
+        return {}, False, None
+    if stored.get('schemas') != schemas:
+        return {}, False, (f"recorded with the {stored.get('schemas')} schemas, this run used the "
+                           f"{schemas} schemas; not compared")
+    if stored.get('machine') != machine:
+        return stored.get('timings', {}), False, "recorded on another machine; regressions are advisory"
+    return stored.get('timings', {}), True, None
+
+
+def load_baselines(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def scale_key(scale: float) -> str:
+    return f"{scale:g}x"
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error or regression.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the database tooling on synthetic data.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiple of the current database size (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark, best is kept (default: 1).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed relative slowdown (default: {DEFAULT_THRESHOLD}).")
+    parser.add_argument("--data-dir", metavar="DIR",
+                        help="Keep the generated database here and reuse it on later runs "
+                             "(default: a temporary directory).")
+    parser.add_argument("--baselines", default=str(BASELINES_FILE), metavar="FILE",
+                        help="Baselines file (default: benchmarks/baselines.json).")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store the timings as the baseline for this scale.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    base_path = Path(args.data_dir) if args.data_dir else Path(tempfile.mkdtemp(prefix='material-db-bench-'))
+    try:
+        started = time.perf_counter()
+        if not (base_path / 'data').exists():
+            generate_database(base_path, args.scale, args.seed)
+        if not (base_path / 'openprinttag').exists():
+            prepare_reference_data(base_path, repo_root)
+        generate_seconds = time.perf_counter() - started
+        result = run_benchmarks(base_path, args.repeat)
+        files = count_yaml_files(base_path / 'data')
+        real_schemas = (base_path / 'openprinttag').is_symlink()
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+    baselines_path = Path(args.baselines)
+    baselines = load_baselines(baselines_path)
+    key = scale_key(args.scale)
+    stored = baselines.get(key, {})
+    schemas = 'openprinttag' if real_schemas else 'stand-in'
+    machine = platform.node()
+    timings, gating, notice = usable_baseline(stored, schemas, machine)
+    rows = compare(result['timings'], timings, args.threshold)
+    report = {
+        'scale': args.scale,
+        'files': files,
+        'schemas': schemas,
+        'python': platform.python_version(),
+        'machine': machine,
+        'generate_seconds': round(generate_seconds, 2),
+        'validation_errors': result['validation_errors'],
+        'baseline_note': stored.get('note'),
+        'baseline_notice': notice,
+        'benchmarks': rows,
+    }
+
+    if args.update_baseline:
+        baselines[key] = {
+            'files': files,
+            'schemas': report['schemas'],
+            'python': report['python'],
+            'machine': machine,
+            'timings': result['timings'],
+        }
+        baselines_path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+    regressions = [row for row in rows if row['regressed']]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Scale {key}: {files:,} files ({report['schemas']} schemas, Python {report['python']}, "
+              f"generated in {report['generate_seconds']}s)")
+        if report['baseline_note']:
+            print(f"Baseline: {report['baseline_note']}")
+        if notice:
+            print(f"Baseline {notice}")
+        print(f"\n{'Benchmark':<36} {'Baseline':>10} {'Current':>10} {'Ratio':>7}")
+        for row in rows:
+            baseline = f"{row['baseline']:.3f}s" if row['baseline'] is not None else '-'
+            ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else '-'
+            flag = ('  ✗ REGRESSION' if gating else '  ⚠ slower') if row['regressed'] else ''
+            print(f"{row['name']:<36} {baseline:>10} {row['seconds']:>9.3f}s {ratio:>7}{flag}")
+        if args.update_baseline:
+            print(f"\n✓ Baseline for {key} written to {baselines_path}")
+        elif regressions and gating:
+            print(f"\n✗ {len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+        elif regressions:
+            print(f"\n⚠ {len(regressions)} benchmarks slower than the baseline by more than "
+                  f"{args.threshold:.0%} (advisory)")
+        elif not timings:
+            print("\n✓ No baseline compared")
+        else:
+            print("\n✓ No regressions")
+
+    if result['validation_errors']:
+        print(f"Error: the synthetic database has {result['validation_errors']} validation errors",
+              file=sys.stderr)
+        return 1
+    return 1 if regressions and gating and not args.update_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
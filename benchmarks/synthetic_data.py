@@ -0,0 +1,202 @@
+"""
+Deterministic synthetic material database generator
+
+Writes brands, materials, packages and containers shaped like the real data
+(derived UUIDs, valid foreign keys, unique GTINs with check digits) at a
+multiple of the current database size. The same scale and seed always
+produce byte-identical files.
+
+The validator also needs the OpenPrintTag schemas and reference data. When
+they have been fetched (make fetch-schemas) they are linked into the
+generated tree, otherwise permissive stand-in schemas and minimal reference
+data are written so the validation phases can still be timed.
+"""
+
+import json
+import random
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict
+
+import yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from lib import slugify
+from uuid_utils import generate_brand_uuid, generate_material_package_uuid, generate_material_uuid
+from validate_json_schema import JsonSchemaValidator
+
+
+# Entity counts of the database at scale 1 (~23.7k files)
+BASE_COUNTS = {
+    'brands': 128,
+    'materials': 14147,
+    'material_packages': 9387,
+    'material_containers': 88,
+}
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+MATERIAL_TYPES = {
+    'PLA': (1.24, 190, 230, 50, 65),
+    'PETG': (1.27, 230, 250, 70, 90),
+    'ABS': (1.04, 240, 260, 90, 110),
+    'ASA': (1.07, 240, 270, 90, 110),
+    'TPU': (1.21, 210, 240, 40, 60),
+    'PC': (1.20, 260, 300, 100, 120),
+    'PA': (1.14, 250, 290, 80, 100),
+}
+FINISHES = ['', 'Silk', 'Matte', 'Galaxy', 'Pro', 'HS', 'Marble', 'Glow', 'Pastel', 'Metallic']
+COLORS = {
+    'Black': '#1a1a1aff', 'White': '#f5f5f5ff', 'Red': '#c0392bff', 'Blue': '#2e86c1ff',
+    'Green': '#28b463ff', 'Yellow': '#f4d03fff', 'Orange': '#e67e22ff', 'Purple': '#8e44adff',
+    'Grey': '#7f8c8dff', 'Pink': '#f1948aff', 'Brown': '#6e2c00ff', 'Gold': '#d4ac0dff',
+    'Silver': '#bdc3c7ff', 'Teal': '#17a589ff', 'Navy': '#1b2631ff', 'Beige': '#e8d8b8ff',
+}
+COUNTRIES = ['CZ', 'DE', 'PL', 'US', 'CN', 'NL', 'ES', 'IT', 'FR', 'GB']
+WEIGHTS = [250, 500, 750, 800, 1000, 2000, 3000]
+BRAND_SYLLABLES = ['ax', 'bel', 'cor', 'dex', 'fil', 'gra', 'lum', 'mak', 'nov', 'pri', 'tex', 'vol', 'zen']
+
+
+def gtin_check_digit(digits: str) -> int:
+    """GS1 check digit of a GTIN without its last digit"""
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return (10 - total % 10) % 10
+
+
+def scaled_counts(scale: float) -> Dict[str, int]:
+    """Entity counts at a multiple of the current database size (at least one of each)"""
+    return {entity: max(1, round(count * scale)) for entity, count in BASE_COUNTS.items()}
+
+
+def _write(path: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.dump(data, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False), encoding='utf-8')
+
+
+def generate_database(base_path: Path, scale: float = 1.0, seed: int = 0) -> Dict[str, int]:
+    """Write a synthetic database into base_path/data
+
+    Args:
+        base_path: Root of the generated tree (the data directory must not exist yet).
+        scale: Multiple of the current database size.
+        seed: Random seed.
+
+    Returns:
+        Number of generated entities per entity type.
+    """
+    counts = scaled_counts(scale)
+    rng = random.Random(seed)
+    data_dir = base_path / 'data'
+    if data_dir.exists():
+        raise FileExistsError(f"{data_dir} already exists")
+
+    brands = []
+    for i in range(counts['brands']):
+        name = ''.join(rng.choice(BRAND_SYLLABLES) for _ in range(2)).capitalize() + f" {i:04d}"
+        brand = {
+            'uuid': str(generate_brand_uuid(name)),
+            'slug': slugify(name),
+            'name': name,
+            'countries_of_origin': [rng.choice(COUNTRIES)],
+        }
+        # Each brand names its own product lines and has its own range of finishes and colors
+        lines = [''.join(rng.choice(BRAND_SYLLABLES) for _ in range(3)).capitalize() for _ in range(3)]
+        finishes = rng.sample(FINISHES, len(FINISHES))
+        colors = rng.sample(list(COLORS), len(COLORS))
+        brands.append((brand, lines, finishes, colors))
+        _write(data_dir / 'brands' / f"{brand['slug']}.yaml", brand)
+
+    containers = []
+    for i in range(counts['material_containers']):
+        weight = WEIGHTS[i % len(WEIGHTS)]
+        container = {
+            'uuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'slug': f"spool-{weight}g-{i:04d}",
+            'name': f"Spool {weight}g #{i}",
+            'class': 'FFF',
+        }
+        containers.append(container)
+        _write(data_dir / 'material-containers' / f"{container['slug']}.yaml", container)
+
+    materials = []
+    variants_per_brand = 3 * len(MATERIAL_TYPES) * len(FINISHES) * len(COLORS)
+    for i in range(counts['materials']):
+        brand, lines, finishes, colors = brands[i % len(brands)]
+        series, variant = divmod(i // len(brands), variants_per_brand)
+        variant, material_type = divmod(variant, len(MATERIAL_TYPES))
+        variant, color = divmod(variant, len(COLORS))
+        line, finish = divmod(variant, len(FINISHES))
+        material_type, finish, color = list(MATERIAL_TYPES)[material_type], finishes[finish], colors[color]
+        name = ' '.join(part for part in (lines[line], material_type, finish, color) if part)
+        if series:
+            name += f" S{series}"
+        density, min_temp, max_temp, min_bed, max_bed = MATERIAL_TYPES[material_type]
+        material = {
+            'uuid': str(generate_material_uuid(uuid.UUID(brand['uuid']), name)),
+            'slug': f"{brand['slug']}-{slugify(name)}",
+            'brand': {'slug': brand['slug']},
+            'name': name,
+            'class': 'FFF',
+            'type': material_type,
+            'abbreviation': material_type,
+            'primary_color': {'color_rgba': COLORS[color]},
+            'properties': {
+                'density': round(density + rng.uniform(-0.03, 0.03), 2),
+                'min_print_temperature': min_temp + rng.choice((-10, 0, 5)),
+                'max_print_temperature': max_temp + rng.choice((0, 5, 10)),
+                'min_bed_temperature': min_bed,
+                'max_bed_temperature': max_bed,
+            },
+        }
+        materials.append((brand, material))
+        _write(data_dir / 'materials' / brand['slug'] / f"{material['slug']}.yaml", material)
+
+    for i in range(counts['material_packages']):
+        brand, material = materials[(i * 7919) % len(materials)]
+        weight = rng.choice(WEIGHTS)
+        body = f"2{i:011d}"
+        gtin = int(body + str(gtin_check_digit(body)))
+        package = {
+            'uuid': str(generate_material_package_uuid(uuid.UUID(brand['uuid']), gtin)),
+            'slug': f"{material['slug']}-{weight}g-{i:07d}",
+            'class': 'FFF',
+            'material': {'slug': material['slug']},
+            'nominal_netto_full_weight': weight,
+            'gtin': gtin,
+            'filament_diameter': 1750,
+        }
+        if rng.random() < 0.6:
+            package['container'] = {'slug': rng.choice(containers)['slug']}
+        _write(data_dir / 'material-packages' / brand['slug'] / f"{package['slug']}.yaml", package)
+
+    return counts
+
+
+def prepare_reference_data(base_path: Path, repo_root: Path) -> bool:
+    """Provide schemas and reference data for the validator in base_path/openprinttag
+
+    Returns:
+        True if the fetched OpenPrintTag schemas are used, False for stand-ins.
+    """
+    target = base_path / 'openprinttag'
+    source = repo_root / 'openprinttag'
+    if (source / 'schema').is_dir():
+        target.symlink_to(source.resolve(), target_is_directory=True)
+        return True
+
+    (target / 'schema').mkdir(parents=True)
+    for schema_filename in JsonSchemaValidator.ENTITY_SCHEMA_MAPPING.values():
+        (target / 'schema' / schema_filename).write_text(json.dumps({
+            '$schema': 'https://json-schema.org/draft/2020-12/schema', 'type': 'object',
+            'required': ['slug'],
+        }), encoding='utf-8')
+    reference_data = {
+        'fff_material_types.yaml': [{'key': t.lower(), 'abbreviation': t, 'name': t} for t in MATERIAL_TYPES],
+        'countries.yaml': [{'code': code} for code in COUNTRIES],
+        'material_certifications.yaml': [],
+    }
+    (target / 'data').mkdir()
+    for filename, data in reference_data.items():
+        (target / 'data' / filename).write_text(yaml.dump(data, Dumper=YAML_DUMPER), encoding='utf-8')
+    return False
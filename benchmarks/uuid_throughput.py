@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Throughput of UUID derivation: per-entity calls vs. batches
+
+Derives material UUIDs for synthetic (brand UUID, name) pairs with
+uuid.uuid5, with generate_material_uuid once per entity, and with
+generate_material_uuids in one batch (as UUID objects, as integers and as
+integers split across worker processes), checks that all of them agree and
+reports entities per second.
+
+Usage:
+    python benchmarks/uuid_throughput.py [--count 1000000] [--processes 4] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from uuid_utils import NAMESPACE_MATERIAL, generate_brand_uuid, generate_material_uuid, generate_material_uuids
+
+
+def synthetic_materials(count: int, brands: int = 500) -> List[tuple[uuid.UUID, str]]:
+    brand_uuids = [generate_brand_uuid(f"Brand {i}") for i in range(brands)]
+    return [(brand_uuids[i % brands], f"PLA Color {i} Edition {i % 97}") for i in range(count)]
+
+
+def run(materials: List[tuple[uuid.UUID, str]], processes: int) -> Dict[str, Dict[str, Any]]:
+    namespace = uuid.UUID(NAMESPACE_MATERIAL)
+    methods: Dict[str, Callable[[], List[uuid.UUID]]] = {
+        'uuid.uuid5': lambda: [uuid.uuid5(namespace, brand.bytes + name.encode("utf-8"))
+                               for brand, name in materials],
+        'generate_material_uuid': lambda: [generate_material_uuid(brand, name) for brand, name in materials],
+        'generate_material_uuids': lambda: generate_material_uuids(materials),
+    }
+    as_ints = {'generate_material_uuids (as_ints)': lambda: generate_material_uuids(materials, as_ints=True)}
+    if processes > 1:
+        as_ints[f'generate_material_uuids (as_ints, {processes} processes)'] = \
+            lambda: generate_material_uuids(materials, processes=processes, as_ints=True)
+    methods.update(as_ints)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    reference = None
+    for name, method in methods.items():
+        started = time.perf_counter()
+        uuids = method()
+        seconds = time.perf_counter() - started
+        if name in as_ints:
+            uuids = [uuid.UUID(int=value) for value in uuids]
+        if reference is None:
+            reference = uuids
+        elif uuids != reference:
+            raise AssertionError(f"{name} differs from uuid.uuid5")
+        results[name] = {'seconds': round(seconds, 3), 'per_second': round(len(materials) / seconds)}
+    return results
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 if the methods disagree.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark batched UUID derivation.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Entities to derive (default: 1000000).")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for the parallel batch (default: CPU count).")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    materials = synthetic_materials(args.count)
+    try:
+        results = run(materials, args.processes)
+    except AssertionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'Method':<52} {'Seconds':>9} {'UUIDs/s':>11}")
+    for name, result in results.items():
+        print(f"{name:<52} {result['seconds']:>9.3f} {result['per_second']:>11,}")
+    print(f"\n✓ All methods derived the same {len(materials):,} UUIDs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
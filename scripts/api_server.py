@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP API over the material database
+
+Loads the database once into an in-memory index (by slug, UUID, GTIN and
+brand plus the full-text search index) and serves it with asyncio:
+
+    GET /health
+    GET /brands
+    GET /brands/<slug or uuid>
+    GET /brands/<slug>/materials | /packages | /containers
+    GET /materials/<slug or uuid>
+    GET /packages/<slug or uuid>
+    GET /containers/<slug or uuid>
+    GET /uuid/<uuid>                 any entity
+    GET /gtin/<gtin>                 packages with material, container and brand
+    GET /search?q=<text>[&limit=20][&entity=materials]
+
+Every response carries an ETag derived from the content of the data files
+(compute_data_hash, the hash data/manifest.yaml records, computed again
+because the manifest may be stale), so clients can revalidate with
+If-None-Match and replicas serving the same data agree on it.
+
+The server polls a cheap stat fingerprint of the data directory and, when it
+changed, builds a new index in a worker thread and swaps it in with a single
+reference assignment.
+Requests in flight keep using the snapshot they started with.
+
+Usage:
+    python scripts/api_server.py [--host 127.0.0.1] [--port 8080] [--reload-interval 5]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from gtin_table import parse_gtin
+from lib import DatabaseLoader, load_manifest_hash
+from search_index import SearchIndex
+from update_manifest import compute_data_hash
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_RELOAD_INTERVAL = 5.0
+MAX_HEADER_SIZE = 16 * 1024
+MAX_SEARCH_LIMIT = 100
+RESPONSE_CACHE_SIZE = 4096
+
+# URL segment -> DatabaseLoader entity name
+ENTITY_ROUTES = {
+    'brands': 'brands',
+    'materials': 'materials',
+    'packages': 'material_packages',
+    'containers': 'material_containers',
+}
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+def _slug_ref(data: Dict[str, Any], field: str) -> Optional[str]:
+    ref = data.get(field)
+    return ref.get('slug') if isinstance(ref, dict) else None
+
+
+def data_fingerprint(base_path: Path) -> str:
+    """Cheap fingerprint of the data directory (paths, sizes and mtimes of all files)"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(base_path / 'data'):
+        dirs.sort()
+        for name in sorted(files):
+            st = os.stat(os.path.join(root, name))
+            digest.update(f"{root}/{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class DatabaseIndex:
+    """Immutable in-memory snapshot of the database with lookup indexes"""
+
+    def __init__(self, data_cache: Dict[str, Dict[str, Any]], data_hash: str = '', content_hash: str = '',
+                 fingerprint: str = ''):
+        self.entities = data_cache
+        self.data_hash = data_hash
+        # data_fingerprint() taken before loading, only used to detect changes
+        self.fingerprint = fingerprint
+        self.etag = f'"{content_hash[:32]}"' if content_hash else None
+
+        materials = data_cache.get('materials', {})
+        self.by_uuid: Dict[str, tuple[str, Dict[str, Any]]] = {}
+        self.by_gtin: Dict[int, list[Dict[str, Any]]] = {}
+        # brand slug -> entity name -> entities of that brand
+        self.by_brand: Dict[str, Dict[str, list[Dict[str, Any]]]] = {}
+
+        for entity_name, entities in data_cache.items():
+            for slug, data in sorted(entities.items()):
+                if data.get('uuid'):
+                    self.by_uuid.setdefault(str(data['uuid']).lower(), (entity_name, data))
+                if entity_name == 'brands':
+                    continue
+                if entity_name == 'material_packages':
+                    material = materials.get(_slug_ref(data, 'material'))
+                    brand_slug = material and _slug_ref(material, 'brand')
+                    gtin = parse_gtin(data.get('gtin'))
+                    if gtin is not None:
+                        self.by_gtin.setdefault(gtin, []).append(data)
+                else:
+                    brand_slug = _slug_ref(data, 'brand')
+                if brand_slug:
+                    self.by_brand.setdefault(brand_slug, {}).setdefault(entity_name, []).append(data)
+
+        self.search_index = SearchIndex.from_entities(data_cache)
+        # request target -> (status, body); valid for the lifetime of this snapshot
+        self.responses: OrderedDict[str, tuple[int, bytes]] = OrderedDict()
+
+    @classmethod
+    def load(cls, base_path: Path, fingerprint: Optional[str] = None) -> 'DatabaseIndex':
+        """Load the database below base_path
+
+        Args:
+            fingerprint: data_fingerprint() of base_path if the caller already
+                took it, before the data is read.
+        """
+        if fingerprint is None:
+            fingerprint = data_fingerprint(base_path)
+        # Hashed before loading: a change in between is picked up by the next
+        # poll, which then also changes the ETag
+        content_hash = compute_data_hash(base_path / 'data')
+        loader = DatabaseLoader(base_path)
+        if not loader.load_schema():
+            raise ValueError(loader.errors[0])
+        return cls(loader.load_all_entities(), load_manifest_hash(base_path), content_hash, fingerprint)
+
+    def get(self, entity_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Get an entity by slug or UUID"""
+        data = self.entities.get(entity_name, {}).get(key)
+        if data is None:
+            match = self.by_uuid.get(key.lower())
+            if match is not None and match[0] == entity_name:
+                data = match[1]
+        return data
+
+    def gtin_records(self, gtin: int) -> list[Dict[str, Any]]:
+        """Get the packages with a GTIN together with their material, container and brand"""
+        materials = self.entities.get('materials', {})
+        records = []
+        for package in self.by_gtin.get(gtin, ()):
+            material = materials.get(_slug_ref(package, 'material'))
+            records.append({
+                'package': package,
+                'material': material,
+                'container': self.entities.get('material_containers', {}).get(_slug_ref(package, 'container')),
+                'brand': self.entities.get('brands', {}).get(material and _slug_ref(material, 'brand')),
+            })
+        return records
+
+
+class ApiServer:
+    """asyncio HTTP/1.1 server answering read-only queries from a DatabaseIndex"""
+
+    def __init__(self, base_path: Path, index: Optional[DatabaseIndex] = None,
+                 reload_interval: float = DEFAULT_RELOAD_INTERVAL):
+        self.base_path = base_path
+        self.reload_interval = reload_interval
+        self.index = index if index is not None else DatabaseIndex.load(base_path)
+        self._fingerprint = self.index.fingerprint or data_fingerprint(base_path)
+        self.reloads = 0
+
+    async def reload_if_changed(self) -> bool:
+        """Rebuild the index if the data directory changed
+
+        Returns:
+            True if a new index was swapped in.
+        """
+        fingerprint = await asyncio.to_thread(data_fingerprint, self.base_path)
+        if fingerprint == self._fingerprint:
+            return False
+        index = await asyncio.to_thread(DatabaseIndex.load, self.base_path, fingerprint)
+        # Single reference assignment: requests see either the old or the new index
+        self.index = index
+        self._fingerprint = fingerprint
+        self.reloads += 1
+        return True
+
+    async def watch(self) -> None:
+        """Poll the data directory and hot-swap the index when it changes"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if await self.reload_if_changed():
+                    print(f"✓ Reloaded database (data_hash {self.index.data_hash[:16]})", flush=True)
+            except Exception as e:  # keep serving the previous snapshot
+                print(f"✗ Reload failed: {e}", file=sys.stderr, flush=True)
+
+    def route(self, index: DatabaseIndex, path: str, query: Dict[str, list[str]]) -> tuple[int, Any]:
+        """Resolve a request path to (status, JSON body)"""
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        if parts == ['health']:
+            return 200, {
+                'status': 'ok',
+                'data_hash': index.data_hash,
+                'counts': {name: len(entities) for name, entities in index.entities.items()},
+            }
+
+        if parts == ['search']:
+            text = query.get('q', [''])[0]
+            try:
+                limit = min(int(query.get('limit', ['20'])[0]), MAX_SEARCH_LIMIT)
+            except ValueError:
+                return 400, {'error': 'limit must be an integer'}
+            entity = query.get('entity', [None])[0]
+            entity = ENTITY_ROUTES.get(entity, entity)
+            results = index.search_index.search(text, limit=limit, entity=entity)
+            return 200, {'query': text, 'results': [
+                {'entity': r.entity, 'slug': r.slug, 'title': r.title, 'score': round(r.score, 4)}
+                for r in results
+            ]}
+
+        if len(parts) == 2 and parts[0] == 'uuid':
+            match = index.by_uuid.get(parts[1].lower())
+            if match is None:
+                return 404, {'error': f"UUID {parts[1]} not found"}
+            return 200, {'entity': match[0], 'data': match[1]}
+
+        if len(parts) == 2 and parts[0] == 'gtin':
+            gtin = parse_gtin(parts[1])
+            records = index.gtin_records(gtin) if gtin is not None else []
+            if not records:
+                return 404, {'error': f"GTIN {parts[1]} not found"}
+            return 200, {'gtin': gtin, 'packages': records}
+
+        entity_name = ENTITY_ROUTES.get(parts[0]) if parts else None
+        if entity_name is None:
+            return 404, {'error': 'Not found'}
+
+        if len(parts) == 1:
+            if entity_name != 'brands':
+                return 404, {'error': f"List {parts[0]} by brand: /brands/<slug>/{parts[0]}"}
+            return 200, [
+                {'uuid': b.get('uuid'), 'slug': slug, 'name': b.get('name')}
+                for slug, b in sorted(index.entities.get('brands', {}).items())
+            ]
+
+        data = index.get(entity_name, parts[1])
+        if data is None:
+            return 404, {'error': f"{parts[0]} {parts[1]} not found"}
+        if len(parts) == 2:
+            return 200, data
+
+        if entity_name == 'brands' and len(parts) == 3 and parts[2] in ENTITY_ROUTES and parts[2] != 'brands':
+            items = index.by_brand.get(data.get('slug'), {}).get(ENTITY_ROUTES[parts[2]], [])
+            return 200, items
+        return 404, {'error': 'Not found'}
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> tuple[int, Dict[str, str], bytes]:
+        """Build the (status, headers, body) of a response"""
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, b'{"error":"Method not allowed"}'
+
+        # Take one snapshot for the whole request
+        index = self.index
+        extra_headers = {'Cache-Control': 'no-cache'}
+        if index.etag:
+            extra_headers['ETag'] = index.etag
+
+        cached = index.responses.get(target)
+        if cached is not None:
+            index.responses.move_to_end(target)
+            status, content = cached
+        else:
+            url = urlsplit(target)
+            try:
+                status, body = self.route(index, url.path, parse_qs(url.query))
+            except Exception as e:
+                return 500, extra_headers, json.dumps({'error': str(e)}).encode('utf-8')
+            content = json.dumps(body, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+            index.responses[target] = (status, content)
+            if len(index.responses) > RESPONSE_CACHE_SIZE:
+                index.responses.popitem(last=False)
+
+        # Only a resolved resource can be unchanged; errors are always sent in full
+        if status == 200 and index.etag and \
+                index.etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, extra_headers, b''
+        return status, extra_headers, content
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests of one (keep-alive) connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, {}, b'', keep_alive=False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._send(writer, 400, {}, b'{"error":"Bad request"}', keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                # Requests are read-only, discard any body
+                length = int(headers.get('content-length', '0') or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                status, response_headers, body = self.respond(method, target, headers)
+                await self._send(writer, status, response_headers, b'' if method == 'HEAD' else body,
+                                 keep_alive, content_length=len(body))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str], body: bytes,
+                    keep_alive: bool = True, content_length: Optional[int] = None) -> None:
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        if status != 304:
+            lines.append('Content-Type: application/json; charset=utf-8')
+            lines.append(f"Content-Length: {len(body) if content_length is None else content_length}")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Serve forever"""
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_SIZE)
+        watcher = asyncio.create_task(self.watch()) if self.reload_interval > 0 else None
+        print(f"✓ Serving on http://{host}:{port} (data_hash {self.index.data_hash[:16]})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Serve the material database as a read-only HTTP API.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to bind (default: {DEFAULT_PORT}).")
+    parser.add_argument("--reload-interval", type=float, default=DEFAULT_RELOAD_INTERVAL, metavar="SECONDS",
+                        help=f"How often to check the data directory for changes, 0 to disable "
+                             f"(default: {DEFAULT_RELOAD_INTERVAL}).")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    started = time.perf_counter()
+    try:
+        index = DatabaseIndex.load(repo_root)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"✓ Loaded database in {time.perf_counter() - started:.1f}s", flush=True)
+
+    server = ApiServer(repo_root, index, args.reload_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
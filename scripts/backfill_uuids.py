@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Backfill missing UUIDs of material packages
+
+Packages without a `uuid` (or with an empty one) get one according to the
+UUID specification: derived from the brand UUID and the GTIN when the
+package has a GTIN, a random UUIDv4 otherwise. The brand is resolved through
+the package's material; the brand UUID is the one stored in the brand file,
+or derived from the brand name if the file has none.
+
+Files are edited minimally: a `uuid:` line is inserted before the first key
+(or replaces an empty `uuid:` line), everything else is kept byte for byte.
+Every edited file is parsed again and must hold exactly the original data
+plus the new UUID before it is written, via an atomic rename, from a pool of
+worker threads. Packages that already have a UUID are never touched, so
+running the backfill again changes nothing.
+
+--check writes nothing and fails if a package has no UUID or a UUID that
+does not match its brand and GTIN.
+
+Usage:
+    python scripts/backfill_uuids.py [--dry-run] [--workers N]
+    python scripts/backfill_uuids.py --check
+"""
+
+import argparse
+import os
+import re
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from lib import DatabaseLoader, parse_yaml, write_atomic
+from uuid_utils import generate_brand_uuid, generate_material_package_uuids, parse_uuid
+
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# A `uuid:` line without a value (empty, null or an empty string)
+_EMPTY_UUID_LINE = re.compile(rb"^uuid:[ \t]*(?:(?:null|~|''|\"\")[ \t]*)?(?:#[^\r\n]*)?(?=\r?\n|\Z)", re.M)
+# Lines before the first key: blank lines, comments, directives and the document start
+_PREAMBLE_LINE = re.compile(rb"(?:[ \t]*(?:#[^\r\n]*)?|%[^\r\n]*|---[ \t]*)\r?\n")
+
+
+def _reference(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get('slug')
+    return value if isinstance(value, str) and value else None
+
+
+def insert_uuid(content: bytes, value: str) -> bytes:
+    """The file content with `uuid: <value>` set, changing nothing else
+
+    An empty `uuid:` line is filled in, otherwise the line is inserted
+    before the first key, using the file's line endings.
+    """
+    newline = b'\r\n' if b'\r\n' in content else b'\n'
+    line = f"uuid: {value}".encode('ascii')
+    match = _EMPTY_UUID_LINE.search(content)
+    if match:
+        return content[:match.start()] + line + content[match.end():]
+    position = 0
+    while True:
+        preamble = _PREAMBLE_LINE.match(content, position)
+        if not preamble:
+            break
+        position = preamble.end()
+    return content[:position] + line + newline + content[position:]
+
+
+def _load_file(path: Path) -> Tuple[Path, Optional[bytes], Any]:
+    try:
+        content = path.read_bytes()
+    except OSError:
+        return path, None, None
+    return path, content, parse_yaml(content)
+
+
+class UuidBackfill:
+    """Finds packages without a UUID and writes the derived or random one"""
+
+    def __init__(self, base_path: Path, workers: int = DEFAULT_WORKERS, dry_run: bool = False):
+        self.base_path = base_path
+        self.workers = max(workers, 1)
+        self.dry_run = dry_run
+        self.stats = {'written': 0, 'derived': 0, 'random': 0, 'present': 0, 'failed': 0}
+        self.errors: List[str] = []
+        # brand slug -> brand UUID
+        self.brand_uuids: Dict[str, Optional[uuid.UUID]] = {}
+        # material slug -> brand slug
+        self.material_brands: Dict[str, Optional[str]] = {}
+
+    def entity_files(self, entity_name: str) -> List[Path]:
+        loader = DatabaseLoader(self.base_path)
+        entity_def = DatabaseLoader.ENTITIES[entity_name]
+        return sorted(path for directory in loader.get_search_dirs(entity_def) if directory.exists()
+                      for path in directory.glob('*.yaml'))
+
+    def load_files(self, executor: ThreadPoolExecutor, entity_name: str) -> List[Tuple[Path, Optional[bytes], Any]]:
+        return list(executor.map(_load_file, self.entity_files(entity_name)))
+
+    def load_references(self, executor: ThreadPoolExecutor) -> None:
+        """Collect brand UUIDs and the brand of every material"""
+        for _, _, data in self.load_files(executor, 'brands'):
+            if isinstance(data, dict) and data.get('slug'):
+                brand_uuid = parse_uuid(data.get('uuid'))
+                if brand_uuid is None and isinstance(data.get('name'), str):
+                    brand_uuid = generate_brand_uuid(data['name'])
+                self.brand_uuids[data['slug']] = brand_uuid
+        for _, _, data in self.load_files(executor, 'materials'):
+            if isinstance(data, dict) and data.get('slug'):
+                self.material_brands[data['slug']] = _reference(data.get('brand'))
+
+    def package_brand_uuid(self, data: Dict[str, Any]) -> Optional[uuid.UUID]:
+        """UUID of the package's brand, resolved through its material"""
+        brand_slug = self.material_brands.get(_reference(data.get('material'))) or _reference(data.get('brand'))
+        return self.brand_uuids.get(brand_slug)
+
+    def derive(self, packages: List[Tuple[Path, bytes, Dict[str, Any]]]) -> List[Tuple[Path, bytes, Dict, str]]:
+        """Attach the new UUID to every package; packages whose brand cannot be resolved fail"""
+        derivable = []
+        result = []
+        for path, content, data in packages:
+            gtin = data.get('gtin')
+            if gtin is None:
+                result.append((path, content, data, str(uuid.uuid4())))
+                continue
+            brand_uuid = self.package_brand_uuid(data)
+            if brand_uuid is None:
+                self.fail(path, f"cannot resolve the brand of material {_reference(data.get('material'))!r}")
+                continue
+            derivable.append((path, content, data, brand_uuid, gtin))
+        derived = generate_material_package_uuids([(brand_uuid, gtin) for *_, brand_uuid, gtin in derivable])
+        result.extend((path, content, data, str(value))
+                      for (path, content, data, _, _), value in zip(derivable, derived))
+        return result
+
+    def fail(self, path: Path, message: str) -> None:
+        self.stats['failed'] += 1
+        self.errors.append(f"{path.relative_to(self.base_path)}: {message}")
+
+    def write(self, path: Path, content: bytes, data: Dict[str, Any], value: str) -> Optional[str]:
+        """Insert the UUID into a file; returns an error message or None"""
+        new_content = insert_uuid(content, value)
+        if parse_yaml(new_content) != {**data, 'uuid': value}:
+            return "the edited file does not parse to the original data plus the UUID"
+        if not self.dry_run:
+            try:
+                write_atomic(path, new_content)
+            except OSError as e:
+                return str(e)
+        return None
+
+    def run(self) -> bool:
+        """Backfill every package without a UUID
+
+        Returns:
+            True if every package has a UUID afterwards.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.load_references(executor)
+            missing = []
+            for path, content, data in self.load_files(executor, 'material_packages'):
+                if not isinstance(data, dict):
+                    self.fail(path, "not a YAML mapping")
+                elif data.get('uuid'):
+                    self.stats['present'] += 1
+                else:
+                    missing.append((path, content, data))
+
+            packages = self.derive(missing)
+            results = executor.map(lambda package: self.write(*package), packages)
+            for (path, _, data, _), error in zip(packages, results):
+                if error:
+                    self.fail(path, error)
+                    continue
+                self.stats['written'] += 1
+                self.stats['random' if data.get('gtin') is None else 'derived'] += 1
+        return not self.errors
+
+    def check(self) -> bool:
+        """Report packages without a UUID or with one not derived from brand and GTIN
+
+        Returns:
+            True if there is nothing to report.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.load_references(executor)
+            packages = [(path, data) for path, _, data in self.load_files(executor, 'material_packages')
+                        if isinstance(data, dict)]
+        derivable = []
+        for path, data in packages:
+            if not data.get('uuid'):
+                self.fail(path, "missing uuid")
+                continue
+            self.stats['present'] += 1
+            if data.get('gtin') is not None:
+                brand_uuid = self.package_brand_uuid(data)
+                if brand_uuid is not None:
+                    derivable.append((path, data, brand_uuid))
+        expected = generate_material_package_uuids([(brand_uuid, data['gtin']) for _, data, brand_uuid in derivable],
+                                                   as_ints=True)
+        for (path, data, _), expected_uuid in zip(derivable, expected):
+            actual_uuid = parse_uuid(data['uuid'])
+            if actual_uuid is not None and actual_uuid.int != expected_uuid:
+                self.fail(path, f"uuid {data['uuid']} is not derived from the brand UUID and GTIN {data['gtin']}")
+        return not self.errors
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Backfill missing UUIDs of material packages.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of parallel readers and writers (default: {DEFAULT_WORKERS}).")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing files.")
+    parser.add_argument("--check", action="store_true",
+                        help="Only verify that every package has a correct UUID; write nothing.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    backfill = UuidBackfill(repo_root, args.workers, args.dry_run or args.check)
+
+    if args.check:
+        if backfill.check():
+            print(f"✓ All {backfill.stats['present']:,} packages have a correct UUID")
+            return 0
+    else:
+        backfill.run()
+        verb = "Would write" if args.dry_run else "Wrote"
+        print(f"✓ {verb} {backfill.stats['written']:,} UUIDs ({backfill.stats['derived']:,} derived from a GTIN, "
+              f"{backfill.stats['random']:,} random), {backfill.stats['present']:,} packages already had one")
+        if not backfill.errors:
+            return 0
+
+    print(f"✗ {len(backfill.errors)} errors:", file=sys.stderr)
+    for error in backfill.errors:
+        print(f"  - {error}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
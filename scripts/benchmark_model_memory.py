@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: dict model vs. typed model
+
+Loads the database twice - once as nested dicts (DatabaseLoader.load_all_entities)
+and once as the slotted, interned typed model (DatabaseLoader.load_model) - and
+reports retained and peak memory of each as measured by tracemalloc.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from lib import DatabaseLoader
+
+
+def measure(load) -> dict:
+    """Run `load` under tracemalloc and return its memory/time statistics"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'retained_bytes': current, 'peak_bytes': peak, 'seconds': elapsed}
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Compare memory use of the dict and typed models.")
+    parser.add_argument(
+        "--base-path",
+        default=str(Path(__file__).parent.parent),
+        metavar="DIR",
+        help="Repository root containing the data directory (default: this repository).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    loader = DatabaseLoader(Path(args.base_path))
+    if not loader.load_schema():
+        print(f"Error: {loader.errors[0]}", file=sys.stderr)
+        return 1
+
+    results = {
+        'dict': measure(loader.load_all_entities),
+        'typed': measure(loader.load_model),
+    }
+    results['retained_ratio'] = results['typed']['retained_bytes'] / max(results['dict']['retained_bytes'], 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'Model':<8} {'Retained':>12} {'Peak':>12} {'Load time':>10}")
+    for name in ('dict', 'typed'):
+        r = results[name]
+        print(f"{name:<8} {r['retained_bytes'] / 2**20:>10.1f}MB {r['peak_bytes'] / 2**20:>10.1f}MB {r['seconds']:>9.2f}s")
+    print(f"\nTyped model retains {results['retained_ratio']:.0%} of the dict model's memory.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Bloom filters of known GTINs and UUIDs for fast negative lookups
+
+Lets edge devices and services reject GTINs and UUIDs that are not in the
+database without touching the full index. A filter never reports a known key
+as unknown; unknown keys are reported as (possibly) known with the configured
+false-positive rate.
+
+File format (little endian):
+    header  MAGIC, bit count m (uint64), hash count k (uint32),
+            key count n (uint64), target false-positive rate (float64),
+            manifest data_hash (64 bytes, hex, zero padded)
+    bits    ceil(m / 8) bytes, bit i is (bits[i // 8] >> (i % 8)) & 1
+
+Key i of k is hashed to bit (h1 + i * h2) mod m, where h1 and h2 are the two
+little-endian uint64 halves of blake2b(key, digest_size=16). Keys are UTF-8
+strings: GTINs in decimal without leading zeros, UUIDs in lowercase
+canonical form.
+
+Usage:
+    python scripts/bloom_filter.py build [--fp-rate 0.001] [--output-dir build]
+    python scripts/bloom_filter.py check 8594173675216
+"""
+
+import argparse
+import hashlib
+import math
+import struct
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from gtin_table import parse_gtin
+from lib import DatabaseLoader, load_manifest_hash
+
+
+MAGIC = b'MDBBLOOM'
+HEADER = struct.Struct('<8sQIQd64s')
+DEFAULT_OUTPUT_DIR = Path('build')
+DEFAULT_FP_RATE = 0.001
+GTIN_FILTER = 'gtins.bloom'
+UUID_FILTER = 'uuids.bloom'
+
+
+def gtin_key(value: Any) -> Optional[str]:
+    """Normalize a GTIN to its filter key, None if invalid"""
+    gtin = parse_gtin(value)
+    return str(gtin) if gtin is not None else None
+
+
+def uuid_key(value: Any) -> Optional[str]:
+    """Normalize a UUID to its filter key, None if invalid"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+class BloomFilter:
+    """A Bloom filter sized for a key count and false-positive rate"""
+
+    def __init__(self, num_bits: int, num_hashes: int, fp_rate: float = 0.0,
+                 data_hash: str = '', bits: Optional[bytearray] = None, count: int = 0):
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = max(num_hashes, 1)
+        self.fp_rate = fp_rate
+        self.data_hash = data_hash
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float = DEFAULT_FP_RATE, data_hash: str = '') -> 'BloomFilter':
+        """Create a filter holding `capacity` keys at the given false-positive rate"""
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"False-positive rate must be between 0 and 1, got {fp_rate}")
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        num_hashes = round(num_bits / capacity * math.log(2))
+        return cls(num_bits, num_hashes, fp_rate, data_hash)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], fp_rate: float = DEFAULT_FP_RATE, data_hash: str = '') -> 'BloomFilter':
+        """Create a filter sized for and holding the given keys"""
+        keys = set(keys)
+        bloom = cls.for_capacity(len(keys), fp_rate, data_hash)
+        for key in sorted(keys):
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def expected_fp_rate(self) -> float:
+        """False-positive rate expected for the number of keys added"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.num_bits, self.num_hashes, self.count,
+                                self.fp_rate, self.data_hash.encode('ascii')))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path: Path, expected_hash: Optional[str] = None) -> 'BloomFilter':
+        """Load a filter written by save()
+
+        Args:
+            path: Filter file.
+            expected_hash: If given, the manifest data_hash the filter must
+                have been built for.
+
+        Raises:
+            ValueError: The file is not a filter or was built for other data.
+        """
+        blob = Path(path).read_bytes()
+        if len(blob) < HEADER.size:
+            raise ValueError(f"Not a Bloom filter file: {path}")
+        magic, num_bits, num_hashes, count, fp_rate, data_hash = HEADER.unpack_from(blob, 0)
+        if magic != MAGIC or len(blob) != HEADER.size + (num_bits + 7) // 8:
+            raise ValueError(f"Not a Bloom filter file: {path}")
+
+        data_hash = data_hash.rstrip(b'\0').decode('ascii')
+        if expected_hash is not None and data_hash != expected_hash:
+            raise ValueError(
+                f"Bloom filter {path} was built for data {data_hash[:16]}..., "
+                f"expected {expected_hash[:16]}..."
+            )
+        return cls(num_bits, num_hashes, fp_rate, data_hash, bytearray(blob[HEADER.size:]), count)
+
+
+def collect_keys(data_cache: Dict[str, Dict[str, Any]]) -> tuple[set[str], set[str]]:
+    """Collect (package GTIN keys, entity UUID keys) from the DatabaseLoader dict model"""
+    gtins = {
+        key for key in (gtin_key(p.get('gtin')) for p in data_cache.get('material_packages', {}).values())
+        if key is not None
+    }
+    uuids = {
+        key
+        for entities in data_cache.values()
+        for key in (uuid_key(e.get('uuid')) for e in entities.values() if e.get('uuid'))
+        if key is not None
+    }
+    return gtins, uuids
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success (key possibly known for `check`), 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Build or query Bloom filters of known GTINs and UUIDs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the filters from the data directory.")
+    build_parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE,
+                              help=f"Target false-positive rate (default: {DEFAULT_FP_RATE}).")
+    build_parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR), metavar="DIR",
+                              help=f"Directory to write the filters to (default: {DEFAULT_OUTPUT_DIR}).")
+
+    check_parser = subparsers.add_parser('check', help="Check whether a GTIN or UUID may be known.")
+    check_parser.add_argument("key", help="GTIN or UUID.")
+    check_parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR), metavar="DIR",
+                              help=f"Directory containing the filters (default: {DEFAULT_OUTPUT_DIR}).")
+
+    args = parser.parse_args()
+    repo_root = Path(__file__).parent.parent
+    output_dir = Path(args.output_dir)
+
+    if args.command == 'build':
+        loader = DatabaseLoader(repo_root)
+        if not loader.load_schema():
+            print(f"Error: {loader.errors[0]}", file=sys.stderr)
+            return 1
+        data_hash = load_manifest_hash(repo_root)
+        gtins, uuids = collect_keys(loader.load_all_entities())
+        for filename, keys in ((GTIN_FILTER, gtins), (UUID_FILTER, uuids)):
+            bloom = BloomFilter.from_keys(keys, args.fp_rate, data_hash)
+            bloom.save(output_dir / filename)
+            print(f"✓ {filename}: {len(keys):,} keys, {len(bloom.bits):,} bytes, "
+                  f"k={bloom.num_hashes}, expected FP rate {bloom.expected_fp_rate():.4%}")
+        return 0
+
+    key = gtin_key(args.key)
+    filename = GTIN_FILTER
+    if key is None:
+        key, filename = uuid_key(args.key), UUID_FILTER
+    if key is None:
+        print(f"Error: {args.key} is neither a GTIN nor a UUID", file=sys.stderr)
+        return 1
+
+    bloom = BloomFilter.load(output_dir / filename, expected_hash=load_manifest_hash(repo_root))
+    if key in bloom:
+        print(f"{args.key}: possibly known")
+        return 0
+    print(f"{args.key}: unknown")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
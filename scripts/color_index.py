@@ -0,0 +1,261 @@
+"""
+Nearest-color search over material primary and secondary colors
+
+Precomputes CIELAB coordinates for every material color (taken from
+`color_lab` when present, otherwise converted from `color_rgba`) into a NumPy
+array and answers k-nearest-neighbour queries by CIE76 Delta E, optionally
+filtered by brand and material type.
+
+The index tracks the stat of every material file it was built from, so
+`refresh()` only re-parses files that were added or changed since the last
+build:
+
+    index = ColorIndex()
+    index.refresh(DatabaseLoader(repo_root))
+    index.nearest('#1e90ff', k=5, material_type='PLA')
+
+Requires the optional `numpy` dependency (pip install -e .[analytics]).
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from lib import DatabaseLoader
+from model import Color, Material, iter_materials
+
+
+@dataclass(slots=True)
+class ColorEntry:
+    """A single indexed color of a material"""
+    slug: str
+    brand: Optional[str]
+    type: Optional[str]
+    role: str  # 'primary' or 'secondary'
+    rgba: Optional[str]
+    lab: tuple[float, float, float]
+
+
+@dataclass(slots=True)
+class ColorMatch:
+    """Result of a nearest-color query"""
+    slug: str
+    delta_e: float
+    role: str
+    rgba: Optional[str]
+
+
+def _srgb_to_linear(channel: float) -> float:
+    if channel <= 0.04045:
+        return channel / 12.92
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _lab_f(t: float) -> float:
+    if t > (6 / 29) ** 3:
+        return t ** (1 / 3)
+    return t / (3 * (6 / 29) ** 2) + 4 / 29
+
+
+def rgba_to_lab(rgba: str) -> tuple[float, float, float]:
+    """Convert a `#rrggbb` / `#rrggbbaa` sRGB color to CIELAB (D65 white point)"""
+    value = rgba.lstrip('#')
+    if len(value) not in (6, 8):
+        raise ValueError(f"Invalid color: {rgba}")
+    r, g, b = (_srgb_to_linear(int(value[i:i + 2], 16) / 255) for i in (0, 2, 4))
+
+    x = (0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / 0.95047
+    y = 0.2126729 * r + 0.7151522 * g + 0.0721750 * b
+    z = (0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / 1.08883
+
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def color_lab(color: Any) -> Optional[tuple[float, float, float]]:
+    """Get the CIELAB coordinates of a color dict or typed Color, or None"""
+    if isinstance(color, Color):
+        lab, rgba = color.lab, color.rgba
+    elif isinstance(color, dict):
+        lab, rgba = color.get('color_lab'), color.get('color_rgba')
+    else:
+        return None
+
+    if lab and len(lab) == 3:
+        return (float(lab[0]), float(lab[1]), float(lab[2]))
+    if isinstance(rgba, str):
+        try:
+            return rgba_to_lab(rgba)
+        except ValueError:
+            return None
+    return None
+
+
+def material_colors(material: Any) -> list[ColorEntry]:
+    """Extract the indexable colors of a dict or typed material"""
+    if isinstance(material, Material):
+        slug, material_type = material.slug, material.type
+        brand = material.brand.slug if material.brand is not None else None
+        primary, secondary = material.primary_color, material.secondary_colors
+    else:
+        slug, material_type = material.get('slug'), material.get('type')
+        brand_ref = material.get('brand')
+        brand = brand_ref.get('slug') if isinstance(brand_ref, dict) else None
+        primary, secondary = material.get('primary_color'), material.get('secondary_colors') or ()
+
+    entries = []
+    for role, color in [('primary', primary)] + [('secondary', c) for c in secondary]:
+        lab = color_lab(color)
+        if lab is None:
+            continue
+        rgba = color.rgba if isinstance(color, Color) else color.get('color_rgba')
+        entries.append(ColorEntry(slug, brand, material_type, role, rgba, lab))
+    return entries
+
+
+class ColorIndex:
+    """k-nearest-neighbour color index, rebuilt incrementally"""
+
+    def __init__(self):
+        # source key (file path or slug) -> colors of that material
+        self._sources: Dict[str, list[ColorEntry]] = {}
+        # file path -> (mtime_ns, size) at the time it was indexed
+        self._stats: Dict[str, tuple[int, int]] = {}
+        self._entries: list[ColorEntry] = []
+        self._lab: Optional[np.ndarray] = None
+        self._dirty = True
+
+    @classmethod
+    def from_materials(cls, materials: Any) -> 'ColorIndex':
+        """Build an index from a dict model, typed Database or iterable of materials"""
+        index = cls()
+        for material in iter_materials(materials):
+            entries = material_colors(material)
+            if entries:
+                index.set_material(entries[0].slug, entries)
+        return index
+
+    def __len__(self) -> int:
+        self._ensure_arrays()
+        return len(self._entries)
+
+    def set_material(self, key: str, entries: list[ColorEntry]) -> None:
+        """Replace the colors indexed under a source key"""
+        self._sources[key] = entries
+        self._dirty = True
+
+    def remove(self, key: str) -> None:
+        """Remove the colors indexed under a source key"""
+        if self._sources.pop(key, None) is not None:
+            self._dirty = True
+        self._stats.pop(key, None)
+
+    def refresh(self, loader: DatabaseLoader) -> tuple[int, int]:
+        """Re-index material files that changed since the last refresh
+
+        Args:
+            loader: Loader pointing at the repository to index.
+
+        Returns:
+            Tuple of (files re-indexed, files removed).
+        """
+        entity_def = loader.ENTITIES['materials']
+        seen: set[str] = set()
+        updated = 0
+
+        for search_dir in loader.get_search_dirs(entity_def):
+            if not search_dir.exists():
+                continue
+            with os.scandir(search_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.yaml'):
+                        continue
+                    key = dir_entry.path
+                    seen.add(key)
+                    st = dir_entry.stat()
+                    stat = (st.st_mtime_ns, st.st_size)
+                    if self._stats.get(key) == stat:
+                        continue
+                    data = loader.load_yaml_file(Path(key))
+                    self.set_material(key, material_colors(data) if isinstance(data, dict) else [])
+                    self._stats[key] = stat
+                    updated += 1
+
+        removed = [key for key in self._stats if key not in seen]
+        for key in removed:
+            self.remove(key)
+
+        return updated, len(removed)
+
+    def _ensure_arrays(self) -> None:
+        if not self._dirty:
+            return
+        self._entries = [entry for entries in self._sources.values() for entry in entries]
+        self._lab = np.array([entry.lab for entry in self._entries], dtype=np.float64).reshape(-1, 3)
+        self._brands = np.array([entry.brand or '' for entry in self._entries], dtype=object)
+        self._types = np.array([entry.type or '' for entry in self._entries], dtype=object)
+        self._secondary = np.array([entry.role != 'primary' for entry in self._entries], dtype=bool)
+        self._dirty = False
+
+    def nearest(self, color: str | tuple[float, float, float], k: int = 5,
+                brand: Optional[str] = None, material_type: Optional[str] = None,
+                include_secondary: bool = True) -> list[ColorMatch]:
+        """Find the k materials closest to a color
+
+        Args:
+            color: `#rrggbb[aa]` string or CIELAB tuple.
+            k: Maximum number of materials to return.
+            brand: Only consider materials of this brand slug.
+            material_type: Only consider materials of this type (e.g. `PLA`).
+            include_secondary: Also match against secondary colors.
+
+        Returns:
+            Matches ordered by Delta E, at most one per material.
+        """
+        self._ensure_arrays()
+        target = np.array(rgba_to_lab(color) if isinstance(color, str) else color, dtype=np.float64)
+
+        candidates = np.arange(len(self._entries))
+        mask = np.ones(len(self._entries), dtype=bool)
+        if brand is not None:
+            mask &= self._brands == brand
+        if material_type is not None:
+            mask &= self._types == material_type
+        if not include_secondary:
+            mask &= ~self._secondary
+        candidates = candidates[mask]
+        if len(candidates) == 0 or k <= 0:
+            return []
+
+        distances = np.sqrt(((self._lab[candidates] - target) ** 2).sum(axis=1))
+
+        # Materials with several colors can occur multiple times, so take a
+        # few extra candidates before falling back to a full sort
+        limit = min(len(candidates), k * 4)
+        if limit < len(candidates):
+            order = np.argpartition(distances, limit - 1)[:limit]
+            order = order[np.argsort(distances[order], kind='stable')]
+        else:
+            order = np.argsort(distances, kind='stable')
+
+        matches = self._collect(candidates, distances, order, k)
+        if len(matches) < k and limit < len(candidates):
+            matches = self._collect(candidates, distances, np.argsort(distances, kind='stable'), k)
+        return matches
+
+    def _collect(self, candidates: np.ndarray, distances: np.ndarray,
+                 order: np.ndarray, k: int) -> list[ColorMatch]:
+        matches: list[ColorMatch] = []
+        seen: set[str] = set()
+        for position in order:
+            entry = self._entries[candidates[position]]
+            if entry.slug in seen:
+                continue
+            seen.add(entry.slug)
+            matches.append(ColorMatch(entry.slug, float(distances[position]), entry.role, entry.rgba))
+            if len(matches) == k:
+                break
+        return matches
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Persistent index of entity files by UUID, slug and GTIN
+
+Entity files live in brand subfolders, so their path cannot be derived from
+a UUID or slug; without an index, finding one entity means loading every
+file. The index maps UUIDs, slugs (per entity type) and GTINs to the files
+that hold them and records each file's stat and SHA-256, in
+build/entity-index.json. Resolving an entity is then a dictionary lookup
+plus one file read; read() checks the file's hash and refreshes the index
+if the file changed since it was indexed. A lookup that finds nothing only
+refreshes the index when asked to (`refresh=True`, `lookup --refresh`): an
+update stats every data file, which is too slow to pay on every miss.
+
+The index is maintained incrementally:
+
+- update() re-reads only files whose stat (mtime, size) changed and drops
+  deleted ones,
+- update_from_git() re-reads only the files `git diff` reports as changed
+  since the commit the index was built at (plus untracked files), without
+  looking at the others.
+
+Opening the index updates it when data/manifest.yaml records a different
+data hash than the index was built against. `verify` re-hashes every data
+file once, checks every indexed hash and recomputes the manifest's
+data_hash from the same reads.
+
+Usage:
+    python scripts/entity_index.py update [--git] [--full]
+    python scripts/entity_index.py lookup --uuid 1378e978-35ed-534c-9dfa-a65525bf8649
+    python scripts/entity_index.py lookup --slug prusament-pla-jet-black [--entity materials] [--show] [--refresh]
+    python scripts/entity_index.py lookup --gtin 8594173675100
+    python scripts/entity_index.py verify
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from gtin_table import parse_gtin
+from lib import DatabaseLoader, load_manifest_hash, parse_yaml, write_atomic
+from update_manifest import list_data_files
+
+
+DEFAULT_INDEX = Path('build') / 'entity-index.json'
+FORMAT_VERSION = 1
+LOOKUP_FIELDS = ('uuid', 'slug', 'gtin')
+
+# Positions in the per-file entries: [entity, mtime_ns, size, sha256, slug, uuid, gtin]
+ENTITY, MTIME, SIZE, SHA256, SLUG, UUID, GTIN = range(7)
+
+
+def _key(field: str, value: Any) -> Optional[str]:
+    """Normalized lookup key: lowercase UUIDs, GTINs as integers"""
+    if field == 'gtin':
+        gtin = parse_gtin(value)
+        return str(gtin) if gtin is not None else None
+    if not isinstance(value, str) or not value:
+        return None
+    return value.lower() if field == 'uuid' else value
+
+
+class EntityIndex:
+    """UUID/slug/GTIN -> entity file index persisted as JSON"""
+
+    def __init__(self, base_path: Path, index_path: Optional[Path] = None):
+        self.base_path = base_path
+        self.index_path = index_path or base_path / DEFAULT_INDEX
+        self.loader = DatabaseLoader(base_path)
+        self.data_hash = ''
+        self.git_head: Optional[str] = None
+        # relative path -> [entity, mtime_ns, size, sha256, slug, uuid, gtin]
+        self.files: Dict[str, list] = {}
+        # field -> key -> relative paths; slugs are keyed by (entity, slug)
+        self._lookup: Dict[str, Dict[Any, List[str]]] = {}
+        self.stats = {'read': 0, 'removed': 0, 'unchanged': 0}
+
+    @classmethod
+    def open(cls, base_path: Path, index_path: Optional[Path] = None) -> 'EntityIndex':
+        """Load the index, updating it if it is missing or the manifest changed"""
+        index = cls(base_path, index_path)
+        if not index.load() or index.data_hash != load_manifest_hash(base_path):
+            index.update()
+            index.save()
+        return index
+
+    def load(self) -> bool:
+        """Load the persisted index; returns False if there is none (or it is outdated)"""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get('format') != FORMAT_VERSION:
+            return False
+        self.data_hash = state.get('data_hash', '')
+        self.git_head = state.get('git_head')
+        self.files = state.get('files', {})
+        self._build_lookup()
+        return True
+
+    def save(self) -> None:
+        write_atomic(self.index_path, json.dumps({
+            'format': FORMAT_VERSION,
+            'data_hash': self.data_hash,
+            'git_head': self.git_head,
+            'files': self.files,
+        }, separators=(',', ':')).encode('utf-8'))
+
+    def _build_lookup(self) -> None:
+        self._lookup = {field: {} for field in LOOKUP_FIELDS}
+        for rel_path, entry in sorted(self.files.items()):
+            for field, position in (('uuid', UUID), ('gtin', GTIN)):
+                if entry[position] is not None:
+                    self._lookup[field].setdefault(entry[position], []).append(rel_path)
+            if entry[SLUG] is not None:
+                self._lookup['slug'].setdefault((entry[ENTITY], entry[SLUG]), []).append(rel_path)
+
+    def source_files(self) -> Dict[str, tuple[str, int, int]]:
+        """Get {relative path: (entity, mtime_ns, size)} of all entity files"""
+        files = {}
+        for entity_name, entity_def in self.loader.ENTITIES.items():
+            for search_dir in self.loader.get_search_dirs(entity_def):
+                if not search_dir.exists():
+                    continue
+                with os.scandir(search_dir) as it:
+                    for dir_entry in it:
+                        if dir_entry.name.endswith('.yaml') and dir_entry.is_file():
+                            st = dir_entry.stat()
+                            rel_path = Path(dir_entry.path).relative_to(self.base_path).as_posix()
+                            files[rel_path] = (entity_name, st.st_mtime_ns, st.st_size)
+        return files
+
+    def _entity_for_path(self, rel_path: str) -> Optional[str]:
+        """Get the DatabaseLoader entity name of an entity file path relative to base_path"""
+        parent = Path(rel_path).parent.as_posix()
+        for entity_name, entity_def in self.loader.ENTITIES.items():
+            directory = entity_def['directory']
+            if parent == directory or (entity_def.get('subdirectories_by_brand')
+                                       and Path(parent).parent.as_posix() == directory):
+                return entity_name
+        return None
+
+    def _index_file(self, rel_path: str, entity_name: str) -> None:
+        path = self.base_path / rel_path
+        try:
+            st = path.stat()
+            content = path.read_bytes()
+        except OSError:
+            self._remove_file(rel_path)
+            return
+        data = parse_yaml(content)
+        if not isinstance(data, dict):
+            data = {}
+        self.files[rel_path] = [
+            entity_name, st.st_mtime_ns, st.st_size, hashlib.sha256(content).hexdigest(),
+            _key('slug', data.get('slug')), _key('uuid', data.get('uuid')), _key('gtin', data.get('gtin')),
+        ]
+        self.stats['read'] += 1
+
+    def _remove_file(self, rel_path: str) -> None:
+        if self.files.pop(rel_path, None) is not None:
+            self.stats['removed'] += 1
+
+    def _finish_update(self) -> None:
+        self.data_hash = load_manifest_hash(self.base_path)
+        self.git_head = _git_head(self.base_path)
+        self._build_lookup()
+
+    def update(self, full: bool = False) -> bool:
+        """Re-index files whose stat changed and drop deleted files
+
+        Args:
+            full: Re-read every file.
+
+        Returns:
+            Whether any file was re-read or dropped.
+        """
+        before = self.stats['read'] + self.stats['removed']
+        current = self.source_files()
+        for rel_path in [p for p in self.files if p not in current]:
+            self._remove_file(rel_path)
+        for rel_path, (entity_name, mtime_ns, size) in current.items():
+            entry = self.files.get(rel_path)
+            if not full and entry and entry[:3] == [entity_name, mtime_ns, size]:
+                self.stats['unchanged'] += 1
+                continue
+            self._index_file(rel_path, entity_name)
+        self._finish_update()
+        return self.stats['read'] + self.stats['removed'] != before
+
+    def update_files(self, rel_paths: Iterable[str]) -> None:
+        """Re-index the given files (relative to base_path); missing files are dropped"""
+        for rel_path in sorted({Path(p).as_posix() for p in rel_paths}):
+            entity_name = self._entity_for_path(rel_path)
+            if entity_name is None or not rel_path.endswith('.yaml'):
+                continue
+            if (self.base_path / rel_path).is_file():
+                self._index_file(rel_path, entity_name)
+            else:
+                self._remove_file(rel_path)
+        self._finish_update()
+
+    def update_from_git(self) -> None:
+        """Re-index the files changed since the indexed commit, per git
+
+        Falls back to update() when the index has no commit or git fails.
+        """
+        if not self.git_head or not self.files:
+            self.update()
+            return
+        try:
+            changed = _git_paths(self.base_path, 'diff', '-z', '--relative', '--name-only', '--no-renames',
+                                 self.git_head, '--', 'data')
+            untracked = _git_paths(self.base_path, 'ls-files', '-z', '--others', '--exclude-standard', '--', 'data')
+        except (OSError, subprocess.CalledProcessError):
+            self.update()
+            return
+        self.update_files(changed + untracked)
+
+    def find(self, field: str, value: Any, entity: Optional[str] = None, refresh: bool = False) -> List[str]:
+        """Relative paths of the files whose `field` (uuid, slug or gtin) is value
+
+        Slugs are only unique per entity type; without `entity` the files of
+        every entity type with that slug are returned. With `refresh`, a miss
+        updates the index from file stats and retries the lookup once.
+        """
+        key = _key(field, value)
+        if key is None:
+            return []
+        paths = self._find(field, key, entity)
+        if not paths and refresh and self._refresh():
+            paths = self._find(field, key, entity)
+        return paths
+
+    def _refresh(self) -> bool:
+        """Update the index from file stats, saving it only if it changed"""
+        if not self.update():
+            return False
+        self.save()
+        return True
+
+    def _find(self, field: str, key: str, entity: Optional[str]) -> List[str]:
+        if field != 'slug':
+            paths = self._lookup[field].get(key, [])
+            return [p for p in paths if entity is None or self.files[p][ENTITY] == entity]
+        entities = [entity] if entity else list(self.loader.ENTITIES)
+        return [p for name in entities for p in self._lookup['slug'].get((name, key), [])]
+
+    def resolve(self, field: str, value: Any, entity: Optional[str] = None,
+                refresh: bool = False) -> Optional[Path]:
+        """Path of the (first) file whose `field` is value, None if there is none"""
+        paths = self.find(field, value, entity, refresh)
+        return self.base_path / paths[0] if paths else None
+
+    def read(self, field: str, value: Any, entity: Optional[str] = None,
+             refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Parsed entity whose `field` is value
+
+        The file's content must still have the indexed hash; otherwise the
+        index is updated from file stats and the lookup retried once. Misses
+        are handled as in find().
+        """
+        for attempt in range(2):
+            for rel_path in self.find(field, value, entity, refresh and attempt == 0):
+                try:
+                    content = (self.base_path / rel_path).read_bytes()
+                except OSError:
+                    break
+                if hashlib.sha256(content).hexdigest() != self.files[rel_path][SHA256]:
+                    break
+                return parse_yaml(content)
+            else:
+                return None
+            if attempt == 0 and not self._refresh():
+                break
+        return None
+
+    def verify(self) -> List[str]:
+        """Check the index and the manifest against the files
+
+        Every data file is read once; its hash is compared with the index and
+        the manifest's data_hash is recomputed from the same reads.
+
+        Returns:
+            Problems found, empty if the index and manifest are up to date.
+        """
+        problems = []
+        data_dir = self.base_path / 'data'
+        data_hasher = hashlib.sha256()
+        seen = set()
+        for path in list_data_files(data_dir):
+            content = path.read_bytes()
+            data_hasher.update(str(path.relative_to(data_dir)).encode('utf-8'))
+            data_hasher.update(content)
+            rel_path = path.relative_to(self.base_path).as_posix()
+            entry = self.files.get(rel_path)
+            if entry is not None:
+                seen.add(rel_path)
+                if entry[SHA256] != hashlib.sha256(content).hexdigest():
+                    problems.append(f"{rel_path}: changed since it was indexed")
+            elif self._entity_for_path(rel_path) is not None:
+                problems.append(f"{rel_path}: not indexed")
+        for rel_path in sorted(set(self.files) - seen):
+            problems.append(f"{rel_path}: indexed but missing")
+
+        manifest_hash = load_manifest_hash(self.base_path)
+        if data_hasher.hexdigest() != manifest_hash:
+            problems.append(f"data/manifest.yaml: data_hash {manifest_hash[:16]}... does not match the data "
+                            f"({data_hasher.hexdigest()[:16]}...), run update_manifest.py")
+        elif self.data_hash != manifest_hash:
+            problems.append("index was built against a different manifest data_hash")
+        return problems
+
+
+def _git_lines(base_path: Path, *args: str) -> List[str]:
+    result = subprocess.run(['git', *args], cwd=base_path, capture_output=True, text=True, check=True)
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def _git_paths(base_path: Path, *args: str) -> List[str]:
+    """Paths printed by a git command run with -z, which leaves unusual names unquoted"""
+    result = subprocess.run(['git', *args], cwd=base_path, capture_output=True, check=True)
+    return [os.fsdecode(path) for path in result.stdout.split(b'\0') if path]
+
+
+def _git_head(base_path: Path) -> Optional[str]:
+    try:
+        return _git_lines(base_path, 'rev-parse', 'HEAD')[0]
+    except (OSError, subprocess.CalledProcessError, IndexError):
+        return None
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error or if nothing was found.
+    """
+    parser = argparse.ArgumentParser(description="Maintain and query the UUID/slug/GTIN -> file index.")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX), metavar="FILE",
+                        help=f"Index file (default: {DEFAULT_INDEX}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="Bring the index up to date.")
+    update_parser.add_argument("--git", action="store_true",
+                               help="Only re-read files git reports as changed since the indexed commit.")
+    update_parser.add_argument("--full", action="store_true", help="Re-read every file.")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Print the file of an entity.")
+    group = lookup_parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--uuid")
+    group.add_argument("--slug")
+    group.add_argument("--gtin")
+    lookup_parser.add_argument("--entity", choices=list(DatabaseLoader.ENTITIES),
+                               help="Entity type (slugs are only unique per type).")
+    lookup_parser.add_argument("--show", action="store_true", help="Print the entity as JSON instead of its path.")
+    lookup_parser.add_argument("--refresh", action="store_true",
+                               help="Update the index from file stats and retry when nothing is found.")
+
+    subparsers.add_parser("verify", help="Check the index and the manifest against the files.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    index_path = repo_root / args.index
+
+    if args.command == "update":
+        index = EntityIndex(repo_root, index_path)
+        if args.full or not index.load():
+            index.update(full=True)
+        elif args.git:
+            index.update_from_git()
+        else:
+            index.update()
+        index.save()
+        print(f"✓ Indexed {len(index.files):,} files: {index.stats['read']:,} read, "
+              f"{index.stats['removed']:,} removed, {index.stats['unchanged']:,} unchanged")
+        return 0
+
+    index = EntityIndex.open(repo_root, index_path)
+    if args.command == "verify":
+        problems = index.verify()
+        if not problems:
+            print(f"✓ Index of {len(index.files):,} files and manifest are up to date")
+            return 0
+        print(f"✗ {len(problems)} problems:", file=sys.stderr)
+        for problem in problems:
+            print(f"  - {problem}", file=sys.stderr)
+        return 1
+
+    field, value = next((f, getattr(args, f)) for f in LOOKUP_FIELDS if getattr(args, f) is not None)
+    if args.show:
+        data = index.read(field, value, args.entity, args.refresh)
+        if data is None:
+            print(f"Error: no entity with {field} {value}", file=sys.stderr)
+            return 1
+        print(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+        return 0
+    paths = index.find(field, value, args.entity, args.refresh)
+    if not paths:
+        print(f"Error: no entity with {field} {value}", file=sys.stderr)
+        return 1
+    for rel_path in paths:
+        print(rel_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
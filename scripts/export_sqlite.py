@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Export the material database to SQLite
+
+Writes brands, materials, material packages and material containers into
+normalized tables (with tags, photos, secondary colors, certifications and
+properties of materials in child tables) so analytics queries can run in SQL.
+
+A full export bulk-inserts everything in one transaction into a temporary
+file, creates the indexes afterwards and atomically replaces the target
+database. An incremental export only re-parses files whose stat changed
+since the previous export (or an explicit list of files) and upserts or
+deletes the affected rows, again in a single transaction.
+
+Usage:
+    python scripts/export_sqlite.py [--output build/material-db.sqlite] [--full]
+    python scripts/export_sqlite.py --files data/materials/prusament/prusament-pla-jet-black.yaml
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from lib import DatabaseLoader, load_manifest_hash
+
+
+DEFAULT_OUTPUT = Path('build') / 'material-db.sqlite'
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE source_files (
+    path TEXT PRIMARY KEY,
+    entity TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE brands (
+    id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL,
+    uuid TEXT,
+    name TEXT
+);
+CREATE TABLE brand_countries (
+    brand_id INTEGER NOT NULL REFERENCES brands(id) ON DELETE CASCADE,
+    country_code TEXT NOT NULL
+);
+CREATE TABLE material_containers (
+    id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL,
+    uuid TEXT,
+    brand_slug TEXT,
+    name TEXT,
+    class TEXT,
+    empty_weight REAL,
+    hole_diameter REAL,
+    inner_diameter REAL,
+    outer_diameter REAL,
+    width REAL
+);
+CREATE TABLE materials (
+    id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL,
+    uuid TEXT,
+    brand_slug TEXT,
+    name TEXT,
+    class TEXT,
+    type TEXT,
+    abbreviation TEXT,
+    url TEXT,
+    primary_color_rgba TEXT,
+    transmission_distance REAL
+);
+CREATE TABLE material_tags (
+    material_id INTEGER NOT NULL REFERENCES materials(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE TABLE material_photos (
+    material_id INTEGER NOT NULL REFERENCES materials(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    url TEXT,
+    type TEXT
+);
+CREATE TABLE material_colors (
+    material_id INTEGER NOT NULL REFERENCES materials(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    rgba TEXT
+);
+CREATE TABLE material_certifications (
+    material_id INTEGER NOT NULL REFERENCES materials(id) ON DELETE CASCADE,
+    certification TEXT NOT NULL
+);
+CREATE TABLE material_properties (
+    material_id INTEGER NOT NULL REFERENCES materials(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value
+);
+CREATE TABLE material_packages (
+    id INTEGER PRIMARY KEY,
+    source_path TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL,
+    uuid TEXT,
+    brand_slug TEXT,
+    material_slug TEXT,
+    container_slug TEXT,
+    class TEXT,
+    gtin INTEGER,
+    nominal_netto_full_weight REAL,
+    filament_diameter REAL,
+    filament_diameter_tolerance REAL,
+    nominal_full_length REAL,
+    url TEXT,
+    brand_specific_id TEXT
+);
+-- Packages reference their brand through the material
+CREATE VIEW material_packages_resolved AS
+SELECT p.*, COALESCE(p.brand_slug, m.brand_slug) AS resolved_brand_slug
+FROM material_packages p
+LEFT JOIN materials m ON m.slug = p.material_slug;
+"""
+
+INDEXES = """
+CREATE INDEX idx_brands_slug ON brands(slug);
+CREATE INDEX idx_brands_uuid ON brands(uuid);
+CREATE INDEX idx_brand_countries_brand ON brand_countries(brand_id);
+CREATE INDEX idx_containers_slug ON material_containers(slug);
+CREATE INDEX idx_containers_uuid ON material_containers(uuid);
+CREATE INDEX idx_containers_brand ON material_containers(brand_slug);
+CREATE INDEX idx_materials_slug ON materials(slug);
+CREATE INDEX idx_materials_uuid ON materials(uuid);
+CREATE INDEX idx_materials_brand ON materials(brand_slug);
+CREATE INDEX idx_materials_type ON materials(type);
+CREATE INDEX idx_material_tags_material ON material_tags(material_id);
+CREATE INDEX idx_material_tags_tag ON material_tags(tag);
+CREATE INDEX idx_material_photos_material ON material_photos(material_id);
+CREATE INDEX idx_material_colors_material ON material_colors(material_id);
+CREATE INDEX idx_material_certifications_material ON material_certifications(material_id);
+CREATE INDEX idx_material_properties_material ON material_properties(material_id);
+CREATE INDEX idx_material_properties_name ON material_properties(name, value);
+CREATE INDEX idx_packages_slug ON material_packages(slug);
+CREATE INDEX idx_packages_uuid ON material_packages(uuid);
+CREATE INDEX idx_packages_gtin ON material_packages(gtin);
+CREATE INDEX idx_packages_brand ON material_packages(brand_slug);
+CREATE INDEX idx_packages_material ON material_packages(material_slug);
+CREATE INDEX idx_packages_container ON material_packages(container_slug);
+"""
+
+# DatabaseLoader entity name -> (table, columns after id/source_path)
+ENTITY_TABLES = {
+    'brands': ('brands', ('slug', 'uuid', 'name')),
+    'material_containers': ('material_containers', (
+        'slug', 'uuid', 'brand_slug', 'name', 'class', 'empty_weight', 'hole_diameter',
+        'inner_diameter', 'outer_diameter', 'width',
+    )),
+    'materials': ('materials', (
+        'slug', 'uuid', 'brand_slug', 'name', 'class', 'type', 'abbreviation', 'url',
+        'primary_color_rgba', 'transmission_distance',
+    )),
+    'material_packages': ('material_packages', (
+        'slug', 'uuid', 'brand_slug', 'material_slug', 'container_slug', 'class', 'gtin',
+        'nominal_netto_full_weight', 'filament_diameter', 'filament_diameter_tolerance',
+        'nominal_full_length', 'url', 'brand_specific_id',
+    )),
+}
+
+# Child table -> (parent id column, columns after the parent id)
+CHILD_TABLES = {
+    'brand_countries': ('brand_id', ('country_code',)),
+    'material_tags': ('material_id', ('tag',)),
+    'material_photos': ('material_id', ('position', 'url', 'type')),
+    'material_colors': ('material_id', ('position', 'rgba')),
+    'material_certifications': ('material_id', ('certification',)),
+    'material_properties': ('material_id', ('name', 'value')),
+}
+
+
+def _slug_ref(data: Dict[str, Any], field: str) -> Optional[str]:
+    ref = data.get(field)
+    return ref.get('slug') if isinstance(ref, dict) else None
+
+
+def _scalar(value: Any) -> Any:
+    """Values SQLite can store as-is; anything else is stored as its string"""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def entity_rows(entity_name: str, data: Dict[str, Any]) -> tuple[Dict[str, Any], Dict[str, list[tuple]]]:
+    """Split an entity document into its main row and child table rows
+
+    Returns:
+        Tuple of ({column: value} of the main row, {child table: [row values without parent id]}).
+    """
+    children: Dict[str, list[tuple]] = {}
+    _, columns = ENTITY_TABLES[entity_name]
+    row = {column: _scalar(data.get(column)) for column in columns}
+    if 'brand_slug' in row:
+        row['brand_slug'] = _slug_ref(data, 'brand')
+
+    if entity_name == 'brands':
+        children['brand_countries'] = [(c,) for c in data.get('countries_of_origin') or ()]
+    elif entity_name == 'materials':
+        primary = data.get('primary_color')
+        row['primary_color_rgba'] = primary.get('color_rgba') if isinstance(primary, dict) else None
+        children['material_tags'] = [(t,) for t in data.get('tags') or ()]
+        children['material_photos'] = [
+            (i, photo.get('url'), photo.get('type')) if isinstance(photo, dict) else (i, photo, None)
+            for i, photo in enumerate(data.get('photos') or ())
+        ]
+        children['material_colors'] = [
+            (i, color.get('color_rgba'))
+            for i, color in enumerate(data.get('secondary_colors') or ()) if isinstance(color, dict)
+        ]
+        children['material_certifications'] = [
+            (c,) for c in data.get('certifications') or data.get('certification_ids') or ()
+        ]
+        properties = data.get('properties')
+        children['material_properties'] = (
+            [(k, _scalar(v)) for k, v in properties.items()] if isinstance(properties, dict) else []
+        )
+    elif entity_name == 'material_packages':
+        row['material_slug'] = _slug_ref(data, 'material')
+        row['container_slug'] = _slug_ref(data, 'container')
+
+    return row, children
+
+
+class SqliteExporter:
+    """Exports the YAML data to a SQLite database"""
+
+    def __init__(self, base_path: Path, db_path: Path):
+        self.base_path = base_path
+        self.db_path = db_path
+        self.loader = DatabaseLoader(base_path)
+        self.stats = {'upserted': 0, 'deleted': 0, 'unchanged': 0}
+
+    def _entity_for_path(self, rel_path: str) -> Optional[str]:
+        """Get the DatabaseLoader entity name of a data file path relative to base_path"""
+        for entity_name, entity_def in self.loader.ENTITIES.items():
+            if rel_path.startswith(entity_def['directory'] + '/'):
+                return entity_name
+        return None
+
+    def source_files(self) -> Dict[str, tuple[str, int, int]]:
+        """Get {relative path: (entity, mtime_ns, size)} of all data files"""
+        files = {}
+        for entity_name, entity_def in self.loader.ENTITIES.items():
+            for search_dir in self.loader.get_search_dirs(entity_def):
+                if not search_dir.exists():
+                    continue
+                with os.scandir(search_dir) as it:
+                    for dir_entry in it:
+                        if dir_entry.name.endswith('.yaml') and dir_entry.is_file():
+                            st = dir_entry.stat()
+                            rel_path = Path(dir_entry.path).relative_to(self.base_path).as_posix()
+                            files[rel_path] = (entity_name, st.st_mtime_ns, st.st_size)
+        return files
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _write_meta(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('data_hash', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (load_manifest_hash(self.base_path),),
+        )
+
+    def export_full(self) -> None:
+        """Rebuild the whole database with bulk inserts"""
+        files = self.source_files()
+        tmp_path = self.db_path.with_name(self.db_path.name + '.tmp')
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.unlink(missing_ok=True)
+
+        conn = self._connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.executescript(SCHEMA)
+
+            main_rows: Dict[str, list[tuple]] = {name: [] for name in ENTITY_TABLES}
+            child_rows: Dict[str, list[tuple]] = {name: [] for name in CHILD_TABLES}
+            for rel_path, (entity_name, _, _) in sorted(files.items()):
+                data = self.loader.load_yaml_file(self.base_path / rel_path)
+                if not isinstance(data, dict) or not data.get('slug'):
+                    continue
+                row_id = len(main_rows[entity_name]) + 1
+                row, children = entity_rows(entity_name, data)
+                main_rows[entity_name].append((row_id, rel_path, *row.values()))
+                for child_table, rows in children.items():
+                    child_rows[child_table].extend((row_id, *values) for values in rows)
+
+            conn.execute("BEGIN")
+            for entity_name, rows in main_rows.items():
+                table, columns = ENTITY_TABLES[entity_name]
+                placeholders = ', '.join('?' * (len(columns) + 2))
+                conn.executemany(
+                    f"INSERT INTO {table} (id, source_path, {', '.join(columns)}) VALUES ({placeholders})", rows
+                )
+            for child_table, rows in child_rows.items():
+                parent_column, columns = CHILD_TABLES[child_table]
+                placeholders = ', '.join('?' * (len(columns) + 1))
+                conn.executemany(
+                    f"INSERT INTO {child_table} ({parent_column}, {', '.join(columns)}) VALUES ({placeholders})", rows
+                )
+            conn.executemany(
+                "INSERT INTO source_files (path, entity, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                [(path, *stat) for path, stat in files.items()],
+            )
+            self._write_meta(conn)
+            conn.execute("COMMIT")
+            conn.executescript(INDEXES)
+            self.stats['upserted'] = sum(len(rows) for rows in main_rows.values())
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, self.db_path)
+
+    def _delete(self, conn: sqlite3.Connection, rel_path: str, entity_name: Optional[str]) -> None:
+        if entity_name is not None:
+            table, _ = ENTITY_TABLES[entity_name]
+            conn.execute(f"DELETE FROM {table} WHERE source_path = ?", (rel_path,))
+        conn.execute("DELETE FROM source_files WHERE path = ?", (rel_path,))
+        self.stats['deleted'] += 1
+
+    def _upsert(self, conn: sqlite3.Connection, rel_path: str, entity_name: str,
+                data: Dict[str, Any]) -> None:
+        table, columns = ENTITY_TABLES[entity_name]
+        row, children = entity_rows(entity_name, data)
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns)
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        (row_id,) = conn.execute(
+            f"INSERT INTO {table} (source_path, {', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(source_path) DO UPDATE SET {updates} RETURNING id",
+            (rel_path, *row.values()),
+        ).fetchone()
+
+        for child_table, (parent_column, child_columns) in CHILD_TABLES.items():
+            if child_table not in children:
+                continue
+            conn.execute(f"DELETE FROM {child_table} WHERE {parent_column} = ?", (row_id,))
+            placeholders = ', '.join('?' * (len(child_columns) + 1))
+            conn.executemany(
+                f"INSERT INTO {child_table} ({parent_column}, {', '.join(child_columns)}) VALUES ({placeholders})",
+                [(row_id, *values) for values in children[child_table]],
+            )
+        self.stats['upserted'] += 1
+
+    def export_incremental(self, files: Optional[Iterable[str]] = None) -> None:
+        """Upsert/delete rows of changed files
+
+        Args:
+            files: Data file paths (relative to base_path) to re-export. When
+                None, files are compared with the stats recorded by the
+                previous export.
+        """
+        if not self.db_path.exists():
+            self.export_full()
+            return
+
+        current = self.source_files()
+        conn = self._connect(self.db_path)
+        try:
+            recorded = {
+                path: (entity, mtime_ns, size)
+                for path, entity, mtime_ns, size in conn.execute(
+                    "SELECT path, entity, mtime_ns, size FROM source_files"
+                )
+            }
+            if files is None:
+                changed = sorted(p for p, stat in current.items() if recorded.get(p) != stat)
+                deleted = sorted(p for p in recorded if p not in current)
+            else:
+                files = sorted({Path(f).as_posix() for f in files})
+                changed = [p for p in files if p in current]
+                deleted = [p for p in files if p not in current]
+            self.stats['unchanged'] = len(current) - len(changed)
+
+            conn.execute("BEGIN")
+            for rel_path in deleted:
+                entity_name = recorded.get(rel_path, (self._entity_for_path(rel_path),))[0]
+                self._delete(conn, rel_path, entity_name)
+
+            for rel_path in changed:
+                entity_name = current[rel_path][0]
+                data = self.loader.load_yaml_file(self.base_path / rel_path)
+                if not isinstance(data, dict) or not data.get('slug'):
+                    self._delete(conn, rel_path, entity_name)
+                    continue
+                self._upsert(conn, rel_path, entity_name, data)
+                conn.execute(
+                    "INSERT INTO source_files (path, entity, mtime_ns, size) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size",
+                    (rel_path, *current[rel_path]),
+                )
+            self._write_meta(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Export the material database to SQLite.")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), metavar="FILE",
+                        help=f"SQLite database to write (default: {DEFAULT_OUTPUT}).")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild the database instead of updating changed files only.")
+    parser.add_argument("--files", nargs="+", metavar="FILE",
+                        help="Only re-export these data files (paths relative to the repository root).")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    exporter = SqliteExporter(repo_root, Path(args.output))
+    if not exporter.loader.load_schema():
+        print(f"Error: {exporter.loader.errors[0]}", file=sys.stderr)
+        return 1
+
+    if args.full:
+        exporter.export_full()
+    else:
+        exporter.export_incremental(args.files)
+
+    for error in exporter.loader.errors:
+        print(f"  Warning: {error}", file=sys.stderr)
+    print(f"✓ Exported to {args.output}: {exporter.stats['upserted']:,} upserted, "
+          f"{exporter.stats['deleted']:,} deleted, {exporter.stats['unchanged']:,} unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
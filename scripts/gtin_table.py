@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+GTIN -> package lookup table for tag readers
+
+Builds a binary table that resolves a scanned GTIN to its material package,
+material, container and brand without loading any YAML:
+
+    header   MAGIC, record count, record area offset, manifest data_hash
+    entries  `count` fixed-width (gtin uint64, offset uint32, length uint32)
+             entries sorted by GTIN
+    records  packed UTF-8 JSON records referenced by the entries
+
+GtinTable memory-maps the file and looks GTINs up by binary search over the
+fixed-width entries, i.e. O(log n) with no parsing beyond the one matching
+record. GTINs shared by several packages have adjacent entries.
+
+Usage:
+    python scripts/gtin_table.py build [--output build/gtin-table.bin]
+    python scripts/gtin_table.py lookup 8594173675216
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from lib import DatabaseLoader, load_manifest_hash
+
+
+MAGIC = b'MDBGTIN1'
+DEFAULT_OUTPUT = Path('build') / 'gtin-table.bin'
+
+# magic, count, records offset, data hash (hex, zero padded)
+HEADER = struct.Struct('<8sII64s')
+ENTRY = struct.Struct('<QII')
+
+# Material fields left out of records to keep them small
+OMITTED_MATERIAL_FIELDS = ('photos',)
+
+
+def parse_gtin(value: Any) -> Optional[int]:
+    """Convert a GTIN from YAML (int or digit string) to int, None if invalid"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _slug_ref(data: Dict[str, Any], field: str) -> Optional[str]:
+    ref = data.get(field)
+    return ref.get('slug') if isinstance(ref, dict) else None
+
+
+def build_records(data_cache: Dict[str, Dict[str, Any]]) -> list[tuple[int, bytes]]:
+    """Create the sorted (gtin, JSON record) list from the DatabaseLoader dict model"""
+    brands = data_cache.get('brands', {})
+    materials = data_cache.get('materials', {})
+    containers = data_cache.get('material_containers', {})
+
+    records = []
+    for slug, package in sorted(data_cache.get('material_packages', {}).items()):
+        gtin = parse_gtin(package.get('gtin'))
+        if gtin is None:
+            continue
+
+        material = materials.get(_slug_ref(package, 'material'))
+        container = containers.get(_slug_ref(package, 'container'))
+        brand_slug = _slug_ref(package, 'brand') or (material and _slug_ref(material, 'brand'))
+        brand = brands.get(brand_slug)
+
+        record = {
+            'package': package,
+            'material': (
+                {k: v for k, v in material.items() if k not in OMITTED_MATERIAL_FIELDS}
+                if material else None
+            ),
+            'container': container,
+            'brand': (
+                {'uuid': brand.get('uuid'), 'slug': brand.get('slug'), 'name': brand.get('name')}
+                if brand else None
+            ),
+        }
+        records.append((gtin, json.dumps(record, separators=(',', ':'), ensure_ascii=False,
+                                         default=str).encode('utf-8')))
+
+    records.sort(key=lambda r: r[0])
+    return records
+
+
+def write_table(path: Path, records: list[tuple[int, bytes]], data_hash: str = '') -> None:
+    """Write sorted (gtin, record) pairs to a table file"""
+    records_offset = HEADER.size + ENTRY.size * len(records)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), records_offset, data_hash.encode('ascii')))
+        offset = 0
+        for gtin, record in records:
+            f.write(ENTRY.pack(gtin, offset, len(record)))
+            offset += len(record)
+        for _, record in records:
+            f.write(record)
+
+
+class GtinTable:
+    """Memory-mapped reader of a GTIN table file"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a GTIN table file: {path}")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"Not a GTIN table file: {path}")
+        magic, self.count, self._records_offset, data_hash = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a GTIN table file: {path}")
+        self.data_hash = data_hash.rstrip(b'\0').decode('ascii')
+
+    def __enter__(self) -> 'GtinTable':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _entry(self, index: int) -> tuple[int, int, int]:
+        return ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+
+    def _first_index(self, gtin: int) -> int:
+        """Binary search for the first entry with entry.gtin >= gtin"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < gtin:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _record(self, offset: int, length: int) -> Dict[str, Any]:
+        start = self._records_offset + offset
+        return json.loads(self._map[start:start + length])
+
+    def __contains__(self, gtin: int) -> bool:
+        index = self._first_index(gtin)
+        return index < self.count and self._entry(index)[0] == gtin
+
+    def lookup_all(self, gtin: int) -> list[Dict[str, Any]]:
+        """Get the records of all packages with a GTIN"""
+        records = []
+        index = self._first_index(gtin)
+        while index < self.count:
+            entry_gtin, offset, length = self._entry(index)
+            if entry_gtin != gtin:
+                break
+            records.append(self._record(offset, length))
+            index += 1
+        return records
+
+    def lookup(self, gtin: int) -> Optional[Dict[str, Any]]:
+        """Get the record of the (first) package with a GTIN, None if unknown
+
+        The record is a dict with `package`, `material`, `container` and
+        `brand` keys.
+        """
+        index = self._first_index(gtin)
+        if index >= self.count:
+            return None
+        entry_gtin, offset, length = self._entry(index)
+        return self._record(offset, length) if entry_gtin == gtin else None
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Build or query the GTIN lookup table.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the table from the data directory.")
+    build_parser.add_argument("--output", default=str(DEFAULT_OUTPUT), metavar="FILE",
+                              help=f"Table file to write (default: {DEFAULT_OUTPUT}).")
+
+    lookup_parser = subparsers.add_parser('lookup', help="Look up a GTIN in a built table.")
+    lookup_parser.add_argument("gtin", type=int, help="GTIN to resolve.")
+    lookup_parser.add_argument("--table", default=str(DEFAULT_OUTPUT), metavar="FILE",
+                               help=f"Table file to read (default: {DEFAULT_OUTPUT}).")
+
+    args = parser.parse_args()
+    repo_root = Path(__file__).parent.parent
+
+    if args.command == 'build':
+        loader = DatabaseLoader(repo_root)
+        if not loader.load_schema():
+            print(f"Error: {loader.errors[0]}", file=sys.stderr)
+            return 1
+        records = build_records(loader.load_all_entities())
+        output = Path(args.output)
+        write_table(output, records, load_manifest_hash(repo_root))
+        print(f"✓ Wrote {len(records):,} GTINs -> {output}")
+        return 0
+
+    with GtinTable(Path(args.table)) as table:
+        records = table.lookup_all(args.gtin)
+    if not records:
+        print(f"GTIN {args.gtin} not found", file=sys.stderr)
+        return 1
+    print(json.dumps(records if len(records) > 1 else records[0], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Bulk import of entities from NDJSON (or a JSON array) into the data directory
+
+Each input record is one entity. Its type comes from an `entity` field
+(`brand`, `material`, `material_package` or `material_container`) or from
+--entity for single-type files. Missing `slug` and `uuid` fields are derived
+the same way as for hand-written entities:
+
+    brand      slug from name,                uuid from name
+    material   slug <brand>-<name>,           uuid from brand uuid + name
+    package    slug <material>-<weight>[-<diameter>], uuid from brand uuid + gtin
+    container  slug from name
+
+Packages without a GTIN and containers keep the uuid of the file they
+replace, if any. References may be given as slugs or `{slug: ...}` mappings;
+brands and materials are resolved from earlier records or from the data
+directory, records referencing entities later in the stream are retried at
+the end.
+
+Files are rendered in the canonical YAML form and written in parallel via
+atomic renames. Files whose content would not change are left untouched, so
+re-importing the same data is a no-op.
+
+Usage:
+    python scripts/import_ndjson.py vendor-catalog.ndjson
+    python scripts/import_ndjson.py materials.json --entity material --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, Optional
+
+from gtin_table import parse_gtin
+from lib import DatabaseLoader, dump_yaml, parse_yaml, slugify, write_atomic
+from uuid_utils import generate_brand_uuid, generate_material_package_uuid, generate_material_uuid
+
+
+ENTITY_ALIASES = {
+    'brand': 'brands',
+    'material': 'materials',
+    'package': 'material_packages',
+    'material_package': 'material_packages',
+    'container': 'material_containers',
+    'material_container': 'material_containers',
+}
+# Fields referencing other entities by slug
+REFERENCE_FIELDS = ('brand', 'material', 'container')
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DEFAULT_FILAMENT_DIAMETER = 1750
+
+
+class UnresolvedReference(ValueError):
+    """A record references a brand or material not (yet) known"""
+
+
+def entity_type(name: str) -> Optional[str]:
+    """Map an entity name (singular, plural, hyphenated) to its DatabaseLoader key"""
+    key = name.strip().lower().replace('-', '_')
+    if key in DatabaseLoader.ENTITIES:
+        return key
+    return ENTITY_ALIASES.get(key)
+
+
+def package_slug(material_slug: str, weight: Any, diameter: Any) -> str:
+    """Derive a package slug, e.g. `<material>-1kg` or `<material>-750g-2850`"""
+    weight = int(weight)
+    slug = f"{material_slug}-{weight // 1000}kg" if weight % 1000 == 0 else f"{material_slug}-{weight}g"
+    if diameter is not None and int(diameter) != DEFAULT_FILAMENT_DIAMETER:
+        slug += f"-{int(diameter)}"
+    return slug
+
+
+def _reference(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get('slug')
+    return value if isinstance(value, str) and value else None
+
+
+def iter_records(stream: IO[str], errors: Optional[list[str]] = None) -> Iterator[tuple[int, Any]]:
+    """Yield (line number, record) from an NDJSON stream or a JSON array
+
+    Args:
+        errors: If given, invalid NDJSON lines are reported here and skipped.
+
+    Raises:
+        ValueError: A line (or the JSON array) is not valid JSON.
+    """
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        for index, record in enumerate(json.loads(first + stream.read()), start=1):
+            yield index, record
+        return
+
+    line_no = 1
+    line = first + stream.readline()
+    while line:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if errors is None:
+                    raise ValueError(f"line {line_no}: invalid JSON: {e}") from e
+                errors.append(f"line {line_no}: invalid JSON: {e}")
+            else:
+                yield line_no, record
+        line_no += 1
+        line = stream.readline()
+
+
+class NdjsonImporter:
+    """Converts import records to entity files and writes them in parallel"""
+
+    def __init__(self, base_path: Path, default_entity: Optional[str] = None,
+                 workers: int = DEFAULT_WORKERS, dry_run: bool = False):
+        self.base_path = base_path
+        self.loader = DatabaseLoader(base_path)
+        self.default_entity = default_entity
+        self.workers = max(workers, 1)
+        self.dry_run = dry_run
+        self.stats = {'written': 0, 'unchanged': 0, 'failed': 0}
+        self.errors: list[str] = []
+
+        # brand slug -> brand uuid, filled from the stream and lazily from disk
+        self._brand_uuids: Dict[str, Optional[str]] = {}
+        # material slug -> brand slug, filled from the stream and the data directory
+        self._material_brands: Dict[str, str] = {}
+        # entity -> slug -> existing file, scanned on first use
+        self._existing: Dict[str, Dict[str, Path]] = {}
+        # target path -> record number, to reject two records for one file
+        self._targets: Dict[Path, int] = {}
+        self._future_paths: Dict[Future, Path] = {}
+
+    def _entity_dir(self, entity: str) -> Path:
+        return self.base_path / DatabaseLoader.ENTITIES[entity]['directory']
+
+    def _brand_uuid(self, brand_slug: str) -> uuid.UUID:
+        if brand_slug not in self._brand_uuids:
+            data = None
+            path = self._entity_dir('brands') / f"{brand_slug}.yaml"
+            if path.exists():
+                data = self.loader.load_yaml_file(path)
+            if isinstance(data, dict):
+                value = data.get('uuid') or (data.get('name') and str(generate_brand_uuid(data['name'])))
+                self._brand_uuids[brand_slug] = value
+            else:
+                return self._unresolved('brand', brand_slug)
+        return uuid.UUID(self._brand_uuids[brand_slug])
+
+    def _existing_files(self, entity: str) -> Dict[str, Path]:
+        """Get slug -> path of the files of an entity type already on disk"""
+        if entity not in self._existing:
+            files = {}
+            for search_dir in self.loader.get_search_dirs(DatabaseLoader.ENTITIES[entity]):
+                if search_dir.exists():
+                    for entry in os.scandir(search_dir):
+                        if entry.name.endswith('.yaml'):
+                            files.setdefault(entry.name[:-5], Path(entry.path))
+            self._existing[entity] = files
+        return self._existing[entity]
+
+    def _material_brand(self, material_slug: str) -> str:
+        if material_slug not in self._material_brands:
+            path = self._existing_files('materials').get(material_slug)
+            if path is None:
+                self._unresolved('material', material_slug)
+            self._material_brands[material_slug] = path.parent.name
+        return self._material_brands[material_slug]
+
+    def _target(self, entity: str, slug: str, brand_slug: Optional[str] = None) -> Path:
+        """Path of an entity file: the existing file of that slug, else the default location"""
+        existing = self._existing_files(entity).get(slug)
+        if existing is not None:
+            return existing
+        directory = self._entity_dir(entity)
+        return (directory / brand_slug if brand_slug else directory) / f"{slug}.yaml"
+
+    @staticmethod
+    def _unresolved(kind: str, slug: str):
+        raise UnresolvedReference(f"unknown {kind} '{slug}'")
+
+    def prepare(self, record: Any) -> tuple[Path, Dict[str, Any]]:
+        """Derive the target file and canonical content of a record
+
+        Returns:
+            Tuple of (file path, entity data with `uuid` and `slug` first).
+
+        Raises:
+            UnresolvedReference: A referenced brand or material is unknown.
+            ValueError: The record is invalid.
+        """
+        if not isinstance(record, dict):
+            raise ValueError("record is not a JSON object")
+        data = dict(record)
+        entity_name = data.pop('entity', None) or self.default_entity
+        entity = entity_type(entity_name) if entity_name else None
+        if entity is None:
+            raise ValueError(f"unknown entity type {entity_name!r}" if entity_name else "missing entity type")
+
+        for field in REFERENCE_FIELDS:
+            if field in data:
+                ref = _reference(data[field])
+                if ref is None:
+                    raise ValueError(f"invalid {field} reference")
+                data[field] = {'slug': ref}
+
+        name = data.get('name')
+        slug = data.pop('slug', None)
+        entity_uuid = data.pop('uuid', None)
+
+        if entity == 'brands':
+            if not name:
+                raise ValueError("brand requires a name")
+            slug = slug or slugify(name)
+            entity_uuid = entity_uuid or str(generate_brand_uuid(name))
+            self._brand_uuids[slug] = entity_uuid
+            path = self._target(entity, slug)
+
+        elif entity == 'materials':
+            if not name or 'brand' not in data:
+                raise ValueError("material requires a name and a brand")
+            brand_slug = data['brand']['slug']
+            brand_uuid = self._brand_uuid(brand_slug)
+            slug = slug or f"{brand_slug}-{slugify(name)}"
+            entity_uuid = entity_uuid or str(generate_material_uuid(brand_uuid, name))
+            self._material_brands[slug] = brand_slug
+            path = self._target(entity, slug, brand_slug)
+
+        elif entity == 'material_packages':
+            if 'material' not in data:
+                raise ValueError("package requires a material")
+            material_slug = data['material']['slug']
+            brand_slug = self._material_brand(material_slug)
+            if not slug:
+                if data.get('nominal_netto_full_weight') is None:
+                    raise ValueError("package requires a slug or nominal_netto_full_weight")
+                slug = package_slug(material_slug, data['nominal_netto_full_weight'],
+                                    data.get('filament_diameter'))
+            if 'gtin' in data:
+                gtin = parse_gtin(data['gtin'])
+                if gtin is None:
+                    raise ValueError(f"invalid gtin {data['gtin']!r}")
+                # Stored as the integer the UUID is derived from, as in the data
+                # files: validation derives it again from str() of the stored value
+                data['gtin'] = gtin
+                if not entity_uuid:
+                    entity_uuid = str(generate_material_package_uuid(self._brand_uuid(brand_slug), gtin))
+            path = self._target(entity, slug, brand_slug)
+
+        else:
+            if not slug and not name:
+                raise ValueError("container requires a slug or a name")
+            slug = slug or slugify(name)
+            path = self._target(entity, slug)
+
+        if not slug:
+            raise ValueError("could not derive a slug")
+        head = {'uuid': entity_uuid} if entity_uuid else {}
+        head['slug'] = slug
+        return path, {**head, **data}
+
+    def write(self, path: Path, data: Dict[str, Any]) -> bool:
+        """Write an entity file unless its content is unchanged
+
+        Returns:
+            True if the file was (or, in dry-run mode, would be) written.
+        """
+        try:
+            existing = path.read_bytes()
+        except FileNotFoundError:
+            existing = None
+
+        previous = None
+        if existing is not None and 'uuid' not in data:
+            previous = parse_yaml(existing)
+            if isinstance(previous, dict) and previous.get('uuid'):
+                data = {'uuid': previous['uuid'], **data}
+
+        content = dump_yaml(data).encode('utf-8')
+        if content == existing:
+            return False
+        # Files formatted differently (e.g. by the UI editor) are left alone
+        # as long as they hold the same data
+        if existing is not None:
+            if previous is None:
+                previous = parse_yaml(existing)
+            if previous == data:
+                return False
+        if not self.dry_run:
+            write_atomic(path, content)
+        return True
+
+    def _collect(self, futures: set[Future], done: set[Future]) -> None:
+        for future in done:
+            futures.discard(future)
+            path = self._future_paths.pop(future)
+            try:
+                self.stats['written' if future.result() else 'unchanged'] += 1
+            except OSError as e:
+                self.stats['failed'] += 1
+                self.errors.append(f"{path}: {e}")
+
+    def run(self, stream: IO[str]) -> bool:
+        """Import all records of a stream
+
+        Returns:
+            True if every record was imported.
+        """
+        futures: set[Future] = set()
+        deferred: list[tuple[int, Any]] = []
+        max_pending = self.workers * 64
+
+        def submit(record_no: int, record: Any, defer: bool) -> None:
+            try:
+                path, data = self.prepare(record)
+            except UnresolvedReference as e:
+                if defer:
+                    deferred.append((record_no, record))
+                    return
+                self.stats['failed'] += 1
+                self.errors.append(f"record {record_no}: {e}")
+                return
+            except (ValueError, TypeError) as e:
+                self.stats['failed'] += 1
+                self.errors.append(f"record {record_no}: {e}")
+                return
+
+            if path in self._targets:
+                self.stats['failed'] += 1
+                self.errors.append(
+                    f"record {record_no}: {path.relative_to(self.base_path)} "
+                    f"already imported from record {self._targets[path]}"
+                )
+                return
+            self._targets[path] = record_no
+
+            future = executor.submit(self.write, path, data)
+            futures.add(future)
+            self._future_paths[future] = path
+            if len(futures) >= max_pending:
+                self._collect(futures, wait(futures, return_when=FIRST_COMPLETED).done)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # A bad line is skipped like an invalid record: stopping there
+            # would leave the records before it imported and the rest not
+            invalid_lines: list[str] = []
+            try:
+                for record_no, record in iter_records(stream, invalid_lines):
+                    submit(record_no, record, defer=True)
+            except ValueError as e:  # a malformed JSON array, nothing was submitted
+                self.errors.append(str(e))
+            self.stats['failed'] += len(invalid_lines)
+            self.errors.extend(invalid_lines)
+            # Records may reference entities that appeared later in the stream,
+            # retry until a pass resolves nothing new
+            while deferred:
+                retry, deferred = deferred, []
+                for record_no, record in retry:
+                    submit(record_no, record, defer=True)
+                if len(deferred) == len(retry):
+                    for record_no, record in deferred:
+                        submit(record_no, record, defer=False)
+                    break
+            self._collect(futures, wait(futures).done)
+
+        return not self.errors
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Import entities from NDJSON or a JSON array.")
+    parser.add_argument("input", help="NDJSON or JSON file to import, '-' for stdin.")
+    parser.add_argument("--entity", help="Entity type of records without an `entity` field.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of parallel writers (default: {DEFAULT_WORKERS}).")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing files.")
+    args = parser.parse_args()
+
+    if args.entity and entity_type(args.entity) is None:
+        print(f"Error: unknown entity type {args.entity!r}", file=sys.stderr)
+        return 1
+
+    repo_root = Path(__file__).parent.parent
+    importer = NdjsonImporter(repo_root, args.entity, args.workers, args.dry_run)
+
+    if args.input == '-':
+        importer.run(sys.stdin)
+    else:
+        try:
+            with open(args.input, encoding='utf-8') as f:
+                importer.run(f)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    verb = "Would write" if args.dry_run else "Wrote"
+    print(f"✓ {verb} {importer.stats['written']:,} files, "
+          f"{importer.stats['unchanged']:,} unchanged")
+    if importer.errors:
+        print(f"✗ {len(importer.errors)} errors:", file=sys.stderr)
+        for error in importer.errors:
+            print(f"  - {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
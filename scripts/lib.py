@@ -4,10 +4,88 @@ Shared library for Material Database scripts
 Provides common functionality for entity loading and data handling.
 """
 
+import os
+import re
+import tempfile
+import unicodedata
 from pathlib import Path
 from typing import Any, Dict
 import yaml
 
+from model import MODEL_BUILD_ORDER, Database
+from uniqueness_index import UniquenessIndex
+
+
+def load_manifest_hash(base_path: Path) -> str:
+    """Get the data_hash recorded in data/manifest.yaml, or '' if unavailable"""
+    manifest_path = base_path / 'data' / 'manifest.yaml'
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = yaml.safe_load(f) or {}
+    except (IOError, yaml.YAMLError):
+        return ''
+    return str(manifest.get('data_hash', ''))
+
+
+# Letters that do not decompose into an ASCII base letter
+SLUG_CHAR_MAP = {'ß': 'ss', 'æ': 'ae', 'Æ': 'AE', 'ø': 'o', 'Ø': 'O', 'đ': 'd', 'Đ': 'D', 'ł': 'l', 'Ł': 'L'}
+SLUG_REMOVE = re.compile(r"[*+~.()'\"!:@]")
+
+
+def slugify(text: str) -> str:
+    """Derive a slug from a name the way the UI editor does (see slugifyName)
+
+    Accents are stripped, punctuation is dropped and runs of whitespace and
+    hyphens become a single hyphen, e.g. "PLA+ Galaxy Black" -> "pla-galaxy-black".
+    """
+    text = ''.join(' ' if ch == '-' else SLUG_CHAR_MAP.get(ch, ch) for ch in text)
+    text = SLUG_REMOVE.sub('', text)
+    text = ''.join(ch for ch in unicodedata.normalize('NFD', text) if not unicodedata.combining(ch))
+    text = re.sub(r'[^A-Za-z0-9\s]', '', text).strip()
+    return re.sub(r'\s+', '-', text).lower()
+
+
+# The C loader of libyaml where PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def parse_yaml(content: bytes) -> Any:
+    """Parse YAML content with YAML_LOADER, None if it is not valid YAML"""
+    try:
+        return yaml.load(content, Loader=YAML_LOADER)
+    except yaml.YAMLError:
+        return None
+
+
+def dump_yaml(data: Any) -> str:
+    """Serialize data the way entity files are written (key order preserved)"""
+    return yaml.dump(data, allow_unicode=True, sort_keys=False, default_flow_style=False)
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    """Write a file via a temporary sibling and rename
+
+    Readers see either the old or the new content, never a partial file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        # mkstemp creates the file as 0600, keep the mode of the file being replaced
+        try:
+            mode = path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
 
 class DatabaseLoader:
     """Loads entity data from YAML files"""
@@ -39,6 +117,8 @@ class DatabaseLoader:
         self.base_path = base_path
         self.schema = {'entities': self.ENTITIES}  # For backward compatibility
         self.errors: list[str] = []
+        # Every file per slug/UUID/GTIN; entity_data only keeps one per slug
+        self.uniqueness = UniquenessIndex()
 
     def load_schema(self) -> bool:
         """Load schema - now just validates structure exists"""
@@ -53,7 +133,7 @@ class DatabaseLoader:
         """Load a YAML file"""
         try:
             with open(path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YAML_LOADER)
         except Exception as e:
             self.errors.append(f"Failed to parse YAML {path}: {e}")
             return None
@@ -67,6 +147,9 @@ class DatabaseLoader:
             # Find all subdirectories (brand folders)
             if base_dir.exists():
                 search_dirs = [d for d in base_dir.iterdir() if d.is_dir()]
+            # Fall back to a flat layout when there are no brand folders
+            if not search_dirs:
+                search_dirs = [base_dir]
         else:
             search_dirs = [base_dir]
 
@@ -87,6 +170,8 @@ class DatabaseLoader:
             for file_path in search_dir.glob("*.yaml"):
                 data = self.load_yaml_file(file_path)
                 if data:
+                    if isinstance(data, dict):
+                        self.uniqueness.add(entity_name, file_path, data)
                     # Store by primary key
                     pk_field = entity_def.get('primary_key', 'slug')
                     key = data.get(pk_field)
@@ -107,3 +192,21 @@ class DatabaseLoader:
             data_cache[entity_name] = self.load_entity_data(entity_name, entity_def)
 
         return data_cache
+
+    def load_model(self) -> Database:
+        """Load all entities into the compact typed model (see model.py)
+
+        Entity types are converted one at a time so the dict representation
+        of only one entity type is held in memory at once.
+        """
+        database = Database()
+        entities = self.schema.get('entities', {}) if self.schema else {}
+
+        for entity_name, add_entity in MODEL_BUILD_ORDER:
+            entity_def = entities.get(entity_name)
+            if entity_def is None:
+                continue
+            for data in self.load_entity_data(entity_name, entity_def).values():
+                add_entity(database, data)
+
+        return database
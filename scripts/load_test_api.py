@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Load test for the read-only HTTP API (api_server.py)
+
+Discovers a mix of request paths from a running server (brands, materials,
+packages by slug and UUID, GTINs, searches), then keeps a number of
+keep-alive connections busy for a fixed duration and reports the request
+rate and latency percentiles.
+
+Usage:
+    python scripts/api_server.py &
+    python scripts/load_test_api.py [--url http://127.0.0.1:8080] [--concurrency 32] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import quote, urlsplit
+
+
+DEFAULT_URL = 'http://127.0.0.1:8080'
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DURATION = 10.0
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client connection"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, path: str) -> tuple[int, bytes]:
+        """Send a GET request, reconnecting if needed
+
+        Returns:
+            Tuple of (status, body).
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode('latin-1'))
+        await self.writer.drain()
+
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(head[0].split(' ', 2)[1])
+        headers = {}
+        for line in head[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(headers.get('content-length', '0')))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[min(int(rank), len(sorted_values)) - 1]
+
+
+async def discover_paths(connection: HttpConnection, max_brands: int = 20) -> list[str]:
+    """Build a request mix from the data served by the server"""
+    status, body = await connection.get('/brands')
+    if status != 200:
+        raise RuntimeError(f"GET /brands returned {status}")
+    brands = json.loads(body)
+
+    rng = random.Random(0)
+    paths = ['/health']
+    for brand in rng.sample(brands, min(max_brands, len(brands))):
+        paths.append(f"/brands/{quote(brand['slug'])}")
+        paths.append(f"/brands/{quote(brand['slug'])}/materials")
+        _, body = await connection.get(f"/brands/{quote(brand['slug'])}/materials")
+        for material in rng.sample(json.loads(body), min(10, len(json.loads(body)))):
+            paths.append(f"/materials/{quote(material['slug'])}")
+            if material.get('uuid'):
+                paths.append(f"/uuid/{material['uuid']}")
+            words = str(material.get('name', '')).split()
+            if words:
+                paths.append(f"/search?q={quote(' '.join(words[:2]))}&limit=10")
+        _, body = await connection.get(f"/brands/{quote(brand['slug'])}/packages")
+        for package in rng.sample(json.loads(body), min(10, len(json.loads(body)))):
+            paths.append(f"/packages/{quote(package['slug'])}")
+            if package.get('gtin'):
+                paths.append(f"/gtin/{package['gtin']}")
+    return paths
+
+
+async def run_load_test(url: str, concurrency: int, duration: float,
+                        paths: Optional[list[str]] = None) -> Dict[str, Any]:
+    """Run the load test against a server
+
+    Returns:
+        Report dict with request counts, requests/sec and latency percentiles in ms.
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname or '127.0.0.1', parts.port or 80
+    if paths is None:
+        connection = HttpConnection(host, port)
+        try:
+            paths = await discover_paths(connection)
+        finally:
+            connection.close()
+
+    latencies: list[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        connection = HttpConnection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                path = rng.choice(paths)
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.get(path)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    connection.close()
+                    continue
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'paths': len(paths),
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'requests_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            **{f"p{pct:g}": round(percentile(latencies, pct) * 1000, 3) for pct in PERCENTILES},
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Load test the read-only HTTP API.")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Server URL (default: {DEFAULT_URL}).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Number of concurrent connections (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, metavar="SECONDS",
+                        help=f"Test duration (default: {DEFAULT_DURATION}).")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_load_test(args.url, args.concurrency, args.duration))
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report['latency_ms']
+        print(f"Requests:     {report['requests']:,} in {report['duration_s']}s "
+              f"({report['concurrency']} connections, {report['paths']} distinct paths)")
+        print(f"Throughput:   {report['requests_per_s']:,} req/s")
+        print("Latency (ms): " + ", ".join(f"{name} {value}" for name, value in latency.items()))
+        print(f"Statuses:     {report['statuses']}, errors: {report['errors']}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
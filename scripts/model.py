@@ -0,0 +1,273 @@
+"""
+Typed in-memory model for the Material Database
+
+Compact alternative to the nested dicts returned by DatabaseLoader. Entities
+are slotted dataclasses, repeated strings (slugs, types, classes, tags,
+property names) are interned and references between entities are resolved
+to the referenced objects.
+"""
+
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+
+def intern_str(value: Any) -> Any:
+    """Intern a string value, leave anything else untouched"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def intern_tuple(values: Any) -> tuple:
+    """Convert a YAML list into a tuple of interned strings"""
+    if not values:
+        return ()
+    return tuple(intern_str(v) for v in values)
+
+
+def intern_keys(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Rebuild a dict with interned keys (and interned string values)"""
+    if not data:
+        return None
+    return {sys.intern(k): intern_str(v) for k, v in data.items()}
+
+
+@dataclass(slots=True)
+class Color:
+    """A color definition (primary or secondary color of a material)"""
+    rgba: Optional[str]
+    lab: Optional[tuple[float, float, float]] = None
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Optional['Color']:
+        if not isinstance(data, dict):
+            return None
+        lab = data.get('color_lab')
+        return cls(
+            rgba=data.get('color_rgba'),
+            lab=tuple(lab) if lab else None,
+        )
+
+
+@dataclass(slots=True)
+class Photo:
+    """A photo of a material"""
+    url: Optional[str]
+    type: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Optional['Photo']:
+        if isinstance(data, str):
+            return cls(url=data)
+        if not isinstance(data, dict):
+            return None
+        return cls(url=data.get('url'), type=intern_str(data.get('type')))
+
+
+@dataclass(slots=True)
+class Brand:
+    uuid: Optional[str]
+    slug: str
+    name: str
+    countries_of_origin: tuple[str, ...] = ()
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class MaterialContainer:
+    uuid: Optional[str]
+    slug: str
+    name: Optional[str]
+    class_: Optional[str]
+    brand: Optional[Brand] = None
+    empty_weight: Optional[float] = None
+    hole_diameter: Optional[float] = None
+    inner_diameter: Optional[float] = None
+    outer_diameter: Optional[float] = None
+    width: Optional[float] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class Material:
+    uuid: Optional[str]
+    slug: str
+    name: str
+    brand: Optional[Brand]
+    class_: Optional[str]
+    type: Optional[str] = None
+    abbreviation: Optional[str] = None
+    primary_color: Optional[Color] = None
+    secondary_colors: tuple[Color, ...] = ()
+    tags: tuple[str, ...] = ()
+    properties: Optional[Dict[str, Any]] = None
+    photos: tuple[Photo, ...] = ()
+    url: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class MaterialPackage:
+    uuid: Optional[str]
+    slug: str
+    class_: Optional[str]
+    material: Optional[Material]
+    container: Optional[MaterialContainer] = None
+    gtin: Optional[int] = None
+    nominal_netto_full_weight: Optional[float] = None
+    filament_diameter: Optional[float] = None
+    nominal_full_length: Optional[float] = None
+    url: Optional[str] = None
+    brand_specific_id: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    @property
+    def brand(self) -> Optional[Brand]:
+        """Packages reference their brand through the material"""
+        return self.material.brand if self.material is not None else None
+
+
+@dataclass(slots=True)
+class Database:
+    """Typed model of the whole database, keyed by slug like the dict model"""
+    brands: Dict[str, Brand] = field(default_factory=dict)
+    materials: Dict[str, Material] = field(default_factory=dict)
+    material_packages: Dict[str, MaterialPackage] = field(default_factory=dict)
+    material_containers: Dict[str, MaterialContainer] = field(default_factory=dict)
+    # (entity_name, entity_slug, field, missing target slug)
+    unresolved: list[tuple[str, str, str, str]] = field(default_factory=list)
+
+    def _resolve(self, target: Dict[str, Any], ref: Any, entity_name: str,
+                 entity_slug: str, field_name: str) -> Any:
+        """Resolve a `{slug: ...}` reference to the target object"""
+        if not isinstance(ref, dict) or not ref.get('slug'):
+            return None
+        obj = target.get(ref['slug'])
+        if obj is None:
+            self.unresolved.append((entity_name, entity_slug, field_name, ref['slug']))
+        return obj
+
+    def add_brand(self, data: Dict[str, Any]) -> Brand:
+        extra = {k: v for k, v in data.items()
+                 if k not in ('uuid', 'slug', 'name', 'countries_of_origin')}
+        brand = Brand(
+            uuid=data.get('uuid'),
+            slug=sys.intern(data['slug']),
+            name=data.get('name'),
+            countries_of_origin=intern_tuple(data.get('countries_of_origin')),
+            extra=intern_keys(extra),
+        )
+        self.brands[brand.slug] = brand
+        return brand
+
+    def add_container(self, data: Dict[str, Any]) -> MaterialContainer:
+        slug = sys.intern(data['slug'])
+        known = ('uuid', 'slug', 'name', 'class', 'brand', 'empty_weight',
+                 'hole_diameter', 'inner_diameter', 'outer_diameter', 'width')
+        container = MaterialContainer(
+            uuid=data.get('uuid'),
+            slug=slug,
+            name=data.get('name'),
+            class_=intern_str(data.get('class')),
+            brand=self._resolve(self.brands, data.get('brand'), 'material_containers', slug, 'brand'),
+            empty_weight=data.get('empty_weight'),
+            hole_diameter=data.get('hole_diameter'),
+            inner_diameter=data.get('inner_diameter'),
+            outer_diameter=data.get('outer_diameter'),
+            width=data.get('width'),
+            extra=intern_keys({k: v for k, v in data.items() if k not in known}),
+        )
+        self.material_containers[slug] = container
+        return container
+
+    def add_material(self, data: Dict[str, Any]) -> Material:
+        slug = sys.intern(data['slug'])
+        known = ('uuid', 'slug', 'name', 'brand', 'class', 'type', 'abbreviation',
+                 'primary_color', 'secondary_colors', 'tags', 'properties', 'photos', 'url')
+        material = Material(
+            uuid=data.get('uuid'),
+            slug=slug,
+            name=data.get('name'),
+            brand=self._resolve(self.brands, data.get('brand'), 'materials', slug, 'brand'),
+            class_=intern_str(data.get('class')),
+            type=intern_str(data.get('type')),
+            abbreviation=intern_str(data.get('abbreviation')),
+            primary_color=Color.from_dict(data.get('primary_color')),
+            secondary_colors=tuple(
+                c for c in map(Color.from_dict, data.get('secondary_colors') or ()) if c is not None
+            ),
+            tags=intern_tuple(data.get('tags')),
+            properties=intern_keys(data.get('properties')),
+            photos=tuple(p for p in map(Photo.from_dict, data.get('photos') or ()) if p is not None),
+            url=data.get('url'),
+            extra=intern_keys({k: v for k, v in data.items() if k not in known}),
+        )
+        self.materials[slug] = material
+        return material
+
+    def add_package(self, data: Dict[str, Any]) -> MaterialPackage:
+        slug = sys.intern(data['slug'])
+        known = ('uuid', 'slug', 'class', 'material', 'container', 'gtin',
+                 'nominal_netto_full_weight', 'filament_diameter',
+                 'nominal_full_length', 'url', 'brand_specific_id')
+        package = MaterialPackage(
+            uuid=data.get('uuid'),
+            slug=slug,
+            class_=intern_str(data.get('class')),
+            material=self._resolve(self.materials, data.get('material'), 'material_packages', slug, 'material'),
+            container=self._resolve(
+                self.material_containers, data.get('container'), 'material_packages', slug, 'container'
+            ),
+            gtin=data.get('gtin'),
+            nominal_netto_full_weight=data.get('nominal_netto_full_weight'),
+            filament_diameter=data.get('filament_diameter'),
+            nominal_full_length=data.get('nominal_full_length'),
+            url=data.get('url'),
+            brand_specific_id=data.get('brand_specific_id'),
+            extra=intern_keys({k: v for k, v in data.items() if k not in known}),
+        )
+        self.material_packages[slug] = package
+        return package
+
+
+def iter_materials(materials: Any) -> Iterable[Any]:
+    """Iterate materials given as a typed Database, a `{slug: material}` mapping or an iterable"""
+    if isinstance(materials, Database):
+        return materials.materials.values()
+    if isinstance(materials, Mapping):
+        return materials.values()
+    return materials
+
+
+def material_fields(material: Any) -> tuple[str, Any, Any, Any, Dict[str, Any]]:
+    """Return (slug, brand slug, type, class, properties) of a dict or typed material"""
+    if isinstance(material, Material):
+        brand = material.brand.slug if material.brand is not None else None
+        return material.slug, brand, material.type, material.class_, material.properties or {}
+
+    brand_ref = material.get('brand')
+    brand = brand_ref.get('slug') if isinstance(brand_ref, dict) else None
+    properties = material.get('properties')
+    return (
+        material.get('slug'), brand, material.get('type'), material.get('class'),
+        properties if isinstance(properties, dict) else {},
+    )
+
+
+# Order in which entity types must be added so references can be resolved
+MODEL_BUILD_ORDER = (
+    ('brands', Database.add_brand),
+    ('material_containers', Database.add_container),
+    ('materials', Database.add_material),
+    ('material_packages', Database.add_package),
+)
+
+
+def build_model(data_cache: Dict[str, Dict[str, Any]]) -> Database:
+    """Build the typed model from a dict model (as returned by load_all_entities)"""
+    database = Database()
+    for entity_name, add_entity in MODEL_BUILD_ORDER:
+        for data in data_cache.get(entity_name, {}).values():
+            add_entity(database, data)
+    return database
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate material detection with MinHash and locality-sensitive hashing
+
+Every material is reduced to a set of features: character trigrams of its
+normalized name (without the brand name, so rebrands still match), its type,
+its quantized primary color and its rounded key properties. Materials whose
+feature sets have a high Jaccard similarity are candidates for the same
+filament entered twice.
+
+Instead of comparing all pairs, each feature set is summarized by a MinHash
+signature which is split into bands; only materials sharing a band bucket
+become candidate pairs, so the pass is near-linear in the number of
+materials as long as buckets stay small. Candidates are verified with the exact Jaccard similarity, and
+their names may only differ in words that do not tell products apart
+(word order, "and", punctuation): a different color word, version, hardness
+or variant marker such as "HS" or "Pro" means a different product.
+
+Pairs from two brands are common for generic names ("PLA Black"), so they are
+only reported when the two brands share many such pairs, as after a rebrand.
+Buckets larger than MAX_BUCKET_SIZE only pair materials of the same brand,
+which bounds the cross-brand pairs, but the pairing within one brand's part
+of such a bucket is still quadratic in its size: a brand with thousands of
+generically named materials of one type and color yields a pair for every two of
+them.
+
+Usage:
+    python scripts/near_duplicates.py [--threshold 0.85] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+import sys
+import unicodedata
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from lib import DatabaseLoader
+
+
+DEFAULT_THRESHOLD = 0.85
+NUM_PERMUTATIONS = 32
+NUM_BANDS = 8
+# Two brands are considered a rebrand when they share this many duplicate
+# pairs, covering at least this share of the smaller brand's materials
+REBRAND_MIN_PAIRS = 5
+REBRAND_MIN_COVERAGE = 0.5
+# Band buckets shared by more materials only pair materials of the same brand:
+# such buckets come from generic names ("PLA Black") sold by many brands,
+# while a rebrand also shares the brand's distinctive names. Within one brand
+# the pairing stays quadratic, see the module docstring
+MAX_BUCKET_SIZE = 32
+# Each RGB channel is quantized to this many levels
+COLOR_LEVELS = 16
+# Properties that tell otherwise similar materials apart, and their rounding step
+PROPERTY_STEPS = {
+    'density': 0.05,
+    'min_print_temperature': 10,
+    'max_print_temperature': 10,
+    'min_bed_temperature': 10,
+    'max_bed_temperature': 10,
+}
+
+# Words that never tell two products apart
+STOP_WORDS = frozenset({'a', 'and', 'in', 'of', 'the', 'to', 'with'})
+SPELLING_VARIANTS = {'grey': 'gray', 'colour': 'color', 'colours': 'colors'}
+# Words (or parts of compound words such as "blackred") that do
+COLOR_WORDS = (
+    'black', 'white', 'red', 'green', 'blue', 'yellow', 'orange', 'purple', 'violet', 'pink',
+    'magenta', 'cyan', 'brown', 'gray', 'silver', 'gold', 'copper', 'bronze', 'beige', 'ivory',
+    'navy', 'teal', 'turquoise', 'olive', 'natural', 'transparent', 'clear',
+)
+VARIANT_WORDS = frozenset({
+    'hs', 'hf', 'pro', 'plus', 'lite', 'max', 'ultra', 'cf', 'gf', 'silk', 'matte', 'glossy',
+    'speed', 'rapid', 'tough', 'recycled', 'dark', 'light',
+})
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+@dataclass(slots=True)
+class DuplicateCluster:
+    """Materials that are likely duplicates of each other"""
+    slugs: list[str]
+    similarity: float  # lowest verified pairwise similarity joining the cluster
+
+
+def normalize_name(name: str, brand_name: Optional[str] = None) -> str:
+    """Lowercase, ASCII-fold and strip punctuation and a leading brand name"""
+    text = unicodedata.normalize('NFKD', str(name).replace('+', ' plus ').replace('&', ' and '))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = ' '.join(SPELLING_VARIANTS.get(word, word) for word in _NON_ALNUM_RE.sub(' ', text).split())
+    if brand_name:
+        brand = normalize_name(brand_name)
+        while brand and text.startswith(brand + ' '):
+            text = text[len(brand) + 1:]
+    return text
+
+
+def is_distinguishing(word: str) -> bool:
+    """Check whether a name word marks a different product when only one name has it"""
+    return (len(word) <= 2 or any(ch.isdigit() for ch in word) or word in VARIANT_WORDS
+            or any(color in word for color in COLOR_WORDS))
+
+
+def names_compatible(a: str, b: str) -> bool:
+    """Check whether two normalized names differ only in non-distinguishing words"""
+    words_a = set(a.split()) - STOP_WORDS
+    words_b = set(b.split()) - STOP_WORDS
+    return not any(is_distinguishing(word) for word in words_a ^ words_b)
+
+
+def _quantized_color(rgba: Any) -> Optional[str]:
+    if not isinstance(rgba, str):
+        return None
+    value = rgba.lstrip('#')
+    if len(value) not in (6, 8):
+        return None
+    try:
+        channels = [int(value[i:i + 2], 16) * COLOR_LEVELS // 256 for i in (0, 2, 4)]
+    except ValueError:
+        return None
+    return '.'.join(str(c) for c in channels)
+
+
+def material_features(material: Dict[str, Any], name: str) -> frozenset[str]:
+    """Get the feature set of a material (dict model) given its normalized name"""
+    padded = "  " + " ".join(word for word in name.split() if word not in STOP_WORDS) + " "
+    features = {f"n:{padded[i:i + 3]}" for i in range(len(padded) - 2)}
+
+    if material.get('type'):
+        features.add(f"t:{str(material['type']).lower()}")
+    primary = material.get('primary_color')
+    color = _quantized_color(primary.get('color_rgba')) if isinstance(primary, dict) else None
+    if color is not None:
+        features.add(f"c:{color}")
+    properties = material.get('properties')
+    if isinstance(properties, dict):
+        for key, step in PROPERTY_STEPS.items():
+            value = properties.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                features.add(f"p:{key}={round(value / step)}")
+    return frozenset(features)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _feature_hashes(feature: str) -> tuple[int, ...]:
+    """NUM_PERMUTATIONS independent 32-bit hashes of a feature from one SHAKE digest"""
+    digest = hashlib.shake_128(feature.encode('utf-8')).digest(4 * NUM_PERMUTATIONS)
+    return struct.unpack(f'<{NUM_PERMUTATIONS}I', digest)
+
+
+class MinHashLSH:
+    """Banded MinHash index returning candidate pairs of similar sets
+
+    With b bands of r rows, two sets with Jaccard similarity s share a band
+    with probability 1 - (1 - s^r)^b; the defaults (8 x 4) make that ~0.93
+    at s = 0.7 and ~0.05 at s = 0.3.
+
+    Each feature is hashed once into NUM_PERMUTATIONS values (one per
+    "permutation"); features repeat a lot across materials, so the hashes
+    are cached and a signature is an element-wise minimum.
+    """
+
+    def __init__(self, bands: int = NUM_BANDS):
+        if NUM_PERMUTATIONS % bands:
+            raise ValueError("NUM_PERMUTATIONS must be a multiple of bands")
+        self.rows = NUM_PERMUTATIONS // bands
+        self.bands = bands
+        self._buckets: list[Dict[tuple[int, ...], list[str]]] = [{} for _ in range(bands)]
+        self._hashes: Dict[str, tuple[int, ...]] = {}
+        self._groups: Dict[str, Optional[str]] = {}
+
+    def signature(self, features: Iterable[str]) -> tuple[int, ...]:
+        """MinHash signature of a feature set"""
+        hashes = []
+        for feature in features:
+            value = self._hashes.get(feature)
+            if value is None:
+                value = self._hashes[feature] = _feature_hashes(feature)
+            hashes.append(value)
+        if not hashes:
+            return (0,) * NUM_PERMUTATIONS
+        return tuple(map(min, zip(*hashes)))
+
+    def add(self, key: str, features: Iterable[str], group: Optional[str] = None) -> None:
+        signature = self.signature(features)
+        self._groups[key] = group
+        for band, buckets in enumerate(self._buckets):
+            start = band * self.rows
+            buckets.setdefault(tuple(signature[start:start + self.rows]), []).append(key)
+
+    def candidates(self, max_bucket_size: Optional[int] = None) -> set[tuple[str, str]]:
+        """Get all (a, b) key pairs, a < b, sharing at least one band bucket
+
+        Args:
+            max_bucket_size: Buckets with more keys only yield pairs from the
+                same group, so a value shared by many groups does not add a
+                quadratic number of pairs. Every pair within one group is
+                still yielded, so a large group costs quadratic time.
+        """
+        pairs = set()
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) < 2:
+                    continue
+                if max_bucket_size is not None and len(keys) > max_bucket_size:
+                    by_group: Dict[Optional[str], list[str]] = {}
+                    for key in keys:
+                        by_group.setdefault(self._groups[key], []).append(key)
+                    groups = by_group.values()
+                else:
+                    groups = [keys]
+                for group_keys in groups:
+                    group_keys = sorted(group_keys)
+                    for i, a in enumerate(group_keys):
+                        for b in group_keys[i + 1:]:
+                            pairs.add((a, b))
+        return pairs
+
+
+def find_duplicate_clusters(materials: Mapping[str, Dict[str, Any]],
+                            brands: Optional[Mapping[str, Dict[str, Any]]] = None,
+                            threshold: float = DEFAULT_THRESHOLD) -> list[DuplicateCluster]:
+    """Find clusters of near-duplicate materials
+
+    Args:
+        materials: Materials by slug (dict model).
+        brands: Brands by slug, used to strip brand names from material names.
+        threshold: Minimum Jaccard similarity of two materials' features.
+
+    Returns:
+        Clusters of two or more materials, largest first.
+    """
+    brands = brands or {}
+    lsh = MinHashLSH()
+    names: Dict[str, str] = {}
+    brand_of: Dict[str, Optional[str]] = {}
+    features: Dict[str, frozenset[str]] = {}
+    colors: Dict[str, Optional[str]] = {}
+    for slug, material in materials.items():
+        brand_ref = material.get('brand')
+        brand_of[slug] = brand_ref.get('slug') if isinstance(brand_ref, dict) else None
+        brand = brands.get(brand_of[slug]) or {}
+        names[slug] = normalize_name(material.get('name') or '', brand.get('name'))
+        features[slug] = material_features(material, names[slug])
+        colors[slug] = next((f for f in features[slug] if f.startswith('c:')), None)
+        lsh.add(slug, features[slug], brand_of[slug])
+
+    edges = []
+    cross_brand: Dict[tuple[str, str], list[tuple[str, str, float]]] = {}
+    for a, b in lsh.candidates(MAX_BUCKET_SIZE):
+        # Differently colored variants of one product line are not duplicates
+        if colors[a] and colors[b] and colors[a] != colors[b]:
+            continue
+        similarity = jaccard(features[a], features[b])
+        if similarity < threshold or not names_compatible(names[a], names[b]):
+            continue
+        if brand_of[a] == brand_of[b]:
+            edges.append((a, b, similarity))
+        else:
+            key = tuple(sorted((str(brand_of[a]), str(brand_of[b]))))
+            cross_brand.setdefault(key, []).append((a, b, similarity))
+
+    brand_sizes: Dict[Optional[str], int] = {}
+    for brand_slug in brand_of.values():
+        brand_sizes[brand_slug] = brand_sizes.get(brand_slug, 0) + 1
+    for pairs in cross_brand.values():
+        smaller = min(brand_sizes[brand_of[pairs[0][0]]], brand_sizes[brand_of[pairs[0][1]]])
+        covered = len({a if brand_of[a] == brand_of[pairs[0][0]] else b for a, b, _ in pairs})
+        if len(pairs) >= REBRAND_MIN_PAIRS and covered >= REBRAND_MIN_COVERAGE * smaller:
+            edges.extend(pairs)
+
+    # Union-find over the verified pairs
+    parent: Dict[str, str] = {}
+
+    def find(key: str) -> str:
+        root = key
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[key] != root:
+            parent[key], key = root, parent[key]
+        return root
+
+    for a, b, _ in edges:
+        parent[find(b)] = find(a)
+
+    members: Dict[str, set[str]] = {}
+    similarity: Dict[str, float] = {}
+    for a, b, pair_similarity in edges:
+        root = find(a)
+        members.setdefault(root, set()).update((a, b))
+        similarity[root] = min(similarity.get(root, 1.0), pair_similarity)
+
+    clusters = [DuplicateCluster(sorted(slugs), round(similarity[root], 3)) for root, slugs in members.items()]
+    clusters.sort(key=lambda c: (-len(c.slugs), -c.similarity, c.slugs))
+    return clusters
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Report clusters of near-duplicate materials.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum Jaccard similarity (default: {DEFAULT_THRESHOLD}).")
+    parser.add_argument("--json", action="store_true", help="Print the clusters as JSON.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    loader = DatabaseLoader(repo_root)
+    if not loader.load_schema():
+        print(f"Error: {loader.errors[0]}", file=sys.stderr)
+        return 1
+    data_cache = loader.load_all_entities()
+    clusters = find_duplicate_clusters(data_cache.get('materials', {}), data_cache.get('brands', {}),
+                                       args.threshold)
+
+    if args.json:
+        print(json.dumps([asdict(c) for c in clusters], indent=2))
+        return 0
+
+    for cluster in clusters:
+        print(f"[{cluster.similarity:.2f}] " + ", ".join(cluster.slugs))
+    print(f"\n✓ {len(clusters)} candidate duplicate clusters "
+          f"({sum(len(c.slugs) for c in clusters)} materials)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
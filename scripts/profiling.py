@@ -0,0 +1,228 @@
+"""
+Per-phase timing and memory instrumentation for the scripts
+
+A Profiler splits a run into named phases and records for each: wall and CPU
+time, files processed, bytes read, throughput, the process's peak RSS so far
+and, optionally, the tracemalloc peak within the phase. Named sub-timers
+(e.g. YAML parsing vs. schema validation inside one phase) and the slowest
+files of the whole run are recorded as well. The report is plain JSON so CI
+can keep trend dashboards.
+
+A disabled profiler (the default of every script) only costs a few
+attribute lookups per phase; per-file call sites check `profiler.enabled`
+before measuring anything.
+
+Usage from a script:
+    parser = argparse.ArgumentParser(...)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, 'my_script')
+    with profiler.phase('load'):
+        ...
+    profiler.finish()
+"""
+
+import heapq
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_SLOWEST_FILES = 20
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Phase:
+    __slots__ = ('name', 'wall', 'cpu', 'files', 'bytes', 'timers', 'peak_rss', 'tracemalloc_peak')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.files = 0
+        self.bytes = 0
+        self.timers: Dict[str, float] = {}
+        self.peak_rss: Optional[int] = None
+        self.tracemalloc_peak: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            'name': self.name,
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'files': self.files,
+            'bytes': self.bytes,
+            'files_per_s': round(self.files / self.wall, 1) if self.wall else None,
+            'bytes_per_s': round(self.bytes / self.wall) if self.wall else None,
+            'timers': {name: round(seconds, 6) for name, seconds in self.timers.items()},
+            'peak_rss_bytes': self.peak_rss,
+        }
+        if self.tracemalloc_peak is not None:
+            result['tracemalloc_peak_bytes'] = self.tracemalloc_peak
+        return result
+
+
+class Profiler:
+    """Records timing and memory statistics per phase of a run"""
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = False,
+                 slowest: int = DEFAULT_SLOWEST_FILES, script: str = '',
+                 output: Optional[str] = None):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.slowest = slowest
+        self.script = script
+        self.output = output  # JSON report path, '-' for stdout
+        self.phases: list[_Phase] = []
+        self._current: Optional[_Phase] = None
+        self._slowest_files: list[tuple[float, str, str, int]] = []  # min-heap
+        self._started_at = datetime.now(timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def disabled(cls) -> 'Profiler':
+        return cls(enabled=False)
+
+    @classmethod
+    def from_args(cls, args: Any, script: str) -> 'Profiler':
+        """Create a profiler from the options added by add_profile_arguments"""
+        if not getattr(args, 'profile', None):
+            return cls.disabled()
+        return cls(trace_memory=args.profile_memory, slowest=args.profile_slowest,
+                   script=script, output=args.profile)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure a phase; phases with the same name are accumulated"""
+        if not self.enabled:
+            yield
+            return
+        phase = next((p for p in self.phases if p.name == name), None)
+        if phase is None:
+            phase = _Phase(name)
+            self.phases.append(phase)
+        previous, self._current = self._current, phase
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            phase.wall += time.perf_counter() - wall
+            phase.cpu += time.process_time() - cpu
+            phase.peak_rss = peak_rss_bytes()
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                phase.tracemalloc_peak = max(phase.tracemalloc_peak or 0, peak)
+            self._current = previous
+
+    def record_file(self, path: Union[Path, str], size: int, seconds: float) -> None:
+        """Count a processed file in the current phase and track the slowest files"""
+        if not self.enabled:
+            return
+        phase_name = ''
+        if self._current is not None:
+            self._current.files += 1
+            self._current.bytes += size
+            phase_name = self._current.name
+        entry = (seconds, str(path), phase_name, size)
+        if len(self._slowest_files) < self.slowest:
+            heapq.heappush(self._slowest_files, entry)
+        elif self.slowest and entry > self._slowest_files[0]:
+            heapq.heapreplace(self._slowest_files, entry)
+
+    @contextmanager
+    def timer(self, timer: str) -> Iterator[None]:
+        """Measure a block into a named sub-timer of the current phase"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(timer, time.perf_counter() - started)
+
+    def add_time(self, timer: str, seconds: float) -> None:
+        """Add to a named sub-timer of the current phase"""
+        if self.enabled and self._current is not None:
+            self._current.timers[timer] = self._current.timers.get(timer, 0.0) + seconds
+
+    def report(self) -> Dict[str, Any]:
+        """The profile as a JSON-serializable dict"""
+        phases = [phase.to_dict() for phase in self.phases]
+        return {
+            'script': self.script,
+            'started_at': self._started_at.isoformat(),
+            'python': sys.version.split()[0],
+            'pid': os.getpid(),
+            'total': {
+                'wall_s': round(time.perf_counter() - self._wall_start, 6),
+                'cpu_s': round(time.process_time() - self._cpu_start, 6),
+                'files': sum(p['files'] for p in phases),
+                'bytes': sum(p['bytes'] for p in phases),
+                'peak_rss_bytes': peak_rss_bytes(),
+            },
+            'phases': phases,
+            'slowest_files': [
+                {'path': path, 'phase': phase, 'seconds': round(seconds, 6), 'bytes': size}
+                for seconds, path, phase, size in sorted(self._slowest_files, reverse=True)
+            ],
+        }
+
+    def summary(self) -> str:
+        """Human readable table of the phases"""
+        lines = [f"{'Phase':<32} {'Wall':>9} {'CPU':>9} {'Files':>8} {'Files/s':>9} {'Peak RSS':>10}"]
+        for phase in self.report()['phases']:
+            rss = f"{phase['peak_rss_bytes'] / 2**20:.0f}MB" if phase['peak_rss_bytes'] else '-'
+            rate = f"{phase['files_per_s']:.0f}" if phase['files'] and phase['files_per_s'] else '-'
+            lines.append(f"{phase['name']:<32} {phase['wall_s']:>8.3f}s {phase['cpu_s']:>8.3f}s "
+                         f"{phase['files']:>8} {rate:>9} {rss:>10}")
+        return '\n'.join(lines)
+
+    def finish(self) -> None:
+        """Write the JSON report (if an output was given) and a summary to stderr"""
+        if not self.enabled:
+            return
+        if self.trace_memory:
+            tracemalloc.stop()
+        report = json.dumps(self.report(), indent=2)
+        if self.output == '-':
+            print(report)
+        elif self.output:
+            path = Path(self.output)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(report + '\n', encoding='utf-8')
+        print(f"\nProfile:\n{self.summary()}", file=sys.stderr)
+
+
+def add_profile_arguments(parser: Any) -> None:
+    """Add --profile, --profile-memory and --profile-slowest to an argument parser"""
+    parser.add_argument("--profile", metavar="FILE",
+                        help="Record per-phase timing and memory statistics as JSON in FILE ('-' for stdout).")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Also record tracemalloc peaks per phase (slows the run down).")
+    parser.add_argument("--profile-slowest", type=int, default=DEFAULT_SLOWEST_FILES, metavar="N",
+                        help=f"Number of slowest files to record (default: {DEFAULT_SLOWEST_FILES}).")
@@ -0,0 +1,103 @@
+"""
+Compact projections of entities for the cross-entity checks
+
+After schema validation the validator only needs a handful of fields of each
+entity: the keys (slug, UUID, GTIN), what UUIDs are derived from (name,
+GTIN, brand), the foreign keys and the inputs of near-duplicate detection.
+An EntityProjection keeps just those in a slotted object with interned
+strings, so the full parsed documents (photos, properties, colors, ...) can
+be dropped as soon as a file is validated.
+
+Projections read like the original dicts through get(), [] and `in`, so the
+checks work on either; nested references such as `brand: {slug: ...}` are
+rebuilt on access.
+
+Usage:
+    data_cache[entity][slug] = project(data)
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from model import intern_str, intern_tuple
+from near_duplicates import PROPERTY_STEPS
+
+# Reference fields ({slug: ...}) stored as the referenced slug
+REFERENCE_FIELDS = ('brand', 'material', 'container')
+
+
+@dataclass(slots=True)
+class EntityProjection:
+    """The fields of an entity the cross-entity checks read"""
+    slug: Optional[str] = None
+    uuid: Optional[str] = None
+    name: Optional[str] = None
+    gtin: Any = None
+    type: Optional[str] = None
+    class_: Optional[str] = None
+    certification_ids: Optional[tuple] = None
+    countries_of_origin: Optional[tuple] = None
+    brand: Optional[str] = None
+    material: Optional[str] = None
+    container: Optional[str] = None
+    color_rgba: Optional[str] = None  # primary_color.color_rgba
+    properties: Optional[Dict[str, Any]] = None  # only the near-duplicate PROPERTY_STEPS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value of a field of the original document, None if not projected"""
+        if key in REFERENCE_FIELDS:
+            slug = getattr(self, key)
+            return {'slug': slug} if slug is not None else default
+        if key == 'primary_color':
+            return {'color_rgba': self.color_rgba} if self.color_rgba is not None else default
+        if key == 'class':
+            key = 'class_'
+        value = getattr(self, key, None) if key in _FIELDS else None
+        if isinstance(value, tuple):
+            return list(value)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+_FIELDS = frozenset(EntityProjection.__dataclass_fields__)
+
+
+def _reference_slug(value: Any) -> Optional[str]:
+    return intern_str(value.get('slug')) if isinstance(value, dict) else None
+
+
+def _optional_tuple(value: Any) -> Optional[tuple]:
+    return intern_tuple(value) if isinstance(value, list) else None
+
+
+def project(data: Dict[str, Any]) -> EntityProjection:
+    """Project a parsed entity document"""
+    primary = data.get('primary_color')
+    properties = data.get('properties')
+    if isinstance(properties, dict):
+        properties = {key: properties[key] for key in PROPERTY_STEPS if key in properties} or None
+    else:
+        properties = None
+    return EntityProjection(
+        slug=intern_str(data.get('slug')),
+        uuid=data.get('uuid'),
+        name=data.get('name'),
+        gtin=data.get('gtin'),
+        type=intern_str(data.get('type')),
+        class_=intern_str(data.get('class')),
+        certification_ids=_optional_tuple(data.get('certification_ids')),
+        countries_of_origin=_optional_tuple(data.get('countries_of_origin')),
+        brand=_reference_slug(data.get('brand')),
+        material=_reference_slug(data.get('material')),
+        container=_reference_slug(data.get('container')),
+        color_rgba=primary.get('color_rgba') if isinstance(primary, dict) else None,
+        properties=properties,
+    )
@@ -0,0 +1,138 @@
+"""
+Columnar property store for vectorized material queries
+
+Turns the `properties` block of every material into NumPy columns (float64,
+NaN where a value is missing) together with categorical codes for brand, type
+and class and a row -> slug map, so analytics filters run as vectorized
+operations instead of Python loops:
+
+    store = build_property_store(loader.load_all_entities()['materials'])
+    rows = (store.category_mask('type', 'PETG')
+            & (store['max_bed_temperature'] <= 80)
+            & (store['density'] < 1.3))
+    slugs = store.select(rows)
+
+Requires the optional `numpy` dependency (pip install -e .[analytics]).
+"""
+
+from typing import Any, Dict, Iterable, Mapping
+
+import numpy as np
+
+from model import Database, iter_materials, material_fields
+
+
+# Numeric material properties stored as columns
+PROPERTY_COLUMNS = (
+    'density',
+    'min_print_temperature',
+    'max_print_temperature',
+    'preheat_temperature',
+    'min_bed_temperature',
+    'max_bed_temperature',
+    'chamber_temperature',
+    'min_chamber_temperature',
+    'max_chamber_temperature',
+    'drying_temperature',
+    'drying_time',
+    'hardness_shore_a',
+    'hardness_shore_d',
+)
+
+# Categorical material fields stored as integer codes (-1 = missing)
+CATEGORY_COLUMNS = ('brand', 'type', 'class')
+
+
+class PropertyStore:
+    """Column-oriented view of material properties"""
+
+    def __init__(self, slugs: list[str], columns: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], categories: Dict[str, list[str]]):
+        self.slugs = slugs
+        self.row_of = {slug: row for row, slug in enumerate(slugs)}
+        self.columns = columns
+        self.missing = {name: np.isnan(column) for name, column in columns.items()}
+        self.codes = codes
+        self.categories = categories
+        self._category_index = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in categories.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Get a numeric property column (NaN where missing)"""
+        return self.columns[name]
+
+    def code_for(self, name: str, value: str) -> int:
+        """Get the categorical code of a value, or -1 if it doesn't occur"""
+        return self._category_index[name].get(value, -1)
+
+    def category_mask(self, name: str, *values: str) -> np.ndarray:
+        """Boolean mask of rows whose categorical field equals one of `values`"""
+        codes = [self.code_for(name, v) for v in values]
+        codes = [c for c in codes if c >= 0]
+        if not codes:
+            return np.zeros(len(self), dtype=bool)
+        return np.isin(self.codes[name], codes)
+
+    def has(self, name: str) -> np.ndarray:
+        """Boolean mask of rows where a numeric property is present"""
+        return ~self.missing[name]
+
+    def select(self, mask: np.ndarray) -> list[str]:
+        """Get slugs of the rows selected by a boolean mask"""
+        return [self.slugs[row] for row in np.flatnonzero(mask)]
+
+    def row(self, slug: str) -> Dict[str, Any]:
+        """Get the stored values of a single material (missing values omitted)"""
+        row = self.row_of[slug]
+        values: Dict[str, Any] = {}
+        for name in CATEGORY_COLUMNS:
+            code = self.codes[name][row]
+            if code >= 0:
+                values[name] = self.categories[name][code]
+        for name, column in self.columns.items():
+            if not self.missing[name][row]:
+                values[name] = float(column[row])
+        return values
+
+
+def build_property_store(materials: Mapping[str, Any] | Database | Iterable[Any]) -> PropertyStore:
+    """Build a PropertyStore from materials
+
+    Args:
+        materials: Dict model `{slug: material dict}`, a typed model Database
+            or any iterable of material dicts / typed materials.
+
+    Returns:
+        The populated PropertyStore.
+    """
+    slugs: list[str] = []
+    values: Dict[str, list[float]] = {name: [] for name in PROPERTY_COLUMNS}
+    raw_categories: Dict[str, list[Any]] = {name: [] for name in CATEGORY_COLUMNS}
+
+    for material in iter_materials(materials):
+        slug, brand, material_type, material_class, properties = material_fields(material)
+        if not slug:
+            continue
+        slugs.append(slug)
+        raw_categories['brand'].append(brand)
+        raw_categories['type'].append(material_type)
+        raw_categories['class'].append(material_class)
+        for name in PROPERTY_COLUMNS:
+            value = properties.get(name)
+            values[name].append(value if isinstance(value, (int, float)) else np.nan)
+
+    columns = {name: np.array(column, dtype=np.float64) for name, column in values.items()}
+
+    codes: Dict[str, np.ndarray] = {}
+    categories: Dict[str, list[str]] = {}
+    for name, raw in raw_categories.items():
+        categories[name] = sorted({v for v in raw if v is not None})
+        index = {value: code for code, value in enumerate(categories[name])}
+        codes[name] = np.array([index.get(v, -1) for v in raw], dtype=np.int32)
+
+    return PropertyStore(slugs, columns, codes, categories)
@@ -0,0 +1,141 @@
+"""
+Reverse-reference index built from foreign key definitions
+
+For every reference an entity makes (e.g. a package's `material.slug`) the
+index records the referrer under the referenced (entity, value), so "which
+packages use this material?" is a dict lookup instead of a scan of every
+package file. The same index answers which entities are not referenced at
+all (orphans) and whether an entity can be deleted safely, and it lets the
+foreign key check test each reference against a set of existing keys.
+
+The foreign key definitions have the shape of
+`JsonSchemaValidator.FOREIGN_KEY_MAPPING`:
+    entity -> [(field_path, target_entity, target_field, is_array, condition)]
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Sequence
+
+ForeignKey = tuple[Sequence[str], str, str, bool, Optional[Callable[[Dict[str, Any]], bool]]]
+
+
+@dataclass(frozen=True, slots=True)
+class Reference:
+    """One foreign key value of an entity"""
+    entity: str
+    key: str
+    field: str  # dotted field path, e.g. 'material.slug'
+    target_entity: str
+    target_field: str
+    value: Any
+
+
+def get_nested_value(data: Dict[str, Any], path: Sequence[str]) -> Any:
+    """Get a nested value from a dictionary using a path, None if missing"""
+    value = data
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+        if value is None:
+            return None
+    return value
+
+
+def hashable_key(value: Any) -> Any:
+    """Get a value usable as a dict key (malformed list/dict values become strings)"""
+    try:
+        hash(value)
+    except TypeError:
+        return str(value)
+    return value
+
+
+class ReferenceIndex:
+    """Index of references by the (entity, value) they point to"""
+
+    def __init__(self, foreign_keys: Mapping[str, Sequence[ForeignKey]]):
+        self.foreign_keys = foreign_keys
+        # (target_entity, target_field, value) -> [Reference]
+        self._by_target: Dict[tuple[str, str, Any], list[Reference]] = {}
+        # (entity, key) -> [Reference], to replace or remove an entity's references
+        self._by_source: Dict[tuple[str, str], list[Reference]] = {}
+
+    def add(self, entity: str, key: str, data: Dict[str, Any]) -> None:
+        """Record the references of an entity, replacing those recorded for the same key"""
+        self.remove(entity, key)
+        references = []
+        for field_path, target_entity, target_field, is_array, condition in self.foreign_keys.get(entity, ()):
+            if condition is not None and not condition(data):
+                continue
+            value = get_nested_value(data, field_path)
+            if value is None:
+                continue
+            values = value if is_array and isinstance(value, list) else [value]
+            field = '.'.join(field_path)
+            for item in values:
+                reference = Reference(entity, key, field, target_entity, target_field, hashable_key(item))
+                references.append(reference)
+                self._by_target.setdefault((target_entity, target_field, reference.value), []).append(reference)
+        if references:
+            self._by_source[(entity, key)] = references
+
+    def remove(self, entity: str, key: str) -> None:
+        """Forget the references of an entity"""
+        for reference in self._by_source.pop((entity, key), ()):
+            target = (reference.target_entity, reference.target_field, reference.value)
+            referrers = self._by_target[target]
+            referrers.remove(reference)
+            if not referrers:
+                del self._by_target[target]
+
+    def referrers(self, target_entity: str, value: Any, target_field: str = 'slug') -> list[Reference]:
+        """Get the references pointing to an entity, e.g. referrers('materials', 'acme-pla')"""
+        return list(self._by_target.get((target_entity, target_field, hashable_key(value)), ()))
+
+    def references_of(self, entity: str, key: str) -> list[Reference]:
+        """Get the references an entity makes"""
+        return list(self._by_source.get((entity, key), ()))
+
+    def targets(self) -> Iterator[tuple[str, str, Any, list[Reference]]]:
+        """Iterate over (target_entity, target_field, value, referrers) of all referenced values"""
+        for (target_entity, target_field, value), referrers in self._by_target.items():
+            yield target_entity, target_field, value, referrers
+
+    def delete_blockers(self, entity: str, data: Dict[str, Any]) -> list[Reference]:
+        """Get the references that would dangle if an entity were deleted
+
+        An entity can be referenced through any of its fields that is the
+        target of a foreign key (usually its slug). References the entity
+        makes to itself do not block its deletion.
+        """
+        key = data.get('slug')
+        target_fields = {fk[2] for fks in self.foreign_keys.values() for fk in fks if fk[1] == entity}
+        blockers = []
+        for target_field in sorted(target_fields):
+            value = data.get(target_field)
+            if value is not None:
+                blockers.extend(r for r in self.referrers(entity, value, target_field)
+                                if (r.entity, r.key) != (entity, key))
+        return blockers
+
+    def orphans(self, data_cache: Mapping[str, Mapping[str, Dict[str, Any]]]) -> Dict[str, list[str]]:
+        """Get the keys of referenceable entities that nothing refers to
+
+        Only entity types that are the target of some foreign key and are
+        present in `data_cache` are reported.
+        """
+        target_fields: Dict[str, set[str]] = {}
+        for fks in self.foreign_keys.values():
+            for _, target_entity, target_field, _, _ in fks:
+                target_fields.setdefault(target_entity, set()).add(target_field)
+
+        orphans = {}
+        for target_entity, fields in target_fields.items():
+            if target_entity not in data_cache:
+                continue
+            orphans[target_entity] = sorted(
+                key for key, data in data_cache[target_entity].items()
+                if not any((target_entity, field, hashable_key(data.get(field))) in self._by_target for field in fields)
+            )
+        return orphans
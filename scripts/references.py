@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Reference queries over the material database
+
+Builds the reverse-reference index (reference_index.py) from the foreign
+keys of JsonSchemaValidator and answers:
+
+    orphans                   entities nothing refers to (brands without
+                              materials, materials without packages, ...)
+    referrers ENTITY SLUG     entities referring to ENTITY/SLUG
+    check-delete ENTITY SLUG  whether ENTITY/SLUG can be deleted without
+                              leaving dangling references (exit code 1 if not)
+
+Entity names are those of the data directories: brands, materials,
+material-packages, material-containers.
+
+Usage:
+    python scripts/references.py orphans [--json]
+    python scripts/references.py referrers materials prusament-pla-galaxy-black
+    python scripts/references.py check-delete material-containers spool-1kg --json
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict
+
+from lib import DatabaseLoader
+from reference_index import ReferenceIndex
+from validate_json_schema import JsonSchemaValidator
+
+
+ENTITY_NAMES = list(JsonSchemaValidator.ENTITY_SCHEMA_MAPPING)
+
+
+def load_references(base_path: Path) -> tuple[Dict[str, Dict[str, Any]], ReferenceIndex]:
+    """Load all entities (keyed by data directory name) and index their references"""
+    loader = DatabaseLoader(base_path)
+    references = ReferenceIndex(JsonSchemaValidator.FOREIGN_KEY_MAPPING)
+    data_cache = {}
+    for entity_name, entity_def in loader.ENTITIES.items():
+        entity_dir = Path(entity_def['directory']).name
+        data_cache[entity_dir] = loader.load_entity_data(entity_name, entity_def)
+        for key, data in data_cache[entity_dir].items():
+            references.add(entity_dir, key, data)
+    return data_cache, references
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error (or if an entity cannot be deleted safely).
+    """
+    parser = argparse.ArgumentParser(description="Query references between entities.")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("orphans", help="List entities nothing refers to.")
+    for command, help_text in (("referrers", "List the entities referring to an entity."),
+                               ("check-delete", "Check that an entity can be deleted safely.")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("entity", choices=ENTITY_NAMES)
+        subparser.add_argument("slug")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    data_cache, references = load_references(repo_root)
+
+    if args.command == "orphans":
+        orphans = references.orphans(data_cache)
+        if args.json:
+            print(json.dumps(orphans, indent=2))
+        else:
+            for entity, keys in orphans.items():
+                print(f"{entity} ({len(keys)}):")
+                for key in keys:
+                    print(f"  {key}")
+        return 0
+
+    data = data_cache[args.entity].get(args.slug)
+    if data is None:
+        print(f"Error: {args.entity}/{args.slug} not found", file=sys.stderr)
+        return 1
+
+    if args.command == "referrers":
+        referrers = references.referrers(args.entity, args.slug)
+        if args.json:
+            print(json.dumps([asdict(r) for r in referrers], indent=2, default=str))
+        else:
+            for reference in referrers:
+                print(f"{reference.entity}/{reference.key} ({reference.field})")
+            print(f"\n✓ {len(referrers)} references to {args.entity}/{args.slug}")
+        return 0
+
+    blockers = references.delete_blockers(args.entity, data)
+    if args.json:
+        print(json.dumps({'safe': not blockers, 'blockers': [asdict(r) for r in blockers]},
+                         indent=2, default=str))
+    elif blockers:
+        print(f"✗ {args.entity}/{args.slug} is still referenced by:")
+        for reference in blockers:
+            print(f"  {reference.entity}/{reference.key} ({reference.field})")
+    else:
+        print(f"✓ {args.entity}/{args.slug} can be deleted safely")
+    return 1 if blockers else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Content-addressed local cache of the OpenPrintTag schemas
+
+Validation needs the schemas and reference data of the OpenPrintTag
+architecture repository at SCHEMA_COMMIT (schema_version.conf) in
+./openprinttag. Instead of cloning the repository for every run, the files
+are kept in a local cache:
+
+    <cache>/objects/ab/abcd...     file contents, named by their SHA-256
+    <cache>/bundles/<commit>.json  the files of a commit: path -> SHA-256
+
+`install` compares ./openprinttag with the bundle of SCHEMA_COMMIT and only
+rewrites it when something differs. The repository is cloned only when the
+cache has no bundle for the commit, and never with --offline. Objects are
+hashed again whenever they are read, so a corrupted cache entry is dropped
+and fetched again instead of being installed.
+
+Bundles can be exported to and imported from tarballs, e.g. to validate on
+a machine without network access. Tarballs of an installed ./openprinttag
+directory (with its .schema-version file) can be imported as well.
+
+A tarball only vouches for itself, so SCHEMA_BUNDLE_HASH in
+schema_version.conf pins the bundle_hash of SCHEMA_COMMIT (`verify` prints
+it): imports must be of SCHEMA_COMMIT and match the pin, and fetched or
+cached bundles that do not match it are rejected. Without a pin a tarball
+is only imported with --trust-unpinned, which trusts its bundle.json (or
+installed tree) as it is and prints the bundle_hash to pin; fetching from
+git works either way.
+
+The cache lives in $SCHEMA_CACHE_DIR, by default
+$XDG_CACHE_HOME/openprinttag-database/schemas (~/.cache/...). The script
+only uses the standard library, so it runs before `make setup`.
+
+Usage:
+    python scripts/schema_cache.py install [--offline] [--refetch]
+    python scripts/schema_cache.py verify
+    python scripts/schema_cache.py export FILE [--commit SHA]
+    python scripts/schema_cache.py import FILE [--trust-unpinned]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional
+
+
+BUNDLE_FORMAT = 1
+# Name of the bundle manifest inside exported tarballs
+BUNDLE_MANIFEST = 'bundle.json'
+VERSION_FILE = '.schema-version'
+# Top-level directories of an installed schema tree
+TREE_DIRS = ('schema', 'data')
+# Directory of the reference data in the architecture repository
+DATA_SPARSE_PATH = 'data'
+
+_COMMIT = re.compile(r'^[0-9a-f]{40}$')
+_HASH = re.compile(r'^[0-9a-f]{64}$')
+_CONFIG_LINE = re.compile(r'^\s*([A-Z_][A-Z0-9_]*)=(.*)$')
+
+
+class SchemaCacheError(Exception):
+    """The cache or a bundle is missing, corrupted or malformed"""
+
+
+@dataclass(frozen=True)
+class SchemaConfig:
+    """The pinned schema source from schema_version.conf"""
+    repo_url: str
+    commit: str
+    sparse_path: str
+    target_dir: str
+    bundle_hash: Optional[str] = None  # expected bundle_hash of commit, if pinned
+
+    @classmethod
+    def load(cls, path: Path) -> 'SchemaConfig':
+        """Parse the shell-style KEY="value" assignments of schema_version.conf"""
+        values = {}
+        for line in path.read_text(encoding='utf-8').splitlines():
+            match = _CONFIG_LINE.match(line)
+            if match:
+                values[match.group(1)] = match.group(2).strip().strip('"\'')
+        try:
+            config = cls(values['SCHEMA_REPO_URL'], values['SCHEMA_COMMIT'].lower(), values['SCHEMA_SPARSE_PATH'],
+                         values['SCHEMA_TARGET_DIR'], values.get('SCHEMA_BUNDLE_HASH', '').lower() or None)
+        except KeyError as e:
+            raise SchemaCacheError(f"{path}: {e.args[0]} is not set") from None
+        if not _COMMIT.match(config.commit):
+            raise SchemaCacheError(f"{path}: SCHEMA_COMMIT must be a full 40 character commit hash")
+        if config.bundle_hash is not None and not _HASH.match(config.bundle_hash):
+            raise SchemaCacheError(f"{path}: SCHEMA_BUNDLE_HASH must be a 64 character SHA-256")
+        return config
+
+    def check_bundle(self, bundle: Dict[str, Any]) -> None:
+        """Reject a bundle of SCHEMA_COMMIT that does not match SCHEMA_BUNDLE_HASH"""
+        if (bundle['commit'] == self.commit and self.bundle_hash is not None
+                and bundle['bundle_hash'] != self.bundle_hash):
+            raise SchemaCacheError(f"The bundle of {self.commit} has bundle_hash {bundle['bundle_hash']}, "
+                                   f"but SCHEMA_BUNDLE_HASH is {self.bundle_hash}")
+
+
+def default_cache_dir() -> Path:
+    if os.environ.get('SCHEMA_CACHE_DIR'):
+        return Path(os.environ['SCHEMA_CACHE_DIR'])
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'openprinttag-database' / 'schemas'
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def bundle_hash(files: Dict[str, str]) -> str:
+    """Hash of a bundle's file list (path and content hash of every file)"""
+    return sha256(''.join(f"{path}\0{digest}\n" for path, digest in sorted(files.items())).encode('utf-8'))
+
+
+def check_tree_path(path: str) -> str:
+    """Validate a relative path inside an installed tree (schema/... or data/...)"""
+    parts = PurePosixPath(path).parts
+    if (len(parts) < 2 or parts[0] not in TREE_DIRS or path.startswith('/')
+            or any(part in ('', '.', '..') for part in parts) or '\\' in path):
+        raise SchemaCacheError(f"Unexpected path in schema bundle: {path!r}")
+    return '/'.join(parts)
+
+
+def read_tree(directory: Path) -> Dict[str, bytes]:
+    """Contents of the schema and data files below a directory, by relative path"""
+    files = {}
+    for tree_dir in TREE_DIRS:
+        root = directory / tree_dir
+        for path in sorted(root.rglob('*')):
+            if path.is_file():
+                files[path.relative_to(directory).as_posix()] = path.read_bytes()
+    return files
+
+
+class SchemaCache:
+    """Content-addressed store of schema files with one bundle per commit"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / digest
+
+    def bundle_path(self, commit: str) -> Path:
+        return self.root / 'bundles' / f"{commit}.json"
+
+    def _write(self, path: Path, content: bytes) -> None:
+        """Write a file atomically (concurrent runs may write the same object)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def store(self, content: bytes) -> str:
+        """Add file content to the store; returns its SHA-256"""
+        digest = sha256(content)
+        if not self.object_path(digest).exists():
+            self._write(self.object_path(digest), content)
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        """Content of an object, verified against its hash; corrupted objects are removed"""
+        path = self.object_path(digest)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            raise SchemaCacheError(f"Object {digest} is missing from the cache") from None
+        if sha256(content) != digest:
+            path.unlink()
+            raise SchemaCacheError(f"Object {digest} is corrupted and was removed from the cache")
+        return content
+
+    def add_bundle(self, commit: str, files: Dict[str, bytes], source: str,
+                   config: Optional[SchemaConfig] = None) -> Dict[str, Any]:
+        """Store the files of a commit and record them as its bundle
+
+        Args:
+            config: Checked with SchemaConfig.check_bundle before the bundle is recorded.
+        """
+        if not _COMMIT.match(commit):
+            raise SchemaCacheError(f"Not a full commit hash: {commit!r}")
+        digests = {check_tree_path(path): self.store(content) for path, content in files.items()}
+        if not any(path.startswith('schema/') for path in digests):
+            raise SchemaCacheError(f"The bundle of {commit} contains no schema files")
+        bundle = {
+            'format': BUNDLE_FORMAT,
+            'commit': commit,
+            'source': source,
+            'bundle_hash': bundle_hash(digests),
+            'files': dict(sorted(digests.items())),
+        }
+        if config is not None:
+            config.check_bundle(bundle)
+        self._write(self.bundle_path(commit), (json.dumps(bundle, indent=2) + '\n').encode('utf-8'))
+        return bundle
+
+    def load_bundle(self, commit: str) -> Optional[Dict[str, Any]]:
+        """The bundle of a commit, None if it is not cached
+
+        Raises:
+            SchemaCacheError: If the bundle file is malformed or does not match its hash.
+        """
+        path = self.bundle_path(commit)
+        try:
+            bundle = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise SchemaCacheError(f"{path} is not valid JSON: {e}") from None
+        if (not isinstance(bundle, dict) or bundle.get('format') != BUNDLE_FORMAT or bundle.get('commit') != commit
+                or not isinstance(bundle.get('files'), dict)
+                or bundle.get('bundle_hash') != bundle_hash(bundle['files'])):
+            raise SchemaCacheError(f"{path} is corrupted")
+        return bundle
+
+    def remove_bundle(self, commit: str) -> None:
+        self.bundle_path(commit).unlink(missing_ok=True)
+
+    def read_bundle(self, bundle: Dict[str, Any]) -> Dict[str, bytes]:
+        """Verified contents of every file of a bundle"""
+        return {path: self.read(digest) for path, digest in bundle['files'].items()}
+
+    def verify(self, commit: str) -> List[str]:
+        """Problems of a cached bundle and its objects"""
+        try:
+            bundle = self.load_bundle(commit)
+        except SchemaCacheError as e:
+            return [str(e)]
+        if bundle is None:
+            return [f"No bundle for {commit} in the cache"]
+        problems = []
+        for digest in sorted(set(bundle['files'].values())):
+            try:
+                self.read(digest)
+            except SchemaCacheError as e:
+                problems.append(str(e))
+        return problems
+
+    def fetch(self, config: SchemaConfig) -> Dict[str, Any]:
+        """Clone the pinned commit (sparse) and add its schema and data files to the cache"""
+        with tempfile.TemporaryDirectory(prefix='openprinttag-schemas-') as tmp:
+            checkout = Path(tmp) / 'repo'
+
+            def git(*args: str) -> str:
+                result = subprocess.run(['git', *args], cwd=checkout if checkout.exists() else tmp,
+                                        capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise SchemaCacheError(f"git {args[0]} failed: {result.stderr.strip()}")
+                return result.stdout.strip()
+
+            print(f"Fetching schemas and data from commit: {config.commit}")
+            git('clone', '--quiet', '--filter=blob:none', '--sparse', '--no-checkout', config.repo_url, str(checkout))
+            git('fetch', '--quiet', 'origin', config.commit)
+            git('checkout', '--quiet', config.commit)
+            git('sparse-checkout', 'set', config.sparse_path, DATA_SPARSE_PATH)
+            if git('rev-parse', 'HEAD') != config.commit:
+                raise SchemaCacheError(f"Checked out {git('rev-parse', 'HEAD')} instead of {config.commit}")
+
+            files = {}
+            for prefix, source_dir in (('schema', config.sparse_path), ('data', DATA_SPARSE_PATH)):
+                root = checkout / source_dir
+                for path in sorted(root.rglob('*')) if root.is_dir() else ():
+                    if path.is_file():
+                        files[f"{prefix}/{path.relative_to(root).as_posix()}"] = path.read_bytes()
+        return self.add_bundle(config.commit, files, config.repo_url, config)
+
+    def export(self, commit: str, tarball: Path) -> Dict[str, Any]:
+        """Write a bundle and its files to a gzipped tarball"""
+        bundle = self.load_bundle(commit)
+        if bundle is None:
+            raise SchemaCacheError(f"No bundle for {commit} in the cache")
+        members = {BUNDLE_MANIFEST: (json.dumps(bundle, indent=2) + '\n').encode('utf-8')}
+        members.update(self.read_bundle(bundle))
+        tarball.parent.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(tarball, 'w:gz') as tar:
+            for name, content in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(content))
+        return bundle
+
+    def import_tarball(self, tarball: Path, config: SchemaConfig, trust_unpinned: bool = False) -> Dict[str, Any]:
+        """Add the bundle in a tarball to the cache
+
+        The tarball holds either an exported bundle (bundle.json, whose hashes
+        every file must match) or an installed tree with its .schema-version
+        file, optionally inside a single top-level directory. Either way it
+        must be the bundle of config.commit matching config.bundle_hash, or,
+        when no bundle_hash is pinned and `trust_unpinned` is set, any bundle
+        of config.commit.
+        """
+        if config.bundle_hash is None and not trust_unpinned:
+            raise SchemaCacheError(f"Cannot verify {tarball}: SCHEMA_BUNDLE_HASH is not set in schema_version.conf "
+                                   f"(pass --trust-unpinned to import it anyway)")
+        try:
+            with tarfile.open(tarball, 'r:*') as tar:
+                members = {}
+                for member in tar.getmembers():
+                    if member.isdir():
+                        continue
+                    if not member.isfile():
+                        raise SchemaCacheError(f"Unexpected {member.name!r} in {tarball}: not a regular file")
+                    members[member.name.removeprefix('./')] = tar.extractfile(member).read()
+        except (OSError, tarfile.TarError) as e:
+            raise SchemaCacheError(f"Cannot read {tarball}: {e}") from None
+
+        top_dirs = {name.split('/', 1)[0] for name in members}
+        if len(top_dirs) == 1 and '/' in next(iter(members), '') and top_dirs.isdisjoint(TREE_DIRS):
+            members = {name.split('/', 1)[1]: content for name, content in members.items()}
+
+        if BUNDLE_MANIFEST in members:
+            try:
+                bundle = json.loads(members.pop(BUNDLE_MANIFEST))
+                commit, expected = bundle['commit'], bundle['files']
+            except (ValueError, KeyError, TypeError):
+                raise SchemaCacheError(f"{tarball}: {BUNDLE_MANIFEST} is malformed") from None
+            if bundle.get('bundle_hash') != bundle_hash(expected):
+                raise SchemaCacheError(f"{tarball}: the file list does not match its bundle_hash")
+            members.pop(VERSION_FILE, None)
+            if set(members) != set(expected):
+                raise SchemaCacheError(f"{tarball}: the files do not match {BUNDLE_MANIFEST}")
+            for name, content in members.items():
+                if sha256(content) != expected[name]:
+                    raise SchemaCacheError(f"{tarball}: {name} does not match its hash in {BUNDLE_MANIFEST}")
+            source = bundle.get('source', str(tarball))
+        elif VERSION_FILE in members:
+            commit = members.pop(VERSION_FILE).decode('utf-8', 'replace').strip().lower()
+            source = str(tarball)
+        else:
+            raise SchemaCacheError(f"{tarball} contains neither {BUNDLE_MANIFEST} nor {VERSION_FILE}")
+        if commit != config.commit:
+            raise SchemaCacheError(f"{tarball} holds the schemas of {commit}, not of SCHEMA_COMMIT {config.commit}")
+        return self.add_bundle(commit, members, source, config)
+
+    def install(self, bundle: Dict[str, Any], target: Path) -> bool:
+        """Make `target` hold exactly the files of a bundle
+
+        Returns:
+            False if it already did, True if it was (re)written.
+        """
+        commit = bundle['commit']
+        try:
+            installed_commit = (target / VERSION_FILE).read_text(encoding='utf-8').strip()
+        except OSError:
+            installed_commit = None
+        if installed_commit == commit:
+            installed = {path: sha256(content) for path, content in read_tree(target).items()}
+            if installed == bundle['files']:
+                return False
+
+        files = self.read_bundle(bundle)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=target.parent, prefix=f'.{target.name}.'))
+        try:
+            tmp.chmod(0o755)
+            for path, content in files.items():
+                (tmp / path).parent.mkdir(parents=True, exist_ok=True)
+                (tmp / path).write_bytes(content)
+            (tmp / VERSION_FILE).write_text(f"{commit}\n", encoding='utf-8')
+            # Swap the directories so a failed install leaves the old tree in place
+            old = target.with_name(f'.{target.name}.old-{os.getpid()}')
+            if target.exists():
+                target.rename(old)
+            tmp.rename(target)
+            shutil.rmtree(old, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return True
+
+
+def install(config: SchemaConfig, cache: SchemaCache, target: Path, offline: bool = False,
+            refetch: bool = False) -> str:
+    """Install the pinned schemas, fetching them only if the cache cannot provide them
+
+    Returns:
+        What happened: 'up-to-date', 'installed' (from the cache) or 'fetched'.
+    """
+    bundle = None
+    if refetch:
+        cache.remove_bundle(config.commit)
+    else:
+        try:
+            bundle = cache.load_bundle(config.commit)
+            if bundle is not None:
+                config.check_bundle(bundle)
+                return 'installed' if cache.install(bundle, target) else 'up-to-date'
+        except SchemaCacheError as e:
+            print(f"  {e}", file=sys.stderr)
+            cache.remove_bundle(config.commit)
+    if offline:
+        raise SchemaCacheError(f"The schemas of {config.commit} are not cached; "
+                               f"run without --offline or import a bundle")
+    cache.install(cache.fetch(config), target)
+    return 'fetched'
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Install the pinned OpenPrintTag schemas from a local cache.")
+    parser.add_argument("--cache-dir", type=Path, default=default_cache_dir(),
+                        help="Cache directory (default: $SCHEMA_CACHE_DIR or ~/.cache/openprinttag-database/schemas).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    install_parser = subparsers.add_parser("install", help="Install the schemas of SCHEMA_COMMIT.")
+    install_parser.add_argument("--offline", action="store_true", help="Fail instead of fetching missing schemas.")
+    install_parser.add_argument("--refetch", action="store_true", help="Fetch the schemas even if they are cached.")
+    subparsers.add_parser("verify", help="Verify the cached and the installed schemas of SCHEMA_COMMIT.")
+    export_parser = subparsers.add_parser("export", help="Write a cached bundle to a tarball.")
+    export_parser.add_argument("file", type=Path)
+    export_parser.add_argument("--commit", help="Commit to export (default: SCHEMA_COMMIT).")
+    import_parser = subparsers.add_parser("import", help="Add the bundle of SCHEMA_COMMIT from a tarball to the cache.")
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument("--trust-unpinned", action="store_true",
+                               help="Import the tarball as it is when SCHEMA_BUNDLE_HASH is not set.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    cache = SchemaCache(args.cache_dir)
+    try:
+        config = SchemaConfig.load(repo_root / 'schema_version.conf')
+        target = repo_root / config.target_dir
+
+        if args.command == "install":
+            result = install(config, cache, target, args.offline, args.refetch)
+            messages = {'up-to-date': "are up to date", 'installed': "installed from the cache",
+                        'fetched': "fetched and cached"}
+            print(f"✓ Schemas and data of {config.commit[:12]} {messages[result]}")
+        elif args.command == "verify":
+            problems = cache.verify(config.commit)
+            bundle = cache.load_bundle(config.commit) if not problems else None
+            if bundle is not None:
+                try:
+                    config.check_bundle(bundle)
+                except SchemaCacheError as e:
+                    problems.append(str(e))
+                installed = {path: sha256(content) for path, content in read_tree(target).items()}
+                if installed != bundle['files']:
+                    problems.append(f"{target} does not match the bundle of {config.commit}")
+            if problems:
+                print(f"✗ {len(problems)} problems:", file=sys.stderr)
+                for problem in problems:
+                    print(f"  - {problem}", file=sys.stderr)
+                return 1
+            print(f"✓ Cached and installed schemas of {config.commit[:12]} are intact "
+                  f"({len(bundle['files'])} files)")
+            if config.bundle_hash is None:
+                print(f"  Pin them in schema_version.conf: SCHEMA_BUNDLE_HASH=\"{bundle['bundle_hash']}\"")
+        elif args.command == "export":
+            bundle = cache.export(args.commit or config.commit, args.file)
+            print(f"✓ Exported {len(bundle['files'])} files of {bundle['commit'][:12]} to {args.file}")
+        else:
+            bundle = cache.import_tarball(args.file, config, args.trust_unpinned)
+            print(f"✓ Imported {len(bundle['files'])} files of {bundle['commit'][:12]}")
+            if config.bundle_hash is None:
+                print(f"  Not verified against a pin; once checked, pin them in schema_version.conf: "
+                      f"SCHEMA_BUNDLE_HASH=\"{bundle['bundle_hash']}\"")
+    except (SchemaCacheError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
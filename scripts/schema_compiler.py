@@ -0,0 +1,801 @@
+#!/usr/bin/env python3
+"""
+Compiles the OpenPrintTag JSON schemas into Python validation functions
+
+jsonschema walks the schema tree for every instance: it looks up each keyword
+in a dict, creates evolved validator objects on every `descend` and resolves
+`$ref`s through the registry each time. The compiler does that walk once and
+emits one Python function per subschema with the keyword checks inlined,
+`$ref`s bound to the target's function and patterns precompiled.
+
+The generated functions reproduce the errors of `iter_errors` (the instance
+path and message of every top-level error) of the installed jsonschema
+version, see `parity` below. Keywords the compiler does not implement
+(`unevaluatedProperties`, `$dynamicRef`, ...) raise UnsupportedSchema and the
+validator falls back to jsonschema for that schema.
+
+The compiler maps jsonschema's private keyword functions (`_keywords`,
+`_legacy_keywords`) to emitters, as laid out in jsonschema 4.26; if they are
+missing, importing or running it raises ImportError or AttributeError and
+validate_json_schema.py validates everything with jsonschema. jsonschema is
+pinned to 4.26.x for that reason, and validate_json_schema.py only uses the
+compiled validators with --compiled-schemas.
+
+Generated modules are cached in build/compiled-schemas/<SCHEMA_COMMIT>/ and
+reused as long as the digest of the schema files, the compiler version and
+the jsonschema version match.
+
+Usage:
+    python scripts/schema_compiler.py build
+    python scripts/schema_compiler.py parity [--mutations 20] [--seed 0]
+"""
+
+import argparse
+import copy
+import datetime
+import hashlib
+import numbers
+import random
+import re
+import sys
+from dataclasses import dataclass
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from jsonschema import FormatChecker, validators
+from jsonschema._legacy_keywords import (
+    additionalItems,
+    contains_draft6_draft7,
+    dependencies_draft4_draft6_draft7,
+    items_draft6_draft7_draft201909,
+)
+from jsonschema import _keywords, _types
+from jsonschema._utils import equal, extras_msg, uniq
+from jsonschema.exceptions import FormatError
+from jsonschema_specifications import REGISTRY as SPECIFICATIONS
+from referencing.exceptions import Unresolvable
+import referencing.jsonschema
+
+from lib import YAML_LOADER, write_atomic
+
+
+# Bump when the generated code changes so cached modules are rebuilt
+COMPILER_VERSION = 1
+CACHE_DIR = Path('build') / 'compiled-schemas'
+
+TYPE_TESTS = {
+    'array': 'isinstance(x, list)',
+    'boolean': 'isinstance(x, bool)',
+    'integer': '(isinstance(x, int) and not isinstance(x, bool) or isinstance(x, float) and x.is_integer())',
+    'null': 'x is None',
+    'number': '(isinstance(x, Number) and not isinstance(x, bool))',
+    'object': 'isinstance(x, dict)',
+    'string': 'isinstance(x, str)',
+}
+
+
+# Functions of the boolean schemas, part of every generated module
+PRELUDE = '''\
+def _true(x, path, errors):
+    pass
+
+
+def _false(x, path, errors):
+    errors.append((path, 'False schema does not allow ' + repr(x)))
+
+'''
+
+
+class UnsupportedSchema(Exception):
+    """The schema uses something the compiler does not implement"""
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledError:
+    """A validation error with the attributes the validator reads from jsonschema's errors"""
+    absolute_path: Tuple[Any, ...]
+    message: str
+
+
+class CompiledValidator:
+    """Drop-in for a jsonschema validator backed by a generated function"""
+
+    def __init__(self, validate: Callable[[Any], List[Tuple[Tuple[Any, ...], str]]], schema_filename: str):
+        self._validate = validate
+        self.schema_filename = schema_filename
+
+    def iter_errors(self, instance: Any) -> List[CompiledError]:
+        return [CompiledError(path, message) for path, message in self._validate(instance)]
+
+    def is_valid(self, instance: Any) -> bool:
+        return not self._validate(instance)
+
+
+def _format_error(format_checker: FormatChecker) -> Callable[[Any, str], Optional[str]]:
+    def format_error(instance: Any, format: str) -> Optional[str]:
+        try:
+            format_checker.check(instance, format)
+        except FormatError as error:
+            return error.message
+        return None
+    return format_error
+
+
+def _is_valid(function: Callable, instance: Any) -> bool:
+    errors: list = []
+    function(instance, (), errors)
+    return not errors
+
+
+def _not_multiple(instance: Any, divisor: float) -> bool:
+    # Same arithmetic as jsonschema's multipleOf for float divisors
+    quotient = instance / divisor
+    try:
+        return int(quotient) != quotient
+    except OverflowError:
+        from fractions import Fraction
+        return (Fraction(instance) / Fraction(divisor)).denominator != 1
+
+
+def _additional_properties_message(extras: List[Any], patterns: Optional[List[str]]) -> str:
+    if patterns is not None:
+        verb = "does" if len(extras) == 1 else "do"
+        joined = ", ".join(repr(each) for each in sorted(extras))
+        return f"{joined} {verb} not match any of the regexes: {', '.join(repr(p) for p in sorted(patterns))}"
+    return "Additional properties are not allowed (%s %s unexpected)" % extras_msg(sorted(extras, key=str))
+
+
+def runtime_namespace(format_checker: FormatChecker) -> Dict[str, Any]:
+    """Globals the generated modules are executed with"""
+    return {
+        're': re,
+        'Number': numbers.Number,
+        'equal': equal,
+        'uniq': uniq,
+        'extras_msg': extras_msg,
+        'format_error': _format_error(format_checker),
+        'is_valid': _is_valid,
+        'not_multiple': _not_multiple,
+        'additional_properties_message': _additional_properties_message,
+    }
+
+
+def _specification(cls: Any) -> Any:
+    return referencing.jsonschema.specification_with(
+        cls.ID_OF(cls.META_SCHEMA) or 'urn:unknown-dialect',
+        default=referencing.Specification.OPAQUE,
+    )
+
+
+class SchemaCompiler:
+    """Generates the Python source of a validation module for one schema"""
+
+    def __init__(self, registry: Any, format_checker: FormatChecker):
+        self.registry = SPECIFICATIONS.combine(registry)
+        self.format_checker = format_checker
+
+    def compile(self, schema: Any) -> str:
+        """Python source defining `validate(instance) -> [(path, message), ...]`"""
+        self._names: Dict[Tuple[int, Any], str] = {}
+        self._keep: List[Any] = []  # keeps compiled subschemas alive so their ids stay unique
+        self._queue: List[Tuple[str, Any, Any, Any]] = []
+        self._constants: List[str] = []
+        self._constant_names: Dict[str, str] = {}
+        functions: List[str] = []
+
+        cls = validators.validator_for(schema, default=validators.Draft202012Validator)
+        resolver = self.registry.resolver_with_root(_specification(cls).create_resource(schema))
+        root = self._function(schema, resolver, cls, descended=False)
+        while self._queue:
+            name, subschema, subresolver, subcls = self._queue.pop(0)
+            functions.append(self._emit_function(name, subschema, subresolver, subcls))
+
+        lines = [PRELUDE] + self._constants + [''] + functions + [
+            '',
+            'def validate(instance):',
+            '    errors = []',
+            f'    {root}(instance, (), errors)',
+            '    return errors',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def _constant(self, value: Any, compiled_pattern: bool = False) -> str:
+        if compiled_pattern:
+            literal = f"re.compile({value!r})"
+        elif isinstance(value, frozenset):
+            literal = f"frozenset({sorted(value, key=repr)!r})"  # set order varies between processes
+        else:
+            literal = repr(value)
+        name = self._constant_names.get(literal)
+        if name is None:
+            name = f"_C{len(self._constant_names)}"
+            self._constant_names[literal] = name
+            self._constants.append(f"{name} = {literal}")
+        return name
+
+    def _function(self, schema: Any, resolver: Any, cls: Any, descended: bool = True) -> str:
+        """Name of the function validating against schema, queued for emission if new"""
+        if schema is True:
+            return '_true'
+        if schema is False:
+            return '_false'
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"schema of type {type(schema).__name__}")
+        cls = validators.validator_for(schema, default=cls)
+        key = (id(schema), cls)
+        name = self._names.get(key)
+        if name is None:
+            name = f"_s{len(self._names)}"
+            self._names[key] = name
+            self._keep.append(schema)
+            if descended:
+                # Like Validator.descend, subschemas with an $id change the base URI
+                resolver = resolver.in_subresource(_specification(cls).create_resource(schema))
+            self._queue.append((name, schema, resolver, cls))
+        return name
+
+    def _emit_function(self, name: str, schema: Dict[str, Any], resolver: Any, cls: Any) -> str:
+        if cls.TYPE_CHECKER is not _types.draft202012_type_checker:
+            raise UnsupportedSchema(f"type checker of {cls.__name__}")
+        lines = [f"def {name}(x, path, errors):"]
+        for keyword, value in cls._APPLICABLE_VALIDATORS(schema):
+            function = cls.VALIDATORS.get(keyword)
+            if function is None:
+                continue  # annotations and unknown keywords are ignored, as in jsonschema
+            emit = KEYWORD_EMITTERS.get(function)
+            if emit is None:
+                raise UnsupportedSchema(f"keyword '{keyword}'")
+            body = emit(self, value, schema, resolver, cls)
+            lines.extend('    ' + line for line in body)
+        if len(lines) == 1:
+            lines.append('    pass')
+        return '\n'.join(lines) + '\n'
+
+    def _sub(self, schema: Any, resolver: Any, cls: Any) -> str:
+        return self._function(schema, resolver, cls)
+
+    @staticmethod
+    def _call(function: str, value: str, key: str) -> str:
+        """Call of a subschema function on value, a child of x at key
+
+        Like jsonschema's descend, errors of a False subschema get the
+        parent's path.
+        """
+        path = 'path' if function == '_false' else f"path + ({key},)"
+        return f"{function}({value}, {path}, errors)"
+
+    # Keyword emitters: each returns the body lines for one keyword, operating
+    # on the instance `x` at `path` and appending (path, message) to `errors`.
+
+    def _ref(self, ref, schema, resolver, cls):
+        try:
+            resolved = resolver.lookup(ref)
+        except Unresolvable as error:
+            raise UnsupportedSchema(f"unresolvable $ref {ref!r}: {error}")
+        target = self._function(resolved.contents, resolved.resolver, cls, descended=False)
+        return [f"{target}(x, path, errors)"]
+
+    def _type(self, types, schema, resolver, cls):
+        types = [types] if isinstance(types, str) else types
+        unknown = [t for t in types if t not in TYPE_TESTS]
+        if unknown:
+            raise UnsupportedSchema(f"unknown type {unknown[0]!r}")
+        reprs = ", ".join(repr(t) for t in types)
+        test = ' or '.join(TYPE_TESTS[t] for t in types) or 'False'
+        return [f"if not ({test}):",
+                f"    errors.append((path, repr(x) + {' is not of type ' + reprs!r}))"]
+
+    def _enum(self, enums, schema, resolver, cls):
+        message = f"' is not one of ' + {repr(enums)!r}"
+        if enums and all(isinstance(each, str) for each in enums):
+            allowed = self._constant(frozenset(enums))
+            return [f"if not isinstance(x, str) or x not in {allowed}:",
+                    f"    errors.append((path, repr(x) + {message}))"]
+        values = self._constant(enums)
+        return [f"if all(not equal(each, x) for each in {values}):",
+                f"    errors.append((path, repr(x) + {message}))"]
+
+    def _const(self, const, schema, resolver, cls):
+        return [f"if not equal(x, {self._constant(const)}):",
+                f"    errors.append((path, {repr(const) + ' was expected'!r}))"]
+
+    def _properties(self, properties, schema, resolver, cls):
+        lines = []
+        for prop, subschema in properties.items():
+            if subschema is True:
+                continue
+            function = self._sub(subschema, resolver, cls)
+            lines += [f"    if {prop!r} in x:",
+                      f"        {self._call(function, f'x[{prop!r}]', repr(prop))}"]
+        return ["if isinstance(x, dict):"] + lines if lines else []
+
+    def _required(self, required, schema, resolver, cls):
+        lines = ["if isinstance(x, dict):"]
+        for prop in required:
+            lines += [f"    if {prop!r} not in x:",
+                      f"        errors.append((path, {f'{prop!r} is a required property'!r}))"]
+        return lines if len(lines) > 1 else []
+
+    def _extras(self, schema) -> str:
+        """Generator expression of the properties of x not covered by properties/patternProperties"""
+        known = self._constant(frozenset(schema.get('properties', {})))
+        patterns = "|".join(schema.get('patternProperties', {}))
+        if patterns:
+            pattern = self._constant(patterns, compiled_pattern=True)
+            return f"[k for k in x if k not in {known} and not {pattern}.search(k)]"
+        return f"[k for k in x if k not in {known}]"
+
+    def _additional_properties(self, additional, schema, resolver, cls):
+        if isinstance(additional, dict):
+            function = self._sub(additional, resolver, cls)
+            return ["if isinstance(x, dict):",
+                    f"    for k in {self._extras(schema)}:",
+                    f"        {self._call(function, 'x[k]', 'k')}"]
+        if additional:
+            return []
+        patterns = list(schema['patternProperties']) if 'patternProperties' in schema else None
+        return ["if isinstance(x, dict):",
+                f"    extras = {self._extras(schema)}",
+                "    if extras:",
+                f"        errors.append((path, additional_properties_message(extras, {self._constant(patterns)})))"]
+
+    def _pattern_properties(self, pattern_properties, schema, resolver, cls):
+        lines = []
+        for pattern, subschema in pattern_properties.items():
+            function = self._sub(subschema, resolver, cls)
+            compiled = self._constant(pattern, compiled_pattern=True)
+            lines += ["    for k, v in x.items():",
+                      f"        if {compiled}.search(k):",
+                      f"            {self._call(function, 'v', 'k')}"]
+        return ["if isinstance(x, dict):"] + lines if lines else []
+
+    def _property_names(self, property_names, schema, resolver, cls):
+        function = self._sub(property_names, resolver, cls)
+        return ["if isinstance(x, dict):",
+                "    for k in x:",
+                f"        {function}(k, path, errors)"]
+
+    def _prefix(self, subschemas, resolver, cls) -> List[str]:
+        lines = []
+        for index, subschema in enumerate(subschemas):
+            function = self._sub(subschema, resolver, cls)
+            lines += [f"    if len(x) > {index}:",
+                      f"        {self._call(function, f'x[{index}]', str(index))}"]
+        return lines
+
+    def _prefix_items(self, prefix_items, schema, resolver, cls):
+        lines = self._prefix(prefix_items, resolver, cls)
+        return ["if isinstance(x, list):"] + lines if lines else []
+
+    def _items(self, items, schema, resolver, cls):
+        prefix = len(schema.get('prefixItems', []))
+        if items is False:
+            word = "items" if prefix != 1 else "item"
+            return [f"if isinstance(x, list) and len(x) > {prefix}:",
+                    f"    extra = len(x) - {prefix}",
+                    f"    rest = x[{prefix}:] if extra != 1 else x[{prefix}]",
+                    f"    errors.append((path, {f'Expected at most {prefix} {word} but found '!r} + str(extra) + ' extra: ' + repr(rest)))"]
+        function = self._sub(items, resolver, cls)
+        if function == '_true':
+            return []
+        return ["if isinstance(x, list):",
+                f"    for i in range({prefix}, len(x)):",
+                f"        {self._call(function, 'x[i]', 'i')}"]
+
+    def _legacy_items(self, items, schema, resolver, cls):
+        if isinstance(items, list):
+            lines = self._prefix(items, resolver, cls)
+            return ["if isinstance(x, list):"] + lines if lines else []
+        function = self._sub(items, resolver, cls)
+        if function == '_true':
+            return []
+        return ["if isinstance(x, list):",
+                "    for i, item in enumerate(x):",
+                f"        {self._call(function, 'item', 'i')}"]
+
+    def _additional_items(self, additional, schema, resolver, cls):
+        items = schema.get('items', {})
+        if isinstance(items, dict):
+            return []
+        if not isinstance(items, list):
+            raise UnsupportedSchema("additionalItems next to a boolean items")
+        count = len(items)
+        if isinstance(additional, dict):
+            function = self._sub(additional, resolver, cls)
+            return ["if isinstance(x, list):",
+                    f"    for i in range({count}, len(x)):",
+                    f"        {self._call(function, 'x[i]', 'i')}"]
+        if additional:
+            return []
+        return [f"if isinstance(x, list) and len(x) > {count}:",
+                f"    errors.append((path, 'Additional items are not allowed (%s %s unexpected)' % extras_msg(x[{count}:])))"]
+
+    def _contains(self, contains, schema, resolver, cls):
+        function = self._sub(contains, resolver, cls)
+        min_contains = schema.get('minContains', 1)
+        max_contains = repr(schema['maxContains']) if 'maxContains' in schema else 'len(x)'
+        return ["if isinstance(x, list):",
+                "    matches = 0",
+                f"    max_contains = {max_contains}",
+                "    for item in x:",
+                f"        if is_valid({function}, item):",
+                "            matches += 1",
+                "            if matches > max_contains:",
+                "                errors.append((path, 'Too many items match the given schema (expected at most ' + str(max_contains) + ')'))",
+                "                break",
+                "    else:",
+                f"        if matches < {min_contains!r}:",
+                "            if not matches:",
+                "                errors.append((path, repr(x) + ' does not contain items matching the given schema'))",
+                "            else:",
+                f"                errors.append((path, {f'Too few items match the given schema (expected at least {min_contains} but only '!r} + str(matches) + ' matched)'))"]
+
+    def _legacy_contains(self, contains, schema, resolver, cls):
+        function = self._sub(contains, resolver, cls)
+        return [f"if isinstance(x, list) and not any(is_valid({function}, item) for item in x):",
+                "    errors.append((path, 'None of ' + repr(x) + ' are valid under the given schema'))"]
+
+    def _multiple_of(self, divisor, schema, resolver, cls):
+        test = f"not_multiple(x, {divisor!r})" if isinstance(divisor, float) else f"x % {divisor!r}"
+        return [f"if {TYPE_TESTS['number']} and {test}:",
+                f"    errors.append((path, repr(x) + {f' is not a multiple of {divisor}'!r}))"]
+
+    def _unique_items(self, unique, schema, resolver, cls):
+        if not unique:
+            return []
+        return ["if isinstance(x, list) and not uniq(x):",
+                "    errors.append((path, repr(x) + ' has non-unique elements'))"]
+
+    def _pattern(self, pattern, schema, resolver, cls):
+        compiled = self._constant(pattern, compiled_pattern=True)
+        return [f"if isinstance(x, str) and not {compiled}.search(x):",
+                f"    errors.append((path, repr(x) + {' does not match ' + repr(pattern)!r}))"]
+
+    def _format(self, format, schema, resolver, cls):
+        if self.format_checker is None or format not in self.format_checker.checkers:
+            return []
+        return [f"message = format_error(x, {format!r})",
+                "if message is not None:",
+                "    errors.append((path, message))"]
+
+    def _dependent_required(self, dependent, schema, resolver, cls):
+        lines = ["if isinstance(x, dict):"]
+        for prop, dependencies in dependent.items():
+            lines.append(f"    if {prop!r} in x:")
+            for each in dependencies:
+                lines += [f"        if {each!r} not in x:",
+                          f"            errors.append((path, {f'{each!r} is a dependency of {prop!r}'!r}))"]
+            if not dependencies:
+                lines.append("        pass")
+        return lines if len(lines) > 1 else []
+
+    def _dependent_schemas(self, dependent, schema, resolver, cls):
+        lines = ["if isinstance(x, dict):"]
+        for prop, subschema in dependent.items():
+            function = self._sub(subschema, resolver, cls)
+            lines += [f"    if {prop!r} in x:",
+                      f"        {function}(x, path, errors)"]
+        return lines if len(lines) > 1 else []
+
+    def _dependencies(self, dependencies, schema, resolver, cls):
+        lines = ["if isinstance(x, dict):"]
+        for prop, dependency in dependencies.items():
+            lines.append(f"    if {prop!r} in x:")
+            if isinstance(dependency, list):
+                for each in dependency:
+                    lines += [f"        if {each!r} not in x:",
+                              f"            errors.append((path, {f'{each!r} is a dependency of {prop!r}'!r}))"]
+                if not dependency:
+                    lines.append("        pass")
+            else:
+                lines.append(f"        {self._sub(dependency, resolver, cls)}(x, path, errors)")
+        return lines if len(lines) > 1 else []
+
+    def _all_of(self, subschemas, schema, resolver, cls):
+        return [f"{self._sub(subschema, resolver, cls)}(x, path, errors)" for subschema in subschemas]
+
+    def _any_of(self, subschemas, schema, resolver, cls):
+        functions = ', '.join(self._sub(subschema, resolver, cls) for subschema in subschemas)
+        return [f"for function in ({functions},):",
+                "    if is_valid(function, x):",
+                "        break",
+                "else:",
+                "    errors.append((path, repr(x) + ' is not valid under any of the given schemas'))"]
+
+    def _one_of(self, subschemas, schema, resolver, cls):
+        functions = ', '.join(self._sub(subschema, resolver, cls) for subschema in subschemas)
+        reprs = self._constant(tuple(repr(subschema) for subschema in subschemas))
+        return [f"functions = ({functions},)",
+                "for first, function in enumerate(functions):",
+                "    if is_valid(function, x):",
+                "        break",
+                "else:",
+                "    first = None",
+                "    errors.append((path, repr(x) + ' is not valid under any of the given schemas'))",
+                "if first is not None:",
+                "    more = [i for i in range(first + 1, len(functions)) if is_valid(functions[i], x)]",
+                "    if more:",
+                f"        errors.append((path, repr(x) + ' is valid under each of ' + ', '.join({reprs}[i] for i in more + [first])))"]
+
+    def _not(self, subschema, schema, resolver, cls):
+        function = self._sub(subschema, resolver, cls)
+        return [f"if is_valid({function}, x):",
+                f"    errors.append((path, repr(x) + {' should not be valid under ' + repr(subschema)!r}))"]
+
+    def _if(self, if_schema, schema, resolver, cls):
+        if 'then' not in schema and 'else' not in schema:
+            return []
+        lines = [f"if is_valid({self._sub(if_schema, resolver, cls)}, x):"]
+        lines.append(f"    {self._sub(schema['then'], resolver, cls)}(x, path, errors)" if 'then' in schema else "    pass")
+        if 'else' in schema:
+            lines += ["else:", f"    {self._sub(schema['else'], resolver, cls)}(x, path, errors)"]
+        return lines
+
+
+def _bound_emitter(operator: str, text: str) -> Callable:
+    """Emitter for minimum, maximum and the exclusive variants"""
+    def emit(compiler, bound, schema, resolver, cls):
+        return [f"if {TYPE_TESTS['number']} and x {operator} {bound!r}:",
+                f"    errors.append((path, repr(x) + {f' {text} {bound!r}'!r}))"]
+    return emit
+
+
+def _size_emitter(type_name: str, operator: str, special: int, special_message: str, message: str) -> Callable:
+    """Emitter for the length, item count and property count limits"""
+    def emit(compiler, limit, schema, resolver, cls):
+        text = special_message if limit == special else message
+        return [f"if {TYPE_TESTS[type_name]} and len(x) {operator} {limit!r}:",
+                f"    errors.append((path, repr(x) + {' ' + text!r}))"]
+    return emit
+
+
+KEYWORD_EMITTERS: Dict[Callable, Callable] = {
+    _keywords.ref: SchemaCompiler._ref,
+    _keywords.type: SchemaCompiler._type,
+    _keywords.enum: SchemaCompiler._enum,
+    _keywords.const: SchemaCompiler._const,
+    _keywords.properties: SchemaCompiler._properties,
+    _keywords.required: SchemaCompiler._required,
+    _keywords.additionalProperties: SchemaCompiler._additional_properties,
+    _keywords.patternProperties: SchemaCompiler._pattern_properties,
+    _keywords.propertyNames: SchemaCompiler._property_names,
+    _keywords.prefixItems: SchemaCompiler._prefix_items,
+    _keywords.items: SchemaCompiler._items,
+    items_draft6_draft7_draft201909: SchemaCompiler._legacy_items,
+    additionalItems: SchemaCompiler._additional_items,
+    _keywords.contains: SchemaCompiler._contains,
+    contains_draft6_draft7: SchemaCompiler._legacy_contains,
+    _keywords.minimum: _bound_emitter('<', 'is less than the minimum of'),
+    _keywords.maximum: _bound_emitter('>', 'is greater than the maximum of'),
+    _keywords.exclusiveMinimum: _bound_emitter('<=', 'is less than or equal to the minimum of'),
+    _keywords.exclusiveMaximum: _bound_emitter('>=', 'is greater than or equal to the maximum of'),
+    _keywords.multipleOf: SchemaCompiler._multiple_of,
+    _keywords.minLength: _size_emitter('string', '<', 1, 'should be non-empty', 'is too short'),
+    _keywords.maxLength: _size_emitter('string', '>', 0, 'is expected to be empty', 'is too long'),
+    _keywords.minItems: _size_emitter('array', '<', 1, 'should be non-empty', 'is too short'),
+    _keywords.maxItems: _size_emitter('array', '>', 0, 'is expected to be empty', 'is too long'),
+    _keywords.minProperties: _size_emitter('object', '<', 1, 'should be non-empty', 'does not have enough properties'),
+    _keywords.maxProperties: _size_emitter('object', '>', 0, 'is expected to be empty', 'has too many properties'),
+    _keywords.uniqueItems: SchemaCompiler._unique_items,
+    _keywords.pattern: SchemaCompiler._pattern,
+    _keywords.format: SchemaCompiler._format,
+    _keywords.dependentRequired: SchemaCompiler._dependent_required,
+    _keywords.dependentSchemas: SchemaCompiler._dependent_schemas,
+    dependencies_draft4_draft6_draft7: SchemaCompiler._dependencies,
+    _keywords.allOf: SchemaCompiler._all_of,
+    _keywords.anyOf: SchemaCompiler._any_of,
+    _keywords.oneOf: SchemaCompiler._one_of,
+    _keywords.not_: SchemaCompiler._not,
+    _keywords.if_: SchemaCompiler._if,
+}
+
+def read_schema_commit(base_path: Path) -> str:
+    """SCHEMA_COMMIT from schema_version.conf"""
+    config = (base_path / 'schema_version.conf').read_text(encoding='utf-8')
+    match = re.search(r'^SCHEMA_COMMIT="?([^"\s]+)"?', config, re.MULTILINE)
+    if not match:
+        raise ValueError("SCHEMA_COMMIT not set in schema_version.conf")
+    return match.group(1)
+
+
+def schema_digest(schema_dir: Path) -> str:
+    """Digest of everything a generated module depends on"""
+    hasher = hashlib.sha256(f"{COMPILER_VERSION}\0{version('jsonschema')}\0".encode())
+    for path in sorted(p for p in schema_dir.rglob('*') if p.is_file()):
+        hasher.update(path.relative_to(schema_dir).as_posix().encode() + b'\0')
+        hasher.update(path.read_bytes() + b'\0')
+    return hasher.hexdigest()
+
+
+class CompiledSchemaCache:
+    """Generated validators per schema file, cached on disk per SCHEMA_COMMIT"""
+
+    def __init__(self, base_path: Path, schema_dir: Path, registry: Any,
+                 format_checker: Optional[FormatChecker] = None, cache_dir: Optional[Path] = None):
+        self.schema_dir = schema_dir
+        self.registry = registry
+        self.format_checker = format_checker or FormatChecker()
+        try:
+            commit = read_schema_commit(base_path)
+        except (OSError, ValueError):
+            commit = 'unversioned'
+        self.cache_dir = (cache_dir or base_path / CACHE_DIR) / commit
+        self.digest = schema_digest(schema_dir)
+        self.compiled = 0  # modules generated (not loaded from the cache) by this instance
+        self._namespace = runtime_namespace(self.format_checker)
+
+    def module_path(self, schema_filename: str) -> Path:
+        return self.cache_dir / (schema_filename.replace('.', '_') + '.py')
+
+    def source(self, schema_filename: str) -> str:
+        """Cached or newly generated source of the module for schema_filename
+
+        Raises:
+            UnsupportedSchema: The schema cannot be compiled.
+        """
+        path = self.module_path(schema_filename)
+        header = f"# source-digest: {self.digest}\n"
+        try:
+            cached = path.read_text(encoding='utf-8')
+            if cached.startswith(header):
+                return cached
+        except OSError:
+            pass
+
+        schema = self.registry.get_or_retrieve(schema_filename).value.contents
+        body = SchemaCompiler(self.registry, self.format_checker).compile(schema)
+        source = (header + f"# Generated by scripts/schema_compiler.py from {schema_filename}, do not edit.\n\n"
+                  + body)
+        self.compiled += 1
+        try:
+            write_atomic(path, source.encode('utf-8'))
+        except OSError:
+            pass  # a read-only checkout still validates, just without the cache
+        return source
+
+    def get(self, schema_filename: str) -> CompiledValidator:
+        """The compiled validator for schema_filename
+
+        Raises:
+            UnsupportedSchema: The schema cannot be compiled.
+        """
+        namespace = dict(self._namespace)
+        exec(compile(self.source(schema_filename), str(self.module_path(schema_filename)), 'exec'), namespace)
+        return CompiledValidator(namespace['validate'], schema_filename)
+
+
+# Parity checking against jsonschema
+
+FUZZ_VALUES = [None, True, False, 0, -1, 1, 1.5, -0.5, 10 ** 12, '', 'x', 'x' * 300, 'FUZZ', [], {},
+               ['a', 'a'], {'slug': 'x'}, datetime.date(2024, 1, 1)]
+
+
+def _nodes(instance: Any, path: Tuple = ()) -> List[Tuple[Tuple, Any]]:
+    nodes = [(path, instance)]
+    if isinstance(instance, dict):
+        for key, value in instance.items():
+            nodes += _nodes(value, path + (key,))
+    elif isinstance(instance, list):
+        for index, value in enumerate(instance):
+            nodes += _nodes(value, path + (index,))
+    return nodes
+
+
+def _replace(instance: Any, path: Tuple, value: Any) -> Any:
+    if not path:
+        return value
+    parent = instance
+    for key in path[:-1]:
+        parent = parent[key]
+    parent[path[-1]] = value
+    return instance
+
+
+def mutate(instance: Any, rng: random.Random, steps: int = 2) -> Any:
+    """A mutated deep copy of instance for parity fuzzing
+
+    Each step picks a random node and deletes, adds, duplicates or replaces
+    something there, favoring values that hit type, range, format and
+    enum checks.
+    """
+    instance = copy.deepcopy(instance)
+    for _ in range(rng.randint(1, steps)):
+        path, node = rng.choice(_nodes(instance))
+        operation = rng.random()
+        if isinstance(node, dict) and node and operation < 0.3:
+            del node[rng.choice(list(node))]
+        elif isinstance(node, dict) and operation < 0.45:
+            node[rng.choice(['x_fuzz', 'slug', 'uuid', 'name'])] = rng.choice(FUZZ_VALUES)
+        elif isinstance(node, list) and node and operation < 0.4:
+            node.append(copy.deepcopy(rng.choice(node)))
+        elif isinstance(node, str) and node and operation < 0.6:
+            index = rng.randrange(len(node))
+            node = node[:index] + rng.choice(['-', ' ', 'Z', '0', '']) + node[index + 1:]
+            instance = _replace(instance, path, node)
+        elif isinstance(node, (int, float)) and not isinstance(node, bool) and operation < 0.6:
+            instance = _replace(instance, path, rng.choice([-node, node + 1, node * 1000, float(node) + 0.5]))
+        else:
+            instance = _replace(instance, path, copy.deepcopy(rng.choice(FUZZ_VALUES)))
+    return instance
+
+
+def _outcome(validator: Any, instance: Any) -> Any:
+    """Sorted (path, message) pairs, or the exception type if validation raised"""
+    try:
+        errors = [(tuple(error.absolute_path), error.message) for error in validator.iter_errors(instance)]
+    except Exception as error:
+        return type(error).__name__
+    return sorted(errors, key=repr)
+
+
+def parity_mismatch(compiled: CompiledValidator, reference: Any, instance: Any) -> Optional[Tuple[Any, Any]]:
+    """(compiled outcome, jsonschema outcome) if they differ, else None
+
+    Errors are compared as sorted lists: jsonschema reports additional
+    properties in set order, which varies between processes.
+    """
+    ours, theirs = _outcome(compiled, instance), _outcome(reference, instance)
+    return None if ours == theirs else (ours, theirs)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    from validate_json_schema import JsonSchemaValidator
+
+    parser = argparse.ArgumentParser(description="Compile the JSON schemas and check parity with jsonschema.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Compile every schema into the cache.")
+    parity = subparsers.add_parser("parity", help="Compare compiled and jsonschema errors on the dataset.")
+    parity.add_argument("--mutations", type=int, default=20, help="Mutated copies per file (default: 20).")
+    parity.add_argument("--seed", type=int, default=0, help="Mutation seed (default: 0).")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    validator = JsonSchemaValidator(repo_root, compiled_schemas=False)
+    if not validator.schema_dir.exists():
+        print(f"Error: Schema directory not found at {validator.schema_dir}", file=sys.stderr)
+        return 1
+    validator.setup_registry()
+    cache = CompiledSchemaCache(repo_root, validator.schema_dir, validator.registry)
+
+    compiled: Dict[str, CompiledValidator] = {}
+    for schema_filename in validator.ENTITY_SCHEMA_MAPPING.values():
+        try:
+            compiled[schema_filename] = cache.get(schema_filename)
+            print(f"✓ {schema_filename} -> {cache.module_path(schema_filename)}")
+        except UnsupportedSchema as e:
+            print(f"  {schema_filename}: not compiled ({e}), jsonschema is used")
+    if args.command == "build":
+        return 0
+
+    rng = random.Random(args.seed)
+    checked = mismatches = 0
+    for entity_dir, schema_filename in validator.ENTITY_SCHEMA_MAPPING.items():
+        if schema_filename not in compiled:
+            continue
+        reference = validator.get_validator(schema_filename)
+        for path in sorted((validator.data_dir / entity_dir).rglob('*.yaml')):
+            with open(path, encoding='utf-8') as f:
+                data = yaml.load(f, Loader=YAML_LOADER)
+            for instance in [data] + [mutate(data, rng) for _ in range(args.mutations)]:
+                checked += 1
+                mismatch = parity_mismatch(compiled[schema_filename], reference, instance)
+                if mismatch:
+                    mismatches += 1
+                    if mismatches <= 10:
+                        print(f"✗ {path}: {instance!r}\n  compiled:   {mismatch[0]}\n  jsonschema: {mismatch[1]}")
+    if mismatches:
+        print(f"\n✗ {mismatches} of {checked:,} instances differ", file=sys.stderr)
+        return 1
+    print(f"\n✓ Compiled validators match jsonschema on {checked:,} instances")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Inverted full-text search index over material names, brand names and tags
+
+The index is built from the data returned by DatabaseLoader and holds:
+- token postings: term -> (document, weighted term frequency)
+- trigram postings over the vocabulary, used for fuzzy (typo tolerant) matching
+- a sorted vocabulary, used for prefix matching
+
+Results are ranked with BM25. The index serializes to a compact binary file
+(a small compressed JSON header plus packed uint32 arrays) that loads in a
+few milliseconds.
+
+Usage:
+    python scripts/search_index.py build [--output build/search-index.bin]
+    python scripts/search_index.py query "prusament galaxy blak"
+"""
+
+import argparse
+import json
+import math
+import re
+import struct
+import sys
+import unicodedata
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from lib import DatabaseLoader
+
+
+MAGIC = b'MDBSRCH1'
+DEFAULT_OUTPUT = Path('build') / 'search-index.bin'
+
+# Weight of a term occurrence per field
+FIELD_WEIGHTS = {
+    'name': 3,
+    'brand': 2,
+    'type': 1,
+    'tags': 1,
+}
+
+# Score multipliers of inexact matches
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.5
+FUZZY_MIN_SIMILARITY = 0.4
+
+BM25_K1 = 1.2
+
+_SPLIT_RE = re.compile(r'[^0-9a-z]+')
+
+
+def tokenize(text: Any) -> list[str]:
+    """Lowercase, strip accents and split text into alphanumeric tokens"""
+    if not isinstance(text, str):
+        return []
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return [t for t in _SPLIT_RE.split(text) if t]
+
+
+def trigrams(term: str) -> set[str]:
+    """Get the trigrams of a term, padded so short terms still have some"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(slots=True)
+class SearchResult:
+    entity: str
+    slug: str
+    title: str
+    score: float
+
+
+def _packed(values: Iterable[int]) -> array:
+    return array('I', values)
+
+
+class SearchIndex:
+    """Inverted index with token and trigram postings"""
+
+    def __init__(self, docs: list[list[str]], terms: list[str],
+                 term_offsets: array, postings: array,
+                 grams: list[str], gram_offsets: array, gram_postings: array):
+        # docs[doc_id] = [entity, slug, title]
+        self.docs = docs
+        # Sorted vocabulary; postings of terms[i] are
+        # postings[2 * term_offsets[i]:2 * term_offsets[i + 1]] as (doc_id, weight) pairs
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings = postings
+        # Sorted trigrams; gram_postings[gram_offsets[i]:gram_offsets[i + 1]] are term ids
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_postings = gram_postings
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        self._gram_ids: Optional[Dict[str, int]] = None
+
+    # -- building -----------------------------------------------------------
+
+    @classmethod
+    def build(cls, documents: Iterable[tuple[str, str, str, Dict[str, Any]]]) -> 'SearchIndex':
+        """Build an index from (entity, slug, title, {field: text or list of texts}) tuples"""
+        docs: list[list[str]] = []
+        term_postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+
+        for entity, slug, title, fields in documents:
+            doc_id = len(docs)
+            docs.append([entity, slug, title])
+            for field_name, value in fields.items():
+                weight = FIELD_WEIGHTS[field_name]
+                texts = value if isinstance(value, (list, tuple)) else [value]
+                for text in texts:
+                    for token in tokenize(text):
+                        postings = term_postings[token]
+                        postings[doc_id] = postings.get(doc_id, 0) + weight
+
+        terms = sorted(term_postings)
+        term_offsets = _packed([0])
+        postings = array('I')
+        gram_terms: Dict[str, list[int]] = defaultdict(list)
+        for term_id, term in enumerate(terms):
+            for doc_id, weight in sorted(term_postings[term].items()):
+                postings.append(doc_id)
+                postings.append(weight)
+            term_offsets.append(len(postings) // 2)
+            for gram in trigrams(term):
+                gram_terms[gram].append(term_id)
+
+        grams = sorted(gram_terms)
+        gram_offsets = _packed([0])
+        gram_postings = array('I')
+        for gram in grams:
+            gram_postings.extend(gram_terms[gram])
+            gram_offsets.append(len(gram_postings))
+
+        return cls(docs, terms, term_offsets, postings, grams, gram_offsets, gram_postings)
+
+    @classmethod
+    def from_entities(cls, data_cache: Dict[str, Dict[str, Any]]) -> 'SearchIndex':
+        """Build an index from the dict model returned by DatabaseLoader.load_all_entities"""
+        brands = data_cache.get('brands', {})
+
+        def documents():
+            for slug, brand in sorted(brands.items()):
+                yield 'brands', slug, brand.get('name') or slug, {'name': brand.get('name')}
+
+            for slug, material in sorted(data_cache.get('materials', {}).items()):
+                brand_ref = material.get('brand')
+                brand_slug = brand_ref.get('slug') if isinstance(brand_ref, dict) else None
+                brand = brands.get(brand_slug, {})
+                types = {material.get('type'), material.get('abbreviation')} - {None}
+                yield 'materials', slug, material.get('name') or slug, {
+                    'name': material.get('name'),
+                    'brand': brand.get('name') or brand_slug,
+                    'type': sorted(types),
+                    'tags': material.get('tags') or [],
+                }
+
+        return cls.build(documents())
+
+    # -- serialization ------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Write the index to a compact binary file"""
+        header = zlib.compress(json.dumps({
+            'docs': self.docs,
+            'terms': self.terms,
+            'grams': self.grams,
+        }, separators=(',', ':')).encode('utf-8'))
+
+        arrays = (self.term_offsets, self.postings, self.gram_offsets, self.gram_postings)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(struct.pack('<4I', *(len(a) for a in arrays)))
+            f.write(header)
+            for a in arrays:
+                if sys.byteorder != 'little':
+                    a = array('I', a)
+                    a.byteswap()
+                f.write(a.tobytes())
+
+    @classmethod
+    def load(cls, path: Path) -> 'SearchIndex':
+        """Load an index written by save()"""
+        blob = Path(path).read_bytes()
+        if blob[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a search index file: {path}")
+
+        pos = len(MAGIC)
+        (header_len,) = struct.unpack_from('<I', blob, pos)
+        lengths = struct.unpack_from('<4I', blob, pos + 4)
+        pos += 20
+        header = json.loads(zlib.decompress(blob[pos:pos + header_len]))
+        pos += header_len
+
+        arrays = []
+        for length in lengths:
+            a = array('I')
+            a.frombytes(blob[pos:pos + 4 * length])
+            if sys.byteorder != 'little':
+                a.byteswap()
+            arrays.append(a)
+            pos += 4 * length
+
+        term_offsets, postings, gram_offsets, gram_postings = arrays
+        return cls(header['docs'], header['terms'], term_offsets, postings,
+                   header['grams'], gram_offsets, gram_postings)
+
+    # -- querying -----------------------------------------------------------
+
+    def _term_postings(self, term_id: int) -> Iterable[tuple[int, int]]:
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        data = self.postings[2 * start:2 * end]
+        return zip(data[::2], data[1::2])
+
+    def _prefix_terms(self, prefix: str) -> list[int]:
+        start = bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(prefix):
+            end += 1
+        return list(range(start, end))
+
+    def _fuzzy_terms(self, token: str) -> list[tuple[int, float]]:
+        if self._gram_ids is None:
+            self._gram_ids = {gram: i for i, gram in enumerate(self.grams)}
+
+        query_grams = trigrams(token)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            gram_id = self._gram_ids.get(gram)
+            if gram_id is None:
+                continue
+            for term_id in self.gram_postings[self.gram_offsets[gram_id]:self.gram_offsets[gram_id + 1]]:
+                shared[term_id] += 1
+
+        matches = []
+        for term_id, count in shared.items():
+            # Dice coefficient of the trigram sets
+            similarity = 2 * count / (len(query_grams) + len(self.terms[term_id]))
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((term_id, similarity))
+        return matches
+
+    def _expand(self, token: str, prefix: bool, fuzzy: bool) -> Dict[int, float]:
+        """Resolve a query token to {term_id: score factor}"""
+        expanded: Dict[int, float] = {}
+        term_id = self._term_ids.get(token)
+        if term_id is not None:
+            expanded[term_id] = 1.0
+        if prefix:
+            for term_id in self._prefix_terms(token):
+                expanded.setdefault(term_id, PREFIX_FACTOR)
+        if fuzzy and not expanded:
+            for term_id, similarity in self._fuzzy_terms(token):
+                expanded.setdefault(term_id, FUZZY_FACTOR * similarity)
+        return expanded
+
+    def search(self, query: str, limit: int = 20, entity: Optional[str] = None,
+               prefix: bool = True, fuzzy: bool = True) -> list[SearchResult]:
+        """Search the index
+
+        Every query token must match a document (exactly, as a prefix or,
+        when nothing else matches, fuzzily). Documents are ranked by BM25.
+
+        Args:
+            query: Free text query.
+            limit: Maximum number of results.
+            entity: Only return documents of this entity type (e.g. `materials`).
+            prefix: Allow query tokens to match as term prefixes.
+            fuzzy: Allow typo tolerant matching via trigram similarity.
+
+        Returns:
+            Results ordered by descending score.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        total_docs = len(self.docs)
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            # Best (match factor * saturated term frequency) per document
+            token_scores: Dict[int, float] = {}
+            for term_id, factor in self._expand(token, prefix, fuzzy).items():
+                for doc_id, weight in self._term_postings(term_id):
+                    score = factor * weight * (BM25_K1 + 1) / (weight + BM25_K1)
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+
+            # The IDF is taken over all documents the token matched, so that
+            # prefix/fuzzy expansions of a common token don't outrank exact matches
+            df = len(token_scores)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            token_scores = {d: s * idf for d, s in token_scores.items()}
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+            if not scores:
+                return []
+
+        results = [
+            SearchResult(self.docs[d][0], self.docs[d][1], self.docs[d][2], s)
+            for d, s in scores.items()
+            if entity is None or self.docs[d][0] == entity
+        ]
+        results.sort(key=lambda r: (-r.score, r.title))
+        return results[:limit]
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the index from the data directory.")
+    build_parser.add_argument("--output", default=str(DEFAULT_OUTPUT), metavar="FILE",
+                              help=f"Index file to write (default: {DEFAULT_OUTPUT}).")
+
+    query_parser = subparsers.add_parser('query', help="Query a built index.")
+    query_parser.add_argument("query", help="Search query.")
+    query_parser.add_argument("--index", default=str(DEFAULT_OUTPUT), metavar="FILE",
+                              help=f"Index file to read (default: {DEFAULT_OUTPUT}).")
+    query_parser.add_argument("--limit", type=int, default=20, help="Maximum number of results.")
+    query_parser.add_argument("--entity", help="Only return this entity type (brands, materials).")
+
+    args = parser.parse_args()
+    repo_root = Path(__file__).parent.parent
+
+    if args.command == 'build':
+        loader = DatabaseLoader(repo_root)
+        if not loader.load_schema():
+            print(f"Error: {loader.errors[0]}", file=sys.stderr)
+            return 1
+        index = SearchIndex.from_entities(loader.load_all_entities())
+        output = Path(args.output)
+        index.save(output)
+        print(f"✓ Indexed {len(index.docs):,} documents, {len(index.terms):,} terms -> {output}")
+        return 0
+
+    index = SearchIndex.load(Path(args.index))
+    for result in index.search(args.query, limit=args.limit, entity=args.entity):
+        print(f"{result.score:7.2f}  {result.entity:<10} {result.slug}  ({result.title})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Semantic diff of the material database between two git refs
+
+Reads both snapshots straight from the git object store (no checkouts) and
+reports entity-level changes instead of line diffs:
+
+    + added      entity only in the new ref
+    - removed    entity only in the old ref
+    ~ modified   same file, field-level changes
+    > renamed    same UUID (or, without a UUID, same slug) at a new path
+
+The data trees of both refs are walked side by side and subtrees with the
+same object id are skipped without being read, so the cost is proportional
+to the changed files, not the size of the database. Objects are read through
+a single `git cat-file --batch` process.
+
+Usage:
+    python scripts/semantic_diff.py v1.2.0 [HEAD] [--json]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from lib import DatabaseLoader, parse_yaml
+
+
+DATA_DIR = 'data'
+TREE_MODE = b'40000'
+
+
+@dataclass(slots=True)
+class FieldChange:
+    """A changed value at a dotted field path (e.g. `properties.density`)"""
+    path: str
+    old: Any
+    new: Any
+
+
+@dataclass(slots=True)
+class EntityChange:
+    """A change of one entity between the two refs"""
+    kind: str  # 'added', 'removed', 'modified' or 'renamed'
+    entity: str
+    slug: Optional[str]
+    path: str
+    old_slug: Optional[str] = None
+    old_path: Optional[str] = None
+    uuid: Optional[str] = None
+    fields: list[FieldChange] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class DiffResult:
+    """Entity changes plus counters of the work done"""
+    changes: list[EntityChange] = field(default_factory=list)
+    other_files: list[str] = field(default_factory=list)
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        'trees_read': 0, 'trees_skipped': 0, 'blobs_read': 0,
+    })
+
+
+class GitObjectReader:
+    """Reads git objects through a persistent `git cat-file --batch` process"""
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'], cwd=repo,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def __enter__(self) -> 'GitObjectReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+        self._process.stdout.close()
+
+    def resolve_tree(self, rev: str) -> str:
+        """Get the object id of the root tree of a revision
+
+        Raises:
+            ValueError: The revision does not exist.
+        """
+        result = subprocess.run(
+            ['git', 'rev-parse', '--verify', '--quiet', f'{rev}^{{tree}}'],
+            cwd=self.repo, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Unknown revision: {rev}")
+        return result.stdout.strip()
+
+    def read(self, oid: str) -> tuple[str, bytes]:
+        """Read an object, returning (type, content)"""
+        self._process.stdin.write(oid.encode('ascii') + b'\n')
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Missing git object: {oid}")
+        content = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # trailing newline
+        return header[1].decode('ascii'), content
+
+    def tree(self, oid: str) -> Dict[str, tuple[bool, str]]:
+        """Read a tree object as {name: (is_tree, object id)}"""
+        _, content = self.read(oid)
+        entries = {}
+        pos = 0
+        while pos < len(content):
+            space = content.index(b' ', pos)
+            nul = content.index(b'\0', space)
+            mode = content[pos:space]
+            name = content[space + 1:nul].decode('utf-8', 'surrogateescape')
+            entries[name] = (mode == TREE_MODE, content[nul + 1:nul + 21].hex())
+            pos = nul + 21
+        return entries
+
+
+def diff_values(old: Any, new: Any, path: str = '') -> Iterator[FieldChange]:
+    """Yield the field-level differences of two parsed YAML values
+
+    Mappings are compared key by key (recursively), any other values
+    (including lists) are compared as a whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in list(old) + [k for k in new if k not in old]:
+            child = f"{path}.{key}" if path else str(key)
+            if key not in new:
+                yield FieldChange(child, old[key], None)
+            elif key not in old:
+                yield FieldChange(child, None, new[key])
+            elif old[key] != new[key]:
+                yield from diff_values(old[key], new[key], child)
+    elif old != new:
+        yield FieldChange(path, old, new)
+
+
+class SemanticDiff:
+    """Computes entity-level changes between two refs of a repository"""
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        self.entity_dirs = [
+            (entity_def['directory'] + '/', entity_name)
+            for entity_name, entity_def in DatabaseLoader.ENTITIES.items()
+        ]
+
+    def entity_for_path(self, path: str) -> Optional[str]:
+        """Get the entity name of a data file path, None for other files"""
+        if not path.endswith('.yaml'):
+            return None
+        for prefix, entity_name in self.entity_dirs:
+            if path.startswith(prefix):
+                return entity_name
+        return None
+
+    def _walk(self, reader: GitObjectReader, old: Optional[str], new: Optional[str], path: str,
+              result: DiffResult, changed: Dict[str, tuple[Optional[str], Optional[str]]]) -> None:
+        """Collect {path: (old blob, new blob)} of differing files below two trees"""
+        if old == new:
+            result.stats['trees_skipped'] += 1
+            return
+        old_entries = reader.tree(old) if old else {}
+        new_entries = reader.tree(new) if new else {}
+        result.stats['trees_read'] += bool(old) + bool(new)
+
+        for name in sorted(set(old_entries) | set(new_entries)):
+            old_is_tree, old_oid = old_entries.get(name, (None, None))
+            new_is_tree, new_oid = new_entries.get(name, (None, None))
+            if old_oid == new_oid:
+                if old_is_tree:
+                    result.stats['trees_skipped'] += 1
+                continue
+            child = f"{path}/{name}"
+            # A name may switch between file and directory
+            if old_is_tree or new_is_tree:
+                self._walk(reader, old_oid if old_is_tree else None, new_oid if new_is_tree else None,
+                           child, result, changed)
+            old_blob = old_oid if old_is_tree is False else None
+            new_blob = new_oid if new_is_tree is False else None
+            if old_blob or new_blob:
+                changed[child] = (old_blob, new_blob)
+
+    def _load(self, reader: GitObjectReader, oid: Optional[str], result: DiffResult) -> Any:
+        if oid is None:
+            return None
+        result.stats['blobs_read'] += 1
+        return parse_yaml(reader.read(oid)[1])
+
+    def diff(self, old_rev: str, new_rev: str) -> DiffResult:
+        """Compare the data directory of two revisions
+
+        Raises:
+            ValueError: A revision does not exist.
+        """
+        result = DiffResult()
+        changed: Dict[str, tuple[Optional[str], Optional[str]]] = {}
+
+        with GitObjectReader(self.repo) as reader:
+            old_root = reader.tree(reader.resolve_tree(old_rev)).get(DATA_DIR)
+            new_root = reader.tree(reader.resolve_tree(new_rev)).get(DATA_DIR)
+            self._walk(reader, old_root[1] if old_root and old_root[0] else None,
+                       new_root[1] if new_root and new_root[0] else None, DATA_DIR, result, changed)
+
+            removed: Dict[str, tuple[str, Dict[str, Any]]] = {}
+            added: Dict[str, tuple[str, Dict[str, Any]]] = {}
+            for path, (old_oid, new_oid) in sorted(changed.items()):
+                entity_name = self.entity_for_path(path)
+                if entity_name is None:
+                    result.other_files.append(path)
+                    continue
+                old = self._load(reader, old_oid, result)
+                new = self._load(reader, new_oid, result)
+                if isinstance(old, dict) and isinstance(new, dict):
+                    result.changes.append(EntityChange(
+                        'modified', entity_name, new.get('slug'), path,
+                        old_slug=old.get('slug') if old.get('slug') != new.get('slug') else None,
+                        uuid=new.get('uuid') or old.get('uuid'),
+                        fields=list(diff_values(old, new)),
+                    ))
+                    continue
+                if isinstance(old, dict):
+                    removed[path] = (entity_name, old)
+                if isinstance(new, dict):
+                    added[path] = (entity_name, new)
+
+        result.changes.extend(self._match_moves(removed, added))
+        result.changes.sort(key=lambda c: (c.entity, c.path))
+        return result
+
+    @staticmethod
+    def _match_moves(removed: Dict[str, tuple[str, Dict[str, Any]]],
+                     added: Dict[str, tuple[str, Dict[str, Any]]]) -> list[EntityChange]:
+        """Pair removed and added files of the same entity by UUID, then by slug"""
+        changes = []
+        for key_field in ('uuid', 'slug'):
+            by_key: Dict[tuple[str, str], list[str]] = {}
+            for path, (entity_name, data) in removed.items():
+                if data.get(key_field):
+                    by_key.setdefault((entity_name, str(data[key_field])), []).append(path)
+            for path, (entity_name, new) in list(added.items()):
+                candidates = by_key.get((entity_name, str(new.get(key_field))))
+                if not new.get(key_field) or not candidates:
+                    continue
+                old_path = candidates.pop(0)
+                old = removed.pop(old_path)[1]
+                del added[path]
+                changes.append(EntityChange(
+                    'renamed', entity_name, new.get('slug'), path,
+                    old_slug=old.get('slug'), old_path=old_path,
+                    uuid=new.get('uuid') or old.get('uuid'),
+                    fields=list(diff_values(old, new)),
+                ))
+
+        for path, (entity_name, data) in removed.items():
+            changes.append(EntityChange('removed', entity_name, data.get('slug'), path, uuid=data.get('uuid')))
+        for path, (entity_name, data) in added.items():
+            changes.append(EntityChange('added', entity_name, data.get('slug'), path, uuid=data.get('uuid')))
+        return changes
+
+
+SYMBOLS = {'added': '+', 'removed': '-', 'modified': '~', 'renamed': '>'}
+
+
+def format_value(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def format_report(result: DiffResult) -> str:
+    """Render a diff result as a human readable report"""
+    lines = []
+    for change in result.changes:
+        title = change.slug or change.path
+        if change.kind == 'renamed':
+            title = f"{change.old_slug} -> {change.slug} ({change.old_path} -> {change.path})"
+        elif change.old_slug:
+            title = f"{change.old_slug} -> {change.slug}"
+        lines.append(f"{SYMBOLS[change.kind]} {change.entity} {title}")
+        for field_change in change.fields:
+            lines.append(f"    {field_change.path}: {format_value(field_change.old)} -> "
+                         f"{format_value(field_change.new)}")
+
+    counts = {kind: sum(c.kind == kind for c in result.changes) for kind in SYMBOLS}
+    summary = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+    if result.other_files:
+        summary += f", {len(result.other_files)} other files changed"
+    lines.append(f"{summary} ({result.stats['blobs_read']} blobs read, "
+                 f"{result.stats['trees_skipped']} unchanged trees skipped)")
+    return '\n'.join(lines)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Show entity-level changes between two git refs.")
+    parser.add_argument("old", help="Old revision (e.g. a release tag or merge base).")
+    parser.add_argument("new", nargs="?", default="HEAD", help="New revision (default: HEAD).")
+    parser.add_argument("--json", action="store_true", help="Print the changes as JSON.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).parent.parent
+    try:
+        result = SemanticDiff(repo_root).diff(args.old, args.new)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(asdict(result), indent=2, ensure_ascii=False, default=str))
+    else:
+        print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Sharded static JSON API for CDN-fronted consumers
+
+Renders the database to immutable JSON files with content-hash filenames and
+precompressed `.gz` siblings:
+
+    index.json                                   root index (the only mutable file)
+    brands/page-<n>.<hash>.json                  brand listing with entity counts
+    containers/page-<n>.<hash>.json              container listing
+    containers/<slug>.<hash>.json
+    brands/<brand>/index.<hash>.json             shard index
+    brands/<brand>.<hash>.json                   brand details
+    brands/<brand>/materials/page-<n>.<hash>.json
+    brands/<brand>/materials/<slug>.<hash>.json
+    brands/<brand>/packages/page-<n>.<hash>.json
+    brands/<brand>/packages/<slug>.<hash>.json
+
+`index.json` maps every shard to its shard index and every global file
+(logical path -> file name), shard indexes do the same for the files of one
+brand. Packages belong to the shard of their material's brand.
+
+Each shard is the root of a Merkle subtree over the SHA-256 of its input
+files. The hashes (and stat of every input file, so unchanged files are not
+re-read) are kept in `<output>/.state.json`; a rebuild only re-renders shards
+whose subtree hash changed and removes the files they no longer produce.
+`index.json` is replaced last, so readers never see it reference missing
+files.
+
+Usage:
+    python scripts/static_api.py [--output build/api] [--page-size 100] [--full] [--profile FILE]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from lib import YAML_LOADER, DatabaseLoader, load_manifest_hash, write_atomic
+from profiling import Profiler, add_profile_arguments
+
+
+DEFAULT_OUTPUT = Path('build') / 'api'
+DEFAULT_PAGE_SIZE = 100
+FORMAT_VERSION = 1
+STATE_FILE = '.state.json'
+INDEX_FILE = 'index.json'
+GLOBAL_SHARD = '_global'
+HASH_LENGTH = 16
+
+
+def to_json(value: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def hashed_name(logical_path: str, content: bytes) -> str:
+    """File name of a logical path with the content hash, e.g. `brands/acme.0123abcd.json`"""
+    return f"{logical_path}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.json"
+
+
+def merkle_hash(leaves: list[tuple[str, str]]) -> str:
+    """Hash of a subtree given its (name, hash) children"""
+    digest = hashlib.sha256()
+    for name, value in sorted(leaves):
+        digest.update(f"{name}\0{value}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def paginate(logical_dir: str, items: list[Any], page_size: int) -> list[tuple[str, Any]]:
+    """Split a listing into `<dir>/page-<n>` documents (one empty page if there are no items)"""
+    page_count = max(1, -(-len(items) // page_size))
+    return [
+        (f"{logical_dir}/page-{page}", {
+            'page': page,
+            'page_count': page_count,
+            'total': len(items),
+            'items': items[(page - 1) * page_size:page * page_size],
+        })
+        for page in range(1, page_count + 1)
+    ]
+
+
+class StaticApiGenerator:
+    """Renders and incrementally updates the static JSON API"""
+
+    def __init__(self, base_path: Path, output_dir: Path, page_size: int = DEFAULT_PAGE_SIZE,
+                 profiler: Optional[Profiler] = None):
+        self.base_path = base_path
+        self.output_dir = output_dir
+        self.page_size = page_size
+        self.profiler = profiler or Profiler.disabled()
+        self.loader = DatabaseLoader(base_path)
+        self.stats = {'shards_built': 0, 'shards_skipped': 0, 'files_written': 0, 'files_removed': 0}
+
+        # relative path -> [entity, mtime_ns, size, sha256, slug, reference slug]
+        self._files: Dict[str, list] = {}
+        self._parsed: Dict[str, Any] = {}
+        # brand slug -> brand files of its shard
+        self._brand_files: Dict[str, list[str]] = {}
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.output_dir / STATE_FILE, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if state.get('format') != FORMAT_VERSION or state.get('page_size') != self.page_size:
+            return {}
+        return state
+
+    def _parse(self, rel_path: str, content: Optional[bytes] = None) -> Any:
+        if rel_path not in self._parsed:
+            try:
+                if content is None:
+                    content = (self.base_path / rel_path).read_bytes()
+                self._parsed[rel_path] = yaml.load(content, Loader=YAML_LOADER)
+            except (OSError, yaml.YAMLError) as e:
+                self.loader.errors.append(f"Failed to parse YAML {rel_path}: {e}")
+                self._parsed[rel_path] = None
+        return self._parsed[rel_path]
+
+    def scan(self, previous: Dict[str, list]) -> None:
+        """Hash all input files, re-reading only those whose stat changed"""
+        self._files = {}
+        for entity_name, entity_def in self.loader.ENTITIES.items():
+            for search_dir in self.loader.get_search_dirs(entity_def):
+                if not search_dir.exists():
+                    continue
+                with os.scandir(search_dir) as it:
+                    for dir_entry in it:
+                        if not dir_entry.name.endswith('.yaml') or not dir_entry.is_file():
+                            continue
+                        st = dir_entry.stat()
+                        rel_path = Path(dir_entry.path).relative_to(self.base_path).as_posix()
+                        cached = previous.get(rel_path)
+                        if cached and cached[:3] == [entity_name, st.st_mtime_ns, st.st_size]:
+                            self._files[rel_path] = cached
+                            continue
+
+                        started = time.perf_counter()
+                        content = Path(dir_entry.path).read_bytes()
+                        data = self._parse(rel_path, content)
+                        slug = data.get('slug') if isinstance(data, dict) else None
+                        ref = None
+                        if isinstance(data, dict):
+                            ref_field = {'materials': 'brand', 'material_packages': 'material'}.get(entity_name)
+                            ref_value = data.get(ref_field) if ref_field else None
+                            ref = ref_value.get('slug') if isinstance(ref_value, dict) else None
+                        self._files[rel_path] = [entity_name, st.st_mtime_ns, st.st_size,
+                                                 hashlib.sha256(content).hexdigest(), slug, ref]
+                        if self.profiler.enabled:
+                            self.profiler.record_file(rel_path, st.st_size, time.perf_counter() - started)
+
+    def assign_shards(self) -> Dict[str, list[str]]:
+        """Group input files into shards: one per brand plus the global shard
+
+        Materials belong to their brand, packages to their material's brand
+        (or their directory if the material is unknown), brands to their own
+        shard; containers are global.
+        """
+        material_brands = {
+            entry[4]: entry[5] for entry in self._files.values()
+            if entry[0] == 'materials' and entry[4] and entry[5]
+        }
+        shards: Dict[str, list[str]] = {}
+        for rel_path, (entity_name, _, _, _, slug, ref) in sorted(self._files.items()):
+            if not slug:
+                continue
+            if entity_name == 'brands':
+                shard = slug
+            elif entity_name == 'materials':
+                shard = ref or Path(rel_path).parent.name
+            elif entity_name == 'material_packages':
+                shard = material_brands.get(ref) or Path(rel_path).parent.name
+            else:
+                shard = GLOBAL_SHARD
+            shards.setdefault(shard, []).append(rel_path)
+        shards.setdefault(GLOBAL_SHARD, [])
+        return shards
+
+    def _shard_entities(self, rel_paths: list[str]) -> Dict[str, list[Dict[str, Any]]]:
+        entities: Dict[str, list[Dict[str, Any]]] = {name: [] for name in self.loader.ENTITIES}
+        for rel_path in rel_paths:
+            data = self._parse(rel_path)
+            if isinstance(data, dict) and data.get('slug'):
+                entities[self._files[rel_path][0]].append(data)
+        for items in entities.values():
+            items.sort(key=lambda e: str(e['slug']))
+        return entities
+
+    def render_brand_shard(self, brand_slug: str, rel_paths: list[str]) -> list[tuple[str, Any]]:
+        """Render the (logical path, document) pairs of one brand shard"""
+        entities = self._shard_entities(rel_paths)
+        base = f"brands/{brand_slug}"
+        documents = [(base, brand) for brand in entities['brands'][:1]]
+        for entity_name, section in (('materials', 'materials'), ('material_packages', 'packages')):
+            items = entities[entity_name]
+            documents += paginate(f"{base}/{section}", items, self.page_size)
+            documents += [(f"{base}/{section}/{item['slug']}", item) for item in items]
+        return documents
+
+    def render_global_shard(self, rel_paths: list[str], counts: Dict[str, Dict[str, int]]) -> list[tuple[str, Any]]:
+        """Render the brand and container listings and the container documents"""
+        containers = self._shard_entities(rel_paths)['material_containers']
+        brands = []
+        for brand_slug in sorted(counts):
+            brand_files = self._brand_files.get(brand_slug)
+            brand = self._parse(brand_files[0]) if brand_files else None
+            if isinstance(brand, dict):
+                brands.append({**brand, **counts[brand_slug]})
+
+        documents = paginate('brands', brands, self.page_size)
+        documents += paginate('containers', containers, self.page_size)
+        documents += [(f"containers/{c['slug']}", c) for c in containers]
+        return documents
+
+    def _write(self, files: Dict[str, bytes]) -> None:
+        """Write content-addressed files and their .gz siblings, skipping existing ones"""
+        def write(name: str, content: bytes) -> int:
+            path = self.output_dir / name
+            if path.exists() and path.with_name(path.name + '.gz').exists():
+                return 0
+            write_atomic(path, content)
+            write_atomic(path.with_name(path.name + '.gz'), gzip.compress(content, compresslevel=9, mtime=0))
+            return 1
+
+        with ThreadPoolExecutor() as executor:
+            self.stats['files_written'] += sum(executor.map(lambda item: write(*item), files.items()))
+
+    def _remove(self, names: set[str]) -> None:
+        for name in sorted(names):
+            for path in (self.output_dir / name, self.output_dir / (name + '.gz')):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            self.stats['files_removed'] += 1
+
+    def _build_shard(self, documents: list[tuple[str, Any]], index_path: Optional[str]) -> tuple[Dict[str, str], list[str]]:
+        """Write a shard's documents (and its shard index)
+
+        Returns:
+            Tuple of ({logical path: file name}, all file names of the shard).
+        """
+        files: Dict[str, bytes] = {}
+        mapping: Dict[str, str] = {}
+        for logical_path, document in documents:
+            content = to_json(document)
+            name = hashed_name(logical_path, content)
+            files[name] = content
+            mapping[logical_path] = name
+        if index_path is not None:
+            content = to_json(mapping)
+            name = hashed_name(index_path, content)
+            files[name] = content
+            mapping = {index_path: name}
+        self._write(files)
+        return mapping, sorted(files)
+
+    def generate(self, full: bool = False) -> str:
+        """Bring the output directory up to date
+
+        Args:
+            full: Re-render every shard regardless of the stored hashes.
+
+        Returns:
+            The Merkle root hash over all shards.
+        """
+        # A full rebuild still needs the previous state to remove stale files
+        with self.profiler.phase('scan'):
+            state = self._load_state()
+            self._parsed = {}
+            self.scan({} if full else state.get('files', {}))
+            shards = self.assign_shards()
+
+        self._brand_files = {
+            slug: [p for p in paths if self._files[p][0] == 'brands']
+            for slug, paths in shards.items() if slug != GLOBAL_SHARD
+        }
+        counts = {
+            slug: {
+                'material_count': sum(self._files[p][0] == 'materials' for p in paths),
+                'package_count': sum(self._files[p][0] == 'material_packages' for p in paths),
+            }
+            for slug, paths in shards.items() if self._brand_files.get(slug)
+        }
+
+        shard_hashes = {
+            slug: merkle_hash([(p, self._files[p][3]) for p in paths])
+            for slug, paths in shards.items() if slug != GLOBAL_SHARD
+        }
+        # The listings depend on the brand files and the per-brand counts
+        shard_hashes[GLOBAL_SHARD] = merkle_hash(
+            [(p, self._files[p][3]) for p in shards[GLOBAL_SHARD]]
+            + [(p, self._files[p][3]) for paths in self._brand_files.values() for p in paths]
+            + [(f"counts/{slug}", f"{c['material_count']}/{c['package_count']}") for slug, c in counts.items()]
+        )
+
+        previous_shards = state.get('shards', {})
+        new_shards: Dict[str, Dict[str, Any]] = {}
+        with self.profiler.phase('render'):
+            for slug in sorted(shard_hashes):
+                previous = previous_shards.get(slug)
+                if (not full and previous and previous['hash'] == shard_hashes[slug]
+                        and all((self.output_dir / name).exists() for name in previous['files'])):
+                    new_shards[slug] = previous
+                    self.stats['shards_skipped'] += 1
+                    continue
+
+                if slug == GLOBAL_SHARD:
+                    mapping, names = self._build_shard(self.render_global_shard(shards[slug], counts), None)
+                else:
+                    mapping, names = self._build_shard(
+                        self.render_brand_shard(slug, shards[slug]), f"brands/{slug}/index"
+                    )
+                new_shards[slug] = {'hash': shard_hashes[slug], 'index': mapping, 'files': names}
+                self.stats['shards_built'] += 1
+
+        root_hash = merkle_hash([(slug, shard['hash']) for slug, shard in new_shards.items()])
+        index = {
+            'format': FORMAT_VERSION,
+            'data_hash': load_manifest_hash(self.base_path),
+            'root_hash': root_hash,
+            'page_size': self.page_size,
+            'files': new_shards[GLOBAL_SHARD]['index'],
+            'shards': {
+                slug: shard['index'][f"brands/{slug}/index"]
+                for slug, shard in new_shards.items() if slug != GLOBAL_SHARD
+            },
+        }
+        index_content = to_json(index)
+        write_atomic(self.output_dir / INDEX_FILE, index_content)
+        write_atomic(self.output_dir / (INDEX_FILE + '.gz'), gzip.compress(index_content, compresslevel=9, mtime=0))
+
+        # Only remove files after the new index is in place
+        kept = {name for shard in new_shards.values() for name in shard['files']}
+        stale = {name for shard in previous_shards.values() for name in shard['files']} - kept
+        self._remove(stale)
+
+        write_atomic(self.output_dir / STATE_FILE, json.dumps({
+            'format': FORMAT_VERSION,
+            'page_size': self.page_size,
+            'root_hash': root_hash,
+            'files': self._files,
+            'shards': new_shards,
+        }).encode('utf-8'))
+        return root_hash
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error.
+    """
+    parser = argparse.ArgumentParser(description="Generate the sharded static JSON API.")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), metavar="DIR",
+                        help=f"Output directory (default: {DEFAULT_OUTPUT}).")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Items per listing page (default: {DEFAULT_PAGE_SIZE}).")
+    parser.add_argument("--full", action="store_true", help="Re-render all shards.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.page_size < 1:
+        print("Error: --page-size must be at least 1", file=sys.stderr)
+        return 1
+
+    repo_root = Path(__file__).parent.parent
+    profiler = Profiler.from_args(args, 'static_api')
+    generator = StaticApiGenerator(repo_root, Path(args.output), args.page_size, profiler)
+    if not generator.loader.load_schema():
+        print(f"Error: {generator.loader.errors[0]}", file=sys.stderr)
+        return 1
+
+    root_hash = generator.generate(full=args.full)
+
+    for error in generator.loader.errors:
+        print(f"  Warning: {error}", file=sys.stderr)
+    stats = generator.stats
+    print(f"✓ Static API in {args.output} (root {root_hash[:16]}): "
+          f"{stats['shards_built']:,} shards built, {stats['shards_skipped']:,} unchanged, "
+          f"{stats['files_written']:,} files written, {stats['files_removed']:,} removed")
+    profiler.finish()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
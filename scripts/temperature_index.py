@@ -0,0 +1,194 @@
+"""
+Interval index for temperature-compatibility queries
+
+Answers "which materials can print at nozzle T with bed B and chamber C?"
+without scanning every material. Each temperature dimension (print, bed,
+chamber) gets a centered interval tree built from the material's
+`min_*_temperature` / `max_*_temperature` properties, plus sorted endpoint
+arrays used to pick the most selective dimension for multi-dimensional
+queries. Queries run in O(log n + k).
+
+    index = build_temperature_index(loader.load_all_entities()['materials'])
+    index.compatible(print=215, bed=60)
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Optional
+
+from model import iter_materials, material_fields
+
+
+# dimension -> (min property, max property)
+TEMPERATURE_DIMENSIONS = {
+    'print': ('min_print_temperature', 'max_print_temperature'),
+    'bed': ('min_bed_temperature', 'max_bed_temperature'),
+    'chamber': ('min_chamber_temperature', 'max_chamber_temperature'),
+}
+
+INF = float('inf')
+
+
+class _IntervalNode:
+    """Node of a centered interval tree"""
+
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, intervals: list[tuple[float, float, int]]):
+        endpoints = sorted(e for lo, hi, _ in intervals for e in (lo, hi) if e not in (INF, -INF))
+        self.center = endpoints[len(endpoints) // 2] if endpoints else 0.0
+
+        left, right, here = [], [], []
+        for interval in intervals:
+            lo, hi, _ = interval
+            if hi < self.center:
+                left.append(interval)
+            elif lo > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        if not here:
+            # Only an inverted interval misses its own endpoint; keep everything
+            # at this node rather than recursing on the same list forever
+            here, left, right = intervals, [], []
+
+        # Intervals overlapping the center, sorted by start and by end (descending)
+        self.by_start = sorted(here, key=lambda i: i[0])
+        self.by_end = sorted(here, key=lambda i: i[1], reverse=True)
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+    def query(self, lo: float, hi: float, out: list[int]) -> None:
+        """Collect rows of all intervals overlapping [lo, hi]"""
+        node = self
+        while node is not None:
+            if hi < node.center:
+                for start, _, row in node.by_start:
+                    if start > hi:
+                        break
+                    out.append(row)
+                node = node.left
+            elif lo > node.center:
+                for _, end, row in node.by_end:
+                    if end < lo:
+                        break
+                    out.append(row)
+                node = node.right
+            else:
+                out.extend(row for _, _, row in node.by_start)
+                if node.left is not None:
+                    node.left.query(lo, hi, out)
+                node = node.right
+
+
+class TemperatureIndex:
+    """Interval index over the temperature ranges of materials"""
+
+    def __init__(self, slugs: list[str], intervals: Dict[str, list[Optional[tuple[float, float]]]]):
+        self.slugs = slugs
+        # dimension -> row -> (lo, hi), None when the material has no data
+        self.intervals = intervals
+        self.trees: Dict[str, Optional[_IntervalNode]] = {}
+        self.sorted_starts: Dict[str, list[float]] = {}
+        self.sorted_ends: Dict[str, list[float]] = {}
+        self.unknown: Dict[str, list[int]] = {}
+
+        for dimension, rows in intervals.items():
+            known = [(lo_hi[0], lo_hi[1], row) for row, lo_hi in enumerate(rows) if lo_hi is not None]
+            self.trees[dimension] = _IntervalNode(known) if known else None
+            self.sorted_starts[dimension] = sorted(lo for lo, _, _ in known)
+            self.sorted_ends[dimension] = sorted(hi for _, hi, _ in known)
+            self.unknown[dimension] = [row for row, lo_hi in enumerate(rows) if lo_hi is None]
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def estimate(self, dimension: str, lo: float, hi: float) -> int:
+        """Upper bound of the number of materials overlapping [lo, hi], in O(log n)"""
+        starts, ends = self.sorted_starts[dimension], self.sorted_ends[dimension]
+        started = bisect_right(starts, hi)
+        not_ended = len(ends) - bisect_left(ends, lo)
+        return min(started, not_ended)
+
+    def query_rows(self, dimension: str, lo: float, hi: float, include_unknown: bool = False) -> list[int]:
+        """Get rows of materials whose range in `dimension` overlaps [lo, hi]"""
+        rows: list[int] = []
+        tree = self.trees[dimension]
+        if tree is not None:
+            tree.query(lo, hi, rows)
+        if include_unknown:
+            rows.extend(self.unknown[dimension])
+        return rows
+
+    def _matches(self, row: int, dimension: str, lo: float, hi: float, include_unknown: bool) -> bool:
+        interval = self.intervals[dimension][row]
+        if interval is None:
+            return include_unknown
+        return interval[0] <= hi and interval[1] >= lo
+
+    def compatible(self, include_unknown: bool = False, **temperatures: Any) -> list[str]:
+        """Get slugs of materials compatible with all given temperatures
+
+        Args:
+            include_unknown: Also return materials that have no temperature
+                data for a queried dimension.
+            **temperatures: Dimension name (`print`, `bed`, `chamber`) mapped
+                to a temperature or to a `(lo, hi)` range that must overlap
+                the material's range. `None` values are ignored.
+
+        Returns:
+            Sorted list of material slugs.
+        """
+        query: Dict[str, tuple[float, float]] = {}
+        for dimension, value in temperatures.items():
+            if dimension not in TEMPERATURE_DIMENSIONS:
+                raise ValueError(f"Unknown temperature dimension: {dimension}")
+            if value is None:
+                continue
+            lo, hi = value if isinstance(value, tuple) else (value, value)
+            query[dimension] = (float(lo), float(hi))
+
+        if not query:
+            return sorted(self.slugs)
+
+        # Run the interval query on the most selective dimension, check the others per row
+        def cost(dimension: str) -> int:
+            estimate = self.estimate(dimension, *query[dimension])
+            return estimate + (len(self.unknown[dimension]) if include_unknown else 0)
+
+        dimensions = sorted(query, key=cost)
+        first = dimensions[0]
+        rows = self.query_rows(first, *query[first], include_unknown=include_unknown)
+        rows = [
+            row for row in rows
+            if all(self._matches(row, d, *query[d], include_unknown) for d in dimensions[1:])
+        ]
+        return sorted(self.slugs[row] for row in rows)
+
+
+def _interval(properties: Dict[str, Any], min_key: str, max_key: str) -> Optional[tuple[float, float]]:
+    """Get the (lo, hi) interval of a material; a missing bound is unbounded"""
+    lo, hi = properties.get(min_key), properties.get(max_key)
+    lo = lo if isinstance(lo, (int, float)) else None
+    hi = hi if isinstance(hi, (int, float)) else None
+    if lo is None and hi is None:
+        return None
+    if lo is not None and hi is not None and lo > hi:
+        # Swapped bounds are a data entry mistake, the range itself is meant
+        lo, hi = hi, lo
+    return (float(lo) if lo is not None else -INF, float(hi) if hi is not None else INF)
+
+
+def build_temperature_index(materials: Any) -> TemperatureIndex:
+    """Build a TemperatureIndex from a dict model, typed Database or iterable of materials"""
+    slugs: list[str] = []
+    intervals: Dict[str, list[Optional[tuple[float, float]]]] = {d: [] for d in TEMPERATURE_DIMENSIONS}
+
+    for material in iter_materials(materials):
+        slug, _, _, _, properties = material_fields(material)
+        if not slug:
+            continue
+        slugs.append(slug)
+        for dimension, (min_key, max_key) in TEMPERATURE_DIMENSIONS.items():
+            intervals[dimension].append(_interval(properties, min_key, max_key))
+
+    return TemperatureIndex(slugs, intervals)
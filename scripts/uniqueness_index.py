@@ -0,0 +1,120 @@
+"""
+Uniqueness index for slugs, UUIDs and GTINs
+
+Both the validator and DatabaseLoader key entities by slug, so a second file
+with the same slug (e.g. in another brand folder) silently replaces the
+first. The index records every occurrence of a key while the files are being
+loaded, so collisions can be reported afterwards without another pass over
+the data, and other checks can look up which files use a key.
+
+Scopes:
+    slug  unique per entity type
+    uuid  unique across all entity types
+    gtin  unique across all entity types (only packages have one)
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+UNIQUE_FIELDS = ('slug', 'uuid', 'gtin')
+# Fields whose values must be unique within an entity type only
+PER_ENTITY_FIELDS = frozenset({'slug'})
+
+
+def normalize_key(field: str, value: Any) -> Optional[str]:
+    """Normalize a key value for comparison, None if the value is empty"""
+    if value is None or value == '' or isinstance(value, (dict, list, bool)):
+        return None
+    text = str(value).strip()
+    if field == 'uuid':
+        text = text.lower()
+    return text or None
+
+
+class KeyConflict:
+    """A key value used by more than one file"""
+
+    def __init__(self, field: str, value: str, entity: Optional[str], occurrences: list[tuple[str, str]]):
+        self.field = field
+        self.value = value
+        self.entity = entity  # None for keys unique across entity types
+        self.occurrences = occurrences  # [(entity, file path)]
+
+    @property
+    def files(self) -> list[str]:
+        return [path for _, path in self.occurrences]
+
+    def __str__(self):
+        scope = f" in {self.entity}" if self.entity else ""
+        return f"Duplicate {self.field} '{self.value}'{scope}: " + ", ".join(self.files)
+
+
+class UniquenessIndex:
+    """Records every file using each slug, UUID and GTIN"""
+
+    def __init__(self):
+        # field -> (entity or None, value) -> [(entity, file path)]
+        self.occurrences: Dict[str, Dict[tuple[Optional[str], str], list[tuple[str, str]]]] = {
+            field: {} for field in UNIQUE_FIELDS
+        }
+
+    def add(self, entity: str, path: Union[Path, str], data: Dict[str, Any]) -> None:
+        """Record the keys of an entity loaded from a file
+
+        Adding the same file again (e.g. when an entity type is reloaded) is
+        a no-op.
+        """
+        occurrence = (entity, str(path))
+        for field in UNIQUE_FIELDS:
+            value = normalize_key(field, data.get(field))
+            if value is None:
+                continue
+            scope = entity if field in PER_ENTITY_FIELDS else None
+            files = self.occurrences[field].setdefault((scope, value), [])
+            if occurrence not in files:
+                files.append(occurrence)
+
+    def remove(self, entity: str, path: Union[Path, str], data: Dict[str, Any]) -> None:
+        """Forget the keys recorded for a file, `data` being what was added for it"""
+        occurrence = (entity, str(path))
+        for field in UNIQUE_FIELDS:
+            value = normalize_key(field, data.get(field))
+            if value is None:
+                continue
+            key = (entity if field in PER_ENTITY_FIELDS else None, value)
+            files = self.occurrences[field].get(key)
+            if files and occurrence in files:
+                files.remove(occurrence)
+                if not files:
+                    del self.occurrences[field][key]
+
+    def files(self, field: str, value: Any, entity: Optional[str] = None) -> list[str]:
+        """Get the files using a key value
+
+        Args:
+            field: One of UNIQUE_FIELDS.
+            value: The key value.
+            entity: Entity type, required for per-entity fields (slug).
+        """
+        value = normalize_key(field, value)
+        if value is None:
+            return []
+        scope = entity if field in PER_ENTITY_FIELDS else None
+        return [path for _, path in self.occurrences[field].get((scope, value), [])]
+
+    def entity_of(self, field: str, value: Any) -> Optional[str]:
+        """Get the entity type using a globally unique key (uuid or gtin)"""
+        value = normalize_key(field, value)
+        occurrences = self.occurrences[field].get((None, value)) if value is not None else None
+        return occurrences[0][0] if occurrences else None
+
+    def conflicts(self) -> list[KeyConflict]:
+        """Get all key values used by more than one file, in a stable order"""
+        conflicts = []
+        for field in UNIQUE_FIELDS:
+            for (scope, value), occurrences in self.occurrences[field].items():
+                if len(occurrences) > 1:
+                    conflicts.append(KeyConflict(field, value, scope, sorted(occurrences, key=lambda o: o[1])))
+        conflicts.sort(key=lambda c: (c.field, c.entity or '', c.value))
+        return conflicts
@@ -4,17 +4,33 @@ Update manifest.yaml with current data hash and timestamp.
 
 This script computes a SHA256 hash of all data files (excluding manifest.yaml)
 to enable clients to detect when data has changed.
+
+Usage:
+    python scripts/update_manifest.py [--profile FILE]
 """
 
+import argparse
 import hashlib
 import sys
+import time
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
 import yaml
 
+from profiling import Profiler, add_profile_arguments
+
+
+def list_data_files(data_dir: Path) -> list[Path]:
+    """Get the data files covered by the hash (yaml and json, except manifest.yaml), sorted by path"""
+    data_files: list[Path] = []
+    for pattern in ["**/*.yaml", "**/*.json"]:
+        data_files.extend(data_dir.glob(pattern))
+    return sorted(f for f in data_files if f.name != "manifest.yaml")
+
 
-def compute_data_hash(data_dir: Path) -> str:
+def compute_data_hash(data_dir: Path, profiler: Optional[Profiler] = None) -> str:
     """Compute SHA256 hash of all data files.
 
     Files are sorted by path to ensure deterministic ordering.
@@ -22,37 +38,35 @@ def compute_data_hash(data_dir: Path) -> str:
 
     Args:
         data_dir: Path to the data directory.
+        profiler: Records the time spent on each file, if enabled.
 
     Returns:
         Hexadecimal SHA256 hash string.
     """
     hasher = hashlib.sha256()
+    data_files = list_data_files(data_dir)
 
-    # Collect all data files (yaml and json), excluding manifest.yaml
-    data_files: list[Path] = []
-    for pattern in ["**/*.yaml", "**/*.json"]:
-        data_files.extend(data_dir.glob(pattern))
-
-    # Filter out manifest.yaml and sort for deterministic ordering
-    data_files = sorted(
-        f for f in data_files if f.name != "manifest.yaml"
-    )
-
+    profiling = profiler is not None and profiler.enabled
     for file_path in data_files:
+        started = time.perf_counter()
         # Include relative path in hash so renames are detected
         rel_path = file_path.relative_to(data_dir)
         hasher.update(str(rel_path).encode("utf-8"))
-        hasher.update(file_path.read_bytes())
+        content = file_path.read_bytes()
+        hasher.update(content)
+        if profiling:
+            profiler.record_file(file_path, len(content), time.perf_counter() - started)
 
     return hasher.hexdigest()
 
 
-def update_manifest(manifest_path: Path, data_dir: Path) -> bool:
+def update_manifest(manifest_path: Path, data_dir: Path, profiler: Optional[Profiler] = None) -> bool:
     """Update manifest.yaml with current hash and timestamp.
 
     Args:
         manifest_path: Path to manifest.yaml file.
         data_dir: Path to data directory.
+        profiler: Profiler for the hashing phase, if any.
 
     Returns:
         True if update was successful, False otherwise.
@@ -68,7 +82,9 @@ def update_manifest(manifest_path: Path, data_dir: Path) -> bool:
             pass
 
     # Compute new hash
-    new_hash = compute_data_hash(data_dir)
+    profiler = profiler or Profiler.disabled()
+    with profiler.phase('hash'):
+        new_hash = compute_data_hash(data_dir, profiler)
     last_modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
     # Write updated manifest
@@ -100,6 +116,10 @@ def main() -> int:
     Returns:
         Exit code: 0 on success, 1 on error.
     """
+    parser = argparse.ArgumentParser(description="Update manifest.yaml with the current data hash.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     data_dir = project_root / "data"
@@ -109,7 +129,9 @@ def main() -> int:
         print(f"Error: {data_dir} not found", file=sys.stderr)
         return 1
 
-    success = update_manifest(manifest_path, data_dir)
+    profiler = Profiler.from_args(args, 'update_manifest')
+    success = update_manifest(manifest_path, data_dir, profiler)
+    profiler.finish()
     return 0 if success else 1
 
 
@@ -2,10 +2,19 @@
 UUID Generation and Validation Utilities
 
 Implements UUIDv5 generation according to the specification in uuid.md
+
+UUIDv5 is the SHA-1 hash of the namespace UUID's bytes followed by the name.
+The hash state after the namespace bytes is computed once per namespace and
+copied for every UUID; the batched functions (generate_*_uuids) derive many
+UUIDs in one call, optionally split across worker processes, and return
+exactly what uuid.uuid5 would.
 """
 
+import hashlib
 import uuid
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 
 # Namespaces for different entity types as defined in uuid.md
@@ -16,11 +25,73 @@ NAMESPACE_MATERIAL_PACKAGE_INSTANCE = "31062f81-b5bd-4f86-a5f8-46367e841508"
 NAMESPACE_PALETTE_COLOR = "6c10f945-d488-40aa-8a7e-d6d0bcacaccb"
 
 
+# Version 5 and the RFC 4122 variant, as set by uuid.UUID(version=5)
+_VERSION_MASK = ~((0xf000 << 64) | (0xc000 << 48))
+_VERSION_BITS = (5 << 76) | (0x8000 << 48)
+# Batches smaller than this are not worth sending to worker processes
+MIN_PARALLEL_BATCH = 50000
+
+
+@lru_cache(maxsize=None)
+def _namespace_hash(namespace: str) -> 'hashlib._Hash':
+    """SHA-1 state after the namespace UUID's bytes"""
+    return hashlib.sha1(uuid.UUID(namespace).bytes)
+
+
+def _uuid5_int(namespace_hash: 'hashlib._Hash', name: bytes) -> int:
+    state = namespace_hash.copy()
+    state.update(name)
+    return int.from_bytes(state.digest()[:16], 'big') & _VERSION_MASK | _VERSION_BITS
+
+
 def generate_uuid(namespace, *args) -> uuid.UUID:
     # Concatenate all arguments as bytes first
-    combined_bytes = b"".join(args)
-    namespace_uuid = uuid.UUID(namespace)
-    return uuid.uuid5(namespace_uuid, combined_bytes)
+    return uuid.UUID(int=_uuid5_int(_namespace_hash(namespace), b"".join(args)))
+
+
+def _derive_ints(namespace: str, names: Sequence[bytes]) -> List[int]:
+    copy = _namespace_hash(namespace).copy
+    values = []
+    for name in names:
+        state = copy()
+        state.update(name)
+        values.append(int.from_bytes(state.digest()[:16], 'big') & _VERSION_MASK | _VERSION_BITS)
+    return values
+
+
+def derive_uuids(namespace: str, names: Sequence[bytes], processes: int = 1,
+                 as_ints: bool = False) -> Union[List[uuid.UUID], List[int]]:
+    """
+    Generate the UUIDs of many names in one namespace.
+
+    Args:
+        namespace: The namespace UUID (string)
+        names: The bytes hashed after the namespace, one per UUID
+        processes: Worker processes to split large batches across
+        as_ints: Return the UUIDs as 128-bit integers (uuid.UUID.int);
+            building the UUID objects costs more than hashing
+
+    Returns:
+        The UUIDs in the order of names
+    """
+    if processes > 1 and len(names) >= MIN_PARALLEL_BATCH:
+        chunk = -(-len(names) // processes)
+        chunks = [names[i:i + chunk] for i in range(0, len(names), chunk)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            values = [value for part in executor.map(_derive_ints, [namespace] * len(chunks), chunks)
+                      for value in part]
+    else:
+        values = _derive_ints(namespace, names)
+    return values if as_ints else [uuid.UUID(int=value) for value in values]
+
+
+def parse_uuid(value) -> Optional[uuid.UUID]:
+    """Parse a UUID string, None if it is missing or malformed"""
+    try:
+        return uuid.UUID(value)
+    except (ValueError, TypeError, AttributeError):
+        return None
+
 
 def generate_brand_uuid(brand_name: str) -> uuid.UUID:
     """
@@ -63,3 +134,30 @@ def generate_material_package_uuid(brand_uuid: uuid.UUID, gtin: int) -> uuid.UUI
         brand_uuid.bytes,
         str(gtin).encode("utf-8")
     )
+
+
+def generate_brand_uuids(brand_names: Iterable[str], processes: int = 1, as_ints: bool = False) -> list:
+    """Batched generate_brand_uuid, see derive_uuids"""
+    return derive_uuids(NAMESPACE_BRAND, [name.encode("utf-8") for name in brand_names], processes, as_ints)
+
+
+def generate_material_uuids(materials: Iterable[Tuple[uuid.UUID, str]], processes: int = 1,
+                            as_ints: bool = False) -> list:
+    """Batched generate_material_uuid of (brand UUID, material name) pairs, see derive_uuids"""
+    return derive_uuids(
+        NAMESPACE_MATERIAL,
+        [brand_uuid.bytes + name.encode("utf-8") for brand_uuid, name in materials],
+        processes,
+        as_ints
+    )
+
+
+def generate_material_package_uuids(packages: Iterable[Tuple[uuid.UUID, int]], processes: int = 1,
+                                    as_ints: bool = False) -> list:
+    """Batched generate_material_package_uuid of (brand UUID, GTIN) pairs, see derive_uuids"""
+    return derive_uuids(
+        NAMESPACE_MATERIAL_PACKAGE,
+        [brand_uuid.bytes + str(gtin).encode("utf-8") for brand_uuid, gtin in packages],
+        processes,
+        as_ints
+    )
@@ -3,23 +3,52 @@
 Material Database JSON Schema Validator
 
 Validates YAML data files against JSON Schema definitions.
+
+Schemas are validated by jsonschema. --compiled-schemas opts in to the
+generated Python functions of schema_compiler.py, except for schemas using
+keywords the compiler does not support or when the installed jsonschema
+lacks the internals the compiler builds on. The compiled validators stay
+opt-in until `make schema-parity` passes on the pinned schemas.
+
+Errors are streamed as they are found with --format ndjson or sarif
+(progress then goes to stderr). Text output lists errors individually up to
+--list-limit per level and groups them by rule and message otherwise;
+--max-errors stops the run early.
+
+--low-memory keeps only the fields the cross-entity checks read
+(projection.py) instead of every parsed document.
+
+Usage:
+    python scripts/validate_json_schema.py [--compiled-schemas] [--low-memory]
+    python scripts/validate_json_schema.py [--format ndjson|sarif] [--output FILE] [--max-errors N]
+    python scripts/validate_json_schema.py [--profile build/profile/validate.json] [--profile-memory]
 """
 
+import argparse
 import json
 import sys
-import uuid
+import time
+from contextlib import redirect_stdout
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 from urllib.parse import urlparse
 
 import yaml
 from jsonschema import FormatChecker, validators
 from referencing import Registry, retrieval
 
+from lib import YAML_LOADER
+from near_duplicates import find_duplicate_clusters
+from profiling import Profiler, add_profile_arguments
+from projection import project
+from reference_index import ReferenceIndex, hashable_key
+from uniqueness_index import UniquenessIndex
+from validation_output import OUTPUT_FORMATS, ErrorCollector, TooManyErrors, create_writer, relative_file
 from uuid_utils import (
-    generate_brand_uuid,
-    generate_material_uuid,
-    generate_material_package_uuid
+    generate_brand_uuids,
+    generate_material_uuids,
+    generate_material_package_uuids,
+    parse_uuid
 )
 
 
@@ -37,6 +66,10 @@ class ValidationError:
         return f"[{self.level.upper()}] {self.entity} ({self.file}): {self.message} [rule: {self.rule}]"
 
 
+# Errors per level listed individually by the command line before grouping
+DEFAULT_LIST_LIMIT = 200
+
+
 class JsonSchemaValidator:
     """Validates material database YAML files against JSON schemas"""
 
@@ -70,15 +103,34 @@ class JsonSchemaValidator:
         ],
     }
 
-    def __init__(self, base_path: Path):
+    # Level of uniqueness conflicts per key field. Duplicate slugs make one of
+    # the files invisible to every other check; the existing data still has
+    # duplicate UUIDs and GTINs, so those are warnings for now.
+    UNIQUENESS_LEVELS = {
+        'slug': 'error',
+        'uuid': 'warning',
+        'gtin': 'warning',
+    }
+
+    def __init__(self, base_path: Path, profiler: Optional[Profiler] = None, compiled_schemas: bool = False,
+                 errors: Optional[ErrorCollector] = None, list_limit: Optional[int] = None,
+                 low_memory: bool = False):
         self.base_path = base_path
+        self.profiler = profiler or Profiler.disabled()
+        self.compiled_schemas = compiled_schemas
+        self.schema_cache: Any = None  # schema_compiler.CompiledSchemaCache, created on first use
         self.schema_dir = base_path / "openprinttag" / "schema"
         self.openprinttag_data_dir = base_path / "openprinttag" / "data"
         self.data_dir = base_path / "data"
-        self.errors: List[ValidationError] = []
+        self.errors = errors if errors is not None else ErrorCollector()
+        self.list_limit = list_limit  # errors listed individually per level, None for all
+        self.low_memory = low_memory  # cache projections instead of the full documents
+        self.files_validated = 0
         self.registry = None
         self.validator_cache: Dict[str, Any] = {}
-        self.data_cache: Dict[str, Dict[str, Any]] = {}  # entity_type -> {slug -> data}
+        self.data_cache: Dict[str, Dict[str, Any]] = {}  # entity_type -> {slug -> data or EntityProjection}
+        self.uniqueness = UniquenessIndex()  # every file per slug/UUID/GTIN
+        self.references = ReferenceIndex(self.FOREIGN_KEY_MAPPING)  # referrers per referenced value
 
     def setup_registry(self) -> None:
         """Set up the schema registry with a cached retriever function"""
@@ -104,6 +156,12 @@ class JsonSchemaValidator:
         if self.registry is None:
             self.setup_registry()
 
+        if self.compiled_schemas:
+            validator = self._compiled_validator(schema_filename)
+            if validator is not None:
+                self.validator_cache[schema_filename] = validator
+                return validator
+
         # Get the schema from the registry
         schema = self.registry.get_or_retrieve(schema_filename).value.contents
 
@@ -114,11 +172,37 @@ class JsonSchemaValidator:
         self.validator_cache[schema_filename] = validator
         return validator
 
+    def _compiled_validator(self, schema_filename: str):
+        """Get the compiled validator for a schema, None if jsonschema has to validate it"""
+        # The compiler builds on jsonschema internals, which other jsonschema
+        # versions may lack: then everything is validated by jsonschema
+        try:
+            import schema_compiler
+        except (ImportError, AttributeError) as e:
+            self.compiled_schemas = False
+            reason = f"schema compiler unavailable: {e}"
+        else:
+            try:
+                if self.schema_cache is None:
+                    self.schema_cache = schema_compiler.CompiledSchemaCache(self.base_path, self.schema_dir,
+                                                                            self.registry)
+                return self.schema_cache.get(schema_filename)
+            except schema_compiler.UnsupportedSchema as e:
+                reason = str(e)
+            except AttributeError as e:
+                self.compiled_schemas = False
+                reason = f"schema compiler unavailable: {e}"
+        self.errors.append(ValidationError(
+            'info', 'schema_compiler', 'schema', schema_filename,
+            f"Not compiled ({reason}), validated by jsonschema"
+        ))
+        return None
+
     def load_yaml_file(self, file_path: Path) -> Any:
         """Load a YAML file"""
         try:
             with open(file_path, 'r') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=YAML_LOADER)
         except Exception as e:
             self.errors.append(ValidationError(
                 'error', 'file_parse', 'file', str(file_path),
@@ -126,30 +210,45 @@ class JsonSchemaValidator:
             ))
             return None
 
-    def validate_file_against_schema(self, file_path: Path, schema_filename: str, entity_type: str) -> None:
-        """Validate a single YAML file against a JSON schema"""
-        data = self.load_yaml_file(file_path)
+    def validate_file_against_schema(self, file_path: Path, schema_filename: str, entity_type: str) -> Any:
+        """Validate a single YAML file against a JSON schema
+
+        Returns:
+            The data cached for cross-entity validation, None if the file was not cached.
+        """
+        if not self.profiler.enabled:
+            return self._validate_file(file_path, schema_filename, entity_type)
+        started = time.perf_counter()
+        data = self._validate_file(file_path, schema_filename, entity_type)
+        self.profiler.record_file(file_path, file_path.stat().st_size, time.perf_counter() - started)
+        return data
+
+    def _validate_file(self, file_path: Path, schema_filename: str, entity_type: str) -> Any:
+        self.files_validated += 1
+        with self.profiler.timer('yaml_parse'):
+            data = self.load_yaml_file(file_path)
         if data is None:
-            return
+            return None
 
         try:
             validator = self.get_validator(schema_filename)
 
             # Collect all validation errors
-            errors = list(validator.iter_errors(data))
-            for error in errors:
-                error_path = ".".join(str(p) for p in error.absolute_path) if error.absolute_path else "root"
-                self.errors.append(ValidationError(
-                    'error', 'schema_validation', entity_type, str(file_path),
-                    f"At '{error_path}': {error.message}"
-                ))
-
+            with self.profiler.timer('schema_validation'):
+                errors = list(validator.iter_errors(data))
         except Exception as e:
             self.errors.append(ValidationError(
                 'error', 'validation_failed', entity_type, str(file_path),
                 f"Validation failed: {e}"
             ))
-            return
+            return None
+
+        for error in errors:
+            error_path = ".".join(str(p) for p in error.absolute_path) if error.absolute_path else "root"
+            self.errors.append(ValidationError(
+                'error', 'schema_validation', entity_type, str(file_path),
+                f"At '{error_path}': {error.message}"
+            ))
 
         # Check slug matches filename for entities with slugs
         if 'slug' in data:
@@ -161,13 +260,21 @@ class JsonSchemaValidator:
                     f"Filename slug '{filename_slug}' does not match slug in file '{content_slug}'"
                 ))
 
+        if isinstance(data, dict):
+            self.uniqueness.add(entity_type, file_path, data)
+
         # Cache the data for cross-entity validation
         if entity_type not in self.data_cache:
             self.data_cache[entity_type] = {}
 
         # Use slug as key if available, otherwise use filename
         cache_key = data.get('slug', file_path.stem)
+        if isinstance(data, dict):
+            self.references.add(entity_type, cache_key, data)
+            if self.low_memory:
+                data = project(data)
         self.data_cache[entity_type][cache_key] = data
+        return data
 
     def validate_entity_directory(self, entity_dir: str, schema_filename: str) -> int:
         """Validate all YAML files in an entity directory. Returns count of files validated."""
@@ -261,107 +368,116 @@ class JsonSchemaValidator:
                 return None
         return value
 
-    def validate_foreign_keys(self) -> None:
-        """Validate all foreign key references exist"""
-        for entity_type, fk_definitions in self.FOREIGN_KEY_MAPPING.items():
-            entity_data = self.data_cache.get(entity_type, {})
+    def validate_foreign_keys(self, keys: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        """Validate all foreign key references exist
 
-            for entity_key, entity_obj in entity_data.items():
-                for field_path, target_entity, target_field, is_array, condition in fk_definitions:
-                    if condition is not None and not condition(entity_obj):
-                        continue
-
-                    value = self.get_nested_value(entity_obj, field_path)
-
-                    if value is None:
-                        continue
-
-                    target_data = self.data_cache.get(target_entity, {})
+        Every referenced value (collected in `self.references` while loading)
+        is looked up in a set of the target entity's keys. `keys` (entity
+        type -> keys) restricts the check to the references of those entities.
+        """
+        if keys is None:
+            targets = self.references.targets()
+        else:
+            targets = ((r.target_entity, r.target_field, r.value, [r])
+                       for entity_type, entity_keys in keys.items() for key in entity_keys
+                       for r in self.references.references_of(entity_type, key))
+        target_values: Dict[tuple[str, str], set] = {}
+        missing = []
+        for target_entity, target_field, value, referrers in targets:
+            values = target_values.get((target_entity, target_field))
+            if values is None:
+                values = target_values[(target_entity, target_field)] = {
+                    hashable_key(item.get(target_field))
+                    for item in self.data_cache.get(target_entity, {}).values()
+                }
+            if value not in values:
+                missing.extend(referrers)
+
+        for reference in sorted(missing, key=lambda r: (r.entity, r.key, r.field)):
+            self.errors.append(ValidationError(
+                'error', 'foreign_key_exists', reference.entity, reference.key,
+                f"Foreign key {reference.field}={reference.value} not found in "
+                f"{reference.target_entity}.{reference.target_field}"
+            ))
 
-                    # Handle arrays
-                    values_to_check = value if is_array else [value]
+    def validate_uuids(self, keys: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        """Validate UUIDs match their derived values according to uuid.md specification
 
-                    for val in values_to_check:
-                        # Check if value exists in target entity
-                        found = any(
-                            item.get(target_field) == val
-                            for item in target_data.values()
-                        )
-                        if not found:
-                            field_name = '.'.join(field_path)
-                            self.errors.append(ValidationError(
-                                'error', 'foreign_key_exists', entity_type, entity_key,
-                                f"Foreign key {field_name}={val} not found in {target_entity}.{target_field}"
-                            ))
+        The expected UUIDs are derived in one batch per entity type. Entities
+        whose UUID, name, GTIN or brand is missing or malformed are skipped:
+        schema and foreign key validation report those. `keys` (entity type ->
+        keys) restricts the check to those entities.
+        """
 
-    def validate_uuids(self) -> None:
-        """Validate UUIDs match their derived values according to uuid.md specification"""
+        def selected(entity_dir: str) -> Iterable[tuple[str, Any]]:
+            entities = self.data_cache.get(entity_dir, {})
+            if keys is None:
+                return entities.items()
+            return [(key, entities[key]) for key in keys.get(entity_dir, ()) if key in entities]
 
         # Validate brands
         brands_data = self.data_cache.get('brands', {})
-        for brand_slug, brand_data in brands_data.items():
-            expected_uuid = generate_brand_uuid(brand_data['name'])
-            is_valid = expected_uuid == uuid.UUID(brand_data['uuid'])
-            if not is_valid:
+        brands = [(slug, data) for slug, data in selected('brands') if isinstance(data.get('name'), str)]
+        expected = generate_brand_uuids([data['name'] for _, data in brands], as_ints=True)
+        self._report_uuid_mismatches('brands', brands, expected)
+
+        # Validate materials and material packages (need brand UUID)
+        brand_uuids = {slug: parse_uuid(data.get('uuid')) for slug, data in brands_data.items()}
+
+        def with_brand_uuid(entity_dir: str, field: str, field_types: tuple) -> list:
+            entities = []
+            for slug, data in selected(entity_dir):
+                # Extract brand slug from format: brand: { slug: "value" }
+                brand_ref = data.get('brand')
+                if not brand_ref or not isinstance(brand_ref, dict):
+                    continue
+                brand_uuid = brand_uuids.get(brand_ref.get('slug'))
+                value = data.get(field)
+                if brand_uuid is not None and isinstance(value, field_types) and not isinstance(value, bool):
+                    entities.append((slug, data, brand_uuid, value))
+            return entities
+
+        materials = with_brand_uuid('materials', 'name', (str,))
+        expected = generate_material_uuids([(brand_uuid, name) for *_, brand_uuid, name in materials], as_ints=True)
+        self._report_uuid_mismatches('materials', [(slug, data) for slug, data, *_ in materials], expected)
+
+        packages = with_brand_uuid('material-packages', 'gtin', (int, str))
+        expected = generate_material_package_uuids([(brand_uuid, gtin) for *_, brand_uuid, gtin in packages],
+                                                   as_ints=True)
+        self._report_uuid_mismatches('material-packages', [(slug, data) for slug, data, *_ in packages], expected)
+
+    def _report_uuid_mismatches(self, entity_type: str, entities: list, expected: List[int]) -> None:
+        """Report entities whose UUID differs from the expected one (as UUID.int)"""
+        for (slug, data), expected_uuid in zip(entities, expected):
+            actual_uuid = parse_uuid(data.get('uuid'))
+            # UUID format validation catches malformed UUIDs
+            if actual_uuid is not None and actual_uuid.int != expected_uuid:
                 self.errors.append(ValidationError(
-                    'error', 'uuid_derivation', 'brands', brand_slug, 'Invalid UUID'
+                    'error', 'uuid_derivation', entity_type, slug, 'Invalid UUID'
                 ))
 
-        # Validate materials (need brand UUID)
-        materials_data = self.data_cache.get('materials', {})
-        for material_slug, material_data in materials_data.items():
-            # Extract brand slug from format: brand: { slug: "value" }
-            brand_ref = material_data.get('brand')
-            if not brand_ref or not isinstance(brand_ref, dict):
-                continue
-            brand_slug = brand_ref.get('slug')
-            if not brand_slug:
-                continue
-
-            brand_data = brands_data.get(brand_slug)
-            if not brand_data or 'uuid' not in brand_data:
-                # FK validation will catch missing brand
-                continue
-
-            try:
-                brand_uuid = uuid.UUID(brand_data['uuid'])
-                expected_uuid = generate_material_uuid(brand_uuid, material_data['name'])
-                is_valid = expected_uuid == uuid.UUID(material_data['uuid'])
-                if not is_valid:
-                    self.errors.append(ValidationError(
-                        'error', 'uuid_derivation', 'materials', material_slug,'Invalid UUID'
-                    ))
-            except (ValueError, TypeError):
-                # UUID format validation will catch this
-                pass
-
-        # Validate material packages (need brand UUID)
-        packages_data = self.data_cache.get('material-packages', {})
-        for package_slug, package_data in packages_data.items():
-            # Extract brand slug from format: brand: { slug: "value" }
-            brand_ref = package_data.get('brand')
-            if not brand_ref or not isinstance(brand_ref, dict):
-                continue
-            brand_slug = brand_ref.get('slug')
-            if not brand_slug:
-                continue
-
-            brand_data = brands_data.get(brand_slug)
-            if not brand_data or 'uuid' not in brand_data:
-                # FK validation will catch missing brand
-                continue
+    def validate_uniqueness(self) -> None:
+        """Validate that slugs, UUIDs and GTINs are not used by more than one file"""
+        for conflict in self.uniqueness.conflicts():
+            first, *others = conflict.occurrences
+            # Quoted repository-relative paths: outputs stay free of local paths
+            # and every conflict shares one message template
+            self.errors.append(ValidationError(
+                self.UNIQUENESS_LEVELS[conflict.field], f'unique_{conflict.field}', first[0], first[1],
+                f"Duplicate {conflict.field} '{conflict.value}', also used by: "
+                + ", ".join(f"'{relative_file(path, self.base_path)}'" for _, path in others)
+            ))
 
-            try:
-                brand_uuid = uuid.UUID(brand_data['uuid'])
-                expected_uuid = generate_material_package_uuid(brand_uuid, package_data['gtin'])
-                is_valid = expected_uuid == uuid.UUID(package_data['uuid'])
-                if not is_valid:
-                    self.errors.append(ValidationError(
-                        'error', 'uuid_derivation', 'material-packages', package_slug, 'Invalid UUID'
-                    ))
-            except (ValueError, TypeError):
-                # UUID format validation will catch this
-                pass
+    def validate_near_duplicates(self) -> None:
+        """Warn about materials that are likely the same filament entered twice"""
+        clusters = find_duplicate_clusters(self.data_cache.get('materials', {}), self.data_cache.get('brands', {}))
+        for cluster in clusters:
+            first, *others = cluster.slugs
+            others = ", ".join(f"'{slug}'" for slug in others)
+            self.errors.append(ValidationError(
+                'warning', 'near_duplicate', 'materials', first,
+                f"Possible duplicates: {others} (similarity {cluster.similarity:.2f})"
+            ))
 
     def validate(self) -> bool:
         """Run all validations"""
@@ -378,70 +494,117 @@ class JsonSchemaValidator:
         print(f"Data directory: {self.data_dir}")
         print(f"\nValidating entity data against schemas...")
 
-        # Validate each entity type
-        total_files = 0
-        for entity_dir, schema_filename in self.ENTITY_SCHEMA_MAPPING.items():
-            print(f"  {entity_dir} -> {schema_filename}...", end=" ")
-            count = self.validate_entity_directory(entity_dir, schema_filename)
-            total_files += count
-            print(f"{count} files")
-
-        print("\nLoading reference data...")
-        self.load_fff_material_types()
-        self.load_material_certifications()
-        self.load_countries()
-
-        print("\nValidating foreign key references...")
-        self.validate_foreign_keys()
-
-        print("Validating UUIDs...")
-        self.validate_uuids()
+        try:
+            self.run_checks()
+        except TooManyErrors:
+            print(f"\n✗ Stopped after {self.errors.max_errors} errors (--max-errors)")
 
         # Print results
         print("\n" + "=" * 80)
-        print(f"Validated {total_files} files")
+        print(f"Validated {self.files_validated} files")
         print()
 
-        if not self.errors:
+        if not self.errors.total():
             print("✓ Validation passed! No errors found.")
             return True
 
-        # Group errors by level
-        errors = [e for e in self.errors if e.level == 'error']
-        warnings = [e for e in self.errors if e.level == 'warning']
-        infos = [e for e in self.errors if e.level == 'info']
+        self.print_level('error', "✗ ERRORS")
+        self.print_level('warning', "\nWARNINGS")
+        self.print_level('info', "\nINFO")
 
-        if errors:
-            print(f"✗ ERRORS ({len(errors)}):")
-            for error in errors:
-                print(f"  {error}")
+        print("\n" + "=" * 80)
+        print(f"Summary: {self.errors.total('error')} errors, {self.errors.total('warning')} warnings, "
+              f"{self.errors.total('info')} info")
 
-        if warnings:
-            print(f"\nWARNINGS ({len(warnings)}):")
-            for warning in warnings:
-                print(f"  {warning}")
+        return self.errors.total('error') == 0
 
-        if infos:
-            print(f"\nINFO ({len(infos)}):")
-            for info in infos:
-                print(f"  {info}")
+    def run_checks(self) -> None:
+        """Schema validation of every file followed by the cross-entity checks"""
+        # Validate each entity type
+        for entity_dir, schema_filename in self.ENTITY_SCHEMA_MAPPING.items():
+            print(f"  {entity_dir} -> {schema_filename}...", end=" ")
+            with self.profiler.phase(f"schema.{entity_dir}"):
+                count = self.validate_entity_directory(entity_dir, schema_filename)
+            print(f"{count} files")
 
-        print("\n" + "=" * 80)
-        print(f"Summary: {len(errors)} errors, {len(warnings)} warnings, {len(infos)} info")
+        print("\nLoading reference data...")
+        with self.profiler.phase('reference_data'):
+            self.load_fff_material_types()
+            self.load_material_certifications()
+            self.load_countries()
 
-        return len(errors) == 0
+        print("\nValidating uniqueness of slugs, UUIDs and GTINs...")
+        with self.profiler.phase('uniqueness'):
+            self.validate_uniqueness()
+
+        print("Validating foreign key references...")
+        with self.profiler.phase('foreign_keys'):
+            self.validate_foreign_keys()
+
+        print("Validating UUIDs...")
+        with self.profiler.phase('uuids'):
+            self.validate_uuids()
+
+        print("Checking for near-duplicate materials...")
+        with self.profiler.phase('near_duplicates'):
+            self.validate_near_duplicates()
+
+    def print_level(self, level: str, title: str) -> None:
+        """Print the errors of one level, grouped by rule and message if there are too many"""
+        count = self.errors.total(level)
+        if not count:
+            return
+        print(f"{title} ({count}):")
+        if self.errors.complete(level) and (self.list_limit is None or count <= self.list_limit):
+            for error in self.errors:
+                if error.level == level:
+                    print(f"  {error}")
+            return
+        for aggregate in self.errors.aggregates(level):
+            print(f"  {aggregate.count:>7,} × [{aggregate.rule}] {aggregate.template}")
+            print(f"            e.g. {', '.join(aggregate.samples)}")
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Validate the material database against the JSON schemas.")
+    parser.add_argument("--compiled-schemas", action="store_true",
+                        help="Validate with the compiled schema validators instead of jsonschema.")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        help="Output format; ndjson and sarif stream errors as they are found (default: text).")
+    parser.add_argument("--output", default="-", metavar="FILE",
+                        help="Where ndjson/sarif output goes (default: stdout).")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Keep only the fields the cross-entity checks need instead of every parsed file.")
+    parser.add_argument("--max-errors", type=int, metavar="N", help="Stop after N errors.")
+    parser.add_argument("--list-limit", type=int, default=DEFAULT_LIST_LIMIT, metavar="N",
+                        help=f"List at most N errors per level, group the rest by rule and message "
+                             f"(default: {DEFAULT_LIST_LIMIT}).")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     # Find repository root
     script_dir = Path(__file__).parent
     repo_root = script_dir.parent
 
-    print(f"Repository: {repo_root}\n")
-
-    validator = JsonSchemaValidator(repo_root)
-    success = validator.validate()
+    profiler = Profiler.from_args(args, 'validate_json_schema')
+    streaming = args.format != 'text'
+    stream = open(args.output, 'w', encoding='utf-8') if streaming and args.output != '-' else sys.stdout
+    collector = ErrorCollector(create_writer(args.format, stream, repo_root),
+                               keep=0 if streaming else args.list_limit, max_errors=args.max_errors)
+    validator = JsonSchemaValidator(repo_root, profiler, compiled_schemas=args.compiled_schemas,
+                                    errors=collector, list_limit=0 if streaming else args.list_limit,
+                                    low_memory=args.low_memory)
+    try:
+        # Keep stdout for the streamed errors
+        with redirect_stdout(sys.stderr if streaming and stream is sys.stdout else sys.stdout):
+            print(f"Repository: {repo_root}\n")
+            success = validator.validate()
+    finally:
+        collector.close()
+        if stream is not sys.stdout:
+            stream.close()
+    profiler.finish()
 
     sys.exit(0 if success else 1)
 
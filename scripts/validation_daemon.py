@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Warm validation daemon for the UI editor
+
+Keeps a JsonSchemaValidator loaded (schema registry, schema validators,
+reference data, every parsed entity with its reference and uniqueness
+indexes) and answers validation requests over a Unix socket, so a save in
+the editor does not pay for a cold Python process and a full reload.
+
+The daemon watches data/ with inotify (through ctypes; polling file stats
+when inotify is not available). A changed file is validated again against
+its schema; the foreign key and UUID checks then run for the entities it
+holds and for their dependents (the entities referring to them, found in
+the ReferenceIndex), and the uniqueness conflicts are recomputed from the
+UniquenessIndex. Near-duplicate detection compares every material with
+every other one and is left to the full validation.
+
+Protocol: one JSON object per line, answered by one JSON object per line.
+
+    {"command": "validate"}
+        every current error
+    {"command": "validate", "files": ["data/materials/acme/acme-pla.yaml"]}
+        validate the files now (without waiting for the watcher) and return
+        the errors of these files and of the entities depending on them
+    {"command": "status"}
+    {"command": "shutdown"}
+
+Usage:
+    python scripts/validation_daemon.py serve [--socket build/validation.sock] [--poll]
+    python scripts/validation_daemon.py query [FILE ...]
+    python scripts/validation_daemon.py stop
+"""
+
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from uniqueness_index import UNIQUE_FIELDS
+from validate_json_schema import JsonSchemaValidator, ValidationError
+from validation_output import ErrorCollector, error_to_dict, relative_file
+
+
+DEFAULT_SOCKET = 'build/validation.sock'
+DEFAULT_POLL_INTERVAL = 1.0
+# Events arriving within this time are validated together (editors write a file in several steps)
+DEBOUNCE_SECONDS = 0.05
+MAX_REQUEST_SIZE = 1024 * 1024
+
+EntityKey = Tuple[str, str]  # (entity type, data_cache key)
+
+
+@dataclass(slots=True)
+class FileState:
+    """What one data file contributed to the validator"""
+    entity_type: str
+    key: Optional[str]  # data_cache key, None if the file was not cached
+    unique_keys: Dict[str, Any]  # slug/UUID/GTIN recorded in the uniqueness index
+    errors: List[ValidationError] = field(default_factory=list)
+
+
+class WarmValidator:
+    """Validation state that is updated file by file"""
+
+    def __init__(self, base_path: Path, compiled_schemas: bool = False):
+        self.base_path = base_path.resolve()
+        self.validator = JsonSchemaValidator(self.base_path, compiled_schemas=compiled_schemas)
+        self.data_dir = self.validator.data_dir
+        self.files: Dict[Path, FileState] = {}
+        self.paths_by_key: Dict[EntityKey, Set[Path]] = {}
+        self.setup_errors: List[ValidationError] = []
+        self.cross_errors: Dict[EntityKey, List[ValidationError]] = {}  # foreign keys and UUIDs
+        self.uniqueness_errors: List[ValidationError] = []
+        # Entities whose checks the last update of a file ran: its old and new
+        # slug and their referrers, so a query for the file after the watcher
+        # applied a rename still finds what the rename broke
+        self.affected_by_path: Dict[Path, Set[EntityKey]] = {}
+
+    def _collect(self, check: Callable, *args: Any) -> List[ValidationError]:
+        """Run a validator check and return the errors it reported"""
+        self.validator.errors = errors = ErrorCollector()
+        check(*args)
+        return list(errors)
+
+    def entity_type_of(self, path: Path) -> Optional[str]:
+        """Entity type of a data file, None for other paths"""
+        try:
+            parts = path.relative_to(self.data_dir).parts
+        except ValueError:
+            return None
+        if path.suffix != '.yaml' or len(parts) not in (2, 3) or parts[0] not in self.validator.ENTITY_SCHEMA_MAPPING:
+            return None
+        return parts[0]
+
+    def data_files(self) -> List[Path]:
+        """Every entity file currently on disk"""
+        paths = []
+        for entity_type in self.validator.ENTITY_SCHEMA_MAPPING:
+            entity_path = self.data_dir / entity_type
+            paths.extend(sorted(entity_path.glob('*.yaml')))
+            paths.extend(sorted(entity_path.glob('*/*.yaml')))
+        return paths
+
+    def load(self) -> None:
+        """Validate everything once"""
+        if not self.validator.schema_dir.exists():
+            raise FileNotFoundError(f"Schema directory not found at {self.validator.schema_dir}")
+        self.setup_errors = self._collect(self._warm_up)
+        for path in self.data_files():
+            self._check_file(path)
+        self._check_entities(None)
+
+    def _warm_up(self) -> None:
+        for schema_filename in self.validator.ENTITY_SCHEMA_MAPPING.values():
+            self.validator.get_validator(schema_filename)
+        self.validator.load_fff_material_types()
+        self.validator.load_material_certifications()
+        self.validator.load_countries()
+
+    def update(self, paths: Iterable[Path]) -> Tuple[Set[Path], Set[EntityKey]]:
+        """Validate changed (added, edited or deleted) files again
+
+        Returns:
+            The files validated and the entities whose cross-entity checks ran.
+        """
+        pending = {path for path in paths if self.entity_type_of(path)}
+        checked: Set[Path] = set()
+        changed_by_path: Dict[Path, Set[EntityKey]] = {}
+        keys_changed = False  # whether a slug, UUID or GTIN changed
+        while pending:
+            path = pending.pop()
+            checked.add(path)
+            changed = changed_by_path[path] = set()
+            old = self.files.get(path)
+            if old is not None:
+                # Another file with the same slug takes over the cached entity
+                pending.update(self._forget(path, old) - checked)
+                if old.key is not None:
+                    changed.add((old.entity_type, old.key))
+            state = self._check_file(path) if path.is_file() else None
+            if state is not None and state.key is not None:
+                changed.add((state.entity_type, state.key))
+            keys_changed = keys_changed or old is None or state is None or old.unique_keys != state.unique_keys
+        if not checked:
+            return checked, set()
+
+        # Entities refer to each other by slug, which is the data_cache key
+        affected: Set[EntityKey] = set()
+        for path, changed in changed_by_path.items():
+            path_affected = self.affected_by_path[path] = set(changed)
+            for entity_type, key in changed:
+                for reference in self.validator.references.referrers(entity_type, key):
+                    path_affected.add((reference.entity, reference.key))
+            affected |= path_affected
+        for entity_key in affected:
+            self.cross_errors.pop(entity_key, None)
+        keys: Dict[str, List[str]] = {}
+        for entity_type, key in affected:
+            if key in self.validator.data_cache.get(entity_type, {}):
+                keys.setdefault(entity_type, []).append(key)
+        self._check_entities(keys, keys_changed)
+        return checked, affected
+
+    def _check_file(self, path: Path) -> FileState:
+        entity_type = self.entity_type_of(path)
+        schema_filename = self.validator.ENTITY_SCHEMA_MAPPING[entity_type]
+        data = None
+        self.validator.errors = errors = ErrorCollector()
+        try:
+            data = self.validator.validate_file_against_schema(path, schema_filename, entity_type)
+        except Exception as e:
+            errors.append(ValidationError('error', 'validation_failed', entity_type, str(path),
+                                          f"Validation failed: {e}"))
+        key = data.get('slug', path.stem) if isinstance(data, dict) else None
+        unique_keys = {name: data.get(name) for name in UNIQUE_FIELDS} if key is not None else {}
+        state = self.files[path] = FileState(entity_type, key, unique_keys, list(errors))
+        if key is not None:
+            self.paths_by_key.setdefault((entity_type, key), set()).add(path)
+        return state
+
+    def _forget(self, path: Path, state: FileState) -> Set[Path]:
+        """Remove what a file contributed; returns other files that cached the same entity"""
+        del self.files[path]
+        self.validator.uniqueness.remove(state.entity_type, path, state.unique_keys)
+        if state.key is None:
+            return set()
+        entity_key = (state.entity_type, state.key)
+        paths = self.paths_by_key[entity_key]
+        paths.discard(path)
+        if paths:
+            return set(paths)
+        del self.paths_by_key[entity_key]
+        self.validator.data_cache.get(state.entity_type, {}).pop(state.key, None)
+        self.validator.references.remove(state.entity_type, state.key)
+        return set()
+
+    def _check_entities(self, keys: Optional[Dict[str, List[str]]], uniqueness: bool = True) -> None:
+        """Run the foreign key and UUID checks (for all entities if keys is None) and the uniqueness check"""
+        for error in self._collect(self.validator.validate_foreign_keys, keys) + \
+                self._collect(self.validator.validate_uuids, keys):
+            self.cross_errors.setdefault((error.entity, error.file), []).append(error)
+        if uniqueness:
+            self.uniqueness_errors = self._collect(self.validator.validate_uniqueness)
+
+    def errors(self, paths: Optional[Iterable[Path]] = None,
+               entities: Optional[Iterable[EntityKey]] = None) -> List[ValidationError]:
+        """Current errors, all of them or those of some files and entities
+
+        A file also covers the entities its last update affected.
+        """
+        if paths is None and entities is None:
+            errors = list(self.setup_errors)
+            for state in self.files.values():
+                errors.extend(state.errors)
+            for entity_errors in self.cross_errors.values():
+                errors.extend(entity_errors)
+            return errors + self.uniqueness_errors
+
+        paths = set(paths or ())
+        entities = set(entities or ())
+        for path in paths:
+            state = self.files.get(path)
+            if state is not None and state.key is not None:
+                entities.add((state.entity_type, state.key))
+            entities |= self.affected_by_path.get(path, set())
+        files = {str(path) for path in paths}
+        # Uniqueness messages name the other files by quoted relative path
+        quoted = {f"'{relative_file(str(path), self.base_path)}'" for path in paths}
+        errors = []
+        for path in sorted(paths):
+            state = self.files.get(path)
+            if state is not None:
+                errors.extend(state.errors)
+        for entity_key in sorted(entities):
+            errors.extend(self.cross_errors.get(entity_key, ()))
+        errors.extend(error for error in self.uniqueness_errors
+                      if error.file in files or any(file in error.message for file in quoted))
+        return errors
+
+
+class InotifyWatcher:
+    """Reports changed files below a directory using Linux inotify"""
+
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT = struct.Struct('iIII')
+
+    name = 'inotify'
+
+    def __init__(self, directory: Path):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Path] = {}
+        self.watch_tree(directory)
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def watch_tree(self, directory: Path) -> Set[Path]:
+        """Watch a directory and its subdirectories; returns the files already in them"""
+        files = set()
+        for root, dirs, names in os.walk(directory):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {root}")
+            self.watches[wd] = Path(root)
+            files.update(Path(root, name) for name in names)
+        return files
+
+    def read(self) -> Tuple[Set[Path], bool]:
+        """Read the pending events
+
+        Returns:
+            The changed paths and whether the caller has to rescan everything
+            (the event queue overflowed or a directory disappeared).
+        """
+        changed: Set[Path] = set()
+        rescan = False
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = self.EVENT.unpack_from(buffer, offset)
+                name = buffer[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0')
+                offset += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if not mask & self.IN_ISDIR:
+                    changed.add(path)
+                elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files may have been written before the watch was added
+                    changed.update(self.watch_tree(path))
+                elif mask & self.IN_MOVED_FROM:
+                    rescan = True
+        return changed, rescan
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Reports changed files below a directory by comparing file stats"""
+
+    name = 'polling'
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        stats = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = Path(root, name)
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def read(self) -> Tuple[Set[Path], bool]:
+        snapshot = self.scan()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed, False
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(directory: Path, poll: bool = False) -> Any:
+    """inotify watcher if available, polling watcher otherwise"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"  inotify unavailable ({e}), polling instead", file=sys.stderr)
+    return PollingWatcher(directory)
+
+
+class ValidationDaemon:
+    """Serves a WarmValidator over a Unix socket and keeps it up to date"""
+
+    def __init__(self, state: WarmValidator, socket_path: Path, poll: bool = False,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.state = state
+        self.socket_path = socket_path
+        self.poll = poll
+        self.poll_interval = poll_interval
+        self.watcher: Any = None
+        self.pending: Set[Path] = set()
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.stopped: Optional[asyncio.Event] = None
+        self.updates = 0
+        self.last_update_ms = 0.0
+
+    def on_changes(self) -> None:
+        """Queue the files reported by the watcher for a (debounced) update"""
+        changed, rescan = self.watcher.read()
+        if rescan:
+            changed |= set(self.state.files) | set(self.state.data_files())
+        self.pending |= changed
+        if self.pending and self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(DEBOUNCE_SECONDS, self.flush)
+
+    def flush(self, extra: Iterable[Path] = ()) -> Tuple[Set[Path], Set[EntityKey]]:
+        """Validate the queued files (and `extra`) now"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        paths = self.pending | set(extra)
+        self.pending = set()
+        started = time.perf_counter()
+        checked, affected = self.state.update(paths)
+        if checked:
+            self.updates += 1
+            self.last_update_ms = (time.perf_counter() - started) * 1000
+            print(f"  Validated {len(checked)} files, {len(affected)} entities in {self.last_update_ms:.1f} ms",
+                  flush=True)
+        return checked, affected
+
+    async def poll_changes(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.on_changes()
+
+    def resolve(self, file: str) -> Path:
+        path = Path(file)
+        return Path(os.path.normpath(path if path.is_absolute() else self.state.base_path / path))
+
+    def respond(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get('command')
+        if command == 'validate':
+            started = time.perf_counter()
+            if self.watcher is not None and not self.poll:
+                # Take in events not delivered to the event loop yet
+                self.on_changes()
+            files = request.get('files')
+            if files is None:
+                self.flush()
+                errors = self.state.errors()
+            elif isinstance(files, list) and all(isinstance(file, str) for file in files):
+                paths = {self.resolve(file) for file in files}
+                _, affected = self.flush(paths)
+                errors = self.state.errors(paths, affected)
+            else:
+                return {'error': "'files' must be a list of paths"}
+            return {
+                'ok': not any(error.level == 'error' for error in errors),
+                'errors': [error_to_dict(error, self.state.base_path) for error in errors],
+                'milliseconds': round((time.perf_counter() - started) * 1000, 2),
+            }
+        if command == 'status':
+            counts: Dict[str, int] = {}
+            for error in self.state.errors():
+                counts[error.level] = counts.get(error.level, 0) + 1
+            return {'files': len(self.state.files), 'errors': counts, 'watcher': self.watcher.name,
+                    'updates': self.updates, 'last_update_ms': round(self.last_update_ms, 2)}
+        if command == 'shutdown':
+            self.stopped.set()
+            return {'ok': True}
+        return {'error': f"Unknown command {command!r}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one connection"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = self.respond(request) if isinstance(request, dict) else {'error': 'Expected an object'}
+                except ValueError as e:
+                    response = {'error': f"Invalid JSON: {e}"}
+                except Exception as e:
+                    response = {'error': str(e)}
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self) -> None:
+        """Serve until a shutdown request"""
+        if self.socket_path.exists():
+            try:
+                request(self.socket_path, {'command': 'status'}, timeout=1)
+            except OSError:
+                self.socket_path.unlink()
+            else:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        self.watcher = create_watcher(self.state.data_dir, self.poll)
+        poller = None
+        if isinstance(self.watcher, InotifyWatcher):
+            loop.add_reader(self.watcher.fileno(), self.on_changes)
+        else:
+            self.poll = True
+            poller = asyncio.create_task(self.poll_changes())
+        server = await asyncio.start_unix_server(self.handle, path=str(self.socket_path), limit=MAX_REQUEST_SIZE)
+        print(f"✓ Listening on {self.socket_path} ({len(self.state.files):,} files, {self.watcher.name})",
+              flush=True)
+        try:
+            async with server:
+                await self.stopped.wait()
+        finally:
+            if poller is not None:
+                poller.cancel()
+            else:
+                loop.remove_reader(self.watcher.fileno())
+            self.watcher.close()
+            self.socket_path.unlink(missing_ok=True)
+
+
+def request(socket_path: Path, payload: Dict[str, Any], timeout: Optional[float] = 30) -> Dict[str, Any]:
+    """Send one request to a running daemon and return its response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(str(socket_path))
+        client.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        with client.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection")
+    return json.loads(line)
+
+
+def main() -> int:
+    """Main entry point.
+
+    Returns:
+        Exit code: 0 on success, 1 on error (or if a query finds errors).
+    """
+    parser = argparse.ArgumentParser(description="Keep the validator warm and validate changed files on request.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Run the daemon.")
+    serve_parser.add_argument("--poll", action="store_true", help="Poll file stats instead of using inotify.")
+    serve_parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, metavar="SECONDS",
+                              help=f"Seconds between polls (default: {DEFAULT_POLL_INTERVAL}).")
+    serve_parser.add_argument("--compiled-schemas", action="store_true",
+                              help="Validate with the compiled schema validators instead of jsonschema.")
+    query_parser = subparsers.add_parser("query", help="Ask a running daemon for errors.")
+    query_parser.add_argument("files", nargs="*", help="Validate these files now and report only their errors.")
+    query_parser.add_argument("--json", action="store_true", help="Print the response as JSON.")
+    subparsers.add_parser("status", help="Show the state of a running daemon.")
+    subparsers.add_parser("stop", help="Stop a running daemon.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).resolve().parent.parent
+    socket_path = repo_root / args.socket
+
+    if args.command == "serve":
+        started = time.perf_counter()
+        state = WarmValidator(repo_root, compiled_schemas=args.compiled_schemas)
+        try:
+            state.load()
+        except FileNotFoundError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"✓ Validated {len(state.files):,} files in {time.perf_counter() - started:.1f}s", flush=True)
+        daemon = ValidationDaemon(state, socket_path, args.poll, args.poll_interval)
+        try:
+            asyncio.run(daemon.serve())
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    payload: Dict[str, Any] = {'command': 'validate' if args.command == 'query' else
+                               'shutdown' if args.command == 'stop' else 'status'}
+    if args.command == 'query' and args.files:
+        payload['files'] = args.files
+    try:
+        response = request(socket_path, payload)
+    except OSError as e:
+        print(f"Error: no daemon on {socket_path} ({e})", file=sys.stderr)
+        return 1
+    if 'error' in response:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+
+    if args.command != 'query' or args.json:
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+    else:
+        for error in response['errors']:
+            print(f"[{error['level'].upper()}] {error['entity']} ({error['file']}): {error['message']} "
+                  f"[rule: {error['rule']}]")
+        mark = "✓" if response['ok'] else "✗"
+        print(f"{mark} {len(response['errors'])} errors and warnings ({response['milliseconds']} ms)")
+    return 0 if response.get('ok', True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
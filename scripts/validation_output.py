@@ -0,0 +1,212 @@
+"""
+Streaming output and aggregation of validation errors
+
+The validator hands every error to an ErrorCollector as soon as it is found.
+The collector:
+
+- streams it to a writer (NDJSON: one JSON object per line; SARIF 2.1.0:
+  results are written as they come and the rule list is appended when the
+  run ends), so a broken schema bump shows up immediately,
+- counts it per level and aggregates it by (level, rule, message template)
+  with a few sample files, where the template is the message with quoted
+  values and numbers blanked out,
+- keeps only the first `keep` errors per level in memory,
+- raises TooManyErrors once `max_errors` errors (level 'error') are reached.
+
+Memory stays bounded by `keep` and the number of distinct templates, no
+matter how many errors a run produces.
+"""
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+OUTPUT_FORMATS = ('text', 'ndjson', 'sarif')
+SAMPLE_FILES = 3
+# Distinct templates tracked; further ones are counted under OTHER_TEMPLATE
+MAX_AGGREGATES = 10000
+OTHER_TEMPLATE = '(other messages)'
+SARIF_LEVELS = {'error': 'error', 'warning': 'warning', 'info': 'note'}
+
+_QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?(?![\w.])")
+
+
+def message_template(message: str) -> str:
+    """The message with quoted values replaced by '*' and numbers by N"""
+    return _NUMBER.sub('N', _QUOTED.sub("'*'", message))
+
+
+class TooManyErrors(Exception):
+    """Raised by ErrorCollector.append when the --max-errors limit is reached"""
+
+
+class ErrorAggregate:
+    """Errors sharing level, rule and message template"""
+
+    __slots__ = ('level', 'rule', 'template', 'count', 'samples')
+
+    def __init__(self, level: str, rule: str, template: str):
+        self.level = level
+        self.rule = rule
+        self.template = template
+        self.count = 0
+        self.samples: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'level': self.level, 'rule': self.rule, 'template': self.template,
+                'count': self.count, 'samples': self.samples}
+
+
+class NdjsonWriter:
+    """Writes one JSON object per error"""
+
+    def __init__(self, stream: TextIO, base_path: Optional[Path] = None):
+        self.stream = stream
+        self.base_path = base_path
+
+    def write(self, error: Any) -> None:
+        self.stream.write(json.dumps(error_to_dict(error, self.base_path), ensure_ascii=False) + '\n')
+
+    def close(self, collector: 'ErrorCollector') -> None:
+        self.stream.flush()
+
+
+class SarifWriter:
+    """Writes a SARIF 2.1.0 log incrementally
+
+    JSON objects are unordered, so the results array is written first and
+    the tool's rule list, which is only known at the end, after it.
+    """
+
+    def __init__(self, stream: TextIO, base_path: Optional[Path] = None, tool: str = 'validate_json_schema'):
+        self.stream = stream
+        self.base_path = base_path
+        self.tool = tool
+        self.rules: Dict[str, int] = {}
+        self.first = True
+        stream.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", '
+                     '"runs": [{"results": [\n')
+
+    def write(self, error: Any) -> None:
+        rule_index = self.rules.setdefault(error.rule, len(self.rules))
+        result = {
+            'ruleId': error.rule,
+            'ruleIndex': rule_index,
+            'level': SARIF_LEVELS.get(error.level, 'none'),
+            'message': {'text': error.message},
+            'locations': [{'physicalLocation': {
+                'artifactLocation': {'uri': relative_file(error.file, self.base_path)},
+            }}],
+            'properties': {'entity': error.entity},
+        }
+        self.stream.write(('' if self.first else ',\n') + json.dumps(result, ensure_ascii=False))
+        self.first = False
+
+    def close(self, collector: 'ErrorCollector') -> None:
+        tool = {'driver': {
+            'name': self.tool,
+            'informationUri': 'https://github.com/OpenPrintTag/openprinttag-database',
+            'rules': [{'id': rule} for rule in self.rules],
+        }}
+        properties = {
+            'counts': dict(collector.counts),
+            'truncated': collector.truncated,
+            'aggregates': [aggregate.to_dict() for aggregate in collector.aggregates()],
+        }
+        self.stream.write(f'\n], "tool": {json.dumps(tool)}, "properties": {json.dumps(properties, ensure_ascii=False)}'
+                          '}]}\n')
+        self.stream.flush()
+
+
+def relative_file(file: str, base_path: Optional[Path]) -> str:
+    """file relative to base_path when it is inside it, as a URI-style path"""
+    if base_path is not None:
+        try:
+            return Path(file).relative_to(base_path).as_posix()
+        except ValueError:
+            pass
+    return file
+
+
+def error_to_dict(error: Any, base_path: Optional[Path] = None) -> Dict[str, str]:
+    """JSON object of an error, as written by NdjsonWriter"""
+    return {
+        'level': error.level,
+        'rule': error.rule,
+        'entity': error.entity,
+        'file': relative_file(error.file, base_path),
+        'message': error.message,
+    }
+
+
+def create_writer(output_format: str, stream: TextIO, base_path: Optional[Path] = None) -> Optional[Any]:
+    """Writer for a streaming format, None for text"""
+    if output_format == 'ndjson':
+        return NdjsonWriter(stream, base_path)
+    if output_format == 'sarif':
+        return SarifWriter(stream, base_path)
+    return None
+
+
+class ErrorCollector(list):
+    """List of validation errors that streams, aggregates and caps what it keeps
+
+    With the defaults it behaves like a plain list. `keep` limits the errors
+    kept per level, `max_errors` makes append raise TooManyErrors.
+    """
+
+    def __init__(self, writer: Optional[Any] = None, keep: Optional[int] = None,
+                 max_errors: Optional[int] = None):
+        super().__init__()
+        self.writer = writer
+        self.keep = keep
+        self.max_errors = max_errors
+        self.counts: Counter = Counter()
+        self.truncated = False  # stopped by max_errors
+        self._aggregates: Dict[Tuple[str, str, str], ErrorAggregate] = {}
+
+    def append(self, error: Any) -> None:
+        self.counts[error.level] += 1
+        self._aggregate(error)
+        if self.writer is not None:
+            self.writer.write(error)
+        if self.keep is None or self.counts[error.level] <= self.keep:
+            super().append(error)
+        if self.max_errors and error.level == 'error' and self.counts['error'] >= self.max_errors:
+            self.truncated = True
+            raise TooManyErrors(f"Stopped after {self.max_errors} errors")
+
+    def _aggregate(self, error: Any) -> None:
+        template = message_template(error.message)
+        key = (error.level, error.rule, template)
+        aggregate = self._aggregates.get(key)
+        if aggregate is None:
+            if len(self._aggregates) >= MAX_AGGREGATES:
+                key = (error.level, error.rule, OTHER_TEMPLATE)
+                aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = ErrorAggregate(*key)
+        aggregate.count += 1
+        if len(aggregate.samples) < SAMPLE_FILES and error.file not in aggregate.samples:
+            aggregate.samples.append(error.file)
+
+    def total(self, level: Optional[str] = None) -> int:
+        return self.counts[level] if level else sum(self.counts.values())
+
+    def complete(self, level: str) -> bool:
+        """Whether every error of level is kept in the list"""
+        return self.keep is None or self.counts[level] <= self.keep
+
+    def aggregates(self, level: Optional[str] = None) -> List[ErrorAggregate]:
+        """Aggregates, most frequent first"""
+        selected: Iterable[ErrorAggregate] = self._aggregates.values()
+        if level:
+            selected = [a for a in selected if a.level == level]
+        return sorted(selected, key=lambda a: (-a.count, a.rule, a.template))
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close(self)
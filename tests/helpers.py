@@ -0,0 +1,24 @@
+"""
+Helpers shared by the tests
+"""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+
+def write_yaml(path: Path, data: Any) -> Path:
+    """Write data to a YAML file, creating its directory"""
+    try:
+        previous = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        previous = None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.dump(data, sort_keys=False), encoding="utf-8")
+    # Make sure a rewrite is seen as a change even within the mtime resolution
+    st = path.stat()
+    if previous is not None and st.st_mtime_ns <= previous:
+        os.utime(path, ns=(st.st_atime_ns, previous + 10**9))
+    return path
@@ -0,0 +1,169 @@
+"""
+Tests for the read-only HTTP API server and its load test client
+"""
+
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from api_server import ApiServer, DatabaseIndex
+from load_test_api import HttpConnection, percentile, run_load_test
+
+
+BRAND_UUID = "ae5ff34e-298e-50c9-8f77-92a97fb30b09"
+MATERIAL_UUID = "8d952f83-f035-5fcf-bf61-34baa72f6aa6"
+
+
+class TestApiServer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self._write("data/manifest.yaml", {'data_hash': 'a' * 64})
+        self._write("data/brands/acme.yaml", {'uuid': BRAND_UUID, 'slug': 'acme', 'name': 'Acme'})
+        self._write("data/material-containers/spool.yaml", {'slug': 'spool', 'name': 'Spool'})
+        self._write("data/materials/acme/acme-galaxy-black.yaml", {
+            'uuid': MATERIAL_UUID, 'slug': 'acme-galaxy-black', 'brand': {'slug': 'acme'},
+            'name': 'PLA Galaxy Black', 'type': 'PLA',
+        })
+        self._write("data/material-packages/acme/acme-galaxy-black-1kg.yaml", {
+            'slug': 'acme-galaxy-black-1kg', 'material': {'slug': 'acme-galaxy-black'},
+            'container': {'slug': 'spool'}, 'gtin': 8594173675216,
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def _write(self, rel_path, data):
+        write_yaml(self.base / rel_path, data)
+
+    async def asyncSetUp(self):
+        self.api = ApiServer(self.base, reload_interval=0)
+        self.server = await asyncio.start_server(self.api.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.connection = HttpConnection('127.0.0.1', self.port)
+
+    async def asyncTearDown(self):
+        self.connection.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _get(self, path):
+        status, body = await self.connection.get(path)
+        return status, json.loads(body) if body else None
+
+    def test_index_lookups(self):
+        index = DatabaseIndex.load(self.base)
+        self.assertEqual(index.get('materials', MATERIAL_UUID.upper())['slug'], 'acme-galaxy-black')
+        self.assertIsNone(index.get('brands', MATERIAL_UUID))
+        self.assertEqual([p['slug'] for p in index.by_brand['acme']['material_packages']],
+                         ['acme-galaxy-black-1kg'])
+        record, = index.gtin_records(8594173675216)
+        self.assertEqual((record['material']['slug'], record['container']['slug'], record['brand']['slug']),
+                         ('acme-galaxy-black', 'spool', 'acme'))
+
+    async def test_entity_endpoints(self):
+        self.assertEqual(await self._get('/brands'),
+                         (200, [{'uuid': BRAND_UUID, 'slug': 'acme', 'name': 'Acme'}]))
+        status, body = await self._get(f'/brands/{BRAND_UUID}')
+        self.assertEqual((status, body['slug']), (200, 'acme'))
+        status, body = await self._get('/brands/acme/packages')
+        self.assertEqual([p['slug'] for p in body], ['acme-galaxy-black-1kg'])
+        status, body = await self._get('/materials/acme-galaxy-black')
+        self.assertEqual(body['name'], 'PLA Galaxy Black')
+        status, body = await self._get(f'/uuid/{MATERIAL_UUID}')
+        self.assertEqual((body['entity'], body['data']['slug']), ('materials', 'acme-galaxy-black'))
+        status, body = await self._get('/gtin/8594173675216')
+        self.assertEqual(body['packages'][0]['package']['slug'], 'acme-galaxy-black-1kg')
+        status, body = await self._get('/containers/spool')
+        self.assertEqual(body['name'], 'Spool')
+
+        self.assertEqual((await self._get('/materials/missing'))[0], 404)
+        self.assertEqual((await self._get('/gtin/123'))[0], 404)
+        self.assertEqual((await self._get('/nothing'))[0], 404)
+
+    async def test_search(self):
+        status, body = await self._get('/search?q=galaxy%20blak&entity=materials')
+        self.assertEqual(status, 200)
+        self.assertEqual([r['slug'] for r in body['results']], ['acme-galaxy-black'])
+        self.assertEqual((await self._get('/search?q=x&limit=many'))[0], 400)
+
+    async def _revalidate(self, path, etag):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nIf-None-Match: {etag}\r\nConnection: close\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def test_etag_revalidation(self):
+        etag = self.api.index.etag
+        response = await self._revalidate('/brands/acme', etag)
+        self.assertTrue(response.startswith(b'HTTP/1.1 304'))
+        self.assertIn(f'ETag: {etag}'.encode(), response)
+        self.assertTrue(response.endswith(b'\r\n\r\n'))
+
+        # Unknown paths are not found whatever the ETag
+        self.assertTrue((await self._revalidate('/nothing', etag)).startswith(b'HTTP/1.1 404'))
+
+        # Identical data elsewhere, or only touched, has the same ETag
+        other = Path(tempfile.mkdtemp())
+        try:
+            shutil.copytree(self.base / 'data', other / 'data')
+            self.assertEqual(DatabaseIndex.load(other).etag, etag)
+        finally:
+            shutil.rmtree(other)
+        self._write("data/brands/acme.yaml", {'uuid': BRAND_UUID, 'slug': 'acme', 'name': 'Acme'})
+        self.assertTrue(await self.api.reload_if_changed())
+        self.assertEqual(self.api.index.etag, etag)
+
+        # A data change without a new manifest still changes the ETag
+        self._write("data/brands/acme.yaml", {'uuid': BRAND_UUID, 'slug': 'acme', 'name': 'Acme Inc.'})
+        self.assertTrue(await self.api.reload_if_changed())
+        self.assertNotEqual(self.api.index.etag, etag)
+        response = await self._revalidate('/brands/acme', etag)
+        self.assertTrue(response.startswith(b'HTTP/1.1 200'))
+        self.assertIn('Acme Inc.'.encode(), response)
+
+    async def test_rejects_other_methods(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(b"DELETE /brands/acme HTTP/1.1\r\nConnection: close\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        self.assertTrue(response.startswith(b'HTTP/1.1 405'))
+
+    async def test_hot_swap_on_data_change(self):
+        self.assertEqual((await self._get('/materials/acme-galaxy-red'))[0], 404)
+        self.assertFalse(await self.api.reload_if_changed())
+
+        self._write("data/materials/acme/acme-galaxy-red.yaml",
+                    {'slug': 'acme-galaxy-red', 'brand': {'slug': 'acme'}, 'name': 'PLA Galaxy Red'})
+        self._write("data/manifest.yaml", {'data_hash': 'b' * 64})
+        self.assertTrue(await self.api.reload_if_changed())
+
+        status, body = await self._get('/materials/acme-galaxy-red')
+        self.assertEqual((status, body['name']), (200, 'PLA Galaxy Red'))
+        status, body = await self._get('/health')
+        self.assertEqual((body['data_hash'], body['counts']['materials']), ('b' * 64, 2))
+
+    async def test_load_test_report(self):
+        report = await run_load_test(f'http://127.0.0.1:{self.port}', concurrency=4, duration=0.2)
+        self.assertGreater(report['requests'], 0)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(list(report['statuses']), ['200'])
+        self.assertLessEqual(report['latency_ms']['p50'], report['latency_ms']['max'])
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99.9), 100.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the package UUID backfill (backfill_uuids.py)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+import yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from backfill_uuids import UuidBackfill, insert_uuid
+from uuid_utils import generate_brand_uuid, generate_material_package_uuid
+
+
+class TestInsertUuid(unittest.TestCase):
+    VALUE = '6f957b59-9725-5068-9102-15bb77807534'
+
+    def test_inserted_before_first_key(self):
+        self.assertEqual(insert_uuid(b'slug: a\nclass: FFF\n', self.VALUE),
+                         f'uuid: {self.VALUE}\nslug: a\nclass: FFF\n'.encode())
+        self.assertEqual(insert_uuid(b'# comment\n---\nslug: a\n', self.VALUE),
+                         f'# comment\n---\nuuid: {self.VALUE}\nslug: a\n'.encode())
+        self.assertEqual(insert_uuid(b'slug: a\r\n', self.VALUE), f'uuid: {self.VALUE}\r\nslug: a\r\n'.encode())
+
+    def test_empty_uuid_line_is_filled_in(self):
+        for line in ('uuid:', 'uuid: ', 'uuid: null', "uuid: ''", 'uuid: ~  # generated'):
+            self.assertEqual(insert_uuid(f'slug: a\n{line}\nclass: FFF\n'.encode(), self.VALUE),
+                             f'slug: a\nuuid: {self.VALUE}\nclass: FFF\n'.encode())
+
+
+class TestUuidBackfill(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.brand_uuid = generate_brand_uuid('Acme')
+        self.write('brands/acme.yaml', f'uuid: {self.brand_uuid}\nslug: acme\nname: Acme\n')
+        self.write('brands/nouuid.yaml', 'slug: nouuid\nname: No UUID\n')
+        self.write('materials/acme/acme-pla.yaml', 'slug: acme-pla\nbrand:\n  slug: acme\nname: PLA\n')
+        self.write('materials/nouuid/nouuid-pla.yaml', 'slug: nouuid-pla\nbrand:\n  slug: nouuid\nname: PLA\n')
+        packages = self.base / 'data' / 'material-packages'
+        self.derived = packages / 'acme' / 'acme-pla-1kg.yaml'
+        self.random = packages / 'acme' / 'acme-pla-2kg.yaml'
+        self.derived_brand_name = packages / 'nouuid' / 'nouuid-pla-1kg.yaml'
+        self.present = packages / 'acme' / 'acme-pla-3kg.yaml'
+        self.write('material-packages/acme/acme-pla-1kg.yaml',
+                   '# Spool\nslug: acme-pla-1kg\nmaterial:\n  slug: acme-pla\ngtin: 8594173675100\n')
+        self.write('material-packages/acme/acme-pla-2kg.yaml', 'slug: acme-pla-2kg\nuuid:\nmaterial:\n  slug: acme-pla\n')
+        self.write('material-packages/nouuid/nouuid-pla-1kg.yaml',
+                   'slug: nouuid-pla-1kg\nmaterial:\n  slug: nouuid-pla\ngtin: 8594173675117\n')
+        self.write('material-packages/acme/acme-pla-3kg.yaml',
+                   'uuid: 31062f81-b5bd-4f86-a5f8-46367e841508\nslug: acme-pla-3kg\ngtin: 8594173675124\n'
+                   'material:\n  slug: acme-pla\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, relative: str, content: str) -> None:
+        path = self.base / 'data' / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def package_uuid(self, path: Path) -> uuid.UUID:
+        return uuid.UUID(yaml.safe_load(path.read_text())['uuid'])
+
+    def test_backfill_is_minimal_and_idempotent(self):
+        backfill = UuidBackfill(self.base, workers=2)
+        self.assertTrue(backfill.run(), backfill.errors)
+        self.assertEqual((backfill.stats['written'], backfill.stats['derived'], backfill.stats['random']), (3, 2, 1))
+
+        expected = generate_material_package_uuid(self.brand_uuid, 8594173675100)
+        self.assertEqual(self.derived.read_text(),
+                         f'# Spool\nuuid: {expected}\nslug: acme-pla-1kg\nmaterial:\n  slug: acme-pla\n'
+                         f'gtin: 8594173675100\n')
+        self.assertEqual(self.package_uuid(self.derived_brand_name),
+                         generate_material_package_uuid(generate_brand_uuid('No UUID'), 8594173675117))
+        self.assertEqual(self.package_uuid(self.random).version, 4)
+
+        contents = {path: path.read_bytes() for path in (self.derived, self.random, self.derived_brand_name)}
+        backfill = UuidBackfill(self.base)
+        self.assertTrue(backfill.run())
+        self.assertEqual(backfill.stats['written'], 0)
+        self.assertEqual({path: path.read_bytes() for path in contents}, contents)
+
+    def test_dry_run_and_unresolvable_brand(self):
+        self.write('material-packages/acme/acme-abs-1kg.yaml',
+                   'slug: acme-abs-1kg\nmaterial:\n  slug: acme-abs\ngtin: 8594173675131\n')
+        backfill = UuidBackfill(self.base, dry_run=True)
+        self.assertFalse(backfill.run())
+        self.assertEqual(backfill.stats['written'], 3)
+        self.assertEqual(len(backfill.errors), 1)
+        self.assertIn("acme-abs-1kg.yaml: cannot resolve the brand of material 'acme-abs'", backfill.errors[0])
+        self.assertNotIn('uuid', yaml.safe_load(self.derived.read_text()))
+
+    def test_check(self):
+        backfill = UuidBackfill(self.base, dry_run=True)
+        self.assertFalse(backfill.check())
+        self.assertEqual(len(backfill.errors), 4)
+        self.assertIn('acme-pla-3kg.yaml: uuid 31062f81-b5bd-4f86-a5f8-46367e841508 is not derived', backfill.errors[3])
+
+        UuidBackfill(self.base).run()
+        self.present.write_text(self.present.read_text().replace(
+            '31062f81-b5bd-4f86-a5f8-46367e841508', str(generate_material_package_uuid(self.brand_uuid, 8594173675124))))
+        backfill = UuidBackfill(self.base, dry_run=True)
+        self.assertTrue(backfill.check(), backfill.errors)
+        self.assertEqual(backfill.stats['present'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
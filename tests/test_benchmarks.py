@@ -0,0 +1,84 @@
+"""
+Tests for the synthetic data generator and benchmark runner (benchmarks/)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+import yaml
+
+# Add benchmarks and scripts directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from run_benchmarks import compare, run_benchmarks, usable_baseline
+from synthetic_data import gtin_check_digit, generate_database, prepare_reference_data, scaled_counts
+from update_stats import count_yaml_files
+from uuid_utils import generate_material_uuid
+
+
+class TestSyntheticData(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_gtin_check_digit(self):
+        # Real GTIN from the database: 859417367521 + 6
+        self.assertEqual(gtin_check_digit('859417367521'), 6)
+
+    def test_generated_database(self):
+        counts = generate_database(self.base / 'a', scale=0.01, seed=1)
+        self.assertEqual(counts, scaled_counts(0.01))
+        self.assertEqual(count_yaml_files(self.base / 'a' / 'data'), sum(counts.values()))
+
+        material_file = next((self.base / 'a' / 'data' / 'materials').rglob('*.yaml'))
+        material = yaml.safe_load(material_file.read_text())
+        brand = yaml.safe_load((self.base / 'a' / 'data' / 'brands' / f"{material['brand']['slug']}.yaml").read_text())
+        self.assertEqual(material['uuid'], str(generate_material_uuid(uuid.UUID(brand['uuid']), material['name'])))
+
+        # Deterministic: the same seed gives identical files
+        generate_database(self.base / 'b', scale=0.01, seed=1)
+        for path in (self.base / 'a' / 'data').rglob('*.yaml'):
+            other = self.base / 'b' / path.relative_to(self.base / 'a')
+            self.assertEqual(path.read_bytes(), other.read_bytes())
+
+        with self.assertRaises(FileExistsError):
+            generate_database(self.base / 'a', scale=0.01)
+
+    def test_benchmarks_on_valid_data(self):
+        generate_database(self.base, scale=0.005)
+        prepare_reference_data(self.base, self.base / 'no-such-repo')
+        result = run_benchmarks(self.base)
+        self.assertEqual(result['validation_errors'], 0)
+        for name in ('count_yaml_files', 'compute_data_hash', 'load_all_entities',
+                     'validate.schema.materials', 'validate.foreign_keys', 'validate.total'):
+            self.assertIn(name, result['timings'])
+
+
+class TestCompare(unittest.TestCase):
+    def test_regression_threshold(self):
+        rows = compare({'slow': 2.0, 'noise': 0.03, 'ok': 1.1, 'new': 1.0},
+                       {'slow': 1.0, 'noise': 0.01, 'ok': 1.0}, threshold=0.25)
+        regressed = {row['name']: row['regressed'] for row in rows}
+        self.assertEqual(regressed, {'slow': True, 'noise': False, 'ok': False, 'new': False})
+        self.assertEqual(rows[0]['ratio'], 2.0)
+
+    def test_only_local_baselines_fail_the_run(self):
+        stored = {'schemas': 'stand-in', 'machine': 'bench-1', 'timings': {'slow': 1.0}}
+        self.assertEqual(usable_baseline(stored, 'stand-in', 'bench-1'), ({'slow': 1.0}, True, None))
+        timings, gating, notice = usable_baseline(stored, 'stand-in', 'laptop')
+        self.assertEqual((timings, gating), ({'slow': 1.0}, False))
+        self.assertIn('advisory', notice)
+        timings, gating, notice = usable_baseline(stored, 'openprinttag', 'bench-1')
+        self.assertEqual((timings, gating), ({}, False))
+        self.assertIn('not compared', notice)
+        self.assertEqual(usable_baseline({}, 'stand-in', 'bench-1'), ({}, False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
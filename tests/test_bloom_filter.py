@@ -0,0 +1,80 @@
+"""
+Tests for the GTIN/UUID Bloom filters (bloom_filter.py)
+"""
+
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from bloom_filter import BloomFilter, collect_keys, gtin_key, uuid_key
+
+
+class TestKeys(unittest.TestCase):
+    def test_gtin_key(self):
+        self.assertEqual(gtin_key('0012345678905'), '12345678905')
+        self.assertEqual(gtin_key(8594173675216), '8594173675216')
+        self.assertIsNone(gtin_key('abc'))
+
+    def test_uuid_key(self):
+        value = 'AE5FF34E-298E-50C9-8F77-92A97FB30B09'
+        self.assertEqual(uuid_key(value), value.lower())
+        self.assertIsNone(uuid_key('not-a-uuid'))
+
+    def test_collect_keys(self):
+        gtins, uuids = collect_keys({
+            'brands': {'a': {'uuid': 'ae5ff34e-298e-50c9-8f77-92a97fb30b09'}},
+            'material_packages': {
+                'p': {'gtin': 8594173675216, 'uuid': 'e84b5751-25ab-5d97-8d82-591644bc93f9'},
+                'q': {'gtin': None},
+            },
+        })
+        self.assertEqual(gtins, {'8594173675216'})
+        self.assertEqual(uuids, {'ae5ff34e-298e-50c9-8f77-92a97fb30b09', 'e84b5751-25ab-5d97-8d82-591644bc93f9'})
+
+
+class TestBloomFilter(unittest.TestCase):
+    def setUp(self):
+        self.keys = [str(uuid.UUID(int=i * 7919)) for i in range(2000)]
+        self.bloom = BloomFilter.from_keys(self.keys, fp_rate=0.01, data_hash='ab' * 32)
+
+    def test_no_false_negatives(self):
+        for key in self.keys:
+            self.assertIn(key, self.bloom)
+
+    def test_false_positive_rate_near_target(self):
+        unknown = [str(uuid.UUID(int=i * 7919 + 1)) for i in range(20000)]
+        false_positives = sum(key in self.bloom for key in unknown)
+        self.assertLess(false_positives / len(unknown), 0.02)
+
+    def test_sizing(self):
+        # ~9.6 bits per key and 7 hashes for a 1% false-positive rate
+        self.assertAlmostEqual(self.bloom.num_bits / len(self.keys), 9.59, places=1)
+        self.assertEqual(self.bloom.num_hashes, 7)
+        with self.assertRaises(ValueError):
+            BloomFilter.for_capacity(10, fp_rate=0)
+
+    def test_save_and_load(self):
+        path = Path(tempfile.mkdtemp()) / 'uuids.bloom'
+        self.bloom.save(path)
+        loaded = BloomFilter.load(path, expected_hash='ab' * 32)
+        self.assertEqual(loaded.bits, self.bloom.bits)
+        self.assertEqual(loaded.count, len(self.keys))
+        self.assertEqual(loaded.data_hash, 'ab' * 32)
+        self.assertIn(self.keys[0], loaded)
+
+    def test_load_rejects_stale_or_invalid_files(self):
+        path = Path(tempfile.mkdtemp()) / 'uuids.bloom'
+        self.bloom.save(path)
+        with self.assertRaises(ValueError):
+            BloomFilter.load(path, expected_hash='cd' * 32)
+        path.write_bytes(b'garbage')
+        with self.assertRaises(ValueError):
+            BloomFilter.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
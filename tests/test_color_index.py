@@ -0,0 +1,116 @@
+"""
+Tests for the nearest-color search index (color_index.py)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    import numpy as np
+    from color_index import ColorIndex, rgba_to_lab
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from lib import DatabaseLoader
+
+
+def material(slug, brand, material_type, rgba=None, secondary=(), lab=None):
+    data = {'slug': slug, 'brand': {'slug': brand}, 'class': 'FFF', 'type': material_type}
+    if rgba:
+        data['primary_color'] = {'color_rgba': rgba}
+        if lab:
+            data['primary_color']['color_lab'] = lab
+    if secondary:
+        data['secondary_colors'] = [{'color_rgba': c} for c in secondary]
+    return data
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestRgbaToLab(unittest.TestCase):
+    def test_reference_colors(self):
+        for rgba, expected in [
+            ('#ffffff', (100.0, 0.0, 0.0)),
+            ('#000000ff', (0.0, 0.0, 0.0)),
+            ('#ff0000', (53.24, 80.09, 67.20)),
+        ]:
+            for actual, value in zip(rgba_to_lab(rgba), expected):
+                self.assertAlmostEqual(actual, value, delta=0.05)
+
+    def test_invalid_color(self):
+        with self.assertRaises(ValueError):
+            rgba_to_lab('#fff')
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestColorIndex(unittest.TestCase):
+    def setUp(self):
+        self.materials = [
+            material('a-red', 'a', 'PLA', '#ff0000ff'),
+            material('a-dark-red', 'a', 'PLA', '#aa0000ff'),
+            material('b-red', 'b', 'PETG', '#fe0101ff'),
+            material('b-blue', 'b', 'PLA', '#0000ffff', secondary=['#ff0000ff']),
+            material('c-lab', 'c', 'PLA', '#00ff00ff', lab=[53.0, 80.0, 67.0]),
+            material('c-none', 'c', 'PLA'),
+        ]
+        self.index = ColorIndex.from_materials(self.materials)
+
+    def test_nearest(self):
+        matches = self.index.nearest('#ff0000', k=2)
+        self.assertEqual([m.slug for m in matches], ['a-red', 'b-blue'])
+        self.assertAlmostEqual(matches[0].delta_e, 0.0, places=6)
+        self.assertEqual(matches[1].role, 'secondary')
+
+    def test_uses_color_lab_when_present(self):
+        matches = self.index.nearest((53.0, 80.0, 67.0), k=1)
+        self.assertEqual(matches[0].slug, 'c-lab')
+
+    def test_one_match_per_material(self):
+        matches = self.index.nearest('#ff0000', k=10)
+        slugs = [m.slug for m in matches]
+        self.assertEqual(len(slugs), len(set(slugs)))
+        self.assertEqual(len(slugs), 5)
+
+    def test_filters(self):
+        self.assertEqual([m.slug for m in self.index.nearest('#ff0000', k=5, brand='b')], ['b-blue', 'b-red'])
+        self.assertEqual([m.slug for m in self.index.nearest('#ff0000', k=5, material_type='PETG')], ['b-red'])
+        slugs = [m.slug for m in self.index.nearest('#ff0000', k=5, brand='b', include_secondary=False)]
+        self.assertEqual(slugs, ['b-red', 'b-blue'])
+        self.assertEqual(self.index.nearest('#ff0000', brand='nobody'), [])
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestColorIndexRefresh(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.loader = DatabaseLoader(self.base)
+
+    def _write(self, data):
+        return write_yaml(self.base / "data" / "materials" / data['brand']['slug'] / f"{data['slug']}.yaml", data)
+
+    def test_incremental_refresh(self):
+        self._write(material('a-red', 'a', 'PLA', '#ff0000ff'))
+        blue = self._write(material('a-blue', 'a', 'PLA', '#0000ffff'))
+        index = ColorIndex()
+        self.assertEqual(index.refresh(self.loader), (2, 0))
+        self.assertEqual(index.refresh(self.loader), (0, 0))
+
+        # Change one file, delete nothing
+        self._write(material('a-blue', 'a', 'PLA', '#ff0101ff'))
+        self.assertEqual(index.refresh(self.loader), (1, 0))
+        self.assertEqual(len(index.nearest('#ff0000', k=5)), 2)
+        self.assertLess(index.nearest('#ff0000', k=2)[1].delta_e, 2)
+
+        blue.unlink()
+        self.assertEqual(index.refresh(self.loader), (0, 1))
+        self.assertEqual([m.slug for m in index.nearest('#ff0000', k=5)], ['a-red'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests for the persistent entity index (entity_index.py)
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from entity_index import EntityIndex
+from update_manifest import update_manifest
+
+BRAND_UUID = 'ae5ff34e-298e-50c9-8f77-92a97fb30b09'
+MATERIAL_UUID = '1378e978-35ed-534c-9dfa-a65525bf8649'
+
+
+class EntityIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.write('brands/prusament.yaml', f'uuid: {BRAND_UUID}\nslug: prusament\nname: Prusament\n')
+        self.write('materials/prusament/prusament-petg.yaml',
+                   f'uuid: {MATERIAL_UUID}\nslug: prusament-petg\nname: PETG\n')
+        self.write('material-packages/prusament/prusament-petg-1kg.yaml',
+                   'slug: prusament-petg-1kg\ngtin: 8594173675100\n')
+        self.write('material-packages/prusament/prusament-petg-1kg-old.yaml',
+                   "slug: prusament-petg-1kg-old\ngtin: '8594173675100'\n")
+        self.write('material-containers/prusament/prusament.yaml', 'slug: prusament\nname: Spool\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def write(self, relative: str, content: str) -> None:
+        path = self.base / 'data' / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def build(self) -> EntityIndex:
+        index = EntityIndex(self.base)
+        index.update()
+        index.save()
+        return index
+
+
+class TestLookup(EntityIndexTestCase):
+    def test_find_by_uuid_slug_and_gtin(self):
+        index = self.build()
+        self.assertEqual(index.find('uuid', MATERIAL_UUID.upper()), ['data/materials/prusament/prusament-petg.yaml'])
+        self.assertEqual(index.find('slug', 'prusament', 'brands'), ['data/brands/prusament.yaml'])
+        self.assertEqual(index.find('slug', 'prusament'),
+                         ['data/brands/prusament.yaml', 'data/material-containers/prusament/prusament.yaml'])
+        self.assertEqual(index.find('gtin', '8594173675100'),
+                         ['data/material-packages/prusament/prusament-petg-1kg-old.yaml',
+                          'data/material-packages/prusament/prusament-petg-1kg.yaml'])
+        self.assertEqual(index.read('uuid', BRAND_UUID)['name'], 'Prusament')
+        self.assertIsNone(index.resolve('uuid', 'no-such-uuid'))
+
+        # A new process only loads the persisted index
+        index = EntityIndex.open(self.base)
+        self.assertEqual(index.stats['read'], 0)
+        self.assertEqual(index.resolve('slug', 'prusament-petg', 'materials'),
+                         self.base / 'data/materials/prusament/prusament-petg.yaml')
+
+    def test_read_refreshes_stale_entries(self):
+        index = self.build()
+        self.write('materials/prusament/prusament-petg.yaml', f'uuid: {MATERIAL_UUID}\nslug: prusament-petg\nname: PETG HF\n')
+        self.assertEqual(index.read('uuid', MATERIAL_UUID)['name'], 'PETG HF')
+
+        (self.base / 'data/brands/prusament.yaml').rename(self.base / 'data/brands/prusament-research.yaml')
+        self.assertEqual(index.read('uuid', BRAND_UUID)['slug'], 'prusament')
+        self.assertEqual(index.find('uuid', BRAND_UUID), ['data/brands/prusament-research.yaml'])
+
+    def test_miss_refreshes_only_on_request(self):
+        index = self.build()
+        self.write('brands/acme.yaml', 'slug: acme\nname: Acme\n')
+        self.assertEqual(index.find('slug', 'acme', 'brands'), [])
+        self.assertIsNone(index.read('slug', 'acme', 'brands'))
+        self.assertEqual(index.find('slug', 'acme', 'brands', refresh=True), ['data/brands/acme.yaml'])
+        self.assertEqual(index.read('slug', 'acme', 'brands')['name'], 'Acme')
+        self.assertEqual(EntityIndex.open(self.base).find('slug', 'acme', 'brands'), ['data/brands/acme.yaml'])
+
+        # A refresh that changes nothing does not rewrite the index
+        mtime_ns = index.index_path.stat().st_mtime_ns
+        self.assertEqual(index.find('slug', 'no-such-brand', refresh=True), [])
+        self.assertEqual(index.index_path.stat().st_mtime_ns, mtime_ns)
+
+
+class TestIncrementalUpdate(EntityIndexTestCase):
+    def test_stat_based_update(self):
+        self.build()
+        self.write('materials/prusament/prusament-petg.yaml', 'uuid: 6f957b59-9725-5068-9102-15bb77807534\n'
+                                                              'slug: prusament-petg\nname: PETG\n')
+        self.write('materials/prusament/prusament-pla.yaml', 'slug: prusament-pla\nname: PLA\n')
+        (self.base / 'data/material-packages/prusament/prusament-petg-1kg-old.yaml').unlink()
+
+        index = EntityIndex(self.base)
+        index.load()
+        index.update()
+        self.assertEqual((index.stats['read'], index.stats['removed'], index.stats['unchanged']), (2, 1, 3))
+        self.assertEqual(index.find('uuid', MATERIAL_UUID), [])
+        self.assertEqual(len(index.find('gtin', 8594173675100)), 1)
+        self.assertEqual(len(index.find('slug', 'prusament-pla')), 1)
+
+    def test_git_diff_update(self):
+        def git(*args):
+            subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=self.base,
+                           check=True, capture_output=True)
+
+        git('init', '-q')
+        git('add', '-A')
+        git('commit', '-qm', 'data')
+        self.build()
+
+        self.write('brands/prusament.yaml', f'uuid: {BRAND_UUID}\nslug: prusament\nname: Prusament Research\n')
+        self.write('brands/acme.yaml', 'slug: acme\nname: Acme\n')
+        # git quotes such names unless -z is used
+        self.write('brands/\u010desk\u00fd filament.yaml', 'slug: cesky-filament\nname: \u010cesk\u00fd Filament\n')
+        git('add', 'data/brands/prusament.yaml')
+        git('commit', '-qm', 'rename')
+        (self.base / 'data/material-containers/prusament/prusament.yaml').unlink()
+
+        index = EntityIndex(self.base)
+        index.load()
+        index.update_from_git()
+        self.assertEqual((index.stats['read'], index.stats['removed'], index.stats['unchanged']), (3, 1, 0))
+        self.assertEqual(index.find('slug', 'acme'), ['data/brands/acme.yaml'])
+        self.assertEqual(index.find('slug', 'cesky-filament'),
+                         ['data/brands/\u010desk\u00fd filament.yaml'])
+        self.assertEqual(index.find('slug', 'prusament'), ['data/brands/prusament.yaml'])
+
+
+class TestVerify(EntityIndexTestCase):
+    def test_verify_against_manifest(self):
+        manifest = self.base / 'data' / 'manifest.yaml'
+        update_manifest(manifest, self.base / 'data')
+        index = EntityIndex.open(self.base)
+        self.assertEqual(index.verify(), [])
+
+        self.write('brands/prusament.yaml', f'uuid: {BRAND_UUID}\nslug: prusament\nname: Prusa\n')
+        problems = index.verify()
+        self.assertEqual(len(problems), 2)
+        self.assertIn('data/brands/prusament.yaml: changed since it was indexed', problems)
+        self.assertTrue(problems[1].startswith('data/manifest.yaml: data_hash'))
+
+        # A new manifest makes opening the index pick up the change
+        update_manifest(manifest, self.base / 'data')
+        index = EntityIndex.open(self.base)
+        self.assertEqual(index.stats['read'], 1)
+        self.assertEqual(index.verify(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the SQLite exporter (export_sqlite.py)
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from export_sqlite import SqliteExporter
+
+
+class TestSqliteExporter(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.db_path = self.base / "build" / "db.sqlite"
+        self._write("data/brands/acme.yaml", {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme',
+                                              'countries_of_origin': ['CZ', 'DE']})
+        self._write("data/material-containers/spool.yaml", {'slug': 'spool', 'name': 'Spool', 'width': 60})
+        self._write("data/materials/acme/acme-pla.yaml", {
+            'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA', 'class': 'FFF', 'type': 'PLA',
+            'primary_color': {'color_rgba': '#ff0000ff'}, 'tags': ['matte', 'silk'],
+            'photos': [{'url': 'https://example.com/a.png', 'type': 'unspecified'}],
+            'properties': {'density': 1.24, 'max_bed_temperature': 60},
+        })
+        self._write("data/material-packages/acme/acme-pla-1kg.yaml", {
+            'slug': 'acme-pla-1kg', 'material': {'slug': 'acme-pla'}, 'container': {'slug': 'spool'},
+            'gtin': 8594173675216, 'nominal_netto_full_weight': 1000,
+        })
+
+    def _write(self, rel_path, data):
+        return write_yaml(self.base / rel_path, data)
+
+    def _query(self, sql, *params):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def test_full_export(self):
+        SqliteExporter(self.base, self.db_path).export_full()
+        self.assertEqual(self._query("SELECT slug, name FROM brands"), [('acme', 'Acme')])
+        self.assertEqual(self._query("SELECT country_code FROM brand_countries ORDER BY 1"), [('CZ',), ('DE',)])
+        self.assertEqual(
+            self._query("SELECT slug, brand_slug, type, primary_color_rgba FROM materials"),
+            [('acme-pla', 'acme', 'PLA', '#ff0000ff')],
+        )
+        self.assertEqual(self._query("SELECT tag FROM material_tags ORDER BY 1"), [('matte',), ('silk',)])
+        self.assertEqual(self._query("SELECT url, type FROM material_photos"),
+                         [('https://example.com/a.png', 'unspecified')])
+        self.assertEqual(
+            self._query("SELECT value FROM material_properties WHERE name = 'density'"), [(1.24,)]
+        )
+        self.assertEqual(
+            self._query("SELECT slug, gtin, container_slug, resolved_brand_slug FROM material_packages_resolved"),
+            [('acme-pla-1kg', 8594173675216, 'spool', 'acme')],
+        )
+        self.assertEqual(self._query("SELECT width FROM material_containers"), [(60.0,)])
+
+    def test_indexes_created(self):
+        SqliteExporter(self.base, self.db_path).export_full()
+        plan = self._query("EXPLAIN QUERY PLAN SELECT * FROM material_packages WHERE gtin = 1")
+        self.assertIn('idx_packages_gtin', plan[0][-1])
+
+    def test_incremental_export(self):
+        SqliteExporter(self.base, self.db_path).export_full()
+
+        # Modify one file, add one, delete one
+        self._write("data/materials/acme/acme-pla.yaml", {
+            'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA Renamed', 'tags': ['matte'],
+        })
+        self._write("data/materials/acme/acme-petg.yaml", {'slug': 'acme-petg', 'brand': {'slug': 'acme'},
+                                                           'name': 'PETG'})
+        (self.base / "data/material-packages/acme/acme-pla-1kg.yaml").unlink()
+
+        exporter = SqliteExporter(self.base, self.db_path)
+        exporter.export_incremental()
+        self.assertEqual(exporter.stats, {'upserted': 2, 'deleted': 1, 'unchanged': 2})
+        self.assertEqual(
+            self._query("SELECT slug, name FROM materials ORDER BY slug"),
+            [('acme-petg', 'PETG'), ('acme-pla', 'PLA Renamed')],
+        )
+        self.assertEqual(self._query("SELECT tag FROM material_tags"), [('matte',)])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM material_properties"), [(0,)])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM material_packages"), [(0,)])
+
+        # Nothing changed since
+        exporter = SqliteExporter(self.base, self.db_path)
+        exporter.export_incremental()
+        self.assertEqual(exporter.stats['upserted'] + exporter.stats['deleted'], 0)
+
+    def test_incremental_export_of_given_files(self):
+        SqliteExporter(self.base, self.db_path).export_full()
+        self._write("data/brands/acme.yaml", {'slug': 'acme', 'name': 'Acme Corp'})
+        self._write("data/materials/acme/acme-pla.yaml", {'slug': 'acme-pla', 'name': 'Ignored'})
+
+        exporter = SqliteExporter(self.base, self.db_path)
+        exporter.export_incremental(["data/brands/acme.yaml"])
+        self.assertEqual(exporter.stats['upserted'], 1)
+        self.assertEqual(self._query("SELECT name FROM brands"), [('Acme Corp',)])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM brand_countries"), [(0,)])
+        self.assertEqual(self._query("SELECT name FROM materials"), [('PLA',)])
+
+    def test_incremental_without_database_does_full_export(self):
+        SqliteExporter(self.base, self.db_path).export_incremental()
+        self.assertEqual(self._query("SELECT COUNT(*) FROM materials"), [(1,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
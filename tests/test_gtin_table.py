@@ -0,0 +1,91 @@
+"""
+Tests for the GTIN lookup table (gtin_table.py)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from gtin_table import GtinTable, build_records, parse_gtin, write_table
+
+
+DATA = {
+    'brands': {'acme': {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme', 'countries_of_origin': ['CZ']}},
+    'materials': {
+        'acme-pla': {'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA',
+                     'photos': [{'url': 'https://example.com/a.png'}]},
+    },
+    'material_containers': {'spool': {'slug': 'spool', 'name': 'Spool'}},
+    'material_packages': {
+        'acme-pla-1kg': {'slug': 'acme-pla-1kg', 'gtin': 8594173675216,
+                         'material': {'slug': 'acme-pla'}, 'container': {'slug': 'spool'}},
+        'acme-pla-2kg': {'slug': 'acme-pla-2kg', 'gtin': '0012345678905',
+                         'material': {'slug': 'acme-pla'}},
+        'acme-pla-dup': {'slug': 'acme-pla-dup', 'gtin': 8594173675216,
+                         'material': {'slug': 'acme-pla'}},
+        'acme-pla-no-gtin': {'slug': 'acme-pla-no-gtin', 'material': {'slug': 'acme-pla'}},
+    },
+}
+
+
+class TestParseGtin(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_gtin(8594173675216), 8594173675216)
+        self.assertEqual(parse_gtin('0012345678905'), 12345678905)
+        self.assertIsNone(parse_gtin(None))
+        self.assertIsNone(parse_gtin('12-34'))
+        self.assertIsNone(parse_gtin(True))
+
+
+class TestGtinTable(unittest.TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp()) / 'gtin-table.bin'
+        write_table(self.path, build_records(DATA), data_hash='ab' * 32)
+        self.table = GtinTable(self.path)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_header(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(self.table.data_hash, 'ab' * 32)
+
+    def test_lookup_resolves_material_container_and_brand(self):
+        record = self.table.lookup(12345678905)
+        self.assertEqual(record['package']['slug'], 'acme-pla-2kg')
+        self.assertEqual(record['material']['slug'], 'acme-pla')
+        self.assertNotIn('photos', record['material'])
+        self.assertIsNone(record['container'])
+        self.assertEqual(record['brand'], {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme'})
+
+    def test_lookup_duplicate_gtin(self):
+        records = self.table.lookup_all(8594173675216)
+        self.assertEqual([r['package']['slug'] for r in records], ['acme-pla-1kg', 'acme-pla-dup'])
+        self.assertEqual(records[0]['container']['name'], 'Spool')
+
+    def test_unknown_gtin(self):
+        for gtin in (0, 12345678904, 8594173675217, 99999999999999):
+            self.assertIsNone(self.table.lookup(gtin))
+            self.assertEqual(self.table.lookup_all(gtin), [])
+            self.assertNotIn(gtin, self.table)
+        self.assertIn(8594173675216, self.table)
+
+    def test_empty_table(self):
+        path = Path(tempfile.mkdtemp()) / 'empty.bin'
+        write_table(path, [])
+        with GtinTable(path) as table:
+            self.assertIsNone(table.lookup(8594173675216))
+
+    def test_rejects_other_files(self):
+        path = Path(tempfile.mkdtemp()) / 'other.bin'
+        for content in (b'', b'x' * 100):
+            path.write_bytes(content)
+            with self.assertRaises(ValueError):
+                GtinTable(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Tests for the NDJSON bulk importer.
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from import_ndjson import NdjsonImporter, iter_records, package_slug
+from lib import slugify
+from uuid_utils import generate_brand_uuid, generate_material_package_uuid, generate_material_uuid
+
+
+def ndjson(*records):
+    return io.StringIO(''.join(json.dumps(record) + '\n' for record in records))
+
+
+class TestImportNdjson(unittest.TestCase):
+    """Test slug/uuid derivation, idempotency and reference resolution."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "data").mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_import(self, *records, **kwargs):
+        importer = NdjsonImporter(self.temp_dir, workers=4, **kwargs)
+        importer.run(ndjson(*records))
+        return importer
+
+    def load(self, relative_path):
+        with open(self.temp_dir / relative_path, encoding='utf-8') as f:
+            return yaml.safe_load(f)
+
+    def test_slugify(self):
+        self.assertEqual(slugify("PLA+ Galaxy Black"), "pla-galaxy-black")
+        self.assertEqual(slugify("Dual-Color Silk PLA+, Silky Lagoon"), "dual-color-silk-pla-silky-lagoon")
+        self.assertEqual(slugify("Café  Crème (Matte)"), "cafe-creme-matte")
+
+    def test_package_slug(self):
+        self.assertEqual(package_slug("acme-pla-red", 1000, 1750), "acme-pla-red-1kg")
+        self.assertEqual(package_slug("acme-pla-red", 750, 2850), "acme-pla-red-750g-2850")
+
+    def test_derives_slugs_and_uuids(self):
+        importer = self.run_import(
+            {"entity": "brand", "name": "Acme"},
+            {"entity": "material", "brand": "acme", "name": "PLA Red", "type": "PLA"},
+            {"entity": "package", "material": "acme-pla-red", "gtin": "1234567890123",
+             "nominal_netto_full_weight": 1000, "filament_diameter": 1750},
+        )
+        self.assertEqual(importer.errors, [])
+        self.assertEqual(importer.stats['written'], 3)
+
+        brand_uuid = generate_brand_uuid("Acme")
+        brand = self.load("data/brands/acme.yaml")
+        self.assertEqual(list(brand)[:2], ['uuid', 'slug'])
+        self.assertEqual(brand['uuid'], str(brand_uuid))
+
+        material = self.load("data/materials/acme/acme-pla-red.yaml")
+        self.assertEqual(material['uuid'], str(generate_material_uuid(brand_uuid, "PLA Red")))
+        self.assertEqual(material['brand'], {'slug': 'acme'})
+
+        package = self.load("data/material-packages/acme/acme-pla-red-1kg.yaml")
+        self.assertEqual(package['uuid'], str(generate_material_package_uuid(brand_uuid, 1234567890123)))
+        self.assertEqual(package['gtin'], 1234567890123)
+
+    def test_gtin_with_leading_zero_is_stored_as_derived(self):
+        self.run_import(
+            {"entity": "brand", "name": "Acme"},
+            {"entity": "material", "brand": "acme", "name": "PLA Red"},
+            {"entity": "package", "material": "acme-pla-red", "gtin": "0012345678905", "slug": "acme-pla-red-1kg"},
+        )
+        package = self.load("data/material-packages/acme/acme-pla-red-1kg.yaml")
+        self.assertEqual(package['gtin'], 12345678905)
+        # validate_uuids and backfill_uuids.py derive it from the stored value
+        self.assertEqual(package['uuid'], str(generate_material_package_uuid(generate_brand_uuid("Acme"),
+                                                                             package['gtin'])))
+        self.assertEqual(package['material'], {'slug': 'acme-pla-red'})
+
+    def test_reimport_is_noop(self):
+        records = [
+            {"entity": "brand", "name": "Acme"},
+            {"entity": "material", "brand": "acme", "name": "PLA Red"},
+        ]
+        self.run_import(*records)
+        path = self.temp_dir / "data/materials/acme/acme-pla-red.yaml"
+        mtime = path.stat().st_mtime_ns
+
+        importer = self.run_import(*records)
+        self.assertEqual(importer.stats, {'written': 0, 'unchanged': 2, 'failed': 0})
+        self.assertEqual(path.stat().st_mtime_ns, mtime)
+
+        importer = self.run_import(records[0], {**records[1], "type": "PLA"})
+        self.assertEqual(importer.stats, {'written': 1, 'unchanged': 1, 'failed': 0})
+        self.assertEqual(self.load(path)['type'], "PLA")
+
+    def test_equivalent_existing_file_is_kept(self):
+        path = self.temp_dir / "data/brands/acme.yaml"
+        path.parent.mkdir(parents=True)
+        content = f"uuid: {generate_brand_uuid('Acme')}\nslug: acme\nname: Acme\ncountries_of_origin:\n  - CZ\n"
+        path.write_text(content)
+
+        importer = self.run_import({"entity": "brand", "name": "Acme", "countries_of_origin": ["CZ"]})
+        self.assertEqual(importer.stats['unchanged'], 1)
+        self.assertEqual(path.read_text(), content)
+
+    def test_existing_uuid_is_kept(self):
+        path = self.temp_dir / "data/material-containers/spool.yaml"
+        path.parent.mkdir(parents=True)
+        path.write_text("uuid: f06357ec-64ac-4182-ad81-1bc6f102b305\nslug: spool\nname: Spool\n")
+
+        self.run_import({"entity": "container", "name": "Spool", "class": "FFF"})
+        data = self.load(path)
+        self.assertEqual(data['uuid'], "f06357ec-64ac-4182-ad81-1bc6f102b305")
+        self.assertEqual(data['class'], "FFF")
+
+    def test_forward_references_are_resolved(self):
+        importer = self.run_import(
+            {"entity": "package", "material": {"slug": "acme-pla-red"}, "nominal_netto_full_weight": 500},
+            {"entity": "material", "brand": "acme", "name": "PLA Red"},
+            {"entity": "brand", "name": "Acme"},
+        )
+        self.assertEqual(importer.errors, [])
+        self.assertTrue((self.temp_dir / "data/material-packages/acme/acme-pla-red-500g.yaml").exists())
+
+    def test_reports_invalid_records(self):
+        importer = self.run_import(
+            {"entity": "material", "brand": "missing", "name": "PLA"},
+            {"entity": "brand", "name": "Acme"},
+            {"entity": "brand", "name": "ACME"},
+            {"entity": "widget"},
+        )
+        self.assertEqual(importer.stats['written'], 1)
+        self.assertEqual(len(importer.errors), 3)
+        self.assertTrue(any("unknown brand 'missing'" in error for error in importer.errors))
+        self.assertTrue(any("already imported from record 2" in error for error in importer.errors))
+
+    def test_invalid_line_is_skipped(self):
+        stream = io.StringIO('{"entity": "brand", "name": "Acme"}\n{"entity": \n'
+                             '{"entity": "brand", "name": "Other"}\n')
+        importer = NdjsonImporter(self.temp_dir, workers=2)
+        self.assertFalse(importer.run(stream))
+        self.assertEqual(importer.stats, {'written': 2, 'unchanged': 0, 'failed': 1})
+        self.assertEqual(len(importer.errors), 1)
+        self.assertTrue(importer.errors[0].startswith("line 2: invalid JSON"))
+
+    def test_dry_run_writes_nothing(self):
+        importer = self.run_import({"entity": "brand", "name": "Acme"}, dry_run=True)
+        self.assertEqual(importer.stats['written'], 1)
+        self.assertFalse((self.temp_dir / "data/brands/acme.yaml").exists())
+
+    def test_json_array_input(self):
+        records = list(iter_records(io.StringIO('  [{"entity": "brand", "name": "Acme"}, {"name": "B"}]')))
+        self.assertEqual(records, [(1, {"entity": "brand", "name": "Acme"}), (2, {"name": "B"})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests for the typed in-memory model (model.py) and DatabaseLoader.load_model
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from lib import DatabaseLoader
+from model import Brand, Material, MaterialPackage, Photo, build_model
+
+
+class TestBuildModel(unittest.TestCase):
+    def setUp(self):
+        self.data_cache = {
+            'brands': {
+                'acme': {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme', 'countries_of_origin': ['CZ']},
+            },
+            'material_containers': {
+                'spool-1kg': {'uuid': 'c-1', 'slug': 'spool-1kg', 'name': '1kg', 'class': 'FFF', 'width': 60},
+            },
+            'materials': {
+                'acme-pla-red': {
+                    'uuid': 'm-1', 'slug': 'acme-pla-red', 'brand': {'slug': 'acme'},
+                    'name': 'PLA Red', 'class': 'FFF', 'type': 'PLA',
+                    'primary_color': {'color_rgba': '#ff0000ff', 'color_lab': [53.2, 80.1, 67.2]},
+                    'tags': ['matte'], 'properties': {'density': 1.24},
+                    'photos': [{'url': 'https://example.com/a.png', 'type': 'unspecified'}],
+                    'transmission_distance': 0.4,
+                },
+            },
+            'material_packages': {
+                'acme-pla-red-1kg': {
+                    'uuid': 'p-1', 'slug': 'acme-pla-red-1kg', 'class': 'FFF',
+                    'material': {'slug': 'acme-pla-red'}, 'container': {'slug': 'spool-1kg'},
+                    'gtin': 1234567890123, 'nominal_netto_full_weight': 1000,
+                },
+                'acme-missing': {
+                    'slug': 'acme-missing', 'class': 'FFF', 'material': {'slug': 'does-not-exist'},
+                },
+            },
+        }
+
+    def test_references_resolved_to_objects(self):
+        db = build_model(self.data_cache)
+        package = db.material_packages['acme-pla-red-1kg']
+        self.assertIsInstance(package, MaterialPackage)
+        self.assertIs(package.material, db.materials['acme-pla-red'])
+        self.assertIs(package.container, db.material_containers['spool-1kg'])
+        self.assertIs(package.brand, db.brands['acme'])
+        self.assertEqual(package.gtin, 1234567890123)
+
+    def test_fields_converted(self):
+        db = build_model(self.data_cache)
+        material = db.materials['acme-pla-red']
+        self.assertIsInstance(material, Material)
+        self.assertEqual(material.class_, 'FFF')
+        self.assertEqual(material.primary_color.rgba, '#ff0000ff')
+        self.assertEqual(material.primary_color.lab, (53.2, 80.1, 67.2))
+        self.assertEqual(material.tags, ('matte',))
+        self.assertEqual(material.photos, (Photo('https://example.com/a.png', 'unspecified'),))
+        self.assertEqual(material.extra, {'transmission_distance': 0.4})
+        self.assertEqual(db.material_containers['spool-1kg'].width, 60)
+
+    def test_unresolved_references_recorded(self):
+        db = build_model(self.data_cache)
+        self.assertIsNone(db.material_packages['acme-missing'].material)
+        self.assertEqual(
+            db.unresolved,
+            [('material_packages', 'acme-missing', 'material', 'does-not-exist')],
+        )
+
+    def test_repeated_strings_interned(self):
+        # Build two materials from separately created strings
+        self.data_cache['materials']['acme-pla-blue'] = {
+            'slug': 'acme-pla-blue', 'brand': {'slug': 'acme'}, 'name': 'PLA Blue',
+            'class': 'FFF', 'type': ''.join(['P', 'L', 'A']), 'tags': [''.join(['mat', 'te'])],
+            'photos': [{'url': 'https://example.com/b.png', 'type': ''.join(['un', 'specified'])}],
+        }
+        db = build_model(self.data_cache)
+        red, blue = db.materials['acme-pla-red'], db.materials['acme-pla-blue']
+        self.assertIs(red.type, blue.type)
+        self.assertIs(red.tags[0], blue.tags[0])
+        self.assertIs(red.photos[0].type, blue.photos[0].type)
+
+    def test_records_are_slotted(self):
+        brand = Brand(uuid=None, slug='x', name='X')
+        with self.assertRaises(AttributeError):
+            brand.unknown = 1
+
+
+class TestLoaderLoadModel(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        write_yaml(self.base / "data/brands/acme.yaml", {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme'})
+        write_yaml(self.base / "data/material-containers/spool.yaml", {'slug': 'spool', 'name': 'Spool'})
+        write_yaml(self.base / "data/materials/acme/acme-pla.yaml",
+                   {'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA', 'class': 'FFF'})
+        write_yaml(self.base / "data/material-packages/acme/acme-pla-1kg.yaml",
+                   {'slug': 'acme-pla-1kg', 'material': {'slug': 'acme-pla'}, 'container': {'slug': 'spool'}})
+
+    def test_load_model(self):
+        loader = DatabaseLoader(self.base)
+        db = loader.load_model()
+        self.assertEqual(loader.errors, [])
+        package = db.material_packages['acme-pla-1kg']
+        self.assertEqual(package.brand.name, 'Acme')
+        self.assertEqual(package.container.name, 'Spool')
+
+    def test_flat_container_directory_is_loaded(self):
+        data = DatabaseLoader(self.base).load_all_entities()
+        self.assertIn('spool', data['material_containers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for near-duplicate material detection (near_duplicates.py)
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from near_duplicates import MinHashLSH, find_duplicate_clusters, names_compatible, normalize_name
+
+
+def material(brand, name, color=None, **properties):
+    data = {'brand': {'slug': brand}, 'name': name, 'type': 'PLA'}
+    if color:
+        data['primary_color'] = {'color_rgba': color}
+    if properties:
+        data['properties'] = properties
+    return data
+
+
+BRANDS = {
+    'acme': {'slug': 'acme', 'name': 'Acme'},
+    'other': {'slug': 'other', 'name': 'Other'},
+}
+
+
+class TestNames(unittest.TestCase):
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('Acme PLA+ Grey/Black', 'Acme'), 'pla plus gray black')
+        self.assertEqual(normalize_name('Acme Acme Žlutá', 'Acme'), 'zluta')
+
+    def test_names_compatible(self):
+        self.assertTrue(names_compatible('silk yellow and pink', 'silk pink yellow'))
+        self.assertTrue(names_compatible('petg ptfe signal', 'petgptfe signal'))
+        # Colors (also inside compound words), versions and variant markers differ
+        self.assertFalse(names_compatible('silk blue red', 'silk blue redwine'))
+        self.assertFalse(names_compatible('pla black', 'pla black v2'))
+        self.assertFalse(names_compatible('pla pro black', 'pla pro hs black'))
+
+
+class TestMinHashLSH(unittest.TestCase):
+    def test_candidates(self):
+        lsh = MinHashLSH()
+        base = {f"f{i}" for i in range(40)}
+        lsh.add('a', base)
+        lsh.add('b', base - {'f0'} | {'x'})
+        lsh.add('c', {f"g{i}" for i in range(40)})
+        self.assertEqual(lsh.candidates(), {('a', 'b')})
+        self.assertEqual(lsh.signature(base), lsh.signature(sorted(base)))
+
+    def test_oversized_buckets_pair_within_groups(self):
+        lsh = MinHashLSH()
+        for i in range(10):
+            lsh.add(f"k{i}", {'pla', 'black'}, group=f"brand{i % 5}")
+        self.assertEqual(len(lsh.candidates()), 45)
+        self.assertEqual(lsh.candidates(max_bucket_size=4),
+                         {(f"k{i}", f"k{i + 5}") for i in range(5)})
+
+
+class TestFindDuplicateClusters(unittest.TestCase):
+    def test_within_brand(self):
+        materials = {
+            'acme-silk-yellow-and-pink': material('acme', 'Silk Yellow and Pink'),
+            'acme-silk-yellow-pink': material('acme', 'Acme Silk Yellow Pink'),
+            'acme-silk-yellow-blue': material('acme', 'Silk Yellow Blue'),
+            'acme-pla-black': material('acme', 'PLA Black', '#000000FF', density=1.24),
+            'acme-pla-black-2': material('acme', 'PLA  Black', '#080808FF', density=1.24),
+            'acme-pla-black-v2': material('acme', 'PLA Black v2', '#000000FF', density=1.24),
+            'acme-pla-white': material('acme', 'PLA Black', '#FFFFFFFF', density=1.24),
+        }
+        clusters = find_duplicate_clusters(materials, BRANDS)
+        self.assertEqual([c.slugs for c in clusters], [
+            ['acme-pla-black', 'acme-pla-black-2'],
+            ['acme-silk-yellow-and-pink', 'acme-silk-yellow-pink'],
+        ])
+        self.assertEqual(clusters[0].similarity, 1.0)
+
+    def test_cross_brand_needs_rebrand_evidence(self):
+        colors = ['Red', 'Green', 'Blue', 'Orange', 'Purple']
+        materials = {
+            'acme-galaxy-black': material('acme', 'Galaxy Black'),
+            'other-galaxy-black': material('other', 'Galaxy Black'),
+        }
+        # One shared generic name is a coincidence
+        self.assertEqual(find_duplicate_clusters(materials, BRANDS), [])
+
+        # A whole product line under a second brand is a rebrand
+        for color in colors:
+            materials[f'acme-nebula-{color.lower()}'] = material('acme', f'Acme Nebula {color}')
+            materials[f'other-nebula-{color.lower()}'] = material('other', f'Other Nebula {color}')
+        clusters = find_duplicate_clusters(materials, BRANDS)
+        self.assertEqual(len(clusters), 6)
+        self.assertIn(['acme-nebula-red', 'other-nebula-red'], [c.slugs for c in clusters])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for the per-phase profiler (profiling.py)
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from profiling import Profiler, add_profile_arguments
+from update_manifest import compute_data_hash
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phases_and_slowest_files(self):
+        profiler = Profiler(slowest=2, script='test')
+        with profiler.phase('load'):
+            for i, seconds in enumerate([0.1, 0.3, 0.2]):
+                profiler.record_file(f"file{i}.yaml", 100, seconds)
+            with profiler.timer('parse'):
+                pass
+            profiler.add_time('parse', 0.5)
+        with profiler.phase('load'):
+            profiler.record_file('file3.yaml', 50, 0.01)
+        with profiler.phase('check'):
+            pass
+
+        report = json.loads(json.dumps(profiler.report()))
+        self.assertEqual([p['name'] for p in report['phases']], ['load', 'check'])
+        load = report['phases'][0]
+        self.assertEqual((load['files'], load['bytes']), (4, 350))
+        self.assertGreaterEqual(load['timers']['parse'], 0.5)
+        self.assertGreater(load['peak_rss_bytes'], 0)
+        self.assertNotIn('tracemalloc_peak_bytes', load)
+        self.assertEqual(report['total']['files'], 4)
+        self.assertEqual([f['path'] for f in report['slowest_files']], ['file1.yaml', 'file2.yaml'])
+        self.assertEqual(report['slowest_files'][0]['phase'], 'load')
+
+    def test_memory_tracing(self):
+        profiler = Profiler(trace_memory=True)
+        with profiler.phase('allocate'):
+            data = [bytes(1000) for _ in range(1000)]
+        del data
+        with redirect_stderr(StringIO()):
+            profiler.finish()
+        self.assertGreater(profiler.report()['phases'][0]['tracemalloc_peak_bytes'], 1_000_000)
+
+    def test_disabled(self):
+        parser = argparse.ArgumentParser()
+        add_profile_arguments(parser)
+        profiler = Profiler.from_args(parser.parse_args([]), 'test')
+        self.assertFalse(profiler.enabled)
+        with profiler.phase('load'), profiler.timer('parse'):
+            profiler.record_file('a.yaml', 1, 1.0)
+        self.assertEqual(profiler.report()['phases'], [])
+
+    def test_report_file(self):
+        tmp = Path(tempfile.mkdtemp())
+        try:
+            (tmp / 'data').mkdir()
+            (tmp / 'data' / 'a.yaml').write_text('slug: a\n')
+            parser = argparse.ArgumentParser()
+            add_profile_arguments(parser)
+            args = parser.parse_args(['--profile', str(tmp / 'out' / 'profile.json')])
+            profiler = Profiler.from_args(args, 'update_manifest')
+            with profiler.phase('hash'):
+                compute_data_hash(tmp / 'data', profiler)
+            with redirect_stderr(StringIO()) as stderr:
+                profiler.finish()
+            self.assertIn('hash', stderr.getvalue())
+
+            report = json.loads((tmp / 'out' / 'profile.json').read_text())
+            self.assertEqual(report['script'], 'update_manifest')
+            self.assertEqual(report['phases'][0]['files'], 1)
+            self.assertEqual(report['slowest_files'][0]['bytes'], 8)
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests for the low-memory entity projections (projection.py)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import yaml
+
+from tests.helpers import write_yaml
+
+# Add benchmarks and scripts directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from projection import project
+from synthetic_data import generate_database, prepare_reference_data
+from validate_json_schema import JsonSchemaValidator
+
+
+class TestProjection(unittest.TestCase):
+    def test_reads_like_the_document(self):
+        material = {
+            'slug': 'acme-pla-black', 'uuid': '4f8a1c9e-2b5d-4e7a-9c3f-1a2b3c4d5e6f', 'name': 'PLA Black',
+            'class': 'FFF', 'type': 'PLA', 'brand': {'slug': 'acme'}, 'certification_ids': [],
+            'primary_color': {'color_rgba': '#000000ff', 'color_lab': [0, 0, 0]},
+            'properties': {'density': 1.24, 'hardness_shore_d': 80}, 'photos': [{'url': 'a.png'}],
+        }
+        projection = project(material)
+        for key in ('slug', 'uuid', 'name', 'class', 'type', 'brand', 'certification_ids'):
+            self.assertEqual(projection.get(key), material[key])
+        self.assertEqual(projection.get('primary_color'), {'color_rgba': '#000000ff'})
+        self.assertEqual(projection.get('properties'), {'density': 1.24})
+        self.assertIsNone(projection.get('photos'))
+        self.assertIsNone(projection.get('material'))
+        self.assertNotIn('gtin', projection)
+        self.assertIn('uuid', projection)
+        with self.assertRaises(KeyError):
+            projection['gtin']
+
+
+class TestLowMemoryValidation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.base = Path(tempfile.mkdtemp())
+        generate_database(cls.base, scale=0.01, seed=3)
+        prepare_reference_data(cls.base, cls.base / 'no-such-repo')
+
+        # A broken foreign key, a wrong derived UUID and a duplicate material
+        data_dir = cls.base / 'data'
+        package_file = next((data_dir / 'material-packages').rglob('*.yaml'))
+        package = yaml.safe_load(package_file.read_text())
+        package['container'] = {'slug': 'no-such-container'}
+        write_yaml(package_file, package)
+        material_file, other_file = sorted((data_dir / 'materials').rglob('*.yaml'))[:2]
+        material = yaml.safe_load(material_file.read_text())
+        material['name'] += ' Renamed'
+        write_yaml(material_file, material)
+        other = dict(material, slug=material['slug'] + '-copy')
+        write_yaml(material_file.parent / f"{other['slug']}.yaml", other)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.base)
+
+    def validate(self, low_memory):
+        validator = JsonSchemaValidator(self.base, low_memory=low_memory)
+        with redirect_stdout(StringIO()):
+            validator.validate()
+        return validator, sorted((e.level, e.rule, e.entity, e.file, e.message) for e in validator.errors)
+
+    def test_same_errors_as_full_documents(self):
+        _, full = self.validate(low_memory=False)
+        validator, projected = self.validate(low_memory=True)
+        self.assertEqual(projected, full)
+        self.assertLessEqual({'foreign_key_exists', 'uuid_derivation', 'near_duplicate'},
+                             {rule for _, rule, *_ in full})
+        self.assertFalse(any(isinstance(data, dict) for data in validator.data_cache['materials'].values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
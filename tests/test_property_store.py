@@ -0,0 +1,83 @@
+"""
+Tests for the columnar property store (property_store.py)
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+try:
+    import numpy as np
+    from property_store import build_property_store
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from model import build_model
+
+
+MATERIALS = {
+    'a-petg': {
+        'slug': 'a-petg', 'brand': {'slug': 'a'}, 'class': 'FFF', 'type': 'PETG',
+        'properties': {'density': 1.27, 'max_bed_temperature': 80},
+    },
+    'a-petg-hot': {
+        'slug': 'a-petg-hot', 'brand': {'slug': 'a'}, 'class': 'FFF', 'type': 'PETG',
+        'properties': {'density': 1.27, 'max_bed_temperature': 90},
+    },
+    'b-petg-heavy': {
+        'slug': 'b-petg-heavy', 'brand': {'slug': 'b'}, 'class': 'FFF', 'type': 'PETG',
+        'properties': {'density': 1.5, 'max_bed_temperature': 70},
+    },
+    'b-pla': {
+        'slug': 'b-pla', 'brand': {'slug': 'b'}, 'class': 'FFF', 'type': 'PLA',
+        'properties': {'density': 1.24, 'max_bed_temperature': 60},
+    },
+    'c-resin': {
+        'slug': 'c-resin', 'brand': {'slug': 'c'}, 'class': 'SLA', 'properties': {},
+    },
+}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestPropertyStore(unittest.TestCase):
+    def setUp(self):
+        self.store = build_property_store(MATERIALS)
+
+    def test_vectorized_filter(self):
+        rows = (self.store.category_mask('type', 'PETG')
+                & (self.store['max_bed_temperature'] <= 80)
+                & (self.store['density'] < 1.3))
+        self.assertEqual(self.store.select(rows), ['a-petg'])
+
+    def test_missing_values_are_nan(self):
+        row = self.store.row_of['c-resin']
+        self.assertTrue(np.isnan(self.store['density'][row]))
+        self.assertFalse(self.store.has('density')[row])
+        self.assertEqual(self.store.codes['type'][row], -1)
+
+    def test_categories(self):
+        self.assertEqual(self.store.categories['brand'], ['a', 'b', 'c'])
+        self.assertEqual(self.store.code_for('type', 'unknown'), -1)
+        self.assertFalse(self.store.category_mask('type', 'unknown').any())
+        self.assertEqual(
+            self.store.select(self.store.category_mask('class', 'SLA')), ['c-resin']
+        )
+
+    def test_row(self):
+        self.assertEqual(
+            self.store.row('b-pla'),
+            {'brand': 'b', 'type': 'PLA', 'class': 'FFF', 'density': 1.24, 'max_bed_temperature': 60.0},
+        )
+
+    def test_build_from_typed_model(self):
+        store = build_property_store(build_model({'materials': MATERIALS}))
+        self.assertEqual(len(store), len(MATERIALS))
+        self.assertEqual(store.slugs, self.store.slugs)
+        np.testing.assert_array_equal(store['density'], self.store['density'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests for the reverse-reference index (reference_index.py)
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from reference_index import ReferenceIndex
+from validate_json_schema import JsonSchemaValidator
+
+
+DATA = {
+    'brands': {
+        'acme': {'slug': 'acme', 'name': 'Acme'},
+        'unused': {'slug': 'unused', 'name': 'Unused'},
+    },
+    'materials': {
+        'acme-pla': {'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'class': 'FFF', 'type': 'PLA'},
+        'acme-petg': {'slug': 'acme-petg', 'brand': {'slug': 'acme'}, 'class': 'FFF', 'type': 'PETG'},
+    },
+    'material-packages': {
+        'acme-pla-1kg': {'slug': 'acme-pla-1kg', 'material': {'slug': 'acme-pla'}, 'container': {'slug': 'spool'}},
+        'acme-pla-2kg': {'slug': 'acme-pla-2kg', 'material': {'slug': 'acme-pla'}},
+    },
+    'material-containers': {
+        'spool': {'slug': 'spool', 'brand': {'slug': 'acme'}},
+        'box': {'slug': 'box'},
+    },
+}
+
+
+def build_index():
+    index = ReferenceIndex(JsonSchemaValidator.FOREIGN_KEY_MAPPING)
+    for entity, entities in DATA.items():
+        for key, data in entities.items():
+            index.add(entity, key, data)
+    return index
+
+
+class TestReferenceIndex(unittest.TestCase):
+    def test_referrers(self):
+        index = build_index()
+        self.assertEqual([(r.key, r.field) for r in index.referrers('materials', 'acme-pla')],
+                         [('acme-pla-1kg', 'material.slug'), ('acme-pla-2kg', 'material.slug')])
+        self.assertEqual(sorted((r.entity, r.key) for r in index.referrers('brands', 'acme')), [
+            ('material-containers', 'spool'), ('materials', 'acme-petg'), ('materials', 'acme-pla'),
+        ])
+        self.assertEqual([r.key for r in index.referrers('fff-material-types', 'PETG', 'abbreviation')],
+                         ['acme-petg'])
+
+    def test_replace_and_remove(self):
+        index = build_index()
+        index.add('material-packages', 'acme-pla-2kg',
+                  {'slug': 'acme-pla-2kg', 'material': {'slug': 'acme-petg'}})
+        self.assertEqual([r.key for r in index.referrers('materials', 'acme-pla')], ['acme-pla-1kg'])
+        self.assertEqual([r.key for r in index.referrers('materials', 'acme-petg')], ['acme-pla-2kg'])
+        index.remove('material-packages', 'acme-pla-2kg')
+        self.assertEqual(index.referrers('materials', 'acme-petg'), [])
+        self.assertEqual(index.references_of('material-packages', 'acme-pla-2kg'), [])
+
+    def test_orphans(self):
+        orphans = build_index().orphans(DATA)
+        self.assertEqual(orphans, {
+            'brands': ['unused'],
+            'materials': ['acme-petg'],
+            'material-containers': ['box'],
+        })
+
+    def test_delete_blockers(self):
+        index = build_index()
+        self.assertEqual([r.key for r in index.delete_blockers('material-containers', DATA['material-containers']['spool'])],
+                         ['acme-pla-1kg'])
+        self.assertEqual(index.delete_blockers('materials', DATA['materials']['acme-petg']), [])
+
+
+class TestValidateForeignKeys(unittest.TestCase):
+    def test_missing_targets(self):
+        validator = JsonSchemaValidator(Path('.'))
+        validator.data_cache = {entity: dict(entities) for entity, entities in DATA.items()}
+        validator.data_cache['fff-material-types'] = {'pla': {'key': 'pla', 'abbreviation': 'PLA'}}
+        validator.references = build_index()
+        validator.data_cache['materials'].pop('acme-pla')
+        validator.references.remove('materials', 'acme-pla')
+
+        validator.validate_foreign_keys()
+        self.assertEqual([(e.entity, e.file, e.message) for e in validator.errors], [
+            ('material-packages', 'acme-pla-1kg', "Foreign key material.slug=acme-pla not found in materials.slug"),
+            ('material-packages', 'acme-pla-2kg', "Foreign key material.slug=acme-pla not found in materials.slug"),
+            ('materials', 'acme-petg', "Foreign key type=PETG not found in fff-material-types.abbreviation"),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
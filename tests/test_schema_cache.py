@@ -0,0 +1,200 @@
+"""
+Tests for the local schema cache (schema_cache.py)
+"""
+
+import dataclasses
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from schema_cache import SchemaCache, SchemaCacheError, SchemaConfig, bundle_hash, install
+
+SPARSE_PATH = 'schema/generated/opt_db_schema'
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.cache = SchemaCache(self.base / 'cache')
+        self.target = self.base / 'repo' / 'openprinttag'
+
+        # A local stand-in for the architecture repository
+        source = self.base / 'architecture'
+        self.write(source / SPARSE_PATH / 'brand.schema.json', '{"type": "object"}')
+        self.write(source / SPARSE_PATH / 'common' / 'uuid.schema.json', '{"type": "string"}')
+        self.write(source / 'data' / 'countries.yaml', '- code: CZ\n')
+        self.write(source / 'README.md', 'not part of the bundle\n')
+        for args in (['init', '-q'], ['add', '-A'], ['commit', '-qm', 'schemas']):
+            subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=source,
+                           check=True, capture_output=True)
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=source, check=True, capture_output=True,
+                                text=True).stdout.strip()
+        self.config = SchemaConfig(source.as_uri(), commit, SPARSE_PATH, './openprinttag')
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    @staticmethod
+    def write(path, content):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def install(self, **kwargs):
+        return install(self.config, self.cache, self.target, **kwargs)
+
+
+class TestInstall(SchemaCacheTestCase):
+    def test_fetches_once_then_works_offline(self):
+        self.assertEqual(self.install(), 'fetched')
+        self.assertEqual(sorted(p.relative_to(self.target).as_posix() for p in self.target.rglob('*') if p.is_file()),
+                         ['.schema-version', 'data/countries.yaml', 'schema/brand.schema.json',
+                          'schema/common/uuid.schema.json'])
+        self.assertEqual((self.target / '.schema-version').read_text(), f"{self.config.commit}\n")
+        self.assertEqual(self.install(offline=True), 'up-to-date')
+
+        # A modified or extra installed file is replaced from the cache
+        (self.target / 'schema' / 'brand.schema.json').write_text('{}')
+        (self.target / 'schema' / 'stale.schema.json').write_text('{}')
+        self.assertEqual(self.install(offline=True), 'installed')
+        self.assertEqual((self.target / 'schema' / 'brand.schema.json').read_text(), '{"type": "object"}')
+        self.assertFalse((self.target / 'schema' / 'stale.schema.json').exists())
+        self.assertEqual(self.cache.verify(self.config.commit), [])
+
+    def test_offline_without_cache(self):
+        with self.assertRaises(SchemaCacheError):
+            self.install(offline=True)
+        self.assertFalse(self.target.exists())
+
+    def test_corrupted_cache_is_fetched_again(self):
+        self.install()
+        bundle = self.cache.load_bundle(self.config.commit)
+        digest = bundle['files']['schema/brand.schema.json']
+        self.cache.object_path(digest).write_text('{"type": "array"}')
+        shutil.rmtree(self.target)
+
+        self.assertEqual(len(self.cache.verify(self.config.commit)), 1)
+        with self.assertRaises(SchemaCacheError):
+            self.install(offline=True)
+        self.assertEqual(self.install(), 'fetched')
+        self.assertEqual((self.target / 'schema' / 'brand.schema.json').read_text(), '{"type": "object"}')
+
+        # A tampered bundle file list is detected as well
+        bundle_path = self.cache.bundle_path(self.config.commit)
+        bundle = json.loads(bundle_path.read_text())
+        bundle['files']['schema/extra.schema.json'] = digest
+        bundle_path.write_text(json.dumps(bundle))
+        with self.assertRaises(SchemaCacheError):
+            self.cache.load_bundle(self.config.commit)
+
+    def test_config(self):
+        path = self.base / 'schema_version.conf'
+        config = ('# comment\nSCHEMA_REPO_URL="https://example.com/a.git"\n'
+                  f'SCHEMA_COMMIT="{self.config.commit.upper()}"\n'
+                  f'SCHEMA_SPARSE_PATH="{SPARSE_PATH}"\nSCHEMA_TARGET_DIR="./openprinttag"\n')
+        path.write_text(config + 'SCHEMA_BUNDLE_HASH=""\n')
+        self.assertEqual(SchemaConfig.load(path), SchemaConfig('https://example.com/a.git', self.config.commit,
+                                                               SPARSE_PATH, './openprinttag'))
+        path.write_text(config + f'SCHEMA_BUNDLE_HASH="{"AB" * 32}"\n')
+        self.assertEqual(SchemaConfig.load(path).bundle_hash, 'ab' * 32)
+        for bad in ('SCHEMA_COMMIT="main"\n', config + 'SCHEMA_BUNDLE_HASH="abc"\n'):
+            path.write_text(bad)
+            with self.assertRaises(SchemaCacheError):
+                SchemaConfig.load(path)
+
+    def test_pinned_bundle_hash(self):
+        self.install()
+        pinned = self.cache.load_bundle(self.config.commit)['bundle_hash']
+        self.config = dataclasses.replace(self.config, bundle_hash=pinned)
+        self.assertEqual(self.install(offline=True), 'up-to-date')
+
+        # A cached bundle or a fetch that does not match the pin is rejected
+        self.config = dataclasses.replace(self.config, bundle_hash='0' * 64)
+        with self.assertRaises(SchemaCacheError):
+            self.install(offline=True)
+        with self.assertRaises(SchemaCacheError):
+            self.install()
+        self.assertIsNone(self.cache.load_bundle(self.config.commit))
+
+
+class TestTarballs(SchemaCacheTestCase):
+    FILES = {
+        'schema/brand.schema.json': b'{"type": "object"}',
+        'schema/common/uuid.schema.json': b'{"type": "string"}',
+        'data/countries.yaml': b'- code: CZ\n',
+    }
+
+    def setUp(self):
+        super().setUp()
+        bundle = self.cache.add_bundle(self.config.commit, self.FILES, 'test')
+        self.config = dataclasses.replace(self.config, bundle_hash=bundle['bundle_hash'])
+
+    def tarball(self, members):
+        path = self.base / 'bundle.tar.gz'
+        with tarfile.open(path, 'w:gz') as tar:
+            for name, content in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        return path
+
+    def test_export_and_import(self):
+        tarball = self.base / 'export' / 'schemas.tar.gz'
+        exported = self.cache.export(self.config.commit, tarball)
+
+        offline = SchemaCache(self.base / 'offline-cache')
+        self.assertEqual(offline.import_tarball(tarball, self.config)['files'], exported['files'])
+        self.assertEqual(install(self.config, offline, self.target, offline=True), 'installed')
+        self.assertEqual((self.target / 'data' / 'countries.yaml').read_text(), '- code: CZ\n')
+
+    def test_import_installed_tree(self):
+        members = {'openprinttag/.schema-version': f"{self.config.commit}\n".encode()}
+        members.update({f'openprinttag/{path}': content for path, content in self.FILES.items()})
+        offline = SchemaCache(self.base / 'offline-cache')
+        bundle = offline.import_tarball(self.tarball(members), self.config)
+        self.assertEqual(bundle['commit'], self.config.commit)
+        self.assertEqual(sorted(bundle['files']), sorted(self.FILES))
+
+    def test_rejects_mismatched_and_unpinned_imports(self):
+        tree = {'.schema-version': f"{self.config.commit}\n".encode(), 'schema/brand.schema.json': b'{}'}
+        other_commit = dict(tree, **{'.schema-version': f"{'a' * 40}\n".encode()})
+        unpinned = dataclasses.replace(self.config, bundle_hash=None)
+        offline = SchemaCache(self.base / 'offline-cache')
+        for members, config in ((tree, self.config), (other_commit, self.config), (tree, unpinned)):
+            with self.subTest(config=config.bundle_hash, commit=members['.schema-version']):
+                with self.assertRaises(SchemaCacheError):
+                    offline.import_tarball(self.tarball(members), config)
+        self.assertEqual(list((self.base / 'offline-cache').glob('bundles/*')), [])
+
+        # Unless an unpinned import is trusted explicitly, still only of SCHEMA_COMMIT
+        with self.assertRaises(SchemaCacheError):
+            offline.import_tarball(self.tarball(other_commit), unpinned, trust_unpinned=True)
+        bundle = offline.import_tarball(self.tarball(tree), unpinned, trust_unpinned=True)
+        self.assertEqual(offline.load_bundle(self.config.commit), bundle)
+
+    def test_rejects_tampered_and_unsafe_tarballs(self):
+        tarball = self.base / 'schemas.tar.gz'
+        self.cache.export(self.config.commit, tarball)
+        with tarfile.open(tarball) as tar:
+            members = {m.name: tar.extractfile(m).read() for m in tar.getmembers()}
+
+        offline = SchemaCache(self.base / 'offline-cache')
+        tampered = dict(members, **{'schema/brand.schema.json': b'{"type": "array"}'})
+        extra = dict(members, **{'schema/extra.schema.json': b'{}'})
+        unsafe = {'.schema-version': f"{'b' * 40}\n".encode(), 'schema/../../evil.json': b'{}'}
+        for bad in (tampered, extra, unsafe, {'schema/brand.schema.json': b'{}'}):
+            with self.subTest(sorted(bad)):
+                with self.assertRaises(SchemaCacheError):
+                    offline.import_tarball(self.tarball(bad), self.config)
+        self.assertFalse(offline.bundle_path(self.config.commit).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
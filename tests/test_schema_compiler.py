@@ -0,0 +1,238 @@
+"""
+Tests for the schema compiler (schema_compiler.py)
+"""
+
+import json
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+import yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from schema_compiler import CompiledSchemaCache, UnsupportedSchema, mutate, parity_mismatch
+from validate_json_schema import JsonSchemaValidator
+
+REPO_ROOT = Path(__file__).parent.parent
+
+COMMON_SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    '$defs': {
+        'slug': {'type': 'string', 'pattern': '^[a-z0-9-]+$', 'minLength': 1, 'maxLength': 64},
+        'entity_ref': {
+            'type': 'object',
+            'properties': {'slug': {'$ref': '#/$defs/slug'}},
+            'required': ['slug'],
+            'additionalProperties': False,
+        },
+        'color': {'type': 'string', 'pattern': '^#[0-9a-fA-F]{8}$'},
+    },
+}
+
+MATERIAL_SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    'type': 'object',
+    'properties': {
+        'uuid': {'type': 'string', 'format': 'uuid'},
+        'slug': {'$ref': 'common.schema.json#/$defs/slug'},
+        'brand': {'$ref': 'common.schema.json#/$defs/entity_ref'},
+        'name': {'type': 'string', 'minLength': 1},
+        'class': {'enum': ['FFF', 'SLA']},
+        'type': {'type': 'string'},
+        'tags': {'type': 'array', 'items': {'enum': ['silk', 'matte', 1, None]}, 'uniqueItems': True, 'maxItems': 3},
+        'primary_color': {
+            'type': 'object',
+            'properties': {'color_rgba': {'$ref': 'common.schema.json#/$defs/color'}},
+            'required': ['color_rgba'],
+        },
+        'secondary_colors': {'type': 'array', 'prefixItems': [{'type': 'object'}], 'items': False},
+        'properties': {
+            'type': 'object',
+            'properties': {
+                'density': {'type': 'number', 'exclusiveMinimum': 0, 'maximum': 20},
+                'min_print_temperature': {'type': 'integer', 'minimum': 0, 'multipleOf': 5},
+                'max_print_temperature': {'type': ['integer', 'null'], 'exclusiveMaximum': 500},
+                'diameter': {'type': 'number', 'multipleOf': 0.05},
+            },
+            'patternProperties': {'^x_': {'type': 'string'}},
+            'additionalProperties': False,
+            'minProperties': 1,
+        },
+        'photos': {
+            'type': 'array',
+            'contains': {'type': 'object', 'required': ['url']},
+            'maxContains': 2,
+            'items': {
+                'type': 'object',
+                'properties': {'url': {'type': 'string', 'format': 'uri-reference'}},
+                'propertyNames': {'maxLength': 8},
+            },
+        },
+        'url': {'anyOf': [{'type': 'string', 'format': 'email'}, {'type': 'string', 'pattern': '^https?://'}]},
+        'certification': {'oneOf': [{'type': 'string'}, {'type': 'string', 'maxLength': 3}, {'type': 'integer'}]},
+        'discontinued': {'not': {'const': 'yes'}},
+        'weight': {'const': 1000},
+    },
+    'required': ['uuid', 'slug', 'brand', 'name', 'class'],
+    'dependentRequired': {'photos': ['url']},
+    'if': {'properties': {'class': {'const': 'FFF'}}, 'required': ['class']},
+    'then': {'required': ['type']},
+    'else': {'properties': {'type': False}},
+    'additionalProperties': {'type': ['string', 'number']},
+}
+
+DRAFT7_SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'definitions': {'positive': {'type': 'integer', 'minimum': 1}},
+    'type': 'object',
+    'properties': {
+        'slug': {'$ref': '#/definitions/positive', 'type': 'string'},
+        'list': {'type': 'array', 'items': [{'type': 'string'}], 'additionalItems': False},
+        'any': {'contains': {'type': 'null'}},
+    },
+    'dependencies': {'slug': ['list'], 'list': {'required': ['any']}},
+}
+
+VALID_MATERIAL = {
+    'uuid': '4f8a1c9e-2b5d-4e7a-9c3f-1a2b3c4d5e6f',
+    'slug': 'acme-pla-black',
+    'brand': {'slug': 'acme'},
+    'name': 'PLA Black',
+    'class': 'FFF',
+    'type': 'PLA',
+    'tags': ['silk', 1],
+    'primary_color': {'color_rgba': '#000000ff'},
+    'secondary_colors': [{'color_rgba': '#ffffffff'}],
+    'properties': {'density': 1.24, 'min_print_temperature': 200, 'max_print_temperature': None,
+                   'diameter': 1.75, 'x_note': 'ok'},
+    'photos': [{'url': 'a.png'}, {'alt': 'b'}],
+    'url': 'https://example.com',
+    'certification': 'abcd',
+    'weight': 1000,
+}
+
+
+class SchemaCompilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.schema_dir = self.base / 'openprinttag' / 'schema'
+        self.schema_dir.mkdir(parents=True)
+        (self.base / 'schema_version.conf').write_text('SCHEMA_COMMIT="abc123"\n')
+        for filename, schema in [('common.schema.json', COMMON_SCHEMA), ('material.schema.json', MATERIAL_SCHEMA),
+                                 ('draft7.schema.json', DRAFT7_SCHEMA)]:
+            (self.schema_dir / filename).write_text(json.dumps(schema))
+
+        self.validator = JsonSchemaValidator(self.base, compiled_schemas=False)
+        self.validator.setup_registry()
+        self.cache = CompiledSchemaCache(self.base, self.schema_dir, self.validator.registry)
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def assert_parity(self, schema_filename, instances):
+        compiled = self.cache.get(schema_filename)
+        reference = self.validator.get_validator(schema_filename)
+        for instance in instances:
+            mismatch = parity_mismatch(compiled, reference, instance)
+            self.assertIsNone(mismatch, f"{instance!r}: compiled {mismatch and mismatch[0]} "
+                                        f"!= jsonschema {mismatch and mismatch[1]}")
+
+
+class TestParity(SchemaCompilerTestCase):
+    def test_valid_and_handwritten_invalid(self):
+        compiled = self.cache.get('material.schema.json')
+        self.assertEqual(compiled.iter_errors(VALID_MATERIAL), [])
+
+        invalid = dict(VALID_MATERIAL, slug='Bad Slug', brand={'slug': 'acme', 'x': 1}, tags=['silk', 'silk', 2],
+                       secondary_colors=[{}, {}, {}], certification='abc', discontinued='yes', extra=[1])
+        del invalid['type']
+        errors = {(e.absolute_path, e.message) for e in compiled.iter_errors(invalid)}
+        self.assertIn((('slug',), "'Bad Slug' does not match '^[a-z0-9-]+$'"), errors)
+        self.assertIn(((), "'type' is a required property"), errors)
+        self.assertIn((('tags', 2), "2 is not one of ['silk', 'matte', 1, None]"), errors)
+        self.assert_parity('material.schema.json', [VALID_MATERIAL, invalid, [], 'x', None])
+
+    def test_mutation_fuzzing(self):
+        rng = random.Random(1)
+        self.assert_parity('material.schema.json', [mutate(VALID_MATERIAL, rng, steps=3) for _ in range(1500)])
+
+    def test_draft7_ref_siblings_and_legacy_keywords(self):
+        rng = random.Random(2)
+        valid = {'slug': 3, 'list': ['a'], 'any': [None]}
+        instances = [valid, {'slug': 'a', 'list': ['a', 'b']}, {'list': [1], 'any': [1]}]
+        self.assert_parity('draft7.schema.json', instances + [mutate(valid, rng) for _ in range(500)])
+
+
+class TestCache(SchemaCompilerTestCase):
+    def test_cached_per_schema_commit(self):
+        self.cache.get('material.schema.json')
+        module = self.base / 'build' / 'compiled-schemas' / 'abc123' / 'material_schema_json.py'
+        self.assertTrue(module.exists())
+        self.assertEqual(self.cache.compiled, 1)
+
+        # A new process reuses the generated module
+        cache = CompiledSchemaCache(self.base, self.schema_dir, self.validator.registry)
+        cache.get('material.schema.json')
+        self.assertEqual(cache.compiled, 0)
+
+        # Edited schemas invalidate it even without a new commit
+        (self.schema_dir / 'common.schema.json').write_text(json.dumps(COMMON_SCHEMA, indent=2))
+        cache = CompiledSchemaCache(self.base, self.schema_dir, self.validator.registry)
+        cache.get('material.schema.json')
+        self.assertEqual(cache.compiled, 1)
+
+    def test_unsupported_keyword_falls_back_to_jsonschema(self):
+        schema = {'$schema': 'https://json-schema.org/draft/2020-12/schema',
+                  'properties': {'slug': True}, 'unevaluatedProperties': False}
+        (self.schema_dir / 'brand.schema.json').write_text(json.dumps(schema))
+        with self.assertRaises(UnsupportedSchema):
+            self.cache.get('brand.schema.json')
+
+        validator = JsonSchemaValidator(self.base, compiled_schemas=True)
+        (self.base / 'data' / 'brands').mkdir(parents=True)
+        (self.base / 'data' / 'brands' / 'acme.yaml').write_text('slug: acme\nname: Acme\n')
+        validator.validate_entity_directory('brands', 'brand.schema.json')
+        self.assertEqual([(e.level, e.rule) for e in validator.errors],
+                         [('info', 'schema_compiler'), ('error', 'schema_validation')])
+
+    def test_unavailable_compiler_falls_back_to_jsonschema(self):
+        (self.base / 'data' / 'materials').mkdir(parents=True)
+        (self.base / 'data' / 'materials' / 'acme.yaml').write_text('slug: acme\n')
+        validator = JsonSchemaValidator(self.base, compiled_schemas=True)
+        # As if the installed jsonschema lacked the internals the compiler uses
+        with mock.patch.dict(sys.modules, {'schema_compiler': None}):
+            validator.validate_entity_directory('materials', 'material.schema.json')
+            validator.get_validator('common.schema.json')
+        self.assertFalse(validator.compiled_schemas)
+        self.assertIsNone(validator.schema_cache)
+        self.assertEqual([(e.level, e.rule) for e in validator.errors][:1], [('info', 'schema_compiler')])
+        self.assertIn('schema compiler unavailable', validator.errors[0].message)
+        self.assertEqual([e.rule for e in validator.errors].count('schema_compiler'), 1)
+
+
+@unittest.skipUnless((REPO_ROOT / 'openprinttag' / 'schema').is_dir(), "schemas not fetched (make fetch-schemas)")
+class TestParityOnDataset(unittest.TestCase):
+    def test_dataset_and_mutations(self):
+        validator = JsonSchemaValidator(REPO_ROOT, compiled_schemas=False)
+        validator.setup_registry()
+        cache = CompiledSchemaCache(REPO_ROOT, validator.schema_dir, validator.registry)
+        rng = random.Random(0)
+        for entity_dir, schema_filename in validator.ENTITY_SCHEMA_MAPPING.items():
+            try:
+                compiled = cache.get(schema_filename)
+            except UnsupportedSchema:
+                continue
+            reference = validator.get_validator(schema_filename)
+            for path in sorted((REPO_ROOT / 'data' / entity_dir).rglob('*.yaml'))[::25]:
+                data = yaml.safe_load(path.read_text(encoding='utf-8'))
+                for instance in [data, mutate(data, rng), mutate(data, rng)]:
+                    self.assertIsNone(parity_mismatch(compiled, reference, instance), f"{path}: {instance!r}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the inverted full-text search index (search_index.py)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from search_index import SearchIndex, tokenize
+
+
+DATA = {
+    'brands': {
+        'prusament': {'slug': 'prusament', 'name': 'Prusament'},
+        'fillamentum': {'slug': 'fillamentum', 'name': 'Fillamentum'},
+    },
+    'materials': {
+        'prusament-pla-galaxy-black': {
+            'slug': 'prusament-pla-galaxy-black', 'brand': {'slug': 'prusament'},
+            'name': 'PLA Galaxy Black', 'type': 'PLA', 'abbreviation': 'PLA',
+            'tags': ['glitter', 'industrially_compostable'],
+        },
+        'prusament-petg-jet-black': {
+            'slug': 'prusament-petg-jet-black', 'brand': {'slug': 'prusament'},
+            'name': 'PETG Jet Black', 'type': 'PETG', 'abbreviation': 'PETG',
+        },
+        'fillamentum-pla-crystal-clear': {
+            'slug': 'fillamentum-pla-crystal-clear', 'brand': {'slug': 'fillamentum'},
+            'name': 'PLA Crystal Clear', 'type': 'PLA', 'tags': ['transparent'],
+        },
+    },
+}
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Café PLA+ Jet_Black'), ['cafe', 'pla', 'jet', 'black'])
+        self.assertEqual(tokenize(None), [])
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex.from_entities(DATA)
+
+    def slugs(self, query, **kwargs):
+        return [r.slug for r in self.index.search(query, **kwargs)]
+
+    def test_exact_terms_are_and_combined(self):
+        self.assertEqual(self.slugs('black pla'), ['prusament-pla-galaxy-black'])
+
+    def test_brand_name_and_tags(self):
+        self.assertEqual(
+            set(self.slugs('prusament', entity='materials')),
+            {'prusament-pla-galaxy-black', 'prusament-petg-jet-black'},
+        )
+        self.assertEqual(self.slugs('compostable'), ['prusament-pla-galaxy-black'])
+
+    def test_ranking_prefers_name_matches(self):
+        # "prusament" is the brand doc name and only the brand field of the materials
+        self.assertEqual(self.slugs('prusament')[0], 'prusament')
+
+    def test_prefix(self):
+        self.assertEqual(self.slugs('gal'), ['prusament-pla-galaxy-black'])
+        self.assertEqual(self.slugs('gal', prefix=False, fuzzy=False), [])
+
+    def test_fuzzy(self):
+        self.assertEqual(self.slugs('cristal'), ['fillamentum-pla-crystal-clear'])
+        self.assertEqual(self.slugs('cristal', fuzzy=False), [])
+
+    def test_no_match(self):
+        self.assertEqual(self.slugs('zzzz'), [])
+        self.assertEqual(self.slugs(''), [])
+
+    def test_save_and_load_roundtrip(self):
+        path = Path(tempfile.mkdtemp()) / 'index.bin'
+        self.index.save(path)
+        loaded = SearchIndex.load(path)
+        for query in ('black pla', 'gal', 'cristal', 'prusament'):
+            self.assertEqual(
+                [(r.slug, round(r.score, 6)) for r in loaded.search(query)],
+                [(r.slug, round(r.score, 6)) for r in self.index.search(query)],
+            )
+
+    def test_load_rejects_other_files(self):
+        path = Path(tempfile.mkdtemp()) / 'other.bin'
+        path.write_bytes(b'not an index')
+        with self.assertRaises(ValueError):
+            SearchIndex.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests for the semantic diff between git refs (semantic_diff.py)
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from semantic_diff import FieldChange, SemanticDiff, diff_values, format_report
+
+
+class TestDiffValues(unittest.TestCase):
+    def test_nested_changes(self):
+        old = {'name': 'PLA', 'properties': {'density': 1.24, 'hardness': 80}, 'tags': ['a']}
+        new = {'name': 'PLA', 'properties': {'density': 1.25}, 'tags': ['a', 'b'], 'url': 'x'}
+        self.assertEqual(list(diff_values(old, new)), [
+            FieldChange('properties.density', 1.24, 1.25),
+            FieldChange('properties.hardness', 80, None),
+            FieldChange('tags', ['a'], ['a', 'b']),
+            FieldChange('url', None, 'x'),
+        ])
+
+
+class TestSemanticDiff(unittest.TestCase):
+    def setUp(self):
+        self.repo = Path(tempfile.mkdtemp())
+        self._git('init', '-q')
+        self._write("data/brands/acme.yaml", {'uuid': 'b-1', 'slug': 'acme', 'name': 'Acme'})
+        self._write("data/brands/other.yaml", {'uuid': 'b-2', 'slug': 'other', 'name': 'Other'})
+        self._write("data/materials/acme/acme-pla.yaml",
+                    {'uuid': 'm-1', 'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA',
+                     'properties': {'density': 1.24}})
+        self._write("data/materials/acme/acme-abs.yaml",
+                    {'uuid': 'm-2', 'slug': 'acme-abs', 'brand': {'slug': 'acme'}, 'name': 'ABS'})
+        self._write("data/materials/other/other-petg.yaml",
+                    {'uuid': 'm-3', 'slug': 'other-petg', 'brand': {'slug': 'other'}, 'name': 'PETG'})
+        self._write("data/material-packages/acme/acme-pla-1kg.yaml",
+                    {'slug': 'acme-pla-1kg', 'material': {'slug': 'acme-pla'}})
+        self.old = self._commit()
+
+    def tearDown(self):
+        shutil.rmtree(self.repo)
+
+    def _git(self, *args):
+        return subprocess.run(
+            ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+            cwd=self.repo, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    def _write(self, rel_path, data):
+        write_yaml(self.repo / rel_path, data)
+
+    def _commit(self):
+        self._git('add', '-A')
+        self._git('commit', '-q', '--allow-empty', '-m', 'snapshot')
+        return self._git('rev-parse', 'HEAD')
+
+    def _changes(self, result):
+        return {(c.kind, c.entity, c.slug): c for c in result.changes}
+
+    def test_entity_changes(self):
+        self._write("data/materials/acme/acme-pla.yaml",
+                    {'uuid': 'm-1', 'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA',
+                     'properties': {'density': 1.3}})
+        # Renamed: same UUID, new slug and file
+        (self.repo / "data/materials/acme/acme-abs.yaml").unlink()
+        self._write("data/materials/acme/acme-abs-plus.yaml",
+                    {'uuid': 'm-2', 'slug': 'acme-abs-plus', 'brand': {'slug': 'acme'}, 'name': 'ABS+'})
+        # Moved without UUID: matched by slug
+        (self.repo / "data/material-packages/acme/acme-pla-1kg.yaml").unlink()
+        self._write("data/material-packages/misc/acme-pla-1kg.yaml",
+                    {'slug': 'acme-pla-1kg', 'material': {'slug': 'acme-pla'}})
+        self._write("data/materials/acme/acme-asa.yaml",
+                    {'uuid': 'm-4', 'slug': 'acme-asa', 'brand': {'slug': 'acme'}, 'name': 'ASA'})
+        (self.repo / "data/brands/other.yaml").unlink()
+        self._write("data/manifest.yaml", {'data_hash': 'x'})
+        new = self._commit()
+
+        result = SemanticDiff(self.repo).diff(self.old, new)
+        changes = self._changes(result)
+        self.assertEqual(sorted(changes), [
+            ('added', 'materials', 'acme-asa'),
+            ('modified', 'materials', 'acme-pla'),
+            ('removed', 'brands', 'other'),
+            ('renamed', 'material_packages', 'acme-pla-1kg'),
+            ('renamed', 'materials', 'acme-abs-plus'),
+        ])
+        self.assertEqual(changes[('modified', 'materials', 'acme-pla')].fields,
+                         [FieldChange('properties.density', 1.24, 1.3)])
+        renamed = changes[('renamed', 'materials', 'acme-abs-plus')]
+        self.assertEqual((renamed.old_slug, renamed.old_path),
+                         ('acme-abs', 'data/materials/acme/acme-abs.yaml'))
+        self.assertEqual([f.path for f in renamed.fields], ['slug', 'name'])
+        self.assertEqual(changes[('renamed', 'material_packages', 'acme-pla-1kg')].fields, [])
+        self.assertEqual(result.other_files, ['data/manifest.yaml'])
+
+        report = format_report(result)
+        self.assertIn("> materials acme-abs -> acme-abs-plus", report)
+        self.assertIn('    properties.density: 1.24 -> 1.3', report)
+
+    def test_unchanged_subtrees_are_skipped(self):
+        self._write("data/materials/acme/acme-pla.yaml",
+                    {'uuid': 'm-1', 'slug': 'acme-pla', 'brand': {'slug': 'acme'}, 'name': 'PLA 2'})
+        new = self._commit()
+
+        result = SemanticDiff(self.repo).diff(self.old, new)
+        self.assertEqual([(c.kind, c.slug) for c in result.changes], [('modified', 'acme-pla')])
+        # Only the two versions of the changed file are read
+        self.assertEqual(result.stats['blobs_read'], 2)
+        # brands/, material-packages/ and materials/other/ are never opened
+        self.assertEqual(result.stats['trees_skipped'], 3)
+        self.assertEqual(result.stats['trees_read'], 6)
+
+    def test_identical_refs(self):
+        new = self._commit()
+        result = SemanticDiff(self.repo).diff(self.old, new)
+        self.assertEqual(result.changes, [])
+        self.assertEqual(result.stats['blobs_read'], 0)
+
+    def test_unknown_revision(self):
+        with self.assertRaises(ValueError):
+            SemanticDiff(self.repo).diff(self.old, 'no-such-ref')
+
+
+if __name__ == '__main__':
+    unittest.main()
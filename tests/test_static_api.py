@@ -0,0 +1,126 @@
+"""
+Tests for the static JSON API generator (static_api.py)
+"""
+
+import gzip
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from static_api import StaticApiGenerator
+
+
+class TestStaticApi(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self.output = self.base / "build" / "api"
+        for brand in ('acme', 'other'):
+            self._write(f"data/brands/{brand}.yaml", {'slug': brand, 'name': brand.title()})
+        self._write("data/material-containers/spool.yaml", {'slug': 'spool', 'name': 'Spool'})
+        for color in ('red', 'green', 'blue'):
+            self._write(f"data/materials/acme/acme-pla-{color}.yaml",
+                        {'slug': f'acme-pla-{color}', 'brand': {'slug': 'acme'}, 'name': f'PLA {color}'})
+        self._write("data/materials/other/other-petg.yaml",
+                    {'slug': 'other-petg', 'brand': {'slug': 'other'}, 'name': 'PETG'})
+        # Packages are sharded by their material's brand, not their directory
+        self._write("data/material-packages/misplaced/acme-pla-red-1kg.yaml",
+                    {'slug': 'acme-pla-red-1kg', 'material': {'slug': 'acme-pla-red'}})
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def _write(self, rel_path, data):
+        return write_yaml(self.base / rel_path, data)
+
+    def _generate(self, **kwargs):
+        generator = StaticApiGenerator(self.base, self.output, page_size=2)
+        generator.generate(**kwargs)
+        return generator
+
+    def _read(self, name):
+        content = (self.output / name).read_bytes()
+        self.assertEqual(gzip.decompress((self.output / (name + '.gz')).read_bytes()), content)
+        return json.loads(content)
+
+    def _shard(self, brand):
+        return self._read(self._read("index.json")['shards'][brand])
+
+    def test_generates_sharded_paginated_output(self):
+        generator = self._generate()
+        self.assertEqual(generator.stats['shards_built'], 3)
+
+        index = self._read("index.json")
+        self.assertEqual(sorted(index['shards']), ['acme', 'other'])
+        brands = self._read(index['files']['brands/page-1'])
+        self.assertEqual(brands['total'], 2)
+        self.assertEqual([(b['slug'], b['material_count'], b['package_count']) for b in brands['items']],
+                         [('acme', 3, 1), ('other', 1, 0)])
+        self.assertEqual(self._read(index['files']['containers/spool'])['name'], 'Spool')
+
+        shard = self._shard('acme')
+        pages = [self._read(shard[f'brands/acme/materials/page-{n}']) for n in (1, 2)]
+        self.assertEqual([p['page_count'] for p in pages], [2, 2])
+        self.assertEqual([m['slug'] for p in pages for m in p['items']],
+                         ['acme-pla-blue', 'acme-pla-green', 'acme-pla-red'])
+        package = self._read(shard['brands/acme/packages/acme-pla-red-1kg'])
+        self.assertEqual(package['material'], {'slug': 'acme-pla-red'})
+        self.assertRegex(shard['brands/acme'], r'^brands/acme\.[0-9a-f]{16}\.json$')
+
+    def test_rebuild_only_changed_shards(self):
+        self._generate()
+        old_material = self._shard('acme')['brands/acme/materials/acme-pla-red']
+        other_shard = self._read("index.json")['shards']['other']
+
+        generator = self._generate()
+        self.assertEqual(generator.stats, {'shards_built': 0, 'shards_skipped': 3,
+                                           'files_written': 0, 'files_removed': 0})
+
+        self._write("data/materials/acme/acme-pla-red.yaml",
+                    {'slug': 'acme-pla-red', 'brand': {'slug': 'acme'}, 'name': 'PLA Crimson'})
+        generator = self._generate()
+        self.assertEqual((generator.stats['shards_built'], generator.stats['shards_skipped']), (1, 2))
+        # The material, its listing page and the shard index
+        self.assertEqual(generator.stats['files_written'], 3)
+        self.assertEqual(generator.stats['files_removed'], 3)
+        self.assertFalse((self.output / old_material).exists())
+        self.assertEqual(self._read("index.json")['shards']['other'], other_shard)
+        material = self._read(self._shard('acme')['brands/acme/materials/acme-pla-red'])
+        self.assertEqual(material['name'], 'PLA Crimson')
+
+    def test_new_entity_updates_counts(self):
+        self._generate()
+        self._write("data/materials/other/other-abs.yaml",
+                    {'slug': 'other-abs', 'brand': {'slug': 'other'}, 'name': 'ABS'})
+        generator = self._generate()
+        # The brand shard and the global listings
+        self.assertEqual(generator.stats['shards_built'], 2)
+        brands = self._read(self._read("index.json")['files']['brands/page-1'])
+        self.assertEqual([b['material_count'] for b in brands['items']], [3, 2])
+
+    def test_removed_brand_shard_is_cleaned_up(self):
+        self._generate()
+        names = self._read(self._read("index.json")['shards']['other'])
+        (self.base / "data/brands/other.yaml").unlink()
+        (self.base / "data/materials/other/other-petg.yaml").unlink()
+        self._generate()
+        self.assertNotIn('other', self._read("index.json")['shards'])
+        for name in names.values():
+            self.assertFalse((self.output / name).exists())
+
+    def test_full_rebuild_is_deterministic(self):
+        self._generate()
+        index = (self.output / "index.json").read_bytes()
+        generator = self._generate(full=True)
+        self.assertEqual(generator.stats['shards_built'], 3)
+        self.assertEqual((self.output / "index.json").read_bytes(), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the temperature-compatibility interval index (temperature_index.py)
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from temperature_index import _IntervalNode, build_temperature_index
+
+
+def material(slug: str, **properties) -> dict:
+    return {'slug': slug, 'class': 'FFF', 'properties': properties}
+
+
+MATERIALS = {
+    m['slug']: m for m in [
+        material('pla', min_print_temperature=190, max_print_temperature=220,
+                 min_bed_temperature=50, max_bed_temperature=60),
+        material('petg', min_print_temperature=230, max_print_temperature=250,
+                 min_bed_temperature=70, max_bed_temperature=90),
+        material('asa', min_print_temperature=250, max_print_temperature=270,
+                 min_bed_temperature=100, max_bed_temperature=120,
+                 min_chamber_temperature=55, max_chamber_temperature=90),
+        material('open-max', min_print_temperature=200),
+        material('no-data'),
+    ]
+}
+
+
+class TestTemperatureIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = build_temperature_index(MATERIALS)
+
+    def test_single_dimension(self):
+        self.assertEqual(self.index.compatible(print=215), ['open-max', 'pla'])
+        self.assertEqual(self.index.compatible(print=250), ['asa', 'open-max', 'petg'])
+        self.assertEqual(self.index.compatible(print=180), [])
+
+    def test_multiple_dimensions(self):
+        self.assertEqual(self.index.compatible(print=250, bed=80), ['petg'])
+        self.assertEqual(self.index.compatible(print=260, bed=110, chamber=60), ['asa'])
+
+    def test_unknown_data(self):
+        self.assertEqual(self.index.compatible(chamber=60), ['asa'])
+        self.assertEqual(
+            self.index.compatible(include_unknown=True, print=215, chamber=60),
+            ['no-data', 'open-max', 'pla'],
+        )
+
+    def test_range_overlap(self):
+        self.assertEqual(self.index.compatible(bed=(55, 75)), ['petg', 'pla'])
+
+    def test_no_constraints_returns_all(self):
+        self.assertEqual(len(self.index.compatible(print=None)), len(MATERIALS))
+
+    def test_unknown_dimension(self):
+        with self.assertRaises(ValueError):
+            self.index.compatible(nozzle=200)
+
+    def test_inverted_bounds(self):
+        # The real database has materials with min and max swapped
+        index = build_temperature_index([material('pa6-gf', min_print_temperature=360, max_print_temperature=290)])
+        self.assertEqual(index.compatible(print=300), ['pa6-gf'])
+        self.assertEqual(index.compatible(print=370), [])
+
+        rows = []
+        _IntervalNode([(250.0, 200.0, 0)]).query(0, 300, rows)
+        self.assertEqual(rows, [0])
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(42)
+        materials = []
+        for i in range(500):
+            props = {}
+            for key in ('print', 'bed'):
+                if rng.random() < 0.8:
+                    lo = rng.randrange(0, 300)
+                    props[f'min_{key}_temperature'] = lo
+                    if rng.random() < 0.9:
+                        props[f'max_{key}_temperature'] = lo + rng.randrange(0, 60)
+            materials.append(material(f'm{i}', **props))
+        index = build_temperature_index(materials)
+
+        def linear(t_print, t_bed):
+            result = []
+            for m in materials:
+                p = m['properties']
+                ok = True
+                for key, t in (('print', t_print), ('bed', t_bed)):
+                    lo, hi = p.get(f'min_{key}_temperature'), p.get(f'max_{key}_temperature')
+                    if lo is None and hi is None:
+                        ok = False
+                    elif (lo is not None and lo > t) or (hi is not None and hi < t):
+                        ok = False
+                if ok:
+                    result.append(m['slug'])
+            return sorted(result)
+
+        for _ in range(50):
+            t_print, t_bed = rng.randrange(0, 330), rng.randrange(0, 330)
+            self.assertEqual(index.compatible(print=t_print, bed=t_bed), linear(t_print, t_bed))
+
+
+if __name__ == '__main__':
+    unittest.main()
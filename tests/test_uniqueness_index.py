@@ -0,0 +1,107 @@
+"""
+Tests for the slug/UUID/GTIN uniqueness index (uniqueness_index.py)
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import write_yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from lib import DatabaseLoader
+from uniqueness_index import UniquenessIndex
+from validate_json_schema import JsonSchemaValidator
+from validation_output import message_template
+
+
+UUID = "8d952f83-f035-5fcf-bf61-34baa72f6aa6"
+
+
+class TestUniquenessIndex(unittest.TestCase):
+    def test_conflicts(self):
+        index = UniquenessIndex()
+        index.add('materials', 'a/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID})
+        index.add('materials', 'b/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID.upper()})
+        index.add('material_packages', 'a/acme-pla.yaml', {'slug': 'acme-pla', 'gtin': 8594173675216})
+        index.add('material_packages', 'a/acme-pla-2kg.yaml', {'slug': 'acme-pla-2kg', 'gtin': '8594173675216'})
+        # Re-adding a file does not conflict with itself
+        index.add('material_packages', 'a/acme-pla-2kg.yaml', {'slug': 'acme-pla-2kg', 'gtin': '8594173675216'})
+
+        conflicts = {(c.field, c.entity, c.value): c.files for c in index.conflicts()}
+        self.assertEqual(conflicts, {
+            ('gtin', None, '8594173675216'): ['a/acme-pla-2kg.yaml', 'a/acme-pla.yaml'],
+            ('slug', 'materials', 'acme-pla'): ['a/acme-pla.yaml', 'b/acme-pla.yaml'],
+            ('uuid', None, UUID): ['a/acme-pla.yaml', 'b/acme-pla.yaml'],
+        })
+
+    def test_lookups(self):
+        index = UniquenessIndex()
+        index.add('material_packages', 'p.yaml', {'slug': 'p', 'uuid': UUID, 'gtin': 123})
+        self.assertEqual(index.files('uuid', UUID.upper()), ['p.yaml'])
+        self.assertEqual(index.files('gtin', '123'), ['p.yaml'])
+        self.assertEqual(index.files('slug', 'p', 'material_packages'), ['p.yaml'])
+        self.assertEqual(index.files('slug', 'p', 'materials'), [])
+        self.assertEqual(index.entity_of('uuid', UUID), 'material_packages')
+        self.assertIsNone(index.entity_of('gtin', 456))
+        self.assertEqual(index.conflicts(), [])
+
+    def test_remove(self):
+        index = UniquenessIndex()
+        index.add('materials', 'a/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID})
+        index.add('materials', 'b/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID})
+        index.remove('materials', 'b/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID})
+        self.assertEqual(index.conflicts(), [])
+        self.assertEqual(index.files('uuid', UUID), ['a/acme-pla.yaml'])
+        index.remove('materials', 'a/acme-pla.yaml', {'slug': 'acme-pla', 'uuid': UUID})
+        self.assertEqual(index.occurrences, {'slug': {}, 'uuid': {}, 'gtin': {}})
+
+
+class TestLoaderAndValidator(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        self._write("data/brands/acme.yaml", {'slug': 'acme', 'name': 'Acme'})
+        self._write("data/materials/acme/acme-pla.yaml", {'slug': 'acme-pla', 'uuid': UUID, 'name': 'PLA'})
+        self._write("data/materials/other/acme-pla.yaml", {'slug': 'acme-pla', 'uuid': UUID, 'name': 'PLA 2'})
+        schema_dir = self.base / "openprinttag" / "schema"
+        schema_dir.mkdir(parents=True)
+        for schema_filename in JsonSchemaValidator.ENTITY_SCHEMA_MAPPING.values():
+            (schema_dir / schema_filename).write_text(json.dumps({
+                "$schema": "https://json-schema.org/draft/2020-12/schema", "type": "object",
+            }))
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def _write(self, rel_path, data):
+        write_yaml(self.base / rel_path, data)
+
+    def test_loader_records_overwritten_files(self):
+        loader = DatabaseLoader(self.base)
+        data = loader.load_all_entities()
+        self.assertEqual(len(data['materials']), 1)
+        self.assertEqual(sorted(loader.uniqueness.files('slug', 'acme-pla', 'materials')), [
+            str(self.base / "data/materials/acme/acme-pla.yaml"),
+            str(self.base / "data/materials/other/acme-pla.yaml"),
+        ])
+
+    def test_validator_reports_conflicts(self):
+        validator = JsonSchemaValidator(self.base)
+        validator.validate_entity_directory('materials', 'material.schema.json')
+        validator.validate_uniqueness()
+        found = {(e.level, e.rule, e.file) for e in validator.errors}
+        self.assertEqual(found, {
+            ('error', 'unique_slug', str(self.base / "data/materials/acme/acme-pla.yaml")),
+            ('warning', 'unique_uuid', str(self.base / "data/materials/acme/acme-pla.yaml")),
+        })
+        slug_error = next(e for e in validator.errors if e.rule == 'unique_slug')
+        self.assertEqual(slug_error.message, "Duplicate slug 'acme-pla', also used by: 'data/materials/other/acme-pla.yaml'")
+        self.assertEqual(message_template(slug_error.message), "Duplicate slug '*', also used by: '*'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,21 @@
 Unit tests for UUID Generation and Validation Utilities
 """
 
+import random
 import unittest
 import uuid
+from unittest import mock
 
+from scripts import uuid_utils
 from scripts.uuid_utils import (
     generate_uuid,
     generate_brand_uuid,
+    generate_brand_uuids,
     generate_material_uuid,
+    generate_material_uuids,
     generate_material_package_uuid,
+    generate_material_package_uuids,
+    parse_uuid,
     NAMESPACE_BRAND,
     NAMESPACE_MATERIAL,
     NAMESPACE_MATERIAL_PACKAGE,
@@ -266,5 +273,47 @@ class TestSpecificUUIDGeneration(unittest.TestCase):
         self.assertEqual(package_uuid, expected_package_uuid)
 
 
+
+class TestBatchedUUIDGeneration(unittest.TestCase):
+    """Tests for the batched generate_*_uuids functions"""
+
+    def setUp(self):
+        rng = random.Random(0)
+        alphabet = "abcXYZ 0123-&é品"
+        self.names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 70))) for _ in range(300)]
+        self.brand_uuids = [generate_brand_uuid(name) for name in self.names[:5]]
+
+    def test_bit_identical_to_uuid5(self):
+        """Test that batched UUIDs equal uuid.uuid5 with the parsed namespace"""
+        self.assertEqual(generate_brand_uuids(self.names),
+                         [uuid.uuid5(uuid.UUID(NAMESPACE_BRAND), name) for name in self.names])
+
+        materials = [(self.brand_uuids[i % 5], name) for i, name in enumerate(self.names)]
+        self.assertEqual(generate_material_uuids(materials),
+                         [uuid.uuid5(uuid.UUID(NAMESPACE_MATERIAL), brand.bytes + name.encode("utf-8"))
+                          for brand, name in materials])
+        self.assertEqual(generate_material_uuids(materials),
+                         [generate_material_uuid(brand, name) for brand, name in materials])
+
+        packages = [(self.brand_uuids[i % 5], 8594173675100 + i) for i in range(300)]
+        self.assertEqual(generate_material_package_uuids(packages),
+                         [generate_material_package_uuid(brand, gtin) for brand, gtin in packages])
+
+    def test_worker_processes(self):
+        """Test that splitting a batch across processes keeps the order"""
+        materials = [(self.brand_uuids[i % 5], name) for i, name in enumerate(self.names)]
+        with mock.patch.object(uuid_utils, 'MIN_PARALLEL_BATCH', 10):
+            self.assertEqual(generate_material_uuids(materials, processes=3), generate_material_uuids(materials))
+            self.assertEqual(generate_material_uuids(materials, processes=3, as_ints=True),
+                             [value.int for value in generate_material_uuids(materials)])
+
+    def test_parse_uuid(self):
+        """Test that malformed UUIDs parse to None"""
+        self.assertEqual(parse_uuid("ae5ff34e-298e-50c9-8f77-92a97fb30b09"),
+                         uuid.UUID("ae5ff34e-298e-50c9-8f77-92a97fb30b09"))
+        for value in (None, 42, "not-a-uuid"):
+            self.assertIsNone(parse_uuid(value))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for the warm validation daemon (validation_daemon.py)
+"""
+
+import asyncio
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import yaml
+
+from tests.helpers import write_yaml
+
+# Add benchmarks and scripts directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from synthetic_data import generate_database, prepare_reference_data
+from validate_json_schema import JsonSchemaValidator
+from validation_daemon import ValidationDaemon, WarmValidator, request
+
+
+def error_tuples(errors):
+    return sorted((e.level, e.rule, e.entity, e.file, e.message) for e in errors if e.rule != 'near_duplicate')
+
+
+class DatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp()).resolve()
+        generate_database(self.base, scale=0.01, seed=5)
+        prepare_reference_data(self.base, self.base / 'no-such-repo')
+        self.data_dir = self.base / 'data'
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def full_validation(self):
+        validator = JsonSchemaValidator(self.base)
+        with redirect_stdout(StringIO()):
+            validator.validate()
+        return error_tuples(validator.errors)
+
+    def edit(self, path, **changes):
+        data = yaml.safe_load(path.read_text())
+        data.update(changes)
+        write_yaml(path, data)
+
+    def first_file(self, entity_dir):
+        return sorted((self.data_dir / entity_dir).rglob('*.yaml'))[0]
+
+
+class TestWarmValidator(DatabaseTestCase):
+    def test_incremental_updates_match_full_validation(self):
+        state = WarmValidator(self.base)
+        with redirect_stdout(StringIO()):
+            state.load()
+        self.assertEqual(error_tuples(state.errors()), self.full_validation())
+
+        material_file = self.first_file('materials')
+        package_file, copied_file = sorted((self.data_dir / 'material-packages').rglob('*.yaml'))[:2]
+        copy_file = self.data_dir / 'material-packages' / 'elsewhere' / copied_file.name
+        copy_file.parent.mkdir()
+        shutil.copy(copied_file, copy_file)
+        self.edit(material_file, name='Renamed')
+        self.edit(package_file, container={'slug': 'no-such-container'})
+        checked, _ = state.update([material_file, package_file, copy_file])
+        self.assertEqual(checked, {material_file, package_file, copy_file})
+        full = self.full_validation()
+        self.assertLessEqual({'foreign_key_exists', 'uuid_derivation', 'unique_slug'}, {rule for _, rule, *_ in full})
+        self.assertEqual(error_tuples(state.errors()), full)
+
+        # Everything refers to the brand
+        brand_file = self.first_file('brands')
+        brand = yaml.safe_load(brand_file.read_text())['slug']
+        brand_content = brand_file.read_text()
+        brand_file.unlink()
+        _, affected = state.update([brand_file])
+        self.assertIn(('brands', brand), affected)
+        self.assertGreater(len(affected), 10)
+        self.assertEqual(error_tuples(state.errors()), self.full_validation())
+
+        # Undo everything again
+        brand_file.write_text(brand_content)
+        copy_file.unlink()
+        state.update([brand_file, copy_file])
+        self.assertEqual(error_tuples(state.errors()), self.full_validation())
+
+    def test_errors_of_files_and_dependents(self):
+        state = WarmValidator(self.base)
+        with redirect_stdout(StringIO()):
+            state.load()
+        package = yaml.safe_load(self.first_file('material-packages').read_text())
+        material_file = next(self.data_dir.glob(f"materials/*/{package['material']['slug']}.yaml"))
+        material_file.write_text('slug: [broken\n')
+        _, affected = state.update([material_file])
+        errors = state.errors([material_file], affected)
+        self.assertEqual(errors[0].rule, 'file_parse')
+        self.assertTrue(errors[1:])
+        self.assertTrue(all(e.rule == 'foreign_key_exists' and package['material']['slug'] in e.message for e in errors[1:]))
+
+    def test_file_query_after_the_watcher_applied_a_rename(self):
+        state = WarmValidator(self.base)
+        with redirect_stdout(StringIO()):
+            state.load()
+        brand_file = self.first_file('brands')
+        brand = yaml.safe_load(brand_file.read_text())['slug']
+        self.edit(brand_file, slug='renamed-brand')
+        state.update([brand_file])
+
+        # Asked later, without the affected entities of that update
+        errors = state.errors([brand_file])
+        self.assertTrue(errors)
+        self.assertTrue(any(e.rule == 'foreign_key_exists' and brand in e.message for e in errors))
+        full = {e for e in self.full_validation() if e[1] == 'foreign_key_exists'}
+        self.assertEqual({e for e in error_tuples(errors) if e[1] == 'foreign_key_exists'}, full)
+
+
+class TestValidationDaemon(DatabaseTestCase):
+    def run_daemon(self, poll):
+        state = WarmValidator(self.base)
+        with redirect_stdout(StringIO()):
+            state.load()
+        socket_path = self.base / 'validation.sock'
+        daemon = ValidationDaemon(state, socket_path, poll=poll, poll_interval=0.05)
+
+        def serve():
+            with redirect_stdout(StringIO()):
+                asyncio.run(daemon.serve())
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        for _ in range(200):
+            if socket_path.exists():
+                break
+            time.sleep(0.01)
+        return socket_path, thread
+
+    def wait_for_rules(self, socket_path, rules):
+        for _ in range(200):
+            errors = request(socket_path, {'command': 'validate'})['errors']
+            if sorted(e['rule'] for e in errors) == rules:
+                return
+            time.sleep(0.02)
+        self.fail(f"the daemon did not report {rules}, but {errors}")
+
+    def check_daemon(self, poll):
+        socket_path, thread = self.run_daemon(poll)
+        try:
+            status = request(socket_path, {'command': 'status'})
+            self.assertEqual(status['watcher'], 'polling' if poll else 'inotify')
+            self.assertEqual(request(socket_path, {'command': 'validate'})['errors'], [])
+
+            # Validated on request
+            package_file = self.first_file('material-packages')
+            self.edit(package_file, material={'slug': 'no-such-material'})
+            relative = package_file.relative_to(self.base).as_posix()
+            response = request(socket_path, {'command': 'validate', 'files': [relative]})
+            self.assertFalse(response['ok'])
+            self.assertEqual([(e['rule'], e['file']) for e in response['errors']],
+                             [('foreign_key_exists', package_file.stem)])
+
+            # Picked up by the watcher
+            material_file = self.first_file('materials')
+            self.edit(material_file, name='Renamed')
+            self.wait_for_rules(socket_path, ['foreign_key_exists', 'uuid_derivation'])
+            self.assertGreater(request(socket_path, {'command': 'status'})['updates'], status['updates'])
+            self.assertEqual(request(socket_path, {'command': 'nothing'}), {'error': "Unknown command 'nothing'"})
+        finally:
+            request(socket_path, {'command': 'shutdown'})
+            thread.join(5)
+        self.assertFalse(socket_path.exists())
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+    def test_inotify(self):
+        self.check_daemon(poll=False)
+
+    def test_polling(self):
+        self.check_daemon(poll=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
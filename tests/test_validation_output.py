@@ -0,0 +1,115 @@
+"""
+Tests for streaming validation output and error aggregation (validation_output.py)
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from validate_json_schema import JsonSchemaValidator, ValidationError
+from uuid_utils import generate_brand_uuid
+from validation_output import ErrorCollector, NdjsonWriter, SarifWriter, TooManyErrors, message_template
+
+
+def schema_error(file, message, level='error', rule='schema_validation'):
+    return ValidationError(level, rule, 'materials', file, message)
+
+
+class TestMessageTemplate(unittest.TestCase):
+    def test_values_are_blanked(self):
+        self.assertEqual(message_template("At 'properties.density': -1.5 is less than the minimum of 0"),
+                         "At '*': N is less than the minimum of N")
+        self.assertEqual(message_template('At \'name\': "it\'s" is too long'), "At '*': '*' is too long")
+        self.assertEqual(message_template("At 'root': 'v2' does not match 'x1'"),
+                         "At '*': '*' does not match '*'")
+
+
+class TestErrorCollector(unittest.TestCase):
+    def test_aggregates_and_keep(self):
+        collector = ErrorCollector(keep=2)
+        for i in range(5):
+            collector.append(schema_error(f"f{i % 4}.yaml", f"At 'slug': 'x{i}' does not match '^a$'"))
+        collector.append(schema_error('g.yaml', "Duplicate UUID", level='warning', rule='unique_uuid'))
+
+        self.assertEqual(len(collector), 3)
+        self.assertEqual(collector.total(), 6)
+        self.assertFalse(collector.complete('error'))
+        self.assertTrue(collector.complete('warning'))
+        [aggregate] = collector.aggregates('error')
+        self.assertEqual((aggregate.count, aggregate.template), (5, "At '*': '*' does not match '*'"))
+        self.assertEqual(aggregate.samples, ['f0.yaml', 'f1.yaml', 'f2.yaml'])
+
+    def test_max_errors(self):
+        collector = ErrorCollector(max_errors=2)
+        collector.append(schema_error('a.yaml', 'warning', level='warning'))
+        collector.append(schema_error('a.yaml', 'one'))
+        with self.assertRaises(TooManyErrors):
+            collector.append(schema_error('b.yaml', 'two'))
+        self.assertTrue(collector.truncated)
+
+    def test_streaming_writers(self):
+        base = Path('/repo')
+        ndjson, sarif = StringIO(), StringIO()
+        for stream, writer in [(ndjson, NdjsonWriter), (sarif, SarifWriter)]:
+            collector = ErrorCollector(writer(stream, base), keep=0)
+            collector.append(schema_error('/repo/data/materials/a.yaml', "At 'root': 'x' is a required property"))
+            collector.append(schema_error('/repo/data/materials/b.yaml', 'Duplicate', 'warning', 'unique_gtin'))
+            collector.close()
+            self.assertEqual(len(collector), 0)
+
+        lines = [json.loads(line) for line in ndjson.getvalue().splitlines()]
+        self.assertEqual([(l['level'], l['file']) for l in lines],
+                         [('error', 'data/materials/a.yaml'), ('warning', 'data/materials/b.yaml')])
+
+        log = json.loads(sarif.getvalue())
+        run = log['runs'][0]
+        self.assertEqual(log['version'], '2.1.0')
+        self.assertEqual([r['id'] for r in run['tool']['driver']['rules']], ['schema_validation', 'unique_gtin'])
+        self.assertEqual([(r['ruleIndex'], r['level']) for r in run['results']], [(0, 'error'), (1, 'warning')])
+        self.assertEqual(run['results'][1]['locations'][0]['physicalLocation']['artifactLocation']['uri'],
+                         'data/materials/b.yaml')
+        self.assertEqual(run['properties']['counts'], {'error': 1, 'warning': 1})
+
+
+class TestValidatorOutput(unittest.TestCase):
+    def setUp(self):
+        self.base = Path(tempfile.mkdtemp())
+        schema_dir = self.base / 'openprinttag' / 'schema'
+        schema_dir.mkdir(parents=True)
+        for schema_filename in JsonSchemaValidator.ENTITY_SCHEMA_MAPPING.values():
+            (schema_dir / schema_filename).write_text(json.dumps({
+                '$schema': 'https://json-schema.org/draft/2020-12/schema', 'type': 'object', 'required': ['countries_of_origin'],
+            }))
+        (self.base / 'data' / 'brands').mkdir(parents=True)
+        for i in range(10):
+            name = f'Brand {i}'
+            (self.base / 'data' / 'brands' / f'brand-{i}.yaml').write_text(
+                f'uuid: {generate_brand_uuid(name)}\nslug: brand-{i}\nname: {name}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.base)
+
+    def test_max_errors_stops_early(self):
+        validator = JsonSchemaValidator(self.base, errors=ErrorCollector(max_errors=3))
+        with redirect_stdout(StringIO()) as out:
+            self.assertFalse(validator.validate())
+        self.assertEqual(validator.files_validated, 3)
+        self.assertIn("Stopped after 3 errors", out.getvalue())
+
+    def test_grouped_text_output(self):
+        validator = JsonSchemaValidator(self.base, errors=ErrorCollector(keep=5), list_limit=5)
+        with redirect_stdout(StringIO()) as out:
+            validator.validate()
+        self.assertIn("     10 × [schema_validation] At '*': '*' is a required property", out.getvalue())
+        self.assertIn("Summary: 10 errors", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()